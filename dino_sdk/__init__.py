@@ -11,9 +11,32 @@ __email__ = "support@datamaster.com"
 from ingestion_engine import IngestionEngine
 from workflow_manager import WorkflowManager  
 from genie_assistant import GenieAssistant
+from backfill_planner import BackfillPlanner
+from ingestion_estimator import IngestionEstimator
+from fixed_width import FixedWidthLayout
+from databricks_client import DatabricksClient
+from job_submitter import JobSubmitter
+from column_profiler import ColumnProfiler
+from profile_cache import ProfileCache
+from batch_cataloger import BatchCataloger
+from pii_detector import PIIDetector
+from column_classifier import ColumnClassifier
+from statement_backend import StatementExecutionBackend
+from genie_space_client import GenieSpaceClient
+from warehouse_selector import WarehouseSelector
 
 __all__ = [
     'IngestionEngine',
     'WorkflowManager', 
-    'GenieAssistant'
+    'GenieAssistant',
+    'BackfillPlanner',
+    'IngestionEstimator',
+    'FixedWidthLayout',
+    'DatabricksClient',
+    'JobSubmitter',
+    'ColumnProfiler',
+    'ProfileCache',
+    'BatchCataloger',
+    'PIIDetector',
+    'ColumnClassifier', 'StatementExecutionBackend', 'GenieSpaceClient', 'WarehouseSelector'
 ]
@@ -0,0 +1,460 @@
+"""
+Dino SDK - Backfill Planner
+Planejamento de cargas históricas particionadas por data em blocos paralelos
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Optional, Dict, Any, List, Callable, Tuple
+
+try:
+    from .ingestion_engine import IngestionEngine
+except ImportError:
+    from ingestion_engine import IngestionEngine
+
+
+class BackfillPlanner:
+    """
+    Planejador de backfill para cargas históricas
+    
+    Funcionalidades:
+    - Expansão de um padrão de caminho particionado por data (strftime)
+    - Divisão do intervalo em N blocos contíguos balanceados por bytes
+    - Geração de scripts por bloco ou de um job multi-task do Databricks
+    - Execução paralela com arquivo de estado retomável e retry por bloco
+    
+    Exemplo de padrão: /Volumes/main/raw/events/%Y/%m/%d/
+    """
+    
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_SUCCEEDED = "succeeded"
+    STATUS_FAILED = "failed"
+    
+    def __init__(
+        self,
+        target_schema: str,
+        table_name: str,
+        path_pattern: str,
+        start_date: str,
+        end_date: str,
+        num_chunks: int = 4,
+        catalog_name: Optional[str] = None,
+        file_format: Optional[str] = None,
+        delimiter: str = ",",
+        output_mode: str = "append",
+        local_path_pattern: Optional[str] = None,
+        output_dir: str = ".",
+        state_file: Optional[str] = None
+    ):
+        """
+        Inicializa o planejador de backfill
+        
+        Args:
+            target_schema: Schema de destino (deve existir previamente)
+            table_name: Nome da tabela de destino
+            path_pattern: Padrão strftime do caminho de origem por data
+            start_date: Data inicial (YYYY-MM-DD, inclusiva)
+            end_date: Data final (YYYY-MM-DD, inclusiva)
+            num_chunks: Número de blocos paralelos
+            catalog_name: Nome do catálogo Unity Catalog
+            file_format: Formato dos arquivos (detectado pelo padrão se None)
+            delimiter: Delimitador para arquivos CSV
+            output_mode: Modo de escrita de cada bloco (append ou merge)
+            local_path_pattern: Padrão strftime equivalente visível localmente
+                (ex: /dbfs/...) usado para listar tamanhos; padrão: path_pattern
+            output_dir: Diretório onde scripts, job e estado são gravados
+            state_file: Arquivo de estado (padrão: backfill_state_<schema>_<tabela>.json)
+        """
+        self.target_schema = target_schema
+        self.table_name = table_name
+        self.path_pattern = path_pattern
+        self.start_date = self._parse_date(start_date)
+        self.end_date = self._parse_date(end_date)
+        self.num_chunks = num_chunks
+        self.catalog_name = catalog_name
+        self.file_format = file_format
+        self.delimiter = delimiter
+        self.output_mode = output_mode
+        self.local_path_pattern = local_path_pattern or path_pattern
+        self.output_dir = output_dir
+        self.state_file = state_file or os.path.join(
+            output_dir, f"backfill_state_{target_schema}_{table_name}.json"
+        )
+        self._state_lock = threading.Lock()
+        
+        self._validate_parameters()
+    
+    def _validate_parameters(self):
+        """Valida os parâmetros de entrada"""
+        if self.end_date < self.start_date:
+            raise ValueError("end_date deve ser maior ou igual a start_date")
+        
+        if self.num_chunks < 1:
+            raise ValueError("num_chunks deve ser maior ou igual a 1")
+        
+        if '%' not in self.path_pattern:
+            raise ValueError("path_pattern deve conter diretivas de data (ex: %Y/%m/%d)")
+        
+        # Blocos paralelos com overwrite sobrescreveriam uns aos outros
+        if self.output_mode not in ["append", "merge"]:
+            raise ValueError("output_mode do backfill deve ser append ou merge")
+    
+    @staticmethod
+    def _parse_date(value) -> date:
+        """Converte string YYYY-MM-DD (ou date) em date"""
+        if isinstance(value, date):
+            return value
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    
+    def _iter_dates(self) -> List[date]:
+        """Lista todas as datas do intervalo"""
+        days = (self.end_date - self.start_date).days
+        return [self.start_date + timedelta(days=offset) for offset in range(days + 1)]
+    
+    @staticmethod
+    def _measure_path(local_path: str) -> Tuple[int, int]:
+        """Retorna (bytes, arquivos) de um arquivo ou diretório local"""
+        if os.path.isfile(local_path):
+            return os.path.getsize(local_path), 1
+        
+        total_bytes = 0
+        file_count = 0
+        stack = [local_path]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total_bytes += entry.stat().st_size
+                            file_count += 1
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+        
+        return total_bytes, file_count
+    
+    def list_partitions(self) -> List[Dict[str, Any]]:
+        """
+        Lista as partições de data do intervalo com seus tamanhos locais
+        
+        Datas sem dados são descartadas. Se nenhuma partição for visível
+        localmente, todas as datas recebem o mesmo peso (1 byte) para que a
+        divisão continue equilibrada por quantidade de dias.
+        """
+        partitions = []
+        for day in self._iter_dates():
+            total_bytes, file_count = self._measure_path(day.strftime(self.local_path_pattern))
+            partitions.append({
+                'date': day.isoformat(),
+                'path': day.strftime(self.path_pattern),
+                'bytes': total_bytes,
+                'file_count': file_count
+            })
+        
+        with_data = [partition for partition in partitions if partition['bytes'] > 0]
+        if with_data:
+            return with_data
+        
+        print("⚠️ Listagem local indisponível - dividindo por número de dias")
+        for partition in partitions:
+            partition['bytes'] = 1
+        return partitions
+    
+    @staticmethod
+    def _split_balanced(weights: List[int], num_chunks: int) -> List[Tuple[int, int]]:
+        """
+        Divide uma sequência em até num_chunks blocos contíguos minimizando o
+        maior bloco (busca binária na capacidade + preenchimento guloso)
+        
+        Returns:
+            Lista de intervalos [inicio, fim) de índices
+        """
+        if not weights:
+            return []
+        
+        num_chunks = min(num_chunks, len(weights))
+        
+        def greedy(capacity: int) -> List[Tuple[int, int]]:
+            ranges = []
+            start = 0
+            current = 0
+            for index, weight in enumerate(weights):
+                if current + weight > capacity and index > start:
+                    ranges.append((start, index))
+                    start = index
+                    current = 0
+                current += weight
+            ranges.append((start, len(weights)))
+            return ranges
+        
+        low, high = max(weights), sum(weights)
+        while low < high:
+            middle = (low + high) // 2
+            if len(greedy(middle)) <= num_chunks:
+                high = middle
+            else:
+                low = middle + 1
+        
+        return greedy(low)
+    
+    def plan(self) -> List[Dict[str, Any]]:
+        """
+        Gera (ou recupera do estado) o plano de blocos do backfill
+        
+        Um plano já salvo com os mesmos parâmetros é reaproveitado, para que
+        uma execução retomada use exatamente os mesmos blocos.
+        """
+        state = self._load_state()
+        if state and state.get('plan_key') == self._plan_key():
+            return state['chunks']
+        
+        partitions = self.list_partitions()
+        ranges = self._split_balanced([p['bytes'] for p in partitions], self.num_chunks)
+        
+        chunks = []
+        for chunk_index, (start, end) in enumerate(ranges):
+            members = partitions[start:end]
+            chunks.append({
+                'chunk_id': f"chunk_{chunk_index:03d}",
+                'start_date': members[0]['date'],
+                'end_date': members[-1]['date'],
+                'paths': [member['path'] for member in members],
+                'total_bytes': sum(member['bytes'] for member in members),
+                'file_count': sum(member['file_count'] for member in members),
+                'status': self.STATUS_PENDING,
+                'attempts': 0,
+                'last_error': None
+            })
+        
+        self._save_state({
+            'plan_key': self._plan_key(),
+            'target_table': self._target_table_label(),
+            'created_at': datetime.now().isoformat(),
+            'chunks': chunks
+        })
+        
+        print(f"🗓️ Backfill planejado: {len(chunks)} blocos para {len(partitions)} partições")
+        return chunks
+    
+    def _plan_key(self) -> str:
+        """Chave que identifica os parâmetros do plano"""
+        raw = json.dumps([
+            self.path_pattern, self.start_date.isoformat(),
+            self.end_date.isoformat(), self.num_chunks
+        ])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+    
+    def _target_table_label(self) -> str:
+        """Nome da tabela de destino para exibição"""
+        if self.catalog_name:
+            return f"{self.catalog_name}.{self.target_schema}.{self.table_name}"
+        return f"{self.target_schema}.{self.table_name}"
+    
+    def _build_engine(self, chunk: Dict[str, Any]) -> IngestionEngine:
+        """Cria o IngestionEngine que lê todas as partições de um bloco"""
+        return IngestionEngine(
+            target_schema=self.target_schema,
+            table_name=self.table_name,
+            file_path=self.path_pattern,
+            delimiter=self.delimiter,
+            catalog_name=self.catalog_name,
+            output_mode=self.output_mode,
+            file_format=self.file_format,
+            source_paths=chunk['paths']
+        )
+    
+    def _chunk_script_name(self, chunk: Dict[str, Any]) -> str:
+        """Nome do script de um bloco"""
+        return f"ingestion_backfill_{self.target_schema}_{self.table_name}_{chunk['chunk_id']}.py"
+    
+    def generate_chunk_scripts(self) -> List[str]:
+        """Gera um script de ingestão batch por bloco"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        
+        script_files = []
+        for chunk in self.plan():
+            engine = self._build_engine(chunk)
+            script, _ = engine.build_script(is_automated=False)
+            script_file = os.path.join(self.output_dir, self._chunk_script_name(chunk))
+            with open(script_file, 'w', encoding='utf-8') as f:
+                f.write(script)
+            script_files.append(script_file)
+        
+        print(f"📝 {len(script_files)} scripts de backfill gerados em: {self.output_dir}")
+        return script_files
+    
+    def generate_job_definition(
+        self,
+        scripts_base_path: str,
+        max_retries: int = 2,
+        min_retry_interval_millis: int = 60000,
+        spark_version: str = "13.3.x-scala2.12",
+        node_type_id: str = "Standard_DS3_v2",
+        num_workers: int = 2
+    ) -> Dict[str, Any]:
+        """
+        Gera um job multi-task (Jobs API 2.1) com uma task por bloco
+        
+        As tasks não dependem umas das outras, então rodam em paralelo no
+        mesmo job cluster; cada uma tem retry próprio, de modo que uma falha
+        reprocessa apenas o bloco afetado.
+        
+        Args:
+            scripts_base_path: Caminho no workspace onde os scripts serão publicados
+            max_retries: Tentativas extras por bloco
+            min_retry_interval_millis: Intervalo mínimo entre tentativas
+            spark_version: Versão do Databricks Runtime do job cluster
+            node_type_id: Tipo de nó do job cluster
+            num_workers: Número de workers do job cluster
+        """
+        cluster_key = "dino_backfill_cluster"
+        tasks = []
+        for chunk in self.plan():
+            tasks.append({
+                'task_key': chunk['chunk_id'],
+                'description': f"Backfill {chunk['start_date']}..{chunk['end_date']}",
+                'job_cluster_key': cluster_key,
+                'spark_python_task': {
+                    'python_file': f"{scripts_base_path.rstrip('/')}/{self._chunk_script_name(chunk)}"
+                },
+                'max_retries': max_retries,
+                'min_retry_interval_millis': min_retry_interval_millis,
+                'retry_on_timeout': True
+            })
+        
+        job_definition = {
+            'name': f"dino_backfill_{self.target_schema}_{self.table_name}",
+            'max_concurrent_runs': 1,
+            'job_clusters': [{
+                'job_cluster_key': cluster_key,
+                'new_cluster': {
+                    'spark_version': spark_version,
+                    'node_type_id': node_type_id,
+                    'num_workers': num_workers
+                }
+            }],
+            'tasks': tasks,
+            'email_notifications': {},
+            'tags': {
+                'dino_sdk_managed': 'true',
+                'dino_backfill': 'true'
+            }
+        }
+        
+        os.makedirs(self.output_dir, exist_ok=True)
+        job_file = os.path.join(
+            self.output_dir, f"backfill_{self.target_schema}_{self.table_name}.json"
+        )
+        with open(job_file, 'w', encoding='utf-8') as f:
+            json.dump(job_definition, f, indent=2, ensure_ascii=False)
+        
+        print(f"📝 Job de backfill salvo em: {job_file}")
+        return job_definition
+    
+    def run(
+        self,
+        runner: Callable[[Dict[str, Any], IngestionEngine], Any],
+        max_workers: int = 4,
+        max_retries: int = 2,
+        retry_delay_seconds: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Executa os blocos pendentes em paralelo, retomando do arquivo de estado
+        
+        Blocos já concluídos são ignorados; blocos que falham são repetidos
+        individualmente até max_retries vezes adicionais.
+        
+        Args:
+            runner: Função que executa um bloco (recebe o bloco e seu engine)
+                e lança exceção em caso de falha
+            max_workers: Número máximo de blocos simultâneos
+            max_retries: Tentativas extras por bloco nesta execução
+            retry_delay_seconds: Espera entre tentativas de um mesmo bloco
+        
+        Returns:
+            Dict com o resumo da execução
+        """
+        chunks = self.plan()
+        pending = [chunk for chunk in chunks if chunk['status'] != self.STATUS_SUCCEEDED]
+        print(f"🚀 Executando {len(pending)} de {len(chunks)} blocos (paralelismo: {max_workers})")
+        
+        def execute(chunk: Dict[str, Any]) -> bool:
+            engine = self._build_engine(chunk)
+            for attempt in range(max_retries + 1):
+                self._update_chunk(chunk['chunk_id'], status=self.STATUS_RUNNING,
+                                   attempts=chunk['attempts'] + 1)
+                chunk['attempts'] += 1
+                try:
+                    runner(chunk, engine)
+                    self._update_chunk(chunk['chunk_id'], status=self.STATUS_SUCCEEDED,
+                                       last_error=None)
+                    return True
+                except Exception as e:
+                    print(f"⚠️ {chunk['chunk_id']} falhou (tentativa {attempt + 1}): {str(e)}")
+                    self._update_chunk(chunk['chunk_id'], status=self.STATUS_FAILED,
+                                       last_error=str(e))
+                    if attempt < max_retries and retry_delay_seconds:
+                        time.sleep(retry_delay_seconds)
+            return False
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(execute, chunk) for chunk in pending]
+            for future in as_completed(futures):
+                future.result()
+        
+        return self.get_status()
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Retorna o resumo do estado atual do backfill"""
+        state = self._load_state() or {'chunks': []}
+        chunks = state['chunks']
+        failed = [chunk['chunk_id'] for chunk in chunks if chunk['status'] == self.STATUS_FAILED]
+        succeeded = sum(1 for chunk in chunks if chunk['status'] == self.STATUS_SUCCEEDED)
+        
+        return {
+            'success': bool(chunks) and succeeded == len(chunks),
+            'target_table': state.get('target_table', self._target_table_label()),
+            'total_chunks': len(chunks),
+            'succeeded_chunks': succeeded,
+            'failed_chunks': failed,
+            'pending_chunks': len(chunks) - succeeded - len(failed),
+            'state_file': self.state_file
+        }
+    
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        """Lê o arquivo de estado, se existir"""
+        if not os.path.exists(self.state_file):
+            return None
+        with open(self.state_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        """Grava o arquivo de estado de forma atômica"""
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2, ensure_ascii=False)
+        os.replace(temp_file, self.state_file)
+    
+    def _update_chunk(self, chunk_id: str, **changes) -> None:
+        """Atualiza um bloco no arquivo de estado"""
+        with self._state_lock:
+            state = self._load_state()
+            for chunk in state['chunks']:
+                if chunk['chunk_id'] == chunk_id:
+                    chunk.update(changes)
+                    if changes.get('status') in [self.STATUS_SUCCEEDED, self.STATUS_FAILED]:
+                        chunk['finished_at'] = datetime.now().isoformat()
+                    break
+            self._save_state(state)
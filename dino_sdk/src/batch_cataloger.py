@@ -0,0 +1,243 @@
+"""
+Dino SDK - Batch Cataloger
+Catalogação de todas as tabelas de um schema ou catálogo em paralelo
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+try:
+    from .genie_assistant import GenieAssistant
+    from .profile_cache import ProfileCache
+    from .column_classifier import ColumnClassifier
+    from .genie_space_client import GenieSpaceClient
+    from .warehouse_selector import WarehouseSelector
+except ImportError:
+    from genie_assistant import GenieAssistant
+    from profile_cache import ProfileCache
+    from column_classifier import ColumnClassifier
+    from genie_space_client import GenieSpaceClient
+    from warehouse_selector import WarehouseSelector
+
+
+class BatchCataloger:
+    """
+    Cataloga em lote as tabelas de um schema (ou de um catálogo inteiro)
+    
+    Funcionalidades:
+    - Enumeração de tabelas e colunas em uma única consulta ao
+      information_schema (sem spark.table por tabela)
+    - Análise, tags e comentários de cada tabela via GenieAssistant,
+      com no máximo max_workers tabelas simultâneas
+    - Cache de análises compartilhado entre as tabelas
+    - Salas Genie opcionais, publicadas com um único cliente (uma listagem
+      das salas existentes e conexões reaproveitadas para todas as tabelas)
+      e distribuídas entre os SQL warehouses serverless equivalentes
+    - Resumo com tempo por tabela e falhas
+    
+    Views não são catalogadas (apenas tabelas MANAGED e EXTERNAL).
+    """
+    
+    TABLE_TYPES = ['MANAGED', 'EXTERNAL']
+    
+    # Tabelas mais lentas listadas no resumo
+    SLOWEST_TABLES = 10
+    
+    # Entradas do cache por tabela: a versão atual e a anterior (base do perfil incremental)
+    CACHE_ENTRIES_PER_TABLE = 2
+    
+    def __init__(
+        self,
+        catalog_name: str,
+        schema_name: Optional[str] = None,
+        tables: Optional[List[str]] = None,
+        max_workers: int = 8,
+        spark=None,
+        sql_backend=None,
+        profile_cache_file: Optional[str] = None,
+        profile_cache_max_entries: Optional[int] = None,
+        genie_rooms: bool = False,
+        **genie_options
+    ):
+        """
+        Inicializa o catalogador
+        
+        Args:
+            catalog_name: Catálogo Unity Catalog
+            schema_name: Schema catalogado (None cataloga todos os schemas do catálogo)
+            tables: Restringe a catalogação a estes nomes de tabela
+            max_workers: Número máximo de tabelas catalogadas simultaneamente
+            spark: Sessão Spark (padrão: sessão ativa)
+            sql_backend: Executor de SQL remoto (ex: StatementExecutionBackend),
+                compartilhado por todas as tabelas no lugar da sessão Spark
+            profile_cache_file: Arquivo SQLite do cache de análises compartilhado
+                (padrão: .dino_profile_cache.sqlite no DINO_OUTPUT_DIR)
+            profile_cache_max_entries: Máximo de entradas do cache (padrão:
+                dimensionado pelo número de tabelas catalogadas, para que
+                schemas grandes não descartem as análises a cada execução)
+            genie_rooms: Se True, cria ou atualiza a sala Genie de cada tabela
+            **genie_options: Opções repassadas a cada GenieAssistant
+                (ex: exact_count, profile_sample_percent)
+        """
+        identifier = re.compile(r'^[A-Za-z0-9_]+$')
+        if not identifier.match(catalog_name) or (schema_name and not identifier.match(schema_name)):
+            raise ValueError("catalog_name e schema_name devem conter apenas letras, números e _")
+        if max_workers < 1:
+            raise ValueError("max_workers deve ser pelo menos 1")
+        if profile_cache_max_entries is not None and profile_cache_max_entries < 1:
+            raise ValueError("profile_cache_max_entries deve ser pelo menos 1")
+        
+        self.catalog_name = catalog_name
+        self.schema_name = schema_name
+        self.tables = set(tables) if tables else None
+        self.max_workers = max_workers
+        self._spark = spark
+        self.sql_backend = sql_backend
+        self.profile_cache_file = profile_cache_file or os.path.join(
+            os.getenv("DINO_OUTPUT_DIR", ""), ".dino_profile_cache.sqlite"
+        )
+        self.profile_cache_max_entries = profile_cache_max_entries
+        self.genie_rooms = genie_rooms
+        self.genie_options = genie_options
+        
+        # Política de classificação carregada uma vez para todas as tabelas
+        if isinstance(genie_options.get('classification_policy'), str):
+            genie_options['classification_policy'] = ColumnClassifier.from_yaml(genie_options['classification_policy'])
+        
+        # Cliente de Genie spaces compartilhado: as salas existentes são listadas uma vez
+        if genie_rooms and genie_options.get('genie_client') is None:
+            genie_options['genie_client'] = GenieSpaceClient(
+                client=getattr(sql_backend, 'client', None),
+                warehouse_id=getattr(sql_backend, 'warehouse_id', None)
+            )
+        # Warehouses listados uma vez para todas as salas
+        if genie_rooms and genie_options.get('auto_select_warehouse', True) and genie_options.get('warehouse_selector') is None:
+            genie_options['warehouse_selector'] = WarehouseSelector(client=genie_options['genie_client'].client)
+    
+    def _get_spark(self):
+        """Retorna a sessão Spark informada ou a sessão ativa"""
+        if self._spark is not None:
+            return self._spark
+        
+        from pyspark.sql import SparkSession
+        spark = SparkSession.getActiveSession()
+        if not spark:
+            raise Exception("Spark session não encontrada")
+        return spark
+    
+    def build_columns_query(self) -> str:
+        """Consulta única de tabelas e colunas no information_schema do catálogo"""
+        table_types = ", ".join(f"'{table_type}'" for table_type in self.TABLE_TYPES)
+        if self.schema_name:
+            schema_filter = f"t.table_schema = '{self.schema_name}'"
+        else:
+            schema_filter = "t.table_schema <> 'information_schema'"
+        
+        return f"""
+SELECT c.table_schema, c.table_name, c.column_name, c.full_data_type, c.is_nullable
+FROM {self.catalog_name}.information_schema.columns c
+JOIN {self.catalog_name}.information_schema.tables t
+  ON t.table_catalog = c.table_catalog AND t.table_schema = c.table_schema AND t.table_name = c.table_name
+WHERE {schema_filter} AND t.table_type IN ({table_types})
+ORDER BY c.table_schema, c.table_name, c.ordinal_position
+""".strip()
+
+    def list_tables(self) -> Dict[tuple, List[Dict[str, Any]]]:
+        """
+        Enumera as tabelas e suas colunas
+        
+        Returns:
+            Dict (schema, tabela) -> colunas [{name, type, nullable}] em ordem
+        """
+        if self.sql_backend is not None:
+            rows = self.sql_backend.execute(self.build_columns_query())
+        else:
+            rows = [row.asDict() for row in self._get_spark().sql(self.build_columns_query()).collect()]
+        
+        tables: Dict[tuple, List[Dict[str, Any]]] = {}
+        for row in rows:
+            if self.tables is not None and row['table_name'] not in self.tables:
+                continue
+            tables.setdefault((row['table_schema'], row['table_name']), []).append({
+                'name': row['column_name'],
+                'type': row['full_data_type'],
+                'nullable': str(row['is_nullable']).upper() in ['YES', 'TRUE']
+            })
+        return tables
+    
+    def cache_max_entries(self, table_count: int) -> int:
+        """Tamanho do cache de análises para table_count tabelas"""
+        if self.profile_cache_max_entries:
+            return self.profile_cache_max_entries
+        return max(table_count * self.CACHE_ENTRIES_PER_TABLE, ProfileCache.DEFAULT_MAX_ENTRIES)
+    
+    def run(self) -> Dict[str, Any]:
+        """
+        Cataloga as tabelas com no máximo max_workers simultâneas
+        
+        Falhas em uma tabela não interrompem as demais.
+        
+        Returns:
+            Dict com contagens, falhas e tempo por tabela
+        """
+        started = time.monotonic()
+        scope = f"{self.catalog_name}.{self.schema_name}" if self.schema_name else self.catalog_name
+        tables = self.list_tables()
+        print(f"📚 Catalogando {len(tables)} tabelas de {scope} (paralelismo: {self.max_workers})")
+        
+        cache = ProfileCache(self.profile_cache_file, max_entries=self.cache_max_entries(len(tables)))
+        spark = self._get_spark() if self.sql_backend is None else None
+        
+        def catalog(schema_name: str, table_name: str, columns: List[Dict[str, Any]]) -> Dict[str, Any]:
+            genie = GenieAssistant(
+                self.catalog_name, schema_name, table_name,
+                spark=spark, sql_backend=self.sql_backend, profile_cache=cache, **self.genie_options
+            )
+            return genie.catalog_table(schema_columns=columns, genie_room=self.genie_rooms)
+        
+        results = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [
+                    executor.submit(catalog, schema_name, table_name, columns)
+                    for (schema_name, table_name), columns in tables.items()
+                ]
+                for future in as_completed(futures):
+                    result = future.result()
+                    results.append(result)
+                    status = '✅' if result['success'] else '❌'
+                    print(f"   {status} {result['table']} ({result['elapsed_seconds']:.1f}s)")
+        finally:
+            cache.close()
+        
+        results.sort(key=lambda result: result['table'])
+        failed = [{'table': result['table'], 'error': result['error']} for result in results if not result['success']]
+        cache_hits = sum(1 for result in results if result.get('cache_status') == 'hit')
+        slowest = sorted(results, key=lambda result: -result['elapsed_seconds'])[:self.SLOWEST_TABLES]
+        genie_rooms = {}
+        for result in results:
+            if result.get('genie_room'):
+                action = result['genie_room']['action']
+                genie_rooms[action] = genie_rooms.get(action, 0) + 1
+        
+        print(f"🏁 {len(results) - len(failed)} de {len(results)} tabelas catalogadas "
+              f"({cache_hits} em cache) em {time.monotonic() - started:.1f}s")
+        
+        return {
+            'success': not failed,
+            'scope': scope,
+            'total_tables': len(results),
+            'succeeded': len(results) - len(failed),
+            'failed': failed,
+            'cache_hits': cache_hits,
+            'genie_rooms': genie_rooms,
+            'timings': {result['table']: result['elapsed_seconds'] for result in results},
+            'slowest': [{'table': result['table'], 'seconds': result['elapsed_seconds']} for result in slowest],
+            'total_seconds': round(time.monotonic() - started, 3),
+            'results': results,
+            'timestamp': datetime.now().isoformat()
+        }
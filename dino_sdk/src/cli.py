@@ -18,6 +18,10 @@ from datetime import datetime
 from .ingestion_engine import IngestionEngine
 from .workflow_manager import WorkflowManager
 from .genie_assistant import GenieAssistant
+from .backfill_planner import BackfillPlanner
+from .cron_schedule import CronSchedule
+from .statement_backend import StatementExecutionBackend
+from .genie_space_client import GenieSpaceClient
 
 
 def setup_logging(debug: bool = False):
@@ -42,22 +46,60 @@ def setup_logging(debug: bool = False):
               help='Se true, realiza ingestão assim que o arquivo é colocado no diretório (file arrival)')
 @click.option('--has-genie', is_flag=True, 
               help='Se true, cria sala Genie e catalogação Unity Catalog Assistant')
+@click.option('--exact-count', is_flag=True, 
+              help='Conta os registros da tabela com COUNT(*) na análise do Genie (padrão: estatísticas do log Delta)')
+@click.option('--classification-policy', type=click.Path(exists=True, dir_okay=False), 
+              help='Arquivo YAML com as regras de categoria e tags das colunas no Genie')
+@click.option('--warehouse-id', 
+              help='Executa o SQL do Genie neste SQL warehouse via Statement Execution API (sem sessão Spark)')
 @click.option('--catalog-name', 
               help='Nome do catálogo Unity Catalog (usa padrão se não informado)')
 @click.option('--output-mode', type=click.Choice(['append', 'overwrite', 'merge']), 
               default='append', help='Modo de escrita (padrão: append)')
-@click.option('--file-format', type=click.Choice(['csv', 'json', 'parquet', 'delta', 'avro']), 
+@click.option('--file-format', type=click.Choice(['csv', 'json', 'parquet', 'delta', 'avro', 'fixedwidth']), 
               help='Formato do arquivo (detectado automaticamente se não informado)')
+@click.option('--fixed-width-layout', type=click.Path(exists=True, dir_okay=False), 
+              help='Arquivo JSON com o layout das colunas (name, start, length, type) e encoding opcional (padrão latin-1) para --file-format fixedwidth')
+@click.option('--change-data-feed', is_flag=True, 
+              help='Para origens Delta, lê apenas as mudanças desde a última versão processada (CDF)')
+@click.option('--merge-keys', 
+              help='Colunas chave separadas por vírgula para o MERGE das mudanças (ex: "id,data")')
+@click.option('--schedule-cron', 
+              help='Agenda o workflow automatizado por cron (ex: "0 6 * * *") em vez do trigger de chegada de arquivo')
+@click.option('--retry-policy', type=click.Choice(['transient', 'none']), default=None, 
+              help='Retry das tasks do workflow: transient (3 tentativas com backoff) ou none '
+                   '(padrão: transient, exceto tasks batch em modo append, que ficam sem retry)')
+@click.option('--compute', type=click.Choice(['job_cluster', 'instance_pool', 'serverless']), 
+              default='job_cluster', help='Compute do workflow automatizado (padrão: job_cluster)')
+@click.option('--instance-pool-id', 
+              help='Instance pool do workflow (obrigatório com --compute instance_pool)')
+@click.option('--deploy', is_flag=True, 
+              help='Publica o workflow no workspace (cria, atualiza ou mantém o job existente); usa DATABRICKS_HOST/DATABRICKS_TOKEN')
+@click.option('--submit', is_flag=True, 
+              help='Envia o script ao workspace e executa via jobs/runs/submit, aguardando o resultado; usa DATABRICKS_HOST/DATABRICKS_TOKEN')
+@click.option('--bundle-dir', 
+              help='Exporta os workflows do --output-dir como Databricks Asset Bundle neste diretório (incremental)')
+@click.option('--output-dir', 
+              help='Diretório dos scripts gerados (reaproveita scripts cujo hash não mudou)')
+@click.option('--estimate', is_flag=True, 
+              help='Estima tempo e tamanho de cluster e inclui as configurações Spark recomendadas no script')
+@click.option('--backfill-start', 
+              help='Data inicial (YYYY-MM-DD) de um backfill; --file-path vira padrão strftime (ex: /raw/%Y/%m/%d/)')
+@click.option('--backfill-end', 
+              help='Data final (YYYY-MM-DD) do backfill')
+@click.option('--backfill-chunks', type=int, default=4, 
+              help='Número de blocos paralelos do backfill (padrão: 4)')
 @click.option('--debug', is_flag=True, 
               help='Ativar modo debug com logs detalhados')
 def main(target_schema, table_name, file_path, delimiter, is_automated, 
-         has_genie, catalog_name, output_mode, file_format, debug):
+         has_genie, exact_count, classification_policy, warehouse_id, catalog_name, output_mode, file_format, fixed_width_layout, change_data_feed,
+         merge_keys, schedule_cron, retry_policy, compute, instance_pool_id, deploy, submit, bundle_dir, output_dir, estimate, backfill_start, backfill_end, backfill_chunks, debug):
     """
     Dino SDK - Ferramenta de ingestão para Databricks
     
     Realiza ingestão de dados com suporte a:
     - Ingestão batch e streaming com file arrival
-    - Múltiplos formatos (CSV, JSON, Parquet, Delta, Avro)
+    - Múltiplos formatos (CSV, JSON, Parquet, Delta, Avro, largura fixa)
     - Integração com Genie Assistant
     - Metadados de auditoria automáticos
     
@@ -79,6 +121,20 @@ def main(target_schema, table_name, file_path, delimiter, is_automated,
     try:
         # Validar entrada
         _validate_inputs(target_schema, table_name, file_path)
+        if schedule_cron:
+            _validate_cron_expression(schedule_cron)
+        if change_data_feed and is_automated:
+            raise ValueError("--change-data-feed não pode ser combinado com --is-automated (streaming)")
+        
+        # Backfill histórico em blocos paralelos
+        if backfill_start or backfill_end:
+            if not (backfill_start and backfill_end):
+                raise ValueError("--backfill-start e --backfill-end devem ser usados juntos")
+            
+            _run_backfill(target_schema, table_name, file_path, delimiter, catalog_name,
+                          output_mode, file_format, backfill_start, backfill_end, backfill_chunks,
+                          output_dir)
+            return
         
         # Criar engine de ingestão
         print(f"⚙️ Configurando ingestão...")
@@ -95,12 +151,16 @@ def main(target_schema, table_name, file_path, delimiter, is_automated,
             delimiter=delimiter,
             catalog_name=catalog_name,
             output_mode=output_mode,
-            file_format=file_format
+            file_format=file_format,
+            use_change_data_feed=change_data_feed,
+            merge_keys=_parse_column_list(merge_keys),
+            output_dir=output_dir,
+            fixed_width_layout=fixed_width_layout
         )
         
         # Executar ingestão
         print(f"\n🚀 Executando ingestão...")
-        result = engine.execute_ingestion(is_automated=is_automated)
+        result = engine.execute_ingestion(is_automated=is_automated, estimate=estimate, submit=submit)
         
         if not result['success']:
             print(f"❌ Erro na ingestão: {result['error']}")
@@ -110,6 +170,21 @@ def main(target_schema, table_name, file_path, delimiter, is_automated,
         print(f"   📊 Tabela: {result['table_full_name']}")
         print(f"   📋 Formato: {result['detected_format']}")
         
+        if result.get('estimate', {}).get('available'):
+            resource_estimate = result['estimate']
+            print(f"   ⏱️ Tempo previsto: {resource_estimate['predicted_runtime_seconds'] / 60:.1f} min")
+            print(f"   🖥️ Workers recomendados: {resource_estimate['recommended_workers']} "
+                  f"({resource_estimate['sizing_profile']})")
+        
+        if result.get('submission'):
+            submission = result['submission']
+            timings = submission['timings']
+            print(f"   🚀 Execução {submission['run_id']}: {submission['result_state']}")
+            if submission.get('rows_loaded') is not None:
+                print(f"   📊 Registros carregados: {submission['rows_loaded']}")
+            if timings.get('run_seconds') is not None:
+                print(f"   ⏱️ Duração: {timings['run_seconds']}s (fila {timings['queue_seconds']}s, setup {timings['setup_seconds']}s)")
+        
         if is_automated:
             print(f"   � Checkpoint: {result.get('checkpoint_location', 'N/A')}")
             print(f"   �📝 Arquivo streaming: {result['ingestion_file']}")
@@ -120,19 +195,49 @@ def main(target_schema, table_name, file_path, delimiter, is_automated,
         if is_automated:
             print(f"\n🔄 Criando workflow automatizado...")
             
-            workflow_manager = WorkflowManager(target_schema, table_name)
+            workflow_manager = WorkflowManager(
+                target_schema,
+                table_name,
+                output_dir=output_dir,
+                compute=compute,
+                instance_pool_id=instance_pool_id,
+                retry_policy=retry_policy,
+                sizing_profile=result.get('estimate', {}).get('sizing_profile'),
+                catalog_name=result['catalog_name']
+            )
             
             workflow_result = workflow_manager.create_auto_ingestion_workflow(
                 source_path=file_path,
                 target_table=result['table_full_name'],
                 checkpoint_location=result.get('checkpoint_location', ''),
                 file_format=result['detected_format'],
-                delimiter=delimiter
+                delimiter=delimiter,
+                schedule_cron=schedule_cron
             )
             
             if workflow_result['success']:
                 print(f"✅ Workflow criado: {workflow_result['workflow_name']}")
+                print(f"   🖥️ Compute: {workflow_result['compute']} ({workflow_result['sizing_profile']})")
+                trigger_settings = workflow_result.get('trigger_settings')
+                if workflow_result.get('schedule'):
+                    print(f"   📅 Agendamento: {schedule_cron} ({workflow_result['schedule']['timezone_id']})")
+                elif trigger_settings:
+                    print(f"   ⏱️ Trigger por chegada de arquivo: espera "
+                          f"{trigger_settings['wait_after_last_change_seconds']}s após o último arquivo, "
+                          f"mínimo de {trigger_settings['min_time_between_triggers_seconds']}s entre execuções")
                 print(f"   📝 Arquivo: {workflow_result.get('workflow_file', 'N/A')}")
+                
+                if bundle_dir:
+                    bundle_result = workflow_manager.export_bundle(bundle_dir)
+                    if not bundle_result['success']:
+                        print(f"⚠️ Erro no bundle: {bundle_result['error']}")
+                
+                if deploy:
+                    deploy_result = workflow_manager.deploy_workflow(workflow_result['job_definition'])
+                    if deploy_result['success']:
+                        print(f"   🚀 Job {deploy_result['job_id']}: {deploy_result['action']}")
+                    else:
+                        print(f"⚠️ Erro no deploy do workflow: {deploy_result['error']}")
             else:
                 print(f"⚠️ Erro no workflow: {workflow_result['error']}")
         
@@ -140,10 +245,18 @@ def main(target_schema, table_name, file_path, delimiter, is_automated,
         if has_genie:
             print(f"\n🧞 Configurando Genie Assistant...")
             
+            # Com um warehouse, o SQL e a publicação da sala usam a mesma sessão HTTP
+            sql_backend = StatementExecutionBackend(warehouse_id=warehouse_id) if warehouse_id else None
             genie = GenieAssistant(
                 catalog_name=result['catalog_name'],
                 schema_name=target_schema,
-                table_name=table_name
+                table_name=table_name,
+                exact_count=exact_count,
+                classification_policy=classification_policy,
+                sql_backend=sql_backend,
+                genie_client=GenieSpaceClient(client=sql_backend.client, warehouse_id=warehouse_id) if sql_backend else None,
+                auto_select_warehouse=not warehouse_id,
+                profile_cache_file=os.path.join(output_dir, ".dino_profile_cache.sqlite") if output_dir else None
             )
             
             genie_result = genie.setup_genie_room_and_cataloging()
@@ -153,23 +266,26 @@ def main(target_schema, table_name, file_path, delimiter, is_automated,
                 print(f"   🏠 Sala: {genie_result['room_name']}")
                 print(f"   📚 Status: {genie_result['catalog_status']}")
                 if genie_result.get('room_url'):
-                    print(f"   🔗 URL: {genie_result['room_url']}")
+                    print(f"   🔗 URL: {genie_result['room_url']} ({genie_result['room_action']})")
             else:
                 print(f"⚠️ Erro no Genie: {genie_result['error']}")
         
         # Resumo final
         print(f"\n🎉 Processo concluído!")
         print(f"📋 Próximos passos:")
-        print(f"   1. Execute o arquivo {result['ingestion_file']} em um notebook Databricks")
+        if not submit:
+            print(f"   1. Execute o arquivo {result['ingestion_file']} em um notebook Databricks")
         
-        if is_automated:
+        if is_automated and bundle_dir:
+            print(f"   2. Publique o bundle: cd {bundle_dir} && databricks bundle deploy -t <target>")
+        elif is_automated and not deploy:
             print(f"   2. Importe o workflow JSON no Databricks Jobs para automação")
         
         if has_genie:
             print(f"   3. Acesse a sala Genie para consultas em linguagem natural")
         
         print(f"   4. Monitore a tabela {result['table_full_name']} no Unity Catalog")
-        
+    
     except KeyboardInterrupt:
         print(f"\n⚠️ Operação cancelada pelo usuário")
         sys.exit(1)
@@ -181,6 +297,42 @@ def main(target_schema, table_name, file_path, delimiter, is_automated,
         sys.exit(1)
 
 
+def _run_backfill(target_schema: str, table_name: str, path_pattern: str, delimiter: str,
+                  catalog_name: Optional[str], output_mode: str, file_format: Optional[str],
+                  start_date: str, end_date: str, num_chunks: int,
+                  output_dir: Optional[str] = None):
+    """Planeja o backfill e gera os scripts por bloco e o job multi-task"""
+    print(f"🗓️ Planejando backfill de {start_date} a {end_date} em {num_chunks} blocos...")
+    
+    planner = BackfillPlanner(
+        target_schema=target_schema,
+        table_name=table_name,
+        path_pattern=path_pattern,
+        start_date=start_date,
+        end_date=end_date,
+        num_chunks=num_chunks,
+        catalog_name=catalog_name,
+        file_format=file_format,
+        delimiter=delimiter,
+        output_mode=output_mode,
+        output_dir=output_dir or "."
+    )
+    
+    chunks = planner.plan()
+    for chunk in chunks:
+        print(f"   📦 {chunk['chunk_id']}: {chunk['start_date']}..{chunk['end_date']} "
+              f"({len(chunk['paths'])} partições, {chunk['total_bytes']:,} bytes)")
+    
+    scripts = planner.generate_chunk_scripts()
+    planner.generate_job_definition(scripts_base_path=f"/Workspace/dino_sdk/backfill/{target_schema}_{table_name}")
+    
+    print("\n🎉 Backfill planejado!")
+    print("📋 Próximos passos:")
+    print(f"   1. Publique os {len(scripts)} scripts no workspace")
+    print("   2. Importe o job JSON no Databricks Jobs - cada bloco roda em paralelo com retry próprio")
+    print(f"   3. Acompanhe o estado em {planner.state_file}")
+
+
 def _validate_inputs(target_schema: str, table_name: str, file_path: str):
     """Valida entradas do usuário"""
     
@@ -196,19 +348,20 @@ def _validate_inputs(target_schema: str, table_name: str, file_path: str):
         raise ValueError("file_path não pode estar vazio")
 
 
+def _parse_column_list(value: Optional[str]) -> List[str]:
+    """Converte lista de colunas separadas por vírgula em lista Python"""
+    if not value:
+        return []
+    return [column.strip() for column in value.split(',') if column.strip()]
+
+
 def _validate_cron_expression(cron_expr: str):
-    """Valida expressão cron básica"""
-    parts = cron_expr.split()
-    if len(parts) != 5:
-        raise ValueError("Expressão cron deve ter 5 campos: 'minuto hora dia mês dia_semana'")
-    
-    # Validação básica dos campos
+    """Valida expressão cron (minuto hora dia mês dia_semana)"""
     try:
-        for i, part in enumerate(parts):
-            if part != '*' and not part.isdigit() and '/' not in part and ',' not in part and '-' not in part:
-                raise ValueError(f"Campo {i+1} da expressão cron inválido: {part}")
-    except:
-        raise ValueError("Expressão cron inválida. Use formato: 'minuto hora dia mês dia_semana'")
+        # O workflow usa Quartz: a expressão também precisa ser convertível
+        CronSchedule(cron_expr).to_quartz()
+    except ValueError as e:
+        raise ValueError(f"Expressão cron inválida ({e}). Use formato: 'minuto hora dia mês dia_semana'")
 
 
 def show_examples():
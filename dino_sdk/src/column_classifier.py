@@ -0,0 +1,246 @@
+"""
+Dino SDK - Column Classifier
+Classificação de colunas por regras configuráveis (nome, tipo e perfil)
+"""
+
+import fnmatch
+import hashlib
+import json
+import re
+from typing import Optional, Dict, Any, List
+
+try:
+    from .column_profiler import ColumnProfiler
+except ImportError:
+    from column_profiler import ColumnProfiler
+
+
+class ColumnClassifier:
+    """
+    Atribui uma categoria a cada coluna a partir de uma política de regras
+    
+    A política (dict ou arquivo YAML) tem o formato:
+    
+        default_category: general
+        case_sensitive: false
+        categories:
+          personal_data:
+            priority: 300
+            description: Dados pessoais sensíveis
+            tags: {privacy: sensitive}
+        rules:
+          - name: documentos
+            category: personal_data
+            names: ["cpf", "*_cpf"]          # globs sobre o nome
+            pattern: "^doc_(cliente|fornecedor)$"   # regex sobre o nome
+            types: ["string", "varchar*"]    # globs sobre o tipo SQL
+            kinds: [string]                  # tipos do ColumnProfiler
+            profile: {max_distinct: 20}      # condições sobre o perfil
+            priority: 350                    # padrão: priority da categoria
+            tags: {document: "true"}
+    
+    Os globs de types casam com o nome SQL do tipo: tipos Spark como
+    StringType() ou LongType() são comparados como string e bigint.
+    
+    Todas as condições são opcionais, exceto category. A regra de maior
+    priority vence (empate: a que aparece primeiro). Condições de perfil só
+    casam com colunas já perfiladas.
+    
+    As condições de nome de todas as regras são compiladas em uma única
+    expressão regular, com uma alternativa por regra em ordem de
+    precedência: cada coluna é classificada com uma busca, e a regra
+    seguinte só é procurada quando as condições de tipo ou perfil da
+    vencedora não são atendidas.
+    """
+    
+    # Condições de perfil: chave -> (campo do perfil, comparação)
+    PROFILE_CONDITIONS = {
+        'min_null_ratio': ('null_ratio', lambda value, limit: value >= limit),
+        'max_null_ratio': ('null_ratio', lambda value, limit: value <= limit),
+        'min_distinct': ('distinct_count', lambda value, limit: value >= limit),
+        'max_distinct': ('distinct_count', lambda value, limit: value <= limit),
+        'min_distinct_ratio': ('distinct_ratio', lambda value, limit: value >= limit),
+        'max_distinct_ratio': ('distinct_ratio', lambda value, limit: value <= limit)
+    }
+    
+    DEFAULT_DESCRIPTION = "Campo de dados"
+    
+    # Construções de pattern incompatíveis com a expressão combinada: flags
+    # globais (ex: (?i)) só valem no início dela e grupos nomeados colidem
+    # com os grupos rule_N que identificam a regra
+    INLINE_FLAGS = re.compile(r"(?<!\\)\(\?[aiLmsux]+\)")
+    NAMED_GROUPS = re.compile(r"(?<!\\)\(\?P[<=]")
+    
+    # Equivalente às heurísticas por nome usadas antes da política configurável
+    DEFAULT_POLICY = {
+        'default_category': 'general',
+        'categories': {
+            'identifier': {'priority': 500, 'description': "Identificador único"},
+            'temporal': {'priority': 400, 'description': "Campo temporal"},
+            'personal_data': {'priority': 300, 'description': "Dados pessoais sensíveis"},
+            'financial': {'priority': 200, 'description': "Dados financeiros"},
+            'categorical': {'priority': 100, 'description': "Campo categórico"},
+            'general': {'priority': 0, 'description': "Campo de dados"}
+        },
+        'rules': [
+            {'name': 'identifier', 'category': 'identifier', 'names': ['*_id', 'id']},
+            {'name': 'temporal', 'category': 'temporal', 'names': ['created_at', 'updated_at', 'timestamp', 'date']},
+            {'name': 'personal_data', 'category': 'personal_data', 'names': ['email', 'phone', 'cpf', 'cnpj']},
+            {'name': 'financial', 'category': 'financial', 'names': ['*amount*', '*price*', '*value*']},
+            {'name': 'categorical', 'category': 'categorical', 'kinds': ['string'],
+             'profile': {'min_distinct': 1, 'max_distinct': 20}}
+        ]
+    }
+    
+    def __init__(self, policy: Optional[Dict[str, Any]] = None):
+        """
+        Inicializa o classificador
+        
+        Args:
+            policy: Política de classificação (padrão: DEFAULT_POLICY)
+        
+        Raises:
+            ValueError: Regra sem categoria, condição de perfil desconhecida
+                ou expressão regular inválida
+        """
+        policy = policy if policy is not None else self.DEFAULT_POLICY
+        # Identifica a política (ex: no cache de análises, que depende da classificação)
+        self.fingerprint = hashlib.sha256(
+            json.dumps(policy, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        self.default_category = policy.get('default_category', 'general')
+        self.categories = {name: dict(settings or {}) for name, settings in (policy.get('categories') or {}).items()}
+        self._flags = 0 if policy.get('case_sensitive', False) else re.IGNORECASE
+        
+        rules = [self._normalize_rule(index, rule) for index, rule in enumerate(policy.get('rules') or [])]
+        # Maior priority primeiro; sorted é estável, então o empate mantém a ordem do arquivo
+        self.rules = sorted(rules, key=lambda rule: -rule['priority'])
+        self._combined: Dict[int, Any] = {}
+        self._combined_from(0)
+    
+    @classmethod
+    def from_yaml(cls, policy_file: str) -> "ColumnClassifier":
+        """Cria o classificador a partir de um arquivo YAML de política"""
+        import yaml
+        
+        with open(policy_file, 'r', encoding='utf-8') as f:
+            policy = yaml.safe_load(f) or {}
+        return cls(policy)
+    
+    @staticmethod
+    def _glob_regex(patterns: List[str]) -> str:
+        """Alternativa regex equivalente a uma lista de globs"""
+        return "|".join(fnmatch.translate(str(pattern)) for pattern in patterns)
+    
+    def _normalize_rule(self, index: int, rule: Dict[str, Any]) -> Dict[str, Any]:
+        """Valida a regra e pré-compila as condições de tipo"""
+        category = rule.get('category')
+        if not category:
+            raise ValueError(f"Regra {rule.get('name', index)} sem category")
+        
+        unknown = set(rule.get('profile') or {}) - set(self.PROFILE_CONDITIONS)
+        if unknown:
+            raise ValueError(f"Condições de perfil desconhecidas na regra {rule.get('name', index)}: {sorted(unknown)}")
+        
+        name_alternatives = []
+        if rule.get('names'):
+            name_alternatives.append(self._glob_regex(rule['names']))
+        if rule.get('pattern'):
+            rule_name = rule.get('name', index)
+            if self.INLINE_FLAGS.search(rule['pattern']):
+                raise ValueError(
+                    f"Flags globais não são suportadas no pattern da regra {rule_name}: "
+                    f"use case_sensitive na política ou a forma local (?i:...)"
+                )
+            if self.NAMED_GROUPS.search(rule['pattern']):
+                raise ValueError(f"Grupos nomeados não são suportados no pattern da regra {rule_name}")
+            try:
+                re.compile(rule['pattern'])
+            except re.error as e:
+                raise ValueError(f"Expressão inválida na regra {rule_name}: {e}")
+            name_alternatives.append(rule['pattern'])
+        
+        category_settings = self.categories.get(category, {})
+        return {
+            'name': rule.get('name', f"rule_{index}"),
+            'category': category,
+            'priority': rule.get('priority', category_settings.get('priority', 0)),
+            'name_regex': "|".join(f"(?:{alternative})" for alternative in name_alternatives) or "(?s:.*)",
+            'types': re.compile(self._glob_regex(rule['types']), re.IGNORECASE) if rule.get('types') else None,
+            'kinds': set(rule['kinds']) if rule.get('kinds') else None,
+            'profile': dict(rule.get('profile') or {}),
+            'tags': {str(key): str(value) for key, value in (rule.get('tags') or {}).items()}
+        }
+    
+    def _combined_from(self, start: int):
+        """Expressão única com as condições de nome das regras a partir de start"""
+        if start not in self._combined:
+            alternatives = [
+                f"(?P<rule_{index}>{self.rules[index]['name_regex']})"
+                for index in range(start, len(self.rules))
+            ]
+            try:
+                self._combined[start] = re.compile("|".join(alternatives), self._flags) if alternatives else None
+            except re.error as e:
+                raise ValueError(f"Condições de nome incompatíveis entre as regras da política: {e}")
+        return self._combined[start]
+    
+    def _matches_conditions(self, rule: Dict[str, Any], column: Dict[str, Any]) -> bool:
+        """Verifica as condições de tipo e perfil da regra"""
+        data_type = str(column.get('type', ''))
+        if rule['types'] is not None and not rule['types'].fullmatch(ColumnProfiler.normalize_type(data_type)):
+            return False
+        if rule['kinds'] is not None and ColumnProfiler.column_kind(data_type) not in rule['kinds']:
+            return False
+        
+        if rule['profile']:
+            profile = column.get('profile')
+            if not profile:
+                return False
+            values = dict(profile)
+            if profile.get('distinct_count') is not None and profile.get('non_null_count'):
+                values['distinct_ratio'] = profile['distinct_count'] / profile['non_null_count']
+            for condition, limit in rule['profile'].items():
+                field, compare = self.PROFILE_CONDITIONS[condition]
+                if values.get(field) is None or not compare(values[field], limit):
+                    return False
+        
+        return True
+    
+    def classify(self, column: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Classifica uma coluna
+        
+        Args:
+            column: Coluna com 'name', 'type' e opcionalmente 'profile'
+        
+        Returns:
+            Dict com category, rule (None para a categoria padrão) e tags
+        """
+        start = 0
+        while True:
+            combined = self._combined_from(start)
+            match = combined.fullmatch(column['name']) if combined else None
+            if not match:
+                return {
+                    'category': self.default_category,
+                    'rule': None,
+                    'tags': dict(self.categories.get(self.default_category, {}).get('tags') or {})
+                }
+            
+            index = int(match.lastgroup[len("rule_"):])
+            rule = self.rules[index]
+            if self._matches_conditions(rule, column):
+                tags = {str(key): str(value) for key, value in
+                        (self.categories.get(rule['category'], {}).get('tags') or {}).items()}
+                tags.update(rule['tags'])
+                return {'category': rule['category'], 'rule': rule['name'], 'tags': tags}
+            start = index + 1
+    
+    def classify_columns(self, columns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Classifica as colunas (na ordem recebida)"""
+        return [self.classify(column) for column in columns]
+    
+    def describe(self, category: str) -> str:
+        """Descrição da categoria usada nos comentários das colunas"""
+        return self.categories.get(category, {}).get('description') or self.DEFAULT_DESCRIPTION
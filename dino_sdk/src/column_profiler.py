@@ -0,0 +1,288 @@
+"""
+Dino SDK - Column Profiler
+Perfil estatístico de todas as colunas de uma tabela em uma única agregação
+"""
+
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+
+class ColumnProfiler:
+    """
+    Calcula o perfil das colunas com uma única consulta sobre a tabela
+    
+    Para cada coluna, conforme o tipo:
+    - Proporção de nulos (todas)
+    - Distintos aproximados (approx_count_distinct, exceto tipos complexos)
+    - Mínimo e máximo (numéricos, textos, datas e booleanos)
+    - Valores mais frequentes (approx_top_k)
+    - Comprimento médio (textos)
+    
+    Todas as expressões ficam no mesmo SELECT, então a tabela (ou a amostra
+    TABLESAMPLE) é lida uma única vez, independentemente do número de colunas.
+    Perfis de lotes diferentes (ex: dados acrescentados) podem ser combinados
+    com merge.
+    """
+    
+    KIND_STRING = "string"
+    KIND_NUMERIC = "numeric"
+    KIND_TEMPORAL = "temporal"
+    KIND_BOOLEAN = "boolean"
+    KIND_COMPLEX = "complex"
+    
+    # Lote com proporção distintos/não nulos a partir deste valor é tratado
+    # como valores novos (ex: identificadores) na combinação de distintos
+    UNIQUE_RATIO = 0.9
+    
+    NUMERIC_TYPES = ['byte', 'short', 'int', 'long', 'float', 'double', 'decimal', 'tinyint', 'smallint', 'bigint']
+    COMPLEX_PREFIXES = ['struct', 'array', 'map', 'binary', 'variant']
+    
+    # Tipos Spark (ex: LongType()) cujo nome SQL é diferente
+    SPARK_TYPE_ALIASES = {
+        'byte': 'tinyint', 'short': 'smallint', 'integer': 'int',
+        'long': 'bigint', 'timestampntz': 'timestamp_ntz'
+    }
+    
+    def __init__(self, top_k: int = 5, sample_percent: Optional[float] = None):
+        """
+        Inicializa o profiler
+        
+        Args:
+            top_k: Quantidade de valores mais frequentes por coluna
+            sample_percent: Percentual da tabela lido via TABLESAMPLE (None lê tudo)
+        """
+        if top_k < 0:
+            raise ValueError("top_k não pode ser negativo")
+        if sample_percent is not None and not 0 < sample_percent <= 100:
+            raise ValueError("sample_percent deve estar entre 0 e 100")
+        
+        self.top_k = top_k
+        self.sample_percent = sample_percent
+    
+    @classmethod
+    def normalize_type(cls, data_type: str) -> str:
+        """Nome SQL do tipo em minúsculas (ex: 'LongType()' -> 'bigint', 'DecimalType(10,2)' -> 'decimal(10,2)')"""
+        normalized = str(data_type).lower().replace('type()', '').replace('type(', '(').strip()
+        return cls.SPARK_TYPE_ALIASES.get(normalized, normalized)
+    
+    @classmethod
+    def column_kind(cls, data_type: str) -> str:
+        """Classifica o tipo Spark (ex: 'string', 'StringType()', 'decimal(10,2)')"""
+        normalized = cls.normalize_type(data_type)
+        
+        if any(normalized.startswith(prefix) for prefix in cls.COMPLEX_PREFIXES):
+            return cls.KIND_COMPLEX
+        if normalized.startswith(('string', 'varchar', 'char')):
+            return cls.KIND_STRING
+        if normalized.startswith(('date', 'timestamp')):
+            return cls.KIND_TEMPORAL
+        if normalized.startswith(('boolean', 'bool')):
+            return cls.KIND_BOOLEAN
+        if any(normalized.startswith(numeric) for numeric in cls.NUMERIC_TYPES) or normalized == 'integer':
+            return cls.KIND_NUMERIC
+        return cls.KIND_COMPLEX
+    
+    @staticmethod
+    def _quote(name: str) -> str:
+        """Nome de coluna entre crases (escapando crases internas)"""
+        return "`" + name.replace("`", "``") + "`"
+    
+    def _column_expressions(self, index: int, name: str, kind: str) -> List[Tuple[str, str]]:
+        """Expressões de agregação de uma coluna como (alias, expressão)"""
+        column = self._quote(name)
+        prefix = f"c{index}"
+        expressions = [(f"{prefix}_non_null", f"COUNT({column})")]
+        
+        if kind == self.KIND_COMPLEX:
+            return expressions
+        
+        expressions.append((f"{prefix}_distinct", f"APPROX_COUNT_DISTINCT({column})"))
+        expressions.append((f"{prefix}_min", f"CAST(MIN({column}) AS STRING)"))
+        expressions.append((f"{prefix}_max", f"CAST(MAX({column}) AS STRING)"))
+        
+        if kind == self.KIND_STRING:
+            expressions.append((f"{prefix}_avg_length", f"AVG(LENGTH({column}))"))
+        if self.top_k and kind in [self.KIND_STRING, self.KIND_NUMERIC, self.KIND_BOOLEAN, self.KIND_TEMPORAL]:
+            expressions.append((f"{prefix}_top", f"APPROX_TOP_K(CAST({column} AS STRING), {self.top_k})"))
+        
+        return expressions
+    
+    def build_query(self, table_full_name: str, columns: List[Dict[str, Any]], where: Optional[str] = None) -> str:
+        """
+        Monta o SELECT único com as agregações de todas as colunas
+        
+        Args:
+            table_full_name: Tabela (ou expressão de tabela, ex: table_changes(...))
+            columns: Colunas com 'name' e 'type'
+            where: Filtro opcional aplicado antes da agregação
+        """
+        select = ["COUNT(*) AS profiled_rows"]
+        for index, column in enumerate(columns):
+            kind = self.column_kind(column['type'])
+            for alias, expression in self._column_expressions(index, column['name'], kind):
+                select.append(f"{expression} AS {alias}")
+        
+        source = table_full_name
+        if self.sample_percent is not None and self.sample_percent < 100:
+            source += f" TABLESAMPLE ({self.sample_percent} PERCENT)"
+        if where:
+            source += f" WHERE {where}"
+        
+        return "SELECT\n    " + ",\n    ".join(select) + f"\nFROM {source}"
+    
+    def parse_result(self, row: Dict[str, Any], columns: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Converte a linha agregada no perfil por coluna
+        
+        Returns:
+            Dict com profiled_rows, sampled e columns {nome: perfil}
+        """
+        profiled_rows = int(row.get('profiled_rows') or 0)
+        profiles = {}
+        
+        for index, column in enumerate(columns):
+            prefix = f"c{index}"
+            kind = self.column_kind(column['type'])
+            non_null = int(row.get(f"{prefix}_non_null") or 0)
+            
+            profile = {
+                'kind': kind,
+                'non_null_count': non_null,
+                'null_count': profiled_rows - non_null,
+                'null_ratio': round((profiled_rows - non_null) / profiled_rows, 4) if profiled_rows else 0.0
+            }
+            
+            if kind != self.KIND_COMPLEX:
+                profile['distinct_count'] = int(row.get(f"{prefix}_distinct") or 0)
+                profile['min'] = row.get(f"{prefix}_min")
+                profile['max'] = row.get(f"{prefix}_max")
+            
+            if kind == self.KIND_STRING:
+                avg_length = row.get(f"{prefix}_avg_length")
+                profile['avg_length'] = round(float(avg_length), 2) if avg_length is not None else None
+            
+            if f"{prefix}_top" in row:
+                profile['top_values'] = [
+                    {'value': self._field(entry, 'item'), 'count': int(self._field(entry, 'count'))}
+                    for entry in (row.get(f"{prefix}_top") or [])
+                ]
+            
+            profiles[column['name']] = profile
+        
+        return {
+            'profiled_rows': profiled_rows,
+            'sampled': self.sample_percent is not None and self.sample_percent < 100,
+            'sample_percent': self.sample_percent,
+            'columns': profiles
+        }
+    
+    @staticmethod
+    def _field(entry: Any, key: str) -> Any:
+        """Lê um campo de struct retornado como Row ou dict"""
+        return entry[key] if isinstance(entry, dict) else getattr(entry, key)
+    
+    def profile(
+        self,
+        run_sql: Callable[[str], List[Dict[str, Any]]],
+        table_full_name: str,
+        columns: List[Dict[str, Any]],
+        where: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Executa a agregação única e retorna o perfil
+        
+        Args:
+            run_sql: Função que executa uma consulta e retorna as linhas como dicts
+            table_full_name: Tabela perfilada
+            columns: Colunas com 'name' e 'type'
+            where: Filtro opcional aplicado antes da agregação
+        """
+        if not columns:
+            return {'profiled_rows': 0, 'sampled': False, 'sample_percent': self.sample_percent, 'columns': {}}
+        
+        rows = run_sql(self.build_query(table_full_name, columns, where))
+        return self.parse_result(rows[0] if rows else {}, columns)
+    
+    @classmethod
+    def merge(cls, base: Dict[str, Any], delta: Dict[str, Any], top_k: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Combina o perfil de uma tabela com o perfil de registros acrescentados
+        
+        Contagens e comprimento médio são exatos; mínimo, máximo e valores
+        frequentes são combinados pelos valores de cada lado. Distintos
+        aproximados não são somáveis: lotes quase todos distintos somam-se
+        (limitados ao total de não nulos) e os demais mantêm o maior valor.
+        
+        Args:
+            base: Perfil anterior (retorno de profile)
+            delta: Perfil dos registros acrescentados
+            top_k: Valores frequentes mantidos (padrão: o maior entre os dois lados)
+        
+        Returns:
+            Perfil combinado
+        """
+        profiled_rows = base['profiled_rows'] + delta['profiled_rows']
+        columns = {}
+        
+        for name, base_column in base['columns'].items():
+            delta_column = delta['columns'].get(name)
+            if delta_column is None:
+                columns[name] = base_column
+                continue
+            
+            non_null = base_column['non_null_count'] + delta_column['non_null_count']
+            merged = {
+                'kind': base_column['kind'],
+                'non_null_count': non_null,
+                'null_count': profiled_rows - non_null,
+                'null_ratio': round((profiled_rows - non_null) / profiled_rows, 4) if profiled_rows else 0.0
+            }
+            
+            if 'distinct_count' in base_column:
+                base_distinct = base_column['distinct_count']
+                delta_distinct = delta_column.get('distinct_count', 0)
+                delta_non_null = delta_column['non_null_count']
+                if delta_non_null and delta_distinct / delta_non_null >= cls.UNIQUE_RATIO:
+                    merged['distinct_count'] = min(base_distinct + delta_distinct, non_null)
+                else:
+                    merged['distinct_count'] = max(base_distinct, delta_distinct)
+                
+                merged['min'] = cls._extreme(base_column['kind'], base_column.get('min'), delta_column.get('min'), min)
+                merged['max'] = cls._extreme(base_column['kind'], base_column.get('max'), delta_column.get('max'), max)
+            
+            if 'avg_length' in base_column:
+                weighted = [
+                    (column.get('avg_length'), column['non_null_count'])
+                    for column in [base_column, delta_column]
+                    if column.get('avg_length') is not None and column['non_null_count']
+                ]
+                total = sum(count for _, count in weighted)
+                merged['avg_length'] = round(sum(avg * count for avg, count in weighted) / total, 2) if total else None
+            
+            if 'top_values' in base_column:
+                counts: Dict[Any, int] = {}
+                for entry in base_column['top_values'] + delta_column.get('top_values', []):
+                    counts[entry['value']] = counts.get(entry['value'], 0) + entry['count']
+                limit = top_k or max(len(base_column['top_values']), len(delta_column.get('top_values', [])))
+                merged['top_values'] = [
+                    {'value': value, 'count': count}
+                    for value, count in sorted(counts.items(), key=lambda item: -item[1])[:limit]
+                ]
+            
+            columns[name] = merged
+        
+        return {
+            'profiled_rows': profiled_rows,
+            'sampled': base.get('sampled', False) or delta.get('sampled', False),
+            'sample_percent': base.get('sample_percent'),
+            'columns': columns
+        }
+    
+    @classmethod
+    def _extreme(cls, kind: str, first: Optional[str], second: Optional[str], choose: Callable) -> Optional[str]:
+        """Mínimo ou máximo entre dois valores em texto, comparando numéricos como número"""
+        values = [value for value in [first, second] if value is not None]
+        if not values:
+            return None
+        if kind == cls.KIND_NUMERIC:
+            return choose(values, key=float)
+        return choose(values)
@@ -0,0 +1,222 @@
+"""
+Dino SDK - Cron Schedule
+Interpretação e expansão de expressões cron (Unix e Quartz)
+"""
+
+from typing import List, Optional
+
+
+class CronSchedule:
+    """
+    Expressão cron de 5 campos: minuto hora dia mês dia_semana
+    
+    Suporta *, listas (1,2), intervalos (1-5), passos (*/15, 0-30/10, 5/15)
+    e nomes de meses e dias da semana (JAN, MON). Dia da semana 0 e 7 são
+    domingo. Converte de e para o formato Quartz usado pelos jobs
+    Databricks (segundos no primeiro campo, ? e domingo = 1).
+    """
+    
+    FIELDS = [
+        ('minute', 0, 59),
+        ('hour', 0, 23),
+        ('day_of_month', 1, 31),
+        ('month', 1, 12),
+        ('day_of_week', 0, 6)
+    ]
+    
+    MONTH_NAMES = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+    WEEKDAY_NAMES = ['SUN', 'MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT']
+    
+    def __init__(self, expression: str):
+        """
+        Interpreta a expressão
+        
+        Args:
+            expression: Expressão cron de 5 campos
+        
+        Raises:
+            ValueError: Expressão inválida
+        """
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError("Expressão cron deve ter 5 campos: 'minuto hora dia mês dia_semana'")
+        
+        self.fields = parts
+        self.values = {}
+        for part, (name, low, high) in zip(parts, self.FIELDS):
+            self.values[name] = self._parse_field(part, name, low, high)
+        
+        self.expression = " ".join(parts)
+    
+    def _parse_field(self, part: str, name: str, low: int, high: int) -> List[int]:
+        """Expande um campo para a lista ordenada de valores"""
+        values = set()
+        for item in part.upper().split(','):
+            step = 1
+            has_step = '/' in item
+            if has_step:
+                item, step_text = item.split('/', 1)
+                if not step_text.isdigit() or int(step_text) < 1:
+                    raise ValueError(f"Passo inválido no campo {name}: {part}")
+                step = int(step_text)
+            
+            if item == '*':
+                start, end = low, high
+            elif '-' in item:
+                start_text, end_text = item.split('-', 1)
+                start, end = self._parse_value(start_text, name), self._parse_value(end_text, name)
+            else:
+                start = self._parse_value(item, name)
+                # 5/15 equivale a 5-<máximo>/15
+                end = high if has_step else start
+            
+            if name == 'day_of_week' and end == 7:
+                # 7 também é domingo
+                values.add(0)
+                end = 6
+                if start == 7:
+                    continue
+            if start < low or end > high or start > end:
+                raise ValueError(f"Valor fora do intervalo {low}-{high} no campo {name}: {part}")
+            
+            values.update(range(start, end + 1, step))
+        
+        return sorted(values)
+    
+    def _parse_value(self, text: str, name: str) -> int:
+        """Converte um valor numérico ou nome (JAN, MON) em inteiro"""
+        if text.isdigit():
+            return int(text)
+        if name == 'month' and text in self.MONTH_NAMES:
+            return self.MONTH_NAMES.index(text) + 1
+        if name == 'day_of_week' and text in self.WEEKDAY_NAMES:
+            return self.WEEKDAY_NAMES.index(text)
+        raise ValueError(f"Valor inválido no campo {name}: {text}")
+    
+    @classmethod
+    def from_quartz(cls, expression: str) -> "CronSchedule":
+        """
+        Cria a partir de uma expressão Quartz (segundos minuto hora dia mês dia_semana [ano])
+        
+        Os segundos e o ano são descartados.
+        """
+        parts = expression.split()
+        if len(parts) not in [6, 7]:
+            raise ValueError(f"Expressão Quartz inválida: {expression}")
+        
+        minute, hour, day_of_month, month, day_of_week = parts[1:6]
+        day_of_month = '*' if day_of_month == '?' else day_of_month
+        if day_of_week == '?':
+            day_of_week = '*'
+        elif day_of_week != '*':
+            day_of_week = cls._shift_weekdays(day_of_week, -1)
+        
+        return cls(" ".join([minute, hour, day_of_month, month, day_of_week]))
+    
+    @classmethod
+    def _shift_weekdays(cls, field: str, delta: int) -> str:
+        """Desloca os dias da semana numéricos entre Unix (0-6) e Quartz (1-7)"""
+        def shift(text: str) -> str:
+            return str(int(text) + delta) if text.isdigit() else text
+        
+        items = []
+        for item in field.split(','):
+            item, _, step = item.partition('/')
+            item = '-'.join(shift(value) for value in item.split('-')) if item != '*' else item
+            items.append(f"{item}/{step}" if step else item)
+        return ','.join(items)
+    
+    def to_quartz(self) -> str:
+        """
+        Converte para Quartz (usado em schedule.quartz_cron_expression)
+        
+        Raises:
+            ValueError: Dia do mês e dia da semana restritos ao mesmo tempo
+                (no cron Unix dispara em qualquer um dos dois; no Quartz um
+                deles precisa ser ?)
+        """
+        minute, hour, day_of_month, month, day_of_week = self.fields
+        if day_of_month != '*' and day_of_week != '*':
+            raise ValueError(
+                f"Expressão {self.expression} não é representável em Quartz: "
+                f"use dia do mês ou dia da semana, não ambos"
+            )
+        if day_of_week == '*':
+            day_of_week = '?'
+        else:
+            day_of_week = self._format_field([day + 1 for day in self.values['day_of_week']], 1, 7)
+            day_of_month = '?'
+        return f"0 {minute} {hour} {day_of_month} {month} {day_of_week}"
+    
+    @property
+    def every_day(self) -> bool:
+        """Indica se a expressão dispara todos os dias"""
+        return self.fields[2] == '*' and self.fields[3] == '*' and self.fields[4] == '*'
+    
+    def start_minutes(self) -> List[int]:
+        """Minutos do dia (0-1439) em que a expressão dispara"""
+        return [hour * 60 + minute for hour in self.values['hour'] for minute in self.values['minute']]
+    
+    def shifted(self, delay_minutes: int) -> Optional["CronSchedule"]:
+        """
+        Retorna a expressão com todos os disparos atrasados em delay_minutes
+        
+        Retorna None quando o resultado não é representável em cron: os
+        disparos deslocados precisam continuar formando o produto
+        horas x minutos, e disparos que passam da meia-noite só são aceitos
+        em expressões diárias.
+        """
+        if delay_minutes == 0:
+            return self
+        if not self.can_shift(delay_minutes):
+            return None
+        
+        minutes = self.values['minute']
+        hours = self.values['hour']
+        every_hour = len(hours) == 24
+        carries = {(minute + delay_minutes) // 60 for minute in minutes}
+        
+        new_minutes = sorted({(minute + delay_minutes) % 60 for minute in minutes})
+        if every_hour:
+            new_hours = hours
+        else:
+            carry = carries.pop()
+            new_hours = sorted({(hour + carry) % 24 for hour in hours})
+        
+        return CronSchedule(" ".join([
+            self._format_field(new_minutes, 0, 59),
+            self._format_field(new_hours, 0, 23),
+            *self.fields[2:]
+        ]))
+    
+    def can_shift(self, delay_minutes: int) -> bool:
+        """Indica se shifted(delay_minutes) é representável (sem criar a expressão)"""
+        minutes = self.values['minute']
+        hours = self.values['hour']
+        first_carry = (minutes[0] + delay_minutes) // 60
+        last_carry = (minutes[-1] + delay_minutes) // 60
+        
+        if first_carry != last_carry and len(hours) != 24:
+            return False
+        return self.every_day or hours[-1] + last_carry <= 23
+    
+    @staticmethod
+    def _format_field(values: List[int], low: int, high: int) -> str:
+        """Compacta uma lista de valores em um campo cron (*, a-b/s ou lista)"""
+        if values == list(range(low, high + 1)):
+            return '*'
+        if len(values) > 2:
+            step = values[1] - values[0]
+            if all(b - a == step for a, b in zip(values, values[1:])):
+                if step == 1:
+                    return f"{values[0]}-{values[-1]}"
+                if values[0] == low and values[-1] + step > high:
+                    return f"*/{step}"
+                return f"{values[0]}-{values[-1]}/{step}"
+        return ','.join(str(value) for value in values)
+    
+    def __str__(self) -> str:
+        return self.expression
+    
+    def __repr__(self) -> str:
+        return f"CronSchedule('{self.expression}')"
@@ -0,0 +1,198 @@
+"""
+Dino SDK - Databricks Client
+Cliente REST mínimo das APIs do workspace Databricks
+"""
+
+import os
+import time
+from typing import Optional, Dict, Any, Iterator
+
+
+class DatabricksAPIError(Exception):
+    """Erro retornado por uma API REST do Databricks"""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None, error_code: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error_code = error_code
+    
+    @property
+    def is_not_found(self) -> bool:
+        """Indica se o recurso solicitado não existe (ex: job removido)"""
+        return self.status_code == 404 or self.error_code in ['RESOURCE_DOES_NOT_EXIST', 'NOT_FOUND']
+
+
+class DatabricksClient:
+    """
+    Cliente REST do workspace Databricks
+    
+    Funcionalidades:
+    - Sessão HTTP única com pool de conexões (keep-alive entre chamadas)
+    - Autenticação por token (variáveis DATABRICKS_HOST e DATABRICKS_TOKEN)
+    - Iteração sobre listagens paginadas por next_page_token
+    - Novas tentativas com backoff exponencial em respostas 429 e 503
+      (respeitando Retry-After), comuns em chamadas em lote; POSTs só são
+      repetidos em 429, quando a requisição certamente não foi processada
+    """
+    
+    # Status de limite de taxa ou indisponibilidade temporária
+    RETRY_STATUS_CODES = [429, 503]
+    
+    # POST não é idempotente (ex: runs/submit, jobs/create): um 503 pode chegar
+    # depois de o servidor aceitar a requisição, e repeti-la duplicaria o recurso
+    NON_IDEMPOTENT_RETRY_STATUS_CODES = [429]
+    
+    # Espera máxima entre tentativas, mesmo com Retry-After maior
+    MAX_RETRY_WAIT_SECONDS = 60.0
+    
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        token: Optional[str] = None,
+        timeout: float = 30.0,
+        pool_maxsize: int = 10,
+        max_retries: int = 3,
+        retry_backoff_seconds: float = 1.0
+    ):
+        """
+        Inicializa o cliente
+        
+        Args:
+            host: URL do workspace (padrão: variável DATABRICKS_HOST)
+            token: Token de acesso (padrão: variável DATABRICKS_TOKEN)
+            timeout: Timeout de cada requisição em segundos
+            pool_maxsize: Conexões mantidas abertas por host
+            max_retries: Novas tentativas após 429/503 (POST: só 429; 0 desativa)
+            retry_backoff_seconds: Espera antes da primeira nova tentativa
+                (dobra a cada tentativa) quando não há Retry-After
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        host = host or os.getenv("DATABRICKS_HOST", "")
+        if not host:
+            raise ValueError("host do workspace não informado (defina DATABRICKS_HOST)")
+        if max_retries < 0:
+            raise ValueError("max_retries não pode ser negativo")
+        if not host.startswith(('http://', 'https://')):
+            host = f"https://{host}"
+        
+        self.host = host.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        token = token or os.getenv("DATABRICKS_TOKEN")
+        if token:
+            self.session.headers['Authorization'] = f"Bearer {token}"
+    
+    def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        payload: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Executa uma chamada REST e retorna o corpo JSON
+        
+        Args:
+            method: Método HTTP
+            path: Caminho da API (ex: /api/2.1/jobs/list)
+            params: Parâmetros de query string
+            payload: Corpo JSON da requisição
+        
+        Raises:
+            DatabricksAPIError: Resposta com status de erro (após esgotar as
+                novas tentativas, no caso de 429/503)
+        """
+        retry_status_codes = self.NON_IDEMPOTENT_RETRY_STATUS_CODES if method.upper() == 'POST' else self.RETRY_STATUS_CODES
+        for attempt in range(self.max_retries + 1):
+            response = self.session.request(
+                method,
+                f"{self.host}/{path.lstrip('/')}",
+                params=params,
+                json=payload,
+                timeout=self.timeout
+            )
+            if response.status_code not in retry_status_codes or attempt == self.max_retries:
+                break
+            time.sleep(self._retry_wait(response, attempt))
+        
+        if response.status_code >= 400:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            raise DatabricksAPIError(
+                f"{method} {path} falhou ({response.status_code}): "
+                f"{body.get('message', response.text[:200])}",
+                status_code=response.status_code,
+                error_code=body.get('error_code')
+            )
+        
+        return response.json() if response.content else {}
+    
+    def _retry_wait(self, response, attempt: int) -> float:
+        """Espera antes da próxima tentativa: Retry-After ou backoff exponencial"""
+        retry_after = response.headers.get('Retry-After')
+        try:
+            wait = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            wait = None
+        if wait is None:
+            wait = self.retry_backoff_seconds * (2 ** attempt)
+        return min(max(wait, 0.0), self.MAX_RETRY_WAIT_SECONDS)
+    
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Executa um GET"""
+        return self.request('GET', path, params=params)
+    
+    def post(self, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Executa um POST"""
+        return self.request('POST', path, payload=payload or {})
+    
+    def patch(self, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Executa um PATCH"""
+        return self.request('PATCH', path, payload=payload or {})
+    
+    def iter_pages(
+        self,
+        path: str,
+        items_key: str,
+        params: Optional[Dict[str, Any]] = None,
+        page_size: int = 100
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre uma listagem paginada item a item
+        
+        As páginas são buscadas sob demanda: o consumidor pode interromper a
+        iteração sem buscar as páginas restantes.
+        
+        Args:
+            path: Caminho da API de listagem
+            items_key: Chave da lista de itens na resposta (ex: jobs, runs)
+            params: Filtros da listagem
+            page_size: Itens por página (limit)
+        """
+        page_params = dict(params or {})
+        page_params['limit'] = page_size
+        
+        while True:
+            data = self.get(path, params=page_params)
+            for item in data.get(items_key, []):
+                yield item
+            
+            next_page_token = data.get('next_page_token')
+            if not data.get('has_more') or not next_page_token:
+                break
+            page_params['page_token'] = next_page_token
+    
+    def close(self):
+        """Fecha as conexões do pool"""
+        self.session.close()
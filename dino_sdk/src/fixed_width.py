@@ -0,0 +1,390 @@
+"""
+Dino SDK - Fixed Width
+Layout de arquivos de largura fixa (mainframe) e conversão local para Parquet
+"""
+
+import codecs
+import json
+import os
+import re
+from typing import Optional, Dict, Any, List, Union
+
+
+class FixedWidthLayout:
+    """
+    Layout de colunas de um arquivo de largura fixa
+    
+    Cada coluna é definida por name, start (posição inicial, base 1), length
+    e type (tipo Spark SQL: string, int, bigint, double, decimal(p,s), date,
+    timestamp). Colunas date/timestamp aceitam format opcional no padrão
+    Spark (ex: yyyyMMdd). O arquivo JSON do layout pode ser a lista de
+    colunas ou {"encoding": "...", "columns": [...]}; a codificação (padrão
+    latin-1) vale tanto para a conversão local quanto para o script Spark.
+    
+    Funcionalidades:
+    - Validação do layout (sobreposição, posições e nomes)
+    - Expressões Spark substring em uma única projeção
+    - Conversão local em streaming para Parquet, fatiando blocos inteiros
+      de linhas com NumPy/PyArrow (sem loops por caractere em Python)
+    
+    Assim como o substring do Spark, as posições contam caracteres (não
+    bytes) e valores que não convertem para o tipo da coluna viram NULL.
+    """
+    
+    SUPPORTED_TYPES = ['string', 'int', 'integer', 'bigint', 'long', 'double', 'float', 'date', 'timestamp']
+    
+    # Conversão do padrão de data Spark para strptime (usado na conversão local)
+    _DATE_TOKENS = [('yyyy', '%Y'), ('MM', '%m'), ('dd', '%d'), ('HH', '%H'), ('mm', '%M'), ('ss', '%S')]
+    
+    # Valores aceitos pelo cast numérico (os demais viram NULL, como no Spark)
+    _INTEGER_PATTERN = r"^[+-]?\d+$"
+    _NUMBER_PATTERN = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+    
+    DEFAULT_ENCODING = "latin-1"
+    
+    # Codificações que o script Spark lê: codec Python -> charset da função
+    # decode do Spark (UTF-8 e ASCII são lidos direto pelo leitor de texto)
+    SPARK_CHARSETS = {'utf-8': 'UTF-8', 'ascii': 'US-ASCII', 'iso8859-1': 'ISO-8859-1'}
+    
+    def __init__(self, columns: List[Dict[str, Any]], encoding: str = DEFAULT_ENCODING):
+        """
+        Inicializa o layout
+        
+        Args:
+            columns: Lista de colunas {name, start, length, type[, format]}
+            encoding: Codificação do arquivo de origem (ex: latin-1, utf-8,
+                cp037 para EBCDIC)
+        """
+        self.columns = [self._normalize_column(column) for column in columns]
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            raise ValueError(f"Codificação desconhecida no layout: {encoding}")
+        self.encoding = encoding
+        self._validate()
+    
+    @classmethod
+    def from_spec(cls, spec: Union[str, List[Dict[str, Any]], Dict[str, Any], "FixedWidthLayout"]) -> "FixedWidthLayout":
+        """Cria o layout a partir de lista de colunas, dict/arquivo JSON ou layout existente"""
+        if isinstance(spec, FixedWidthLayout):
+            return spec
+        if isinstance(spec, str):
+            with open(spec, 'r', encoding='utf-8') as f:
+                spec = json.load(f)
+        if isinstance(spec, dict):
+            return cls(spec['columns'], encoding=spec.get('encoding') or cls.DEFAULT_ENCODING)
+        return cls(spec)
+    
+    @staticmethod
+    def _normalize_column(column: Dict[str, Any]) -> Dict[str, Any]:
+        """Normaliza uma definição de coluna"""
+        normalized = {
+            'name': str(column.get('name', '')).strip(),
+            'start': int(column.get('start', 0)),
+            'length': int(column.get('length', 0)),
+            'type': str(column.get('type', 'string')).strip().lower()
+        }
+        if column.get('format'):
+            normalized['format'] = column['format']
+        return normalized
+    
+    def _validate(self):
+        """Valida o layout"""
+        if not self.columns:
+            raise ValueError("Layout de largura fixa deve ter ao menos uma coluna")
+        
+        names = set()
+        previous_end = 0
+        for column in sorted(self.columns, key=lambda c: c['start']):
+            if not column['name']:
+                raise ValueError("Toda coluna do layout precisa de name")
+            if column['name'] in names:
+                raise ValueError(f"Coluna duplicada no layout: {column['name']}")
+            if column['start'] < 1 or column['length'] < 1:
+                raise ValueError(f"Coluna {column['name']}: start e length devem ser >= 1")
+            if column['start'] <= previous_end:
+                raise ValueError(f"Coluna {column['name']} sobrepõe a coluna anterior")
+            if column['type'] not in self.SUPPORTED_TYPES and not column['type'].startswith('decimal('):
+                raise ValueError(f"Tipo {column['type']} não suportado na coluna {column['name']}")
+            
+            names.add(column['name'])
+            previous_end = column['start'] + column['length'] - 1
+    
+    @property
+    def record_length(self) -> int:
+        """Comprimento do registro (fim da última coluna)"""
+        return max(column['start'] + column['length'] - 1 for column in self.columns)
+    
+    def to_dict(self) -> List[Dict[str, Any]]:
+        """Retorna o layout como lista de colunas"""
+        return [dict(column) for column in self.columns]
+    
+    def spark_charset(self) -> str:
+        """
+        Charset do arquivo na leitura Spark
+        
+        Raises:
+            ValueError: Codificação sem suporte na função decode do Spark
+                (ex: EBCDIC), que deve ser convertida com convert_to_parquet
+        """
+        name = codecs.lookup(self.encoding).name
+        if name not in self.SPARK_CHARSETS:
+            raise ValueError(
+                f"Codificação {self.encoding} não suportada na leitura Spark "
+                f"(use {', '.join(self.SPARK_CHARSETS)} ou converta com convert_to_parquet)"
+            )
+        return self.SPARK_CHARSETS[name]
+    
+    def spark_needs_decode(self) -> bool:
+        """Se o arquivo precisa ser lido em binário e decodificado (não UTF-8/ASCII)"""
+        return self.spark_charset() not in ['UTF-8', 'US-ASCII']
+    
+    def spark_select_expressions(self, value_column: str = "value") -> List[str]:
+        """
+        Gera as expressões SQL de uma única projeção sobre a coluna de texto
+        
+        Campos vazios (só espaços) viram NULL antes da conversão de tipo. As
+        conversões usam try_cast/try_to_timestamp: com ANSI ligado (padrão no
+        serverless e no Spark 4), valores inválidos também viram NULL, como
+        na conversão local.
+        """
+        expressions = []
+        for column in self.columns:
+            raw = f"nullif(trim(substring({value_column}, {column['start']}, {column['length']})), '')"
+            column_type = column['type']
+            
+            if column_type == 'string':
+                expression = raw
+            elif column_type in ['date', 'timestamp'] and column.get('format'):
+                expression = f"try_to_timestamp({raw}, '{column['format']}')"
+                if column_type == 'date':
+                    expression = f"to_date({expression})"
+            else:
+                expression = f"try_cast({raw} as {column_type})"
+            
+            expressions.append(f"{expression} as `{column['name']}`")
+        return expressions
+    
+    def _arrow_type(self, column: Dict[str, Any]):
+        """Tipo PyArrow equivalente ao tipo Spark da coluna"""
+        import pyarrow as pa
+        
+        column_type = column['type']
+        if column_type == 'string':
+            return pa.string()
+        if column_type in ['int', 'integer']:
+            return pa.int32()
+        if column_type in ['bigint', 'long']:
+            return pa.int64()
+        if column_type in ['double', 'float']:
+            return pa.float64()
+        if column_type == 'date':
+            return pa.date32()
+        if column_type == 'timestamp':
+            return pa.timestamp('us')
+        
+        precision, scale = re.match(r"decimal\((\d+)\s*,\s*(\d+)\)", column_type).groups()
+        return pa.decimal128(int(precision), int(scale))
+    
+    def _strptime_format(self, column: Dict[str, Any]) -> str:
+        """Converte o format Spark da coluna para strptime"""
+        default = '%Y-%m-%d' if column['type'] == 'date' else '%Y-%m-%d %H:%M:%S'
+        spark_format = column.get('format')
+        if not spark_format:
+            return default
+        for token, directive in self._DATE_TOKENS:
+            spark_format = spark_format.replace(token, directive)
+        return spark_format
+    
+    def _safe_cast(self, values, column: Dict[str, Any]):
+        """Converte o texto para o tipo da coluna; valores inválidos viram NULL"""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        target_type = self._arrow_type(column)
+        if column['type'] in ['date', 'timestamp']:
+            parsed = pc.strptime(values, format=self._strptime_format(column), unit='us', error_is_null=True)
+            return parsed.cast(target_type)
+        
+        pattern = self._INTEGER_PATTERN if pa.types.is_integer(target_type) else self._NUMBER_PATTERN
+        valid = pc.match_substring_regex(values, pattern)
+        values = pc.if_else(valid, values, pa.scalar(None, pa.string()))
+        try:
+            return values.cast(target_type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # Estouro de faixa/precisão: converte valor a valor, anulando os que falham
+            converted = []
+            for value in values:
+                try:
+                    converted.append(pa.array([value.as_py()], type=pa.string()).cast(target_type)[0].as_py())
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    converted.append(None)
+            return pa.array(converted, type=target_type)
+    
+    def slice_block(self, records, encoding: Optional[str] = None):
+        """
+        Fatia um bloco de registros em colunas tipadas
+        
+        Args:
+            records: Matriz NumPy uint8 (linhas x record_length) de uma
+                codificação de um byte por caractere, ou pyarrow.StringArray
+                com as linhas já decodificadas
+            encoding: Codificação do arquivo de origem (padrão: a do layout)
+        
+        Returns:
+            pyarrow.RecordBatch com uma coluna por campo do layout
+        """
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        encoding = encoding or self.encoding
+        arrays = []
+        for column in self.columns:
+            start = column['start'] - 1
+            width = column['length']
+            
+            if isinstance(records, pa.Array):
+                values = pc.utf8_slice_codeunits(records, start, start + width)
+            else:
+                field_bytes = np.ascontiguousarray(records[:, start:start + width]).view(f"S{width}").ravel()
+                if encoding.lower().replace('-', '') in ['ascii', 'utf8']:
+                    values = pa.array(field_bytes, type=pa.binary()).cast(pa.string())
+                else:
+                    values = pa.array(np.char.decode(field_bytes, encoding), type=pa.string())
+            
+            values = pc.utf8_trim_whitespace(values)
+            values = pc.if_else(pc.equal(values, ""), pa.scalar(None, pa.string()), values)
+            
+            if column['type'] != 'string':
+                values = self._safe_cast(values, column)
+            arrays.append(values)
+        
+        return pa.RecordBatch.from_arrays(arrays, names=[column['name'] for column in self.columns])
+    
+    def _records_from_block(self, block: bytes, encoding: Optional[str] = None):
+        """
+        Converte um bloco de linhas completas em registros de tamanho fixo
+        
+        Retorna a matriz uint8 (linhas x registro) quando cada caractere do
+        bloco ocupa um byte; com caracteres multibyte (ex: UTF-8 com acentos),
+        retorna as linhas decodificadas em um pyarrow.StringArray, para que
+        as posições do layout contem caracteres como no Spark.
+        """
+        import numpy as np
+        
+        encoding = encoding or self.encoding
+        length = self.record_length
+        newline = "\n".encode(encoding)
+        
+        text = block.decode(encoding, errors='replace')
+        if len(text) != len(block):
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            
+            lines = text.replace("\r\n", "\n").split("\n")
+            if lines and lines[-1] == "":
+                lines.pop()
+            return pc.utf8_rpad(pa.array(lines, type=pa.string()), width=length, padding=" ")
+        
+        # Caminho rápido: registros de tamanho exato terminados na quebra de linha
+        if len(block) % (length + 1) == 0:
+            matrix = np.frombuffer(block, dtype=np.uint8).reshape(-1, length + 1)
+            if (matrix[:, length] == newline[0]).all():
+                return matrix[:, :length]
+        
+        # Linhas irregulares (\r\n, registros curtos/longos): normaliza para o comprimento
+        lines = block.replace("\r".encode(encoding) + newline, newline).split(newline)
+        if lines and lines[-1] == b"":
+            lines.pop()
+        records = np.array(lines, dtype=f"S{length}").view(np.uint8).reshape(-1, length).copy()
+        records[records == 0] = " ".encode(encoding)[0]
+        return records
+    
+    def convert_to_parquet(
+        self,
+        input_path: str,
+        output_path: str,
+        block_size_bytes: int = 16 * 1024 * 1024,
+        encoding: Optional[str] = None,
+        compression: str = "snappy"
+    ) -> Dict[str, Any]:
+        """
+        Converte localmente um arquivo de largura fixa para Parquet em streaming
+        
+        O arquivo é lido em blocos de bytes; cada bloco de linhas completas é
+        fatiado de uma vez e gravado como um row group. A quebra de linha é a
+        da codificação: em EBCDIC (ex: cp037), os registros terminam em LF
+        (0x25) ou NL (0x15).
+        
+        Args:
+            input_path: Arquivo de largura fixa de origem
+            output_path: Arquivo Parquet de destino
+            block_size_bytes: Tamanho aproximado do bloco lido por vez
+            encoding: Codificação do arquivo (padrão: a do layout; ex: latin-1,
+                cp037 para EBCDIC)
+            compression: Codec do Parquet
+        
+        Returns:
+            Dict com linhas, row groups e arquivo gerado
+        """
+        import pyarrow.parquet as pq
+        
+        encoding = encoding or self.encoding
+        newline = "\n".encode(encoding)
+        if len(newline) != 1:
+            raise ValueError(f"Codificação {encoding} não suportada: a quebra de linha deve ocupar um byte")
+        # EBCDIC: o NL de mainframe é normalizado para o LF da codificação
+        next_line = "\x85".encode(encoding) if newline != b"\n" else None
+        
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        
+        rows = 0
+        row_groups = 0
+        writer: Optional[pq.ParquetWriter] = None
+        remainder = b""
+        
+        try:
+            with open(input_path, 'rb') as f:
+                while True:
+                    chunk = f.read(block_size_bytes)
+                    if not chunk:
+                        break
+                    
+                    if next_line:
+                        chunk = chunk.replace(next_line, newline)
+                    data = remainder + chunk
+                    cut = data.rfind(newline) + 1
+                    if cut == 0:
+                        remainder = data
+                        continue
+                    block, remainder = data[:cut], data[cut:]
+                    
+                    batch = self.slice_block(self._records_from_block(block, encoding), encoding)
+                    if writer is None:
+                        writer = pq.ParquetWriter(output_path, batch.schema, compression=compression)
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+                    row_groups += 1
+            
+            if remainder.strip():
+                batch = self.slice_block(self._records_from_block(remainder + newline, encoding), encoding)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, batch.schema, compression=compression)
+                writer.write_batch(batch)
+                rows += batch.num_rows
+                row_groups += 1
+        finally:
+            if writer is not None:
+                writer.close()
+        
+        print(f"📦 {rows:,} registros convertidos para {output_path} ({row_groups} row groups)")
+        return {
+            'success': True,
+            'input_path': input_path,
+            'output_path': output_path,
+            'rows': rows,
+            'row_groups': row_groups
+        }
@@ -3,11 +3,29 @@ Genie Assistant - Integração com Databricks Genie e Unity Catalog Assistant
 Responsável pela criação de salas Genie e catalogação automática de dados
 """
 
+import hashlib
 import json
+import os
 import time
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Union
 from datetime import datetime
 
+try:
+    from .column_profiler import ColumnProfiler
+    from .profile_cache import ProfileCache
+    from .pii_detector import PIIDetector
+    from .column_classifier import ColumnClassifier
+    from .genie_space_client import GenieSpaceClient
+    from .warehouse_selector import WarehouseSelector
+except ImportError:
+    from column_profiler import ColumnProfiler
+    from profile_cache import ProfileCache
+    from pii_detector import PIIDetector
+    from column_classifier import ColumnClassifier
+    from genie_space_client import GenieSpaceClient
+    from warehouse_selector import WarehouseSelector
+
 
 class GenieAssistant:
     """
@@ -18,62 +36,612 @@ class GenieAssistant:
     - Catalogação automática via Unity Catalog Assistant
     - Geração de descrições inteligentes de dados
     - Configuração de metadados e tags
+    - Contagem de registros pelos metadados Delta (sem varrer a tabela)
+    - Perfil estatístico das colunas em uma única leitura da tabela
+    - Cache da análise por versão Delta, com perfil incremental via Change
+      Data Feed quando apenas novos dados foram acrescentados
+    - Tags e comentários aplicados apenas onde diferem dos atuais no Unity
+      Catalog, com colunas atualizadas em paralelo
+    - Detecção de dados pessoais pelo conteúdo de uma amostra das colunas
+    - Categorias e tags das colunas definidas por uma política de regras (YAML)
+    - Execução do SQL na sessão Spark ou em um SQL warehouse (sql_backend),
+      permitindo catalogar fora do cluster
+    - Publicação das salas pela API de Genie spaces: a sala existente é
+      atualizada no lugar apenas quando a configuração muda
+    - Escolha automática do SQL warehouse serverless da sala pelo porte da
+      tabela e pela carga atual dos warehouses
     """
     
-    def __init__(self, catalog_name: str, schema_name: str, table_name: str):
+    # Origem do número de registros reportado na análise
+    ROW_COUNT_EXACT = "exact"
+    ROW_COUNT_STATS = "stats"
+    ROW_COUNT_ESTIMATE = "estimate"
+    ROW_COUNT_UNKNOWN = "unknown"
+    
+    # Commits recentes usados para estimar bytes por registro
+    HISTORY_SAMPLE_SIZE = 20
+    
+    # Colunas com proporção de nulos a partir deste valor são esparsas
+    SPARSE_NULL_RATIO = 0.5
+    # Colunas detalhadas na descrição (limita o tamanho do texto do Genie)
+    MAX_PROFILED_COLUMNS_IN_DESCRIPTION = 30
+    
+    # Operações que não alteram os dados (mantêm o perfil válido)
+    DATA_NEUTRAL_OPERATIONS = [
+        'OPTIMIZE', 'VACUUM START', 'VACUUM END', 'SET TBLPROPERTIES',
+        'UNSET TBLPROPERTIES', 'CHANGE COLUMN', 'ANALYZE'
+    ]
+    
+    # Tentativas de um DDL que conflita com outra alteração da mesma tabela
+    DDL_CONFLICT_RETRIES = 3
+    DDL_CONFLICT_MARKERS = ['ConcurrentModification', 'MetadataChanged', 'DELTA_METADATA_CHANGED']
+    
+    def __init__(
+        self,
+        catalog_name: str,
+        schema_name: str,
+        table_name: str,
+        exact_count: bool = False,
+        spark=None,
+        profile_columns: bool = True,
+        profile_sample_percent: Optional[float] = None,
+        profile_top_k: int = 5,
+        profile_cache: Optional[ProfileCache] = None,
+        profile_cache_file: Optional[str] = None,
+        use_profile_cache: bool = True,
+        ddl_max_workers: int = 8,
+        detect_pii: bool = True,
+        pii_sample_rows: int = 1000,
+        pii_threshold: float = 0.8,
+        classification_policy: Union[str, ColumnClassifier, None] = None,
+        sql_backend=None,
+        genie_client: Optional[GenieSpaceClient] = None,
+        warehouse_selector: Optional[WarehouseSelector] = None,
+        auto_select_warehouse: bool = True
+    ):
+        """
+        Inicializa o assistente
+        
+        Args:
+            catalog_name: Catálogo da tabela
+            schema_name: Schema da tabela
+            table_name: Nome da tabela
+            exact_count: Se True, conta os registros com COUNT(*) (varre a
+                tabela); se False, usa as estatísticas do log Delta
+            spark: Sessão Spark (padrão: sessão ativa)
+            profile_columns: Se True, calcula o perfil das colunas (nulos,
+                distintos, mín/máx, valores frequentes) em uma única agregação
+            profile_sample_percent: Percentual lido via TABLESAMPLE no perfil
+                (None lê a tabela inteira)
+            profile_top_k: Valores mais frequentes guardados por coluna
+            profile_cache: Cache de análises por versão Delta
+            profile_cache_file: Arquivo SQLite do cache (padrão:
+                .dino_profile_cache.sqlite no DINO_OUTPUT_DIR)
+            use_profile_cache: Se False, sempre analisa a tabela do zero
+            ddl_max_workers: Colunas atualizadas simultaneamente (comentários e tags)
+            detect_pii: Se True, procura dados pessoais no conteúdo das colunas de texto
+            pii_sample_rows: Linhas lidas na amostra da detecção de dados pessoais
+            pii_threshold: Proporção mínima de valores reconhecidos para marcar
+                a coluna como dado pessoal
+            classification_policy: Arquivo YAML da política de classificação
+                das colunas ou ColumnClassifier já criado (padrão: variável
+                DINO_CLASSIFICATION_POLICY ou a política padrão por nome)
+            sql_backend: Executor de SQL remoto com execute() e execute_arrow()
+                (ex: StatementExecutionBackend); se informado, nenhuma sessão
+                Spark é usada e o número de registros vem das estatísticas
+                do DESCRIBE DETAIL e do histórico
+            genie_client: Cliente da API de Genie spaces, compartilhável entre
+                tabelas; se informado, a sala é publicada no workspace mesmo
+                fora do Databricks (padrão: criado sob demanda no Databricks)
+            warehouse_selector: Seletor de SQL warehouses, compartilhável entre
+                tabelas (padrão: criado sob demanda com o cliente REST em uso)
+            auto_select_warehouse: Se True, preenche o sql_warehouse_id da sala
+                com o warehouse recomendado; se False, a sala usa o warehouse
+                do genie_client (DINO_WAREHOUSE_ID)
+        """
+        if ddl_max_workers < 1:
+            raise ValueError("ddl_max_workers deve ser pelo menos 1")
+        
         self.catalog_name = catalog_name
         self.schema_name = schema_name
         self.table_name = table_name
         self.table_full_name = f"{catalog_name}.{schema_name}.{table_name}"
         self.genie_room_name = f"Sala_Genie_{schema_name}_{table_name}"
+        self.exact_count = exact_count
+        self._spark = spark
+        self.sql_backend = sql_backend
+        self.genie_client = genie_client
+        self.warehouse_selector = warehouse_selector
+        self.auto_select_warehouse = auto_select_warehouse
+        self.warehouse_selection = None
+        self.profile_columns = profile_columns
+        self.profiler = ColumnProfiler(top_k=profile_top_k, sample_percent=profile_sample_percent)
+        self.use_profile_cache = use_profile_cache
+        self.profile_cache_file = profile_cache_file or os.path.join(
+            os.getenv("DINO_OUTPUT_DIR", ""), ".dino_profile_cache.sqlite"
+        )
+        self._profile_cache = profile_cache
+        self.ddl_max_workers = ddl_max_workers
+        self._current_metadata = None
+        self.detect_pii = detect_pii
+        self.pii_detector = PIIDetector(sample_rows=pii_sample_rows, threshold=pii_threshold)
+        
+        classification_policy = classification_policy or os.getenv("DINO_CLASSIFICATION_POLICY")
+        if isinstance(classification_policy, ColumnClassifier):
+            self.classifier = classification_policy
+        elif classification_policy:
+            self.classifier = ColumnClassifier.from_yaml(classification_policy)
+        else:
+            self.classifier = ColumnClassifier()
+    
+    def _get_spark(self):
+        """Retorna a sessão Spark informada ou a sessão ativa"""
+        if self._spark is not None:
+            return self._spark
+        
+        from pyspark.sql import SparkSession
+        spark = SparkSession.getActiveSession()
+        if not spark:
+            raise Exception("Spark session não encontrada")
+        return spark
+    
+    def _run_sql(self, statement: str) -> List[Dict[str, Any]]:
+        """Executa uma consulta e retorna as linhas como dicts"""
+        if self.sql_backend is not None:
+            return self.sql_backend.execute(statement)
+        return [row.asDict() for row in self._get_spark().sql(statement).collect()]
+    
+    def _run_sql_arrow(self, statement: str):
+        """Executa uma consulta e retorna o resultado como pyarrow.Table"""
+        if self.sql_backend is not None:
+            return self.sql_backend.execute_arrow(statement)
+        
+        df = self._get_spark().sql(statement)
+        if hasattr(df, 'toArrow'):
+            return df.toArrow()
+        
+        import pyarrow as pa
+        return pa.Table.from_pandas(df.toPandas(), preserve_index=False)
+    
+    def _get_genie_client(self) -> GenieSpaceClient:
+        """Retorna o cliente de Genie spaces (reusa o cliente REST do sql_backend)"""
+        if self.genie_client is None:
+            self.genie_client = GenieSpaceClient(
+                client=getattr(self.sql_backend, 'client', None),
+                warehouse_id=getattr(self.sql_backend, 'warehouse_id', None)
+            )
+        return self.genie_client
+    
+    def _get_warehouse_selector(self) -> Optional[WarehouseSelector]:
+        """
+        Retorna o seletor de warehouses (None sem acesso às APIs do workspace)
+        
+        Reusa o cliente REST do genie_client ou do sql_backend; sem nenhum
+        deles, o seletor só é criado dentro do Databricks.
+        """
+        if self.warehouse_selector is None:
+            client = getattr(self.genie_client, 'client', None) or getattr(self.sql_backend, 'client', None)
+            if client is None and not self._is_databricks_environment():
+                return None
+            self.warehouse_selector = WarehouseSelector(client=client)
+        return self.warehouse_selector
+    
+    def _select_warehouse(self, table_analysis: Dict[str, Any]) -> Optional[str]:
+        """SQL warehouse recomendado para a sala (None mantém o padrão do genie_client)"""
+        self.warehouse_selection = None
+        if not self.auto_select_warehouse:
+            return None
+        
+        try:
+            selector = self._get_warehouse_selector()
+            if selector is None:
+                return None
+            size_class = self._categorize_row_count(table_analysis.get('row_count', 0))
+            self.warehouse_selection = selector.select(
+                size_class,
+                key=self.table_full_name,
+                current_warehouse_id=self._current_room_warehouse()
+            )
+        except Exception as e:
+            print(f"⚠️ Seleção automática de warehouse indisponível: {str(e)}")
+            return None
+        
+        if self.warehouse_selection is None:
+            print("⚠️ Nenhum SQL warehouse serverless disponível para a sala")
+            return None
+        
+        selection = self.warehouse_selection
+        origin = "mantido" if selection['kept'] else f"para tabela {selection['size_class']}"
+        print(f"🏭 Warehouse {selection['name']} ({selection['cluster_size']}, {selection['state']}, "
+              f"carga {selection['load']:.0%}) {origin}")
+        return selection['warehouse_id']
+    
+    def _current_room_warehouse(self) -> Optional[str]:
+        """Warehouse da sala já publicada (None se a sala ainda não existe)"""
+        if self.genie_client is None and not self._is_databricks_environment():
+            return None
+        space = self._get_genie_client().find_space(self.genie_room_name)
+        return space.get('warehouse_id') if space else None
     
-    def _analyze_table_structure(self) -> Dict[str, Any]:
-        """Analisa a estrutura da tabela para gerar metadados inteligentes"""
+    def _get_profile_cache(self) -> Optional[ProfileCache]:
+        """Retorna o cache de análises (None se desativado)"""
+        if not self.use_profile_cache:
+            return None
+        if self._profile_cache is None:
+            self._profile_cache = ProfileCache(self.profile_cache_file)
+        return self._profile_cache
+    
+    def _get_table_version(self) -> Optional[int]:
+        """Versão Delta atual da tabela (None se não for Delta ou sem histórico)"""
         try:
-            from pyspark.sql import SparkSession
-            spark = SparkSession.getActiveSession()
+            history = self._run_sql(f"DESCRIBE HISTORY {self.table_full_name} LIMIT 1")
+            return int(history[0]['version']) if history else None
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _sql_literal(value: Any) -> str:
+        """Literal de texto SQL (Spark concatena '' em vez de escapar, então usa barra)"""
+        return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+    
+    @staticmethod
+    def _quote_identifier(name: str) -> str:
+        """Nome de coluna entre crases (escapando crases internas)"""
+        return "`" + name.replace("`", "``") + "`"
+    
+    def _tag_pairs(self, tags: Dict[str, str]) -> str:
+        """Pares 'chave' = 'valor' de SET TAGS"""
+        return ", ".join(f"{self._sql_literal(key)} = {self._sql_literal(value)}" for key, value in tags.items())
+    
+    def _get_current_metadata(self) -> Dict[str, Any]:
+        """
+        Tags e comentários atuais da tabela e das colunas no Unity Catalog
+        
+        Lidos uma única vez por instância (uma consulta de tags e uma de
+        comentários no information_schema) e atualizados à medida que os DDLs
+        são aplicados. Se o information_schema não puder ser lido, retorna
+        vazio e todos os metadados são aplicados.
+        
+        Returns:
+            Dict com table_tags, table_comment, column_tags e column_comments
+        """
+        if self._current_metadata is not None:
+            return self._current_metadata
+        
+        metadata = {'table_tags': {}, 'table_comment': None, 'column_tags': {}, 'column_comments': {}}
+        information_schema = f"{self.catalog_name}.information_schema"
+        # O information_schema guarda os nomes em minúsculas
+        catalog, schema, table = (
+            self._sql_literal(name.lower()) for name in [self.catalog_name, self.schema_name, self.table_name]
+        )
+        tag_filter = f"catalog_name = {catalog} AND schema_name = {schema} AND table_name = {table}"
+        comment_filter = f"table_catalog = {catalog} AND table_schema = {schema} AND table_name = {table}"
+        
+        try:
+            tags = self._run_sql(
+                f"SELECT CAST(NULL AS STRING) AS column_name, tag_name, tag_value "
+                f"FROM {information_schema}.table_tags WHERE {tag_filter}\n"
+                f"UNION ALL\n"
+                f"SELECT column_name, tag_name, tag_value "
+                f"FROM {information_schema}.column_tags WHERE {tag_filter}"
+            )
+            for row in tags:
+                if row['column_name'] is None:
+                    metadata['table_tags'][row['tag_name']] = row['tag_value']
+                else:
+                    metadata['column_tags'].setdefault(row['column_name'], {})[row['tag_name']] = row['tag_value']
             
-            if not spark:
-                raise Exception("Spark session não encontrada")
+            comments = self._run_sql(
+                f"SELECT CAST(NULL AS STRING) AS column_name, comment "
+                f"FROM {information_schema}.tables WHERE {comment_filter}\n"
+                f"UNION ALL\n"
+                f"SELECT column_name, comment "
+                f"FROM {information_schema}.columns WHERE {comment_filter}"
+            )
+            for row in comments:
+                if row['column_name'] is None:
+                    metadata['table_comment'] = row['comment']
+                else:
+                    metadata['column_comments'][row['column_name']] = row['comment']
+        
+        except Exception as e:
+            print(f"⚠️ Metadados atuais indisponíveis, aplicando todos: {str(e)}")
+        
+        self._current_metadata = metadata
+        return metadata
+    
+    def _execute_ddl(self, statement: str) -> None:
+        """Executa um DDL, repetindo quando conflita com outra alteração da tabela"""
+        for attempt in range(1, self.DDL_CONFLICT_RETRIES + 1):
+            try:
+                self._run_sql(statement)
+                return
+            except Exception as e:
+                conflict = any(marker in str(e) for marker in self.DDL_CONFLICT_MARKERS)
+                if not conflict or attempt == self.DDL_CONFLICT_RETRIES:
+                    raise
+                time.sleep(0.5 * attempt)
+    
+    def _get_table_statistics(self) -> Dict[str, Any]:
+        """
+        Obtém número de registros, arquivos e tamanho da tabela
+        
+        numFiles e sizeInBytes vêm do DESCRIBE DETAIL. O número de registros
+        vem, em ordem de preferência, de:
+        - exact: COUNT(*), apenas com exact_count=True
+        - stats: soma de numRecords das estatísticas dos arquivos ativos no
+          log de transações Delta
+        - estimate: sizeInBytes dividido pelos bytes por registro dos
+          commits recentes (DESCRIBE HISTORY)
+        
+        Returns:
+            Dict com row_count, row_count_source, num_files, size_in_bytes,
+            format e change_data_feed
+        """
+        detail = self._run_sql(f"DESCRIBE DETAIL {self.table_full_name}")[0]
+        properties = detail.get('properties') or {}
+        statistics = {
+            'row_count': None,
+            'row_count_source': self.ROW_COUNT_UNKNOWN,
+            'num_files': detail.get('numFiles'),
+            'size_in_bytes': detail.get('sizeInBytes'),
+            'format': detail.get('format'),
+            'change_data_feed': str(properties.get('delta.enableChangeDataFeed', '')).lower() == 'true'
+        }
+        
+        if self.exact_count:
+            statistics['row_count'] = self._run_sql(
+                f"SELECT COUNT(*) AS row_count FROM {self.table_full_name}"
+            )[0]['row_count']
+            statistics['row_count_source'] = self.ROW_COUNT_EXACT
+            return statistics
+        
+        # O log Delta é lido com a API de DataFrames (apenas na sessão Spark)
+        if statistics['format'] == 'delta' and detail.get('location') and self.sql_backend is None:
+            row_count = self._read_log_row_count(detail['location'])
+            if row_count is not None:
+                statistics['row_count'] = row_count
+                statistics['row_count_source'] = self.ROW_COUNT_STATS
+                return statistics
+        
+        row_count = self._estimate_row_count(statistics['size_in_bytes'])
+        if row_count is not None:
+            statistics['row_count'] = row_count
+            statistics['row_count_source'] = self.ROW_COUNT_ESTIMATE
+        
+        return statistics
+    
+    def _read_log_row_count(self, location: str) -> Optional[int]:
+        """
+        Soma numRecords dos arquivos ativos a partir do log de transações Delta
+        
+        Lê o último checkpoint e os commits JSON posteriores (apenas o log,
+        nunca os dados) e mantém a ação mais recente de cada arquivo. Linhas
+        marcadas em deletion vectors (deletionVector.cardinality) são
+        descontadas. Retorna None se o log não puder ser lido ou se algum
+        arquivo ativo não tiver estatísticas.
+        """
+        try:
+            from pyspark.sql import functions as F
+            from pyspark.sql.window import Window
+            
+            spark = self._get_spark()
+            log_dir = f"{location.rstrip('/')}/_delta_log"
+            
+            def file_actions(df, version_column):
+                # Checkpoints e commits têm structs add/remove com campos diferentes
+                add_path = F.col('add.path') if 'add' in df.columns else F.lit(None)
+                remove_path = F.col('remove.path') if 'remove' in df.columns else F.lit(None)
+                stats = F.col('add.stats') if 'add' in df.columns else F.lit(None)
+                has_dv = 'add' in df.columns and 'deletionVector' in df.schema['add'].dataType.fieldNames()
+                deleted = F.col('add.deletionVector.cardinality') if has_dv else F.lit(None)
+                return (df
+                    .select(version_column.alias('version'),
+                            F.coalesce(add_path, remove_path).alias('path'),
+                            add_path.isNotNull().alias('is_add'),
+                            stats.cast('string').alias('stats'),
+                            deleted.cast('long').alias('deleted_records'))
+                    .where(F.col('path').isNotNull()))
+            
+            checkpoint_version = -1
+            actions = None
+            try:
+                checkpoint_version = spark.read.json(f"{log_dir}/_last_checkpoint").first()['version']
+                checkpoint = spark.read.parquet(f"{log_dir}/{checkpoint_version:020d}.checkpoint*.parquet")
+                actions = file_actions(checkpoint, F.lit(checkpoint_version).cast('long'))
+            except Exception:
+                checkpoint_version = -1  # Sem checkpoint: todos os commits JSON
+            
+            commits = spark.read.json(f"{log_dir}/*.json")
+            commit_version = F.regexp_extract(F.input_file_name(), r'(\d+)\.json$', 1).cast('long')
+            commit_actions = file_actions(commits, commit_version).where(F.col('version') > checkpoint_version)
+            actions = commit_actions if actions is None else actions.unionByName(commit_actions)
+            
+            # Deletion vector atualizado: remove e add do mesmo arquivo no mesmo commit (vale o add)
+            latest = Window.partitionBy('path').orderBy(F.col('version').desc(), F.col('is_add').desc())
+            active = (actions
+                .withColumn('rank', F.row_number().over(latest))
+                .where((F.col('rank') == 1) & F.col('is_add'))
+                .withColumn('num_records', F.get_json_object('stats', '$.numRecords').cast('long')))
             
-            # Obter schema da tabela
-            table_df = spark.table(self.table_full_name)
-            schema_info = table_df.schema
+            totals = active.agg(
+                F.sum('num_records').alias('row_count'),
+                F.sum(F.coalesce(F.col('deleted_records'), F.lit(0))).alias('deleted_records'),
+                F.sum(F.col('num_records').isNull().cast('int')).alias('missing_stats')
+            ).first()
+            
+            if totals['missing_stats']:
+                return None
+            return int(totals['row_count'] or 0) - int(totals['deleted_records'] or 0)
+        
+        except Exception as e:
+            print(f"⚠️ Estatísticas do log Delta indisponíveis: {str(e)}")
+            return None
+    
+    def _estimate_row_count(self, size_in_bytes: Optional[int]) -> Optional[int]:
+        """Estima registros pelo tamanho da tabela e bytes por registro dos commits recentes"""
+        if not size_in_bytes:
+            return 0 if size_in_bytes == 0 else None
+        
+        try:
+            history = self._run_sql(
+                f"DESCRIBE HISTORY {self.table_full_name} LIMIT {self.HISTORY_SAMPLE_SIZE}"
+            )
+        except Exception as e:
+            print(f"⚠️ Histórico da tabela indisponível: {str(e)}")
+            return None
+        
+        return self._rows_from_history(size_in_bytes, history)
+    
+    @staticmethod
+    def _rows_from_history(size_in_bytes: int, history: List[Dict[str, Any]]) -> Optional[int]:
+        """Aplica a razão registros/bytes das escritas do histórico ao tamanho atual"""
+        written_rows = 0
+        written_bytes = 0
+        for commit in history:
+            metrics = commit.get('operationMetrics') or {}
+            rows = metrics.get('numOutputRows')
+            output_bytes = metrics.get('numOutputBytes')
+            if rows is not None and output_bytes:
+                written_rows += int(rows)
+                written_bytes += int(output_bytes)
+        
+        if not written_bytes:
+            return None
+        return int(round(size_in_bytes * written_rows / written_bytes))
+    
+    def _classify_columns(self, columns_analysis: List[Dict[str, Any]]) -> None:
+        """Atribui categoria e tags da política a cada coluna (usa o perfil, se houver)"""
+        for column_info in columns_analysis:
+            classification = self.classifier.classify(column_info)
+            column_info['category'] = classification['category']
+            column_info['classification_tags'] = classification['tags']
+    
+    def _settings_fingerprint(self) -> str:
+        """Hash das opções que alteram a análise (uma análise em cache só vale para as mesmas opções)"""
+        settings = {
+            'exact_count': self.exact_count,
+            'profile_columns': self.profile_columns,
+            'profile_sample_percent': self.profiler.sample_percent,
+            'profile_top_k': self.profiler.top_k,
+            'detect_pii': self.detect_pii,
+            'pii_sample_rows': self.pii_detector.sample_rows,
+            'pii_threshold': self.pii_detector.threshold,
+            'classification_policy': self.classifier.fingerprint
+        }
+        canonical = json.dumps(settings, sort_keys=True)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def _analyze_table_structure(self, schema_columns: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Analisa a estrutura da tabela para gerar metadados inteligentes
+        
+        Com o cache ativo, a análise da versão Delta atual é reaproveitada sem
+        consultar a tabela (cache_status 'hit'); se a versão mudou apenas por
+        acréscimo de dados, só os registros novos são perfilados
+        ('incremental'); caso contrário a tabela é analisada do zero ('miss').
+        Análises feitas com outras opções (contagem, perfil, dados pessoais ou
+        política de classificação) não são reaproveitadas.
+        
+        Args:
+            schema_columns: Colunas já conhecidas ({name, type, nullable}, ex:
+                lidas do information_schema); se None, o schema vem de spark.table
+        """
+        try:
+            cache = self._get_profile_cache()
+            version = self._get_table_version() if cache else None
+            settings_fingerprint = self._settings_fingerprint()
+            
+            if version is not None:
+                cached = cache.get(self.table_full_name, version)
+                if cached and cached.get('settings_fingerprint') == settings_fingerprint:
+                    print(f"♻️ Análise em cache para a versão {version} de {self.table_full_name}")
+                    cached['cache_status'] = 'hit'
+                    return cached
             
             # Analisar colunas
             columns_analysis = []
-            for field in schema_info.fields:
-                column_info = {
-                    'name': field.name,
-                    'type': str(field.dataType),
-                    'nullable': field.nullable,
-                    'metadata': field.metadata if field.metadata else {}
-                }
-                
-                # Categorizar tipo de dados
-                if field.name.lower().endswith('_id') or field.name.lower() == 'id':
-                    column_info['category'] = 'identifier'
-                elif field.name.lower() in ['created_at', 'updated_at', 'timestamp', 'date']:
-                    column_info['category'] = 'temporal'
-                elif field.name.lower() in ['email', 'phone', 'cpf', 'cnpj']:
-                    column_info['category'] = 'personal_data'
-                elif 'amount' in field.name.lower() or 'price' in field.name.lower() or 'value' in field.name.lower():
-                    column_info['category'] = 'financial'
-                else:
-                    column_info['category'] = 'general'
-                
-                columns_analysis.append(column_info)
+            if schema_columns is not None:
+                for column in schema_columns:
+                    columns_analysis.append({
+                        'name': column['name'],
+                        'type': column['type'],
+                        'nullable': column.get('nullable', True),
+                        'metadata': {}
+                    })
+                schema_json = json.dumps(
+                    [[column['name'], column['type'], column.get('nullable', True)] for column in schema_columns]
+                )
+            elif self.sql_backend is not None:
+                # Sem sessão Spark: schema pelo information_schema
+                rows = self._run_sql(
+                    f"SELECT column_name, full_data_type, is_nullable "
+                    f"FROM {self.catalog_name}.information_schema.columns "
+                    f"WHERE table_schema = {self._sql_literal(self.schema_name.lower())} "
+                    f"AND table_name = {self._sql_literal(self.table_name.lower())} "
+                    f"ORDER BY ordinal_position"
+                )
+                for row in rows:
+                    columns_analysis.append({
+                        'name': row['column_name'],
+                        'type': row['full_data_type'],
+                        'nullable': str(row['is_nullable']).upper() in ['YES', 'TRUE'],
+                        'metadata': {}
+                    })
+                schema_json = json.dumps(
+                    [[column['name'], column['type'], column['nullable']] for column in columns_analysis]
+                )
+            else:
+                # Obter schema da tabela (sem ler os dados)
+                schema_info = self._get_spark().table(self.table_full_name).schema
+                for field in schema_info.fields:
+                    columns_analysis.append({
+                        'name': field.name,
+                        'type': str(field.dataType),
+                        'nullable': field.nullable,
+                        'metadata': field.metadata if field.metadata else {}
+                    })
+                schema_json = schema_info.json()
             
-            # Obter estatísticas básicas da tabela
-            row_count = table_df.count()
+            self._classify_columns(columns_analysis)
             
-            return {
-                'row_count': row_count,
+            # Obter estatísticas básicas da tabela pelos metadados
+            table_statistics = self._get_table_statistics()
+            
+            previous = cache.latest(self.table_full_name, before_version=version) if version is not None else None
+            if previous and previous.get('settings_fingerprint') != settings_fingerprint:
+                previous = None
+            
+            profile = None
+            if self.profile_columns:
+                base_version = self._incremental_base_version(
+                    previous, version, schema_json, table_statistics['change_data_feed']
+                )
+                profile = self._profile_columns(columns_analysis, previous if base_version is not None else None,
+                                                base_version, version)
+            
+            pii_columns = self._detect_pii(columns_analysis) if self.detect_pii else []
+            
+            table_analysis = {
+                'profile': profile,
+                'pii_columns': pii_columns,
+                'row_count': table_statistics['row_count'] or 0,
+                'row_count_source': table_statistics['row_count_source'],
+                'num_files': table_statistics['num_files'],
+                'size_in_bytes': table_statistics['size_in_bytes'],
                 'column_count': len(columns_analysis),
                 'columns': columns_analysis,
-                'schema_json': schema_info.json()
+                'schema_json': schema_json,
+                'table_version': version,
+                'settings_fingerprint': settings_fingerprint,
+                'cache_status': 'incremental' if profile and profile.get('incremental_from') is not None else 'miss'
             }
             
+            if version is not None:
+                cache.put(self.table_full_name, version, table_analysis)
+            
+            return table_analysis
+            
         except Exception as e:
             print(f"⚠️ Erro ao analisar estrutura da tabela: {str(e)}")
             return {
@@ -83,11 +651,183 @@ class GenieAssistant:
                 'error': str(e)
             }
     
+    def _incremental_base_version(
+        self,
+        previous: Optional[Dict[str, Any]],
+        version: Optional[int],
+        schema_json: str,
+        change_data_feed: bool
+    ) -> Optional[int]:
+        """
+        Versão da análise anterior a partir da qual o perfil pode ser incremental
+        
+        Requer Change Data Feed ativo, o mesmo schema, perfil anterior sem
+        amostragem e apenas commits de acréscimo (ou sem alteração de dados)
+        desde a versão analisada. Retorna None quando é preciso perfilar do zero.
+        """
+        if not (previous and previous.get('profile') and change_data_feed and version is not None):
+            return None
+        if self.profiler.sample_percent is not None or previous['profile'].get('sampled'):
+            return None
+        if previous.get('schema_json') != schema_json:
+            return None
+        
+        base_version = previous.get('table_version')
+        if base_version is None or base_version >= version:
+            return None
+        
+        history = self._run_sql(f"DESCRIBE HISTORY {self.table_full_name} LIMIT {version - base_version}")
+        commits = [commit for commit in history if commit['version'] > base_version]
+        if len(commits) != version - base_version or not all(self._is_append_only(commit) for commit in commits):
+            return None
+        return base_version
+    
+    @classmethod
+    def _is_append_only(cls, commit: Dict[str, Any]) -> bool:
+        """Indica se o commit apenas acrescentou registros (ou não alterou dados)"""
+        operation = commit.get('operation')
+        parameters = commit.get('operationParameters') or {}
+        
+        if operation in cls.DATA_NEUTRAL_OPERATIONS:
+            return True
+        if operation == 'WRITE':
+            return parameters.get('mode') == 'Append'
+        if operation == 'STREAMING UPDATE':
+            return parameters.get('outputMode') == 'Append'
+        return False
+    
+    @staticmethod
+    def _stored_profile(table_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Reconstrói o perfil (formato do ColumnProfiler) de uma análise em cache"""
+        return {
+            'profiled_rows': table_analysis['profile']['profiled_rows'],
+            'sampled': table_analysis['profile']['sampled'],
+            'sample_percent': table_analysis['profile']['sample_percent'],
+            'columns': {col['name']: col['profile'] for col in table_analysis['columns'] if col.get('profile')}
+        }
+    
+    def _profile_columns(
+        self,
+        columns_analysis: List[Dict[str, Any]],
+        previous: Optional[Dict[str, Any]] = None,
+        base_version: Optional[int] = None,
+        version: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Calcula o perfil das colunas e o incorpora à análise de cada coluna
+        
+        Com uma análise anterior e base_version, perfila apenas os registros
+        inseridos depois de base_version (table_changes) e combina com o perfil
+        anterior; se a leitura incremental falhar, perfila a tabela inteira.
+        
+        Colunas genéricas de texto com poucos distintos passam à categoria
+        'categorical'. Falhas no perfil não interrompem a análise.
+        
+        Returns:
+            Resumo do perfil (registros perfilados, amostragem e versão base
+            do incremental) ou None
+        """
+        profile = None
+        incremental_from = None
+        
+        if previous is not None and base_version is not None:
+            try:
+                print(f"📐 Perfil incremental das versões {base_version + 1}-{version} (Change Data Feed)...")
+                changes = f"table_changes('{self.table_full_name}', {base_version + 1}, {version})"
+                appended = ColumnProfiler(top_k=self.profiler.top_k).profile(
+                    self._run_sql, changes, columns_analysis, where="_change_type = 'insert'"
+                )
+                profile = ColumnProfiler.merge(self._stored_profile(previous), appended, top_k=self.profiler.top_k)
+                incremental_from = base_version
+            except Exception as e:
+                print(f"⚠️ Perfil incremental indisponível, perfilando a tabela inteira: {str(e)}")
+        
+        if profile is None:
+            try:
+                print(f"📐 Calculando perfil de {len(columns_analysis)} colunas (uma leitura)...")
+                profile = self.profiler.profile(self._run_sql, self.table_full_name, columns_analysis)
+            except Exception as e:
+                print(f"⚠️ Perfil das colunas indisponível: {str(e)}")
+                return None
+        
+        for column_info in columns_analysis:
+            column_info['profile'] = profile['columns'].get(column_info['name'])
+        # Regras da política com condições de perfil (ex: categóricos)
+        self._classify_columns(columns_analysis)
+        
+        return {
+            'profiled_rows': profile['profiled_rows'],
+            'sampled': profile['sampled'],
+            'sample_percent': profile['sample_percent'],
+            'incremental_from': incremental_from
+        }
+    
+    def _detect_pii(self, columns_analysis: List[Dict[str, Any]]) -> List[str]:
+        """
+        Procura dados pessoais no conteúdo das colunas de texto
+        
+        Colunas reconhecidas passam à categoria 'personal_data' e recebem
+        'pii' com o tipo e a proporção da amostra reconhecida. Falhas na
+        detecção não interrompem a análise.
+        
+        Returns:
+            Nomes das colunas reconhecidas
+        """
+        try:
+            print(f"🔎 Procurando dados pessoais em até {self.pii_detector.sample_rows:,} linhas...")
+            detections = self.pii_detector.detect(self._run_sql_arrow, self.table_full_name, columns_analysis)
+        except Exception as e:
+            print(f"⚠️ Detecção de dados pessoais indisponível: {str(e)}")
+            return []
+        
+        detected = []
+        for column_info in columns_analysis:
+            detection = detections.get(column_info['name'])
+            if detection and detection['pii_type']:
+                column_info['pii'] = {'type': detection['pii_type'], 'confidence': detection['confidence']}
+                column_info['category'] = 'personal_data'
+                detected.append(column_info['name'])
+        
+        if detected:
+            print(f"   🔐 Dados pessoais em: {', '.join(detected)}")
+        return detected
+    
+    @staticmethod
+    def _is_sensitive(column_info: Dict[str, Any]) -> bool:
+        """Coluna com dados pessoais (pela classificação ou pelo conteúdo)"""
+        return column_info.get('category') == 'personal_data' or bool(column_info.get('pii'))
+    
+    @staticmethod
+    def _describe_column_profile(column_profile: Dict[str, Any], sensitive: bool = False) -> str:
+        """
+        Resumo textual do perfil de uma coluna
+        
+        Para colunas sensíveis apenas nulos, distintos e comprimento são
+        descritos: valores da amostra (mín/máx e frequentes) nunca vão para
+        comentários ou descrições.
+        """
+        parts = [f"{column_profile['null_ratio']:.1%} nulos"]
+        
+        if 'distinct_count' in column_profile:
+            parts.append(f"~{column_profile['distinct_count']:,} distintos")
+        if (not sensitive and column_profile.get('min') is not None
+                and column_profile['kind'] != ColumnProfiler.KIND_STRING):
+            parts.append(f"de {column_profile['min']} a {column_profile['max']}")
+        if column_profile.get('avg_length') is not None:
+            parts.append(f"comprimento médio {column_profile['avg_length']:.1f}")
+        
+        top_values = [] if sensitive else [str(entry['value']) for entry in column_profile.get('top_values', [])[:3]]
+        if top_values and column_profile.get('distinct_count', 0) <= 1000:
+            parts.append(f"frequentes: {', '.join(top_values)}")
+        
+        return ", ".join(parts)
+    
     def _generate_table_description(self, table_analysis: Dict[str, Any]) -> str:
         """Gera descrição inteligente da tabela baseada na análise"""
         
         columns = table_analysis.get('columns', [])
         row_count = table_analysis.get('row_count', 0)
+        row_count_label = self._row_count_label(table_analysis)
         
         # Identificar tipos de colunas
         identifiers = [col['name'] for col in columns if col.get('category') == 'identifier']
@@ -99,7 +839,7 @@ class GenieAssistant:
 📊 Tabela: {self.table_full_name}
 
 📋 Resumo:
-• Total de registros: {row_count:,}
+• Total de registros: {row_count:,}{row_count_label}
 • Total de colunas: {len(columns)}
 • Schema: {self.schema_name}
 • Catálogo: {self.catalog_name}
@@ -134,12 +874,32 @@ class GenieAssistant:
             if category != 'general':
                 description += f"• {category.replace('_', ' ').title()}: {len(cols)} colunas\n"
         
+        profiled = [col for col in columns if col.get('profile')]
+        if profiled:
+            profile = table_analysis.get('profile') or {}
+            sample_note = f" (amostra de {profile['sample_percent']}%)" if profile.get('sampled') else ""
+            description += f"\n📐 Perfil das Colunas{sample_note}:\n"
+            for col in profiled[:self.MAX_PROFILED_COLUMNS_IN_DESCRIPTION]:
+                description += f"• {col['name']}: {self._describe_column_profile(col['profile'], self._is_sensitive(col))}\n"
+            if len(profiled) > self.MAX_PROFILED_COLUMNS_IN_DESCRIPTION:
+                description += f"• ... e mais {len(profiled) - self.MAX_PROFILED_COLUMNS_IN_DESCRIPTION} colunas\n"
+        
+        # Sem data/hora: o comentário só muda quando a tabela muda
         description += f"""
-🔧 Gerado automaticamente pelo Dino SDK em {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+🔧 Gerado automaticamente pelo Dino SDK
 """
         
         return description.strip()
     
+    def _row_count_label(self, table_analysis: Dict[str, Any]) -> str:
+        """Sufixo que indica quando o número de registros não é exato"""
+        source = table_analysis.get('row_count_source', self.ROW_COUNT_EXACT)
+        if source == self.ROW_COUNT_ESTIMATE:
+            return " (estimativa)"
+        if source == self.ROW_COUNT_UNKNOWN:
+            return " (indisponível)"
+        return ""
+    
     def _create_genie_room_config(self, table_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Cria configuração para sala Genie"""
         
@@ -150,14 +910,14 @@ class GenieAssistant:
             "room_name": self.genie_room_name,
             "display_name": f"Análise de {self.table_name.title()}",
             "description": description,
-            "sql_warehouse_id": None,  # Será preenchido dinamicamente
+            "sql_warehouse_id": self._select_warehouse(table_analysis),
             "instructions": f"""
 Você é um assistente especializado em análise da tabela {self.table_full_name}.
 
 Contexto da Tabela:
 - Schema: {self.schema_name} 
 - Tabela: {self.table_name}
-- Registros: {table_analysis.get('row_count', 'N/A')}
+- Registros: {table_analysis.get('row_count', 'N/A')}{self._row_count_label(table_analysis)}
 
 Suas especialidades:
 1. Responder perguntas sobre os dados desta tabela
@@ -185,16 +945,13 @@ Para consultas complexas, quebre em etapas e explique o raciocínio.
     def _apply_unity_catalog_tags(self, table_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """Aplica tags automáticas no Unity Catalog baseado na análise"""
         try:
-            from pyspark.sql import SparkSession
-            spark = SparkSession.getActiveSession()
+            current_tags = self._get_current_metadata()['table_tags']
             
-            if not spark:
-                return {'success': False, 'error': 'Spark session não encontrada'}
-            
-            # Tags automáticas baseadas na análise
+            # Tags automáticas baseadas na análise; ingestion_date é a data da
+            # primeira catalogação e não é regravada nas execuções seguintes
             auto_tags = {
                 'dino_sdk_managed': 'true',
-                'ingestion_date': datetime.now().strftime('%Y-%m-%d'),
+                'ingestion_date': current_tags.get('ingestion_date') or datetime.now().strftime('%Y-%m-%d'),
                 'data_classification': 'bronze',  # Assumindo camada bronze
                 'row_count_range': self._categorize_row_count(table_analysis.get('row_count', 0))
             }
@@ -208,26 +965,39 @@ Para consultas complexas, quebre em etapas e explique o raciocínio.
                 auto_tags['contains_pii'] = 'true'
                 auto_tags['privacy_level'] = 'sensitive'
             
+            pii_types = sorted({col['pii']['type'] for col in columns if col.get('pii')})
+            if pii_types:
+                auto_tags['pii_types'] = ','.join(pii_types)
+            
             if has_financial_data:
                 auto_tags['contains_financial'] = 'true'
                 auto_tags['compliance_required'] = 'true'
             
-            # Aplicar tags via SQL (simulado)
-            tag_statements = []
-            for tag_key, tag_value in auto_tags.items():
-                tag_sql = f"ALTER TABLE {self.table_full_name} SET TAGS ('{tag_key}' = '{tag_value}')"
-                tag_statements.append(tag_sql)
+            # Tags a partir do perfil das colunas
+            profiled = [col['profile'] for col in columns if col.get('profile')]
+            if profiled:
+                auto_tags['profiled_columns'] = str(len(profiled))
+                sparse = sum(1 for profile in profiled if profile['null_ratio'] >= self.SPARSE_NULL_RATIO)
+                if sparse:
+                    auto_tags['sparse_columns'] = str(sparse)
+                if (table_analysis.get('profile') or {}).get('sampled'):
+                    auto_tags['profile_sampled'] = 'true'
             
-            # Em ambiente real, executaria as SQL statements
-            print(f"🏷️ Aplicando {len(auto_tags)} tags automáticas...")
-            for statement in tag_statements:
+            # Apenas tags ausentes ou com valor diferente, em um único DDL
+            changed_tags = {key: value for key, value in auto_tags.items() if current_tags.get(key) != value}
+            
+            print(f"🏷️ {len(auto_tags)} tags automáticas ({len(changed_tags)} a aplicar)...")
+            if changed_tags:
+                statement = f"ALTER TABLE {self.table_full_name} SET TAGS ({self._tag_pairs(changed_tags)})"
                 print(f"   📝 {statement}")
-                # spark.sql(statement)  # Descomentaria em ambiente real
+                self._execute_ddl(statement)
+                current_tags.update(changed_tags)
             
             return {
                 'success': True,
                 'tags_applied': auto_tags,
-                'statements_executed': len(tag_statements)
+                'tags_changed': changed_tags,
+                'statements_executed': 1 if changed_tags else 0
             }
             
         except Exception as e:
@@ -286,7 +1056,8 @@ Para consultas complexas, quebre em etapas e explique o raciocínio.
                 }
             
             print(f"   ✅ {table_analysis['column_count']} colunas analisadas")
-            print(f"   ✅ {table_analysis['row_count']:,} registros encontrados")
+            print(f"   ✅ {table_analysis['row_count']:,} registros encontrados "
+                  f"(origem: {table_analysis['row_count_source']})")
             
             # 2. Criar configuração da sala Genie
             print("🏠 Criando sala Genie...")
@@ -303,8 +1074,8 @@ Para consultas complexas, quebre em etapas e explique o raciocínio.
             print("📈 Configurando linhagem de dados...")
             lineage_info = self._create_data_lineage()
             
-            # 5. Salvar configurações (em ambiente real, usaria APIs do Databricks)
-            if self._is_databricks_environment():
+            # 5. Publicar a sala (ou salvar a configuração fora do Databricks)
+            if self.genie_client is not None or self._is_databricks_environment():
                 genie_result = self._create_genie_room_via_api(genie_config)
             else:
                 genie_result = self._save_genie_configuration(genie_config)
@@ -312,12 +1083,13 @@ Para consultas complexas, quebre em etapas e explique o raciocínio.
             # 6. Aplicar comentários na tabela
             self._apply_table_comments(table_analysis)
             
-            room_url = f"https://your-workspace.cloud.databricks.com/genie/rooms/{genie_result.get('room_id', 'generated')}"
-            
             return {
                 'success': True,
                 'room_name': self.genie_room_name,
-                'room_url': room_url,
+                'room_id': genie_result.get('room_id'),
+                'room_url': genie_result.get('room_url'),
+                'room_action': genie_result.get('action'),
+                'warehouse_selection': self.warehouse_selection,
                 'catalog_status': 'completed',
                 'tags_applied': tagging_result.get('tags_applied', {}),
                 'lineage_configured': True,
@@ -331,6 +1103,67 @@ Para consultas complexas, quebre em etapas e explique o raciocínio.
                 'error': f"Erro na configuração do Genie: {str(e)}"
             }
     
+    def catalog_table(
+        self,
+        schema_columns: Optional[List[Dict[str, Any]]] = None,
+        genie_room: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Cataloga a tabela no Unity Catalog (análise, tags e comentários)
+        
+        Args:
+            schema_columns: Colunas já conhecidas (ver _analyze_table_structure)
+            genie_room: Se True, também cria ou atualiza a sala Genie via API
+        
+        Returns:
+            Dict com resultado, origem da análise e tempo gasto; falhas nos
+            comentários (inclusive de colunas isoladas) marcam success False,
+            com error e failed_columns
+        """
+        started = time.monotonic()
+        try:
+            table_analysis = self._analyze_table_structure(schema_columns)
+            if table_analysis.get('error'):
+                raise Exception(f"Erro na análise da tabela: {table_analysis['error']}")
+            
+            tagging_result = self._apply_unity_catalog_tags(table_analysis)
+            if not tagging_result['success']:
+                raise Exception(tagging_result['error'])
+            comments_result = self._apply_table_comments(table_analysis)
+            
+            room_result = None
+            if genie_room:
+                room_result = self._create_genie_room_via_api(self._create_genie_room_config(table_analysis))
+                room_result['warehouse_selection'] = self.warehouse_selection
+            
+            failed_columns = comments_result.get('failed_columns', {})
+            result = {
+                'success': comments_result['success'],
+                'table': self.table_full_name,
+                'row_count': table_analysis['row_count'],
+                'row_count_source': table_analysis.get('row_count_source'),
+                'column_count': table_analysis['column_count'],
+                'cache_status': table_analysis.get('cache_status'),
+                'tags_applied': tagging_result.get('tags_applied', {}),
+                'statements_executed': tagging_result['statements_executed'] + comments_result.get('statements_executed', 0),
+                'genie_room': room_result,
+                'failed_columns': failed_columns,
+                'elapsed_seconds': round(time.monotonic() - started, 3)
+            }
+            if not comments_result['success']:
+                result['error'] = comments_result.get('error') or (
+                    f"Falha ao atualizar {len(failed_columns)} colunas: {', '.join(sorted(failed_columns))}"
+                )
+            return result
+        
+        except Exception as e:
+            return {
+                'success': False,
+                'table': self.table_full_name,
+                'error': str(e),
+                'elapsed_seconds': round(time.monotonic() - started, 3)
+            }
+    
     def _is_databricks_environment(self) -> bool:
         """Verifica se está em ambiente Databricks"""
         try:
@@ -343,19 +1176,15 @@ Para consultas complexas, quebre em etapas e explique o raciocínio.
             return False
     
     def _create_genie_room_via_api(self, genie_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Cria sala Genie via API do Databricks"""
+        """Cria ou atualiza a sala Genie via API do Databricks (idempotente)"""
         try:
-            # Em ambiente real, usaria a API do Databricks Genie
-            import random
-            room_id = f"room_{random.randint(100000, 999999)}"
-            
-            print(f"🔧 Criando sala Genie via API...")
-            print(f"🏠 Room ID: {room_id}")
-            
-            # Aqui seria feita a chamada real para API do Genie
+            space = self._get_genie_client().ensure_space(genie_config)
             
             return {
-                'room_id': room_id,
+                'room_id': space['space_id'],
+                'room_url': space['room_url'],
+                'action': space['action'],
+                'config_hash': space['config_hash'],
                 'created_via': 'api'
             }
             
@@ -377,49 +1206,106 @@ Para consultas complexas, quebre em etapas e explique o raciocínio.
             'created_via': 'file'
         }
     
-    def _apply_table_comments(self, table_analysis: Dict[str, Any]) -> None:
-        """Aplica comentários inteligentes na tabela e colunas"""
+    def _column_comment(self, column_info: Dict[str, Any]) -> str:
+        """Comentário da coluna pela descrição da categoria na política e pelo perfil"""
+        category = column_info.get('category', self.classifier.default_category)
+        comment = f"{self.classifier.describe(category)} - {column_info['name']}"
+        
+        if column_info.get('profile'):
+            comment += f" ({self._describe_column_profile(column_info['profile'], self._is_sensitive(column_info))})"
+        if column_info.get('pii'):
+            pii = column_info['pii']
+            comment += f" [{pii['type']} em {pii['confidence']:.0%} da amostra]"
+        return comment
+    
+    def _column_tags(self, column_info: Dict[str, Any]) -> Dict[str, str]:
+        """Tags da coluna (categoria, exceto a padrão, tags da política e tipo de dado pessoal)"""
+        category = column_info.get('category', self.classifier.default_category)
+        tags = {'dino_category': category} if category != self.classifier.default_category else {}
+        tags.update(column_info.get('classification_tags') or {})
+        if column_info.get('pii'):
+            tags['pii_type'] = column_info['pii']['type']
+        return tags
+    
+    def _apply_table_comments(self, table_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Aplica comentários inteligentes e tags de categoria na tabela e colunas
+        
+        Apenas comentários e tags diferentes dos atuais são aplicados. Cada
+        coluna alterada recebe no máximo um DDL de comentário e um de tags, e
+        até ddl_max_workers colunas são atualizadas ao mesmo tempo.
+        
+        Returns:
+            Dict com DDLs executados, colunas atualizadas e falhas por coluna
+        """
         try:
-            from pyspark.sql import SparkSession
-            spark = SparkSession.getActiveSession()
-            
-            if not spark:
-                return
+            current = self._get_current_metadata()
+            statements_executed = 0
             
             # Comentário da tabela
             table_description = self._generate_table_description(table_analysis)
-            table_comment_sql = f"""
-                COMMENT ON TABLE {self.table_full_name} IS '{table_description.replace("'", "''")}'
-            """
+            if current['table_comment'] != table_description:
+                print(f"💬 Aplicando comentário na tabela...")
+                self._execute_ddl(f"COMMENT ON TABLE {self.table_full_name} IS {self._sql_literal(table_description)}")
+                current['table_comment'] = table_description
+                statements_executed += 1
+            
+            # Comentários e tags das colunas (apenas as diferenças)
+            updates = []
+            for col in table_analysis.get('columns', []):
+                col_name = col['name']
+                comment = self._column_comment(col)
+                current_tags = current['column_tags'].get(col_name, {})
+                changed_tags = {
+                    key: value for key, value in self._column_tags(col).items() if current_tags.get(key) != value
+                }
+                if current['column_comments'].get(col_name) != comment or changed_tags:
+                    updates.append((
+                        col_name,
+                        comment if current['column_comments'].get(col_name) != comment else None,
+                        changed_tags
+                    ))
+            
+            def update_column(col_name: str, comment: Optional[str], tags: Dict[str, str]) -> int:
+                target = f"ALTER TABLE {self.table_full_name} ALTER COLUMN {self._quote_identifier(col_name)}"
+                executed = 0
+                if comment is not None:
+                    self._execute_ddl(f"{target} COMMENT {self._sql_literal(comment)}")
+                    current['column_comments'][col_name] = comment
+                    executed += 1
+                if tags:
+                    self._execute_ddl(f"{target} SET TAGS ({self._tag_pairs(tags)})")
+                    current['column_tags'].setdefault(col_name, {}).update(tags)
+                    executed += 1
+                return executed
             
-            print(f"💬 Aplicando comentário na tabela...")
-            # spark.sql(table_comment_sql)  # Descomentaria em ambiente real
+            failed_columns = {}
+            if updates:
+                with ThreadPoolExecutor(max_workers=min(self.ddl_max_workers, len(updates))) as executor:
+                    futures = {executor.submit(update_column, *update): update[0] for update in updates}
+                    for future, col_name in futures.items():
+                        try:
+                            statements_executed += future.result()
+                        except Exception as e:
+                            failed_columns[col_name] = str(e)
             
-            # Comentários nas colunas
             columns = table_analysis.get('columns', [])
-            for col in columns:
-                col_name = col['name']
-                col_category = col.get('category', 'general')
-                
-                # Gerar comentário baseado na categoria
-                if col_category == 'identifier':
-                    comment = f"Identificador único - {col_name}"
-                elif col_category == 'temporal':
-                    comment = f"Campo temporal - {col_name}"
-                elif col_category == 'personal_data':
-                    comment = f"Dados pessoais sensíveis - {col_name}"
-                elif col_category == 'financial':
-                    comment = f"Dados financeiros - {col_name}"
-                else:
-                    comment = f"Campo de dados - {col_name}"
-                
-                col_comment_sql = f"""
-                    COMMENT ON COLUMN {self.table_full_name}.{col_name} IS '{comment}'
-                """
-                
-                # spark.sql(col_comment_sql)  # Descomentaria em ambiente real
+            print(f"   ✅ {len(updates) - len(failed_columns)} colunas atualizadas, "
+                  f"{len(columns) - len(updates)} inalteradas")
+            for col_name, error in failed_columns.items():
+                print(f"   ⚠️ Coluna {col_name}: {error}")
             
-            print(f"   ✅ Comentários aplicados em {len(columns)} colunas")
+            return {
+                'success': not failed_columns,
+                'statements_executed': statements_executed,
+                'columns_updated': len(updates) - len(failed_columns),
+                'columns_unchanged': len(columns) - len(updates),
+                'failed_columns': failed_columns
+            }
             
         except Exception as e:
             print(f"⚠️ Erro ao aplicar comentários: {str(e)}")
+            return {
+                'success': False,
+                'error': f"Erro ao aplicar comentários: {str(e)}"
+            }
@@ -0,0 +1,213 @@
+"""
+Dino SDK - Genie Space Client
+Criação e atualização idempotente de salas (spaces) Genie via API REST
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+try:
+    from .databricks_client import DatabricksClient, DatabricksAPIError
+except ImportError:
+    from databricks_client import DatabricksClient, DatabricksAPIError
+
+
+class GenieSpaceClient:
+    """
+    Publica as salas Genie geradas pelo GenieAssistant
+    
+    Funcionalidades:
+    - Busca das salas existentes pelo título, com a listagem feita uma única
+      vez e mantida em memória (compartilhável entre tabelas e threads)
+    - Hash SHA-256 das entradas estáveis da sala (título, definição
+      serializada e warehouse) gravado na descrição da sala:
+      - Sala com o mesmo hash: nada é enviado (skipped)
+      - Sala com hash diferente: PATCH no lugar (updated); se a sala foi
+        removida do workspace, é criada novamente
+      - Sala inexistente: POST (created)
+    - Todas as chamadas passam pela sessão HTTP do DatabricksClient (pool
+      keep-alive, novas tentativas em 429/503; a criação só em 429)
+    """
+    
+    SPACES_API = "/api/2.0/genie/spaces"
+    
+    # Marcador do hash da configuração no fim da descrição da sala
+    CONFIG_HASH_MARKER = "dino_config_hash"
+    CONFIG_HASH_PATTERN = re.compile(r"\[dino_config_hash:([0-9a-f]{64})\]\s*$")
+    
+    def __init__(
+        self,
+        client: Optional[DatabricksClient] = None,
+        warehouse_id: Optional[str] = None,
+        parent_path: Optional[str] = None,
+        page_size: int = 100
+    ):
+        """
+        Inicializa o cliente
+        
+        Args:
+            client: Cliente REST do workspace (padrão: DATABRICKS_HOST/DATABRICKS_TOKEN)
+            warehouse_id: SQL warehouse das salas quando a configuração não
+                informa sql_warehouse_id (padrão: variável DINO_WAREHOUSE_ID)
+            parent_path: Pasta do workspace onde as salas são criadas
+            page_size: Salas por página na listagem
+        """
+        self.client = client or DatabricksClient()
+        self.warehouse_id = warehouse_id or os.getenv("DINO_WAREHOUSE_ID")
+        self.parent_path = parent_path
+        self.page_size = page_size
+        
+        self._spaces: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.RLock()
+        # Um lock por título evita criar a mesma sala duas vezes em paralelo
+        self._title_locks: Dict[str, threading.Lock] = {}
+    
+    def config_hash(self, genie_config: Dict[str, Any]) -> str:
+        """
+        Hash SHA-256 da sala: título, definição serializada e warehouse
+        
+        A descrição fica de fora: ela é texto de apresentação e não deve, por
+        si só, provocar uma atualização da sala.
+        """
+        stable = {
+            'title': genie_config['room_name'],
+            'serialized_space': self.serialize_space(genie_config),
+            'warehouse_id': genie_config.get('sql_warehouse_id') or self.warehouse_id
+        }
+        canonical = json.dumps(stable, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def stored_hash(cls, space: Dict[str, Any]) -> Optional[str]:
+        """Hash gravado na descrição de uma sala (None se não gerenciada)"""
+        match = cls.CONFIG_HASH_PATTERN.search(space.get('description') or '')
+        return match.group(1) if match else None
+    
+    def list_spaces(self, refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Salas do workspace por título (listagem completa feita uma vez)
+        
+        Args:
+            refresh: Se True, descarta a listagem em memória e busca novamente
+        """
+        with self._lock:
+            if self._spaces is None or refresh:
+                spaces = {}
+                params = {'page_size': self.page_size}
+                while True:
+                    data = self.client.get(self.SPACES_API, params=params)
+                    for space in data.get('spaces', []):
+                        spaces.setdefault(space.get('title'), space)
+                    
+                    next_page_token = data.get('next_page_token')
+                    if not next_page_token:
+                        break
+                    params['page_token'] = next_page_token
+                self._spaces = spaces
+            return self._spaces
+    
+    def find_space(self, title: str) -> Optional[Dict[str, Any]]:
+        """Sala com o título informado (None se não existir)"""
+        return self.list_spaces().get(title)
+    
+    def serialize_space(self, genie_config: Dict[str, Any]) -> str:
+        """Definição serializada da sala: tabelas e instruções"""
+        tables = [
+            {'identifier': f"{table['catalog_name']}.{table['schema_name']}.{table['table_name']}"}
+            for table in genie_config.get('table_identifiers', [])
+        ]
+        space = {
+            'version': 1,
+            'data_sources': {'tables': tables}
+        }
+        instructions = (genie_config.get('instructions') or '').strip()
+        if instructions:
+            space['instructions'] = {'text_instructions': [{'content': [instructions]}]}
+        return json.dumps(space, ensure_ascii=False)
+    
+    def space_url(self, space_id: str) -> str:
+        """URL da sala no workspace"""
+        return f"{self.client.host}/genie/rooms/{space_id}"
+    
+    def _payload(self, genie_config: Dict[str, Any], config_hash: str) -> Dict[str, Any]:
+        """Corpo das chamadas de criação e atualização"""
+        warehouse_id = genie_config.get('sql_warehouse_id') or self.warehouse_id
+        if not warehouse_id:
+            raise ValueError("SQL warehouse da sala não informado (sql_warehouse_id ou DINO_WAREHOUSE_ID)")
+        
+        description = (genie_config.get('description') or '').strip()
+        payload = {
+            'title': genie_config['room_name'],
+            'description': f"{description}\n\n[{self.CONFIG_HASH_MARKER}:{config_hash}]".lstrip(),
+            'warehouse_id': warehouse_id,
+            'serialized_space': self.serialize_space(genie_config)
+        }
+        if self.parent_path:
+            payload['parent_path'] = self.parent_path
+        return payload
+    
+    def _title_lock(self, title: str) -> threading.Lock:
+        with self._lock:
+            return self._title_locks.setdefault(title, threading.Lock())
+    
+    def ensure_space(self, genie_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Cria ou atualiza a sala de forma idempotente
+        
+        Args:
+            genie_config: Configuração gerada pelo GenieAssistant (room_name,
+                description, instructions, table_identifiers, sql_warehouse_id)
+        
+        Raises:
+            ValueError: Nenhum SQL warehouse informado
+            DatabricksAPIError: Erro da API (após as novas tentativas)
+        
+        Returns:
+            Dict com space_id, action (created, updated ou skipped), room_url
+            e config_hash
+        """
+        title = genie_config['room_name']
+        config_hash = self.config_hash(genie_config)
+        
+        with self._title_lock(title):
+            existing = self.find_space(title)
+            action = 'created'
+            space = None
+            
+            if existing and self.stored_hash(existing) == config_hash:
+                action = 'skipped'
+                space = existing
+            else:
+                payload = self._payload(genie_config, config_hash)
+                if existing:
+                    try:
+                        response = self.client.patch(f"{self.SPACES_API}/{existing['space_id']}", payload)
+                        space = {**existing, **payload, **response}
+                        action = 'updated'
+                    except DatabricksAPIError as e:
+                        if not e.is_not_found:
+                            raise
+                
+                if space is None:
+                    space = {**payload, **self.client.post(self.SPACES_API, payload)}
+                # A descrição com o novo hash vale para as próximas chamadas
+                space['description'] = payload['description']
+                
+                with self._lock:
+                    self.list_spaces()[title] = space
+        
+        icons = {'created': '🆕', 'updated': '🔁', 'skipped': '⏭️'}
+        print(f"{icons[action]} Sala Genie {title} ({space['space_id']}): {action}")
+        
+        return {
+            'space_id': space['space_id'],
+            'action': action,
+            'room_url': self.space_url(space['space_id']),
+            'config_hash': config_hash,
+            'timestamp': datetime.now().isoformat()
+        }
@@ -4,29 +4,47 @@ Dino SDK - Ingestion Engine
 Motor de ingestão batch para Databricks com Unity Catalog
 """
 
+import hashlib
+import json
 import os
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from pathlib import Path
 
+try:
+    from .ingestion_estimator import IngestionEstimator
+    from .fixed_width import FixedWidthLayout
+    from .job_submitter import JobSubmitter
+except ImportError:
+    from ingestion_estimator import IngestionEstimator
+    from fixed_width import FixedWidthLayout
+    from job_submitter import JobSubmitter
+
 
 class IngestionEngine:
     """
     Motor de ingestão batch para Databricks
     
     Funcionalidades:
-    - Ingestão batch de arquivos (CSV, JSON, Parquet, Delta, Avro)
+    - Ingestão batch de arquivos (CSV, JSON, Parquet, Delta, Avro, largura fixa)
     - Integração com Unity Catalog
     - Detecção automática de formato
     - Metadados de auditoria
     - Validação de pré-requisitos
+    - Leitura incremental de tabelas Delta via Change Data Feed
+    - Execução opcional do script gerado no workspace (jobs/runs/submit)
     
     Pré-requisitos:
     - Schema de destino deve existir
     - Permissões adequadas no Unity Catalog
     """
     
+    # Serializa a leitura-alteração-escrita do índice de scripts entre threads
+    _SCRIPT_INDEX_LOCK = threading.Lock()
+    
     def __init__(
         self,
         target_schema: str,
@@ -36,7 +54,15 @@ class IngestionEngine:
         catalog_name: Optional[str] = None,
         output_mode: str = "append",
         file_format: Optional[str] = None,
-        checkpoint_location: Optional[str] = None
+        checkpoint_location: Optional[str] = None,
+        partition_columns: Optional[List[str]] = None,
+        use_change_data_feed: bool = False,
+        merge_keys: Optional[List[str]] = None,
+        cdf_state_table: Optional[str] = None,
+        source_paths: Optional[List[str]] = None,
+        spark_conf: Optional[Dict[str, str]] = None,
+        output_dir: Optional[str] = None,
+        fixed_width_layout=None
     ):
         """
         Inicializa o motor de ingestão
@@ -50,6 +76,20 @@ class IngestionEngine:
             output_mode: Modo de escrita (append, overwrite, merge)
             file_format: Formato do arquivo (detectado automaticamente se None)
             checkpoint_location: Localização do checkpoint para streaming
+            partition_columns: Colunas de particionamento da tabela de destino
+            use_change_data_feed: Se True (apenas formato delta), lê somente as
+                mudanças desde a última versão processada via Change Data Feed
+            merge_keys: Colunas chave usadas no MERGE das mudanças (obrigatório com CDF)
+            cdf_state_table: Tabela que guarda a última versão processada por destino
+                (padrão: <catalogo>.<schema>._dino_cdf_state)
+            source_paths: Lista explícita de arquivos/diretórios a ler em uma única
+                leitura (ex: um bloco de partições de data em um backfill);
+                file_path passa a ser apenas a origem registrada na auditoria
+            spark_conf: Configurações Spark aplicadas no início do script gerado
+            output_dir: Diretório dos scripts gerados (padrão: variável
+                DINO_OUTPUT_DIR ou diretório atual)
+            fixed_width_layout: Layout das colunas para file_format='fixedwidth'
+                (lista de {name, start, length, type} ou caminho de arquivo JSON)
         """
         self.target_schema = target_schema
         self.table_name = table_name
@@ -59,6 +99,14 @@ class IngestionEngine:
         self.output_mode = output_mode
         self.file_format = file_format
         self.checkpoint_location = checkpoint_location
+        self.partition_columns = partition_columns or []
+        self.use_change_data_feed = use_change_data_feed
+        self.merge_keys = merge_keys or []
+        self.cdf_state_table = cdf_state_table or f"{self.catalog_name}.{self.target_schema}._dino_cdf_state"
+        self.source_paths = source_paths or []
+        self.spark_conf = dict(spark_conf or {})
+        self.output_dir = output_dir or os.getenv("DINO_OUTPUT_DIR", "")
+        self.fixed_width_layout = FixedWidthLayout.from_spec(fixed_width_layout) if fixed_width_layout else None
         
         # Detectar formato se não fornecido
         if not self.file_format:
@@ -80,7 +128,7 @@ class IngestionEngine:
             raise ValueError("file_path é obrigatório")
         
         # Validar formato suportado
-        supported_formats = ["csv", "json", "parquet", "delta", "avro"]
+        supported_formats = ["csv", "json", "parquet", "delta", "avro", "fixedwidth"]
         if self.file_format not in supported_formats:
             raise ValueError(f"Formato {self.file_format} não suportado. Use: {supported_formats}")
         
@@ -88,6 +136,21 @@ class IngestionEngine:
         valid_modes = ["append", "overwrite", "merge"]
         if self.output_mode not in valid_modes:
             raise ValueError(f"output_mode deve ser um de: {valid_modes}")
+        
+        # Validar Change Data Feed
+        if self.use_change_data_feed:
+            if self.file_format != "delta":
+                raise ValueError("use_change_data_feed requer file_format='delta'")
+            if not self.merge_keys:
+                raise ValueError("merge_keys é obrigatório quando use_change_data_feed=True")
+        
+        if self.file_format == "fixedwidth":
+            if not self.fixed_width_layout:
+                raise ValueError("fixed_width_layout é obrigatório para file_format='fixedwidth'")
+            self.fixed_width_layout.spark_charset()
+        
+        if self.source_paths and self.file_format == "delta":
+            raise ValueError("source_paths não é suportado para o formato delta")
     
     def _get_default_catalog(self) -> str:
         """Obtém o catálogo padrão do workspace"""
@@ -132,11 +195,12 @@ class IngestionEngine:
         
         code = f'''
 # Dino SDK - Ingestão Streaming com Auto Loader
-# Gerado automaticamente em {datetime.now().isoformat()}
 
 from pyspark.sql import SparkSession
 from pyspark.sql.functions import *
 from delta.tables import DeltaTable
+import json
+import sys
 import time
 
 # Configurações da ingestão
@@ -146,6 +210,14 @@ CHECKPOINT_LOCATION = "{self.checkpoint_location}"
 FILE_FORMAT = "{self.file_format}"
 DELIMITER = "{self.delimiter}"
 
+# Parâmetros opcionais da task do workflow (--max-files-per-trigger N, --available-now)
+MAX_FILES_PER_TRIGGER = "100"
+if "--max-files-per-trigger" in sys.argv[:-1]:
+    MAX_FILES_PER_TRIGGER = sys.argv[sys.argv.index("--max-files-per-trigger") + 1]
+
+# Disparado por chegada de arquivo: processa os pendentes e termina
+AVAILABLE_NOW = "--available-now" in sys.argv
+{self._generate_spark_conf_code()}
 print(f"🚀 Iniciando ingestão streaming com Auto Loader")
 print(f"📁 Origem: {{SOURCE_PATH}}")
 print(f"📊 Destino: {{TARGET_TABLE}}")
@@ -158,7 +230,7 @@ auto_loader_options = {{
     "cloudFiles.schemaLocation": f"{{CHECKPOINT_LOCATION}}/schema",
     "cloudFiles.useNotifications": "true",
     "cloudFiles.includeExistingFiles": "false",
-    "cloudFiles.maxFilesPerTrigger": "100"
+    "cloudFiles.maxFilesPerTrigger": MAX_FILES_PER_TRIGGER
 }}
 
 # Adicionar opções específicas para CSV
@@ -169,12 +241,17 @@ if FILE_FORMAT == "csv":
         "cloudFiles.inferSchema": "true"
     }})
 
+# Arquivos de largura fixa são lidos como texto (ou binário, decodificado
+# no charset do layout) e fatiados por posição
+if FILE_FORMAT == "fixedwidth":
+    auto_loader_options["cloudFiles.format"] = "{self._fixed_width_source_format()}"
+
 # Configurar stream de leitura
 print("📖 Configurando Auto Loader...")
 df_stream = (spark.readStream
     .format("cloudFiles")
     .options(**auto_loader_options)
-    .load(SOURCE_PATH))
+    .load(SOURCE_PATH){self._generate_fixed_width_projection(keep_file_metadata=True)})
 
 # Adicionar metadados de processamento
 df_with_metadata = (df_stream
@@ -187,7 +264,7 @@ df_with_metadata = (df_stream
     .withColumn("_dino_table_name", lit("{self.table_name}"))
     .withColumn("_dino_schema_name", lit("{self.target_schema}"))
 )
-
+{self._generate_file_metadata_drop_code()}
 print("✅ Stream configurado com metadados de auditoria")
 
 # Função para processar batch
@@ -206,17 +283,26 @@ def process_batch(batch_df, batch_id):
 
 # Configurar streaming query
 print("⚡ Iniciando streaming query...")
-query = (df_with_metadata.writeStream
+stream_writer = (df_with_metadata.writeStream
     .foreachBatch(process_batch)
-    .option("checkpointLocation", CHECKPOINT_LOCATION)
-    .trigger(availableNow=False)  # Modo contínuo
-    .start())
-
-print("🔄 Streaming em execução. Monitore os logs para acompanhar o progresso.")
-print("⏹️ Para parar, execute: query.stop()")
+    .option("checkpointLocation", CHECKPOINT_LOCATION))
 
-# Aguardar (opcional - remova se quiser que rode em background)
-# query.awaitTermination()
+if AVAILABLE_NOW:
+    query = stream_writer.trigger(availableNow=True).start()
+    query.awaitTermination()
+    print("✅ Arquivos pendentes processados")
+    
+    # Métricas lidas pelo JobSubmitter na saída da execução
+    rows_loaded = sum(progress["numInputRows"] for progress in query.recentProgress)
+    print("DINO_METRICS " + json.dumps({{"rows_loaded": rows_loaded, "target_table": TARGET_TABLE}}))
+else:
+    query = stream_writer.trigger(availableNow=False).start()  # Modo contínuo
+    
+    print("🔄 Streaming em execução. Monitore os logs para acompanhar o progresso.")
+    print("⏹️ Para parar, execute: query.stop()")
+    
+    # Aguardar (opcional - remova se quiser que rode em background)
+    # query.awaitTermination()
 '''
         return code
     
@@ -229,19 +315,19 @@ print("⏹️ Para parar, execute: query.stop()")
         
         code = f'''
 # Dino SDK - Ingestão Batch
-# Gerado automaticamente em {datetime.now().isoformat()}
 
 from pyspark.sql import SparkSession
 from pyspark.sql.functions import *
 from delta.tables import DeltaTable
+import json
 import time
 
 # Configurações da ingestão
-SOURCE_PATH = "{self.file_path}"
+SOURCE_PATH = "{self.file_path}"{self._generate_source_paths_code()}
 TARGET_TABLE = "{table_full_name}"
 FILE_FORMAT = "{self.file_format}"
 OUTPUT_MODE = "{self.output_mode}"
-
+{self._generate_spark_conf_code()}
 print(f"🚀 Iniciando ingestão batch")
 print(f"📁 Origem: {{SOURCE_PATH}}")
 print(f"📊 Destino: {{TARGET_TABLE}}")
@@ -265,7 +351,8 @@ df_with_metadata = (df_source
 )
 
 print("✅ Metadados adicionados")
-print(f"📊 Registros carregados: {{df_with_metadata.count()}}")
+rows_loaded = df_with_metadata.count()
+print(f"📊 Registros carregados: {{rows_loaded}}")
 
 # Mostrar preview dos dados
 print("👀 Preview dos dados:")
@@ -293,6 +380,9 @@ spark.sql(f"""
     ORDER BY _dino_ingestion_timestamp DESC
     LIMIT 10
 """).show(truncate=False)
+
+# Métricas lidas pelo JobSubmitter na saída da execução
+print("DINO_METRICS " + json.dumps({{"rows_loaded": rows_loaded, "target_table": TARGET_TABLE}}))
 '''
         return code
     
@@ -313,42 +403,434 @@ spark.sql(f"""
     
     def _generate_read_code(self) -> str:
         """Gera código de leitura baseado no formato"""
+        load_arg = "SOURCE_PATHS" if self.source_paths else "SOURCE_PATH"
         if self.file_format == "csv":
             return f'''df_source = (spark.read
     .format("csv")
     .option("header", "true")
     .option("inferSchema", "true")
     .option("delimiter", "{self.delimiter}")
-    .load(SOURCE_PATH))'''
+    .load({load_arg}))'''
         
         elif self.file_format == "json":
-            return '''df_source = (spark.read
+            return f'''df_source = (spark.read
     .format("json")
     .option("multiline", "true")
-    .load(SOURCE_PATH))'''
+    .load({load_arg}))'''
         
         elif self.file_format == "parquet":
-            return '''df_source = (spark.read
+            return f'''df_source = (spark.read
     .format("parquet")
-    .load(SOURCE_PATH))'''
+    .load({load_arg}))'''
         
         elif self.file_format == "delta":
+            if self.use_change_data_feed:
+                return self._generate_cdf_read_code()
             return '''df_source = (spark.read
     .format("delta")
     .load(SOURCE_PATH))'''
         
+        elif self.file_format == "fixedwidth":
+            if self._fixed_width_source_format() == "binaryFile":
+                return f'''df_source = (spark.read
+    .format("binaryFile")
+    .load({load_arg}){self._generate_fixed_width_projection()})'''
+            return f'''df_source = (spark.read
+    .text({load_arg}){self._generate_fixed_width_projection()})'''
+        
         elif self.file_format == "avro":
-            return '''df_source = (spark.read
+            return f'''df_source = (spark.read
     .format("avro")
-    .load(SOURCE_PATH))'''
+    .load({load_arg}))'''
         
         else:
             return f'''df_source = (spark.read
     .format("{self.file_format}")
-    .load(SOURCE_PATH))'''
+    .load({load_arg}))'''
+    
+    def _generate_fixed_width_projection(self, keep_file_metadata: bool = False) -> str:
+        """
+        Gera a projeção única com substring por coluna para arquivos de largura fixa
+        
+        Args:
+            keep_file_metadata: Mantém a coluna _metadata (usada pelos metadados
+                de auditoria do streaming) na projeção
+        """
+        if self.file_format != "fixedwidth":
+            return ""
+        decode = ""
+        if self._fixed_width_source_format() == "binaryFile":
+            # spark.read.text só lê UTF-8: o conteúdo binário é decodificado
+            # no charset do layout e quebrado em linhas
+            metadata = ', col("_metadata")' if keep_file_metadata else ""
+            decode = (
+                f'\n    .select(explode(split(regexp_replace('
+                f'decode(col("content"), "{self.fixed_width_layout.spark_charset()}"), '
+                f'r"\\r?\\n\\z", ""), r"\\r?\\n")).alias("value"){metadata})'
+            )
+        expressions = self.fixed_width_layout.spark_select_expressions()
+        if keep_file_metadata:
+            expressions.append("_metadata")
+        lines = ",\n".join(f'        "{expression}"' for expression in expressions)
+        return f"{decode}\n    .selectExpr(\n{lines}\n    )"
+    
+    def _fixed_width_source_format(self) -> str:
+        """Formato de leitura Spark do arquivo de largura fixa (text ou binaryFile)"""
+        if self.file_format == "fixedwidth" and self.fixed_width_layout.spark_needs_decode():
+            return "binaryFile"
+        return "text"
+    
+    def _generate_file_metadata_drop_code(self) -> str:
+        """Remove a coluna _metadata mantida na projeção de largura fixa"""
+        if self.file_format != "fixedwidth":
+            return ""
+        return 'df_with_metadata = df_with_metadata.drop("_metadata")\n'
+    
+    def _generate_spark_conf_code(self) -> str:
+        """Gera as chamadas spark.conf.set para as configurações recomendadas"""
+        if not self.spark_conf:
+            return ""
+        lines = ["", "# Configurações Spark recomendadas"]
+        for key, value in sorted(self.spark_conf.items()):
+            lines.append(f'spark.conf.set("{key}", "{value}")')
+        return "\n".join(lines) + "\n"
+    
+    def _get_normalized_config(self) -> Dict[str, Any]:
+        """Retorna a configuração do engine em forma canônica (base do hash do script)"""
+        return {
+            'catalog_name': self.catalog_name,
+            'target_schema': self.target_schema,
+            'table_name': self.table_name,
+            'file_path': self.file_path,
+            'source_paths': list(self.source_paths),
+            'file_format': self.file_format,
+            'delimiter': self.delimiter,
+            'output_mode': self.output_mode,
+            'checkpoint_location': self.checkpoint_location,
+            'partition_columns': list(self.partition_columns),
+            'use_change_data_feed': self.use_change_data_feed,
+            'merge_keys': list(self.merge_keys),
+            'cdf_state_table': self.cdf_state_table,
+            'fixed_width_layout': self.fixed_width_layout.to_dict() if self.fixed_width_layout else None,
+            'spark_conf': dict(sorted(self.spark_conf.items()))
+        }
+    
+    def build_script(self, is_automated: bool = False) -> Tuple[str, str]:
+        """
+        Gera o script completo e seu hash de conteúdo
+        
+        O hash cobre a configuração normalizada e o corpo gerado; o cabeçalho
+        com data de geração fica fora do hash para que regenerações da mesma
+        configuração produzam o mesmo hash.
+        
+        Raises:
+            ValueError: Change Data Feed combinado com is_automated
+        
+        Returns:
+            Tupla (conteúdo do script, hash)
+        """
+        if is_automated and self.use_change_data_feed:
+            raise ValueError("use_change_data_feed não é suportado na ingestão automatizada (streaming)")
+        
+        mode = "streaming" if is_automated else "batch"
+        body = self._generate_streaming_code() if is_automated else self._generate_batch_code()
+        
+        hashed_content = json.dumps(
+            {'mode': mode, 'config': self._get_normalized_config()}, sort_keys=True
+        ) + body
+        script_hash = hashlib.sha256(hashed_content.encode('utf-8')).hexdigest()
+        
+        header = (
+            f"# Gerado automaticamente em {datetime.now().isoformat()}\n"
+            f"# dino-script-hash: {script_hash}\n"
+        )
+        return header + body, script_hash
+    
+    @staticmethod
+    def _read_script_hash(script_file: str) -> Optional[str]:
+        """Lê o hash registrado no cabeçalho de um script já gerado"""
+        try:
+            with open(script_file, 'r', encoding='utf-8') as f:
+                for _ in range(5):
+                    line = f.readline()
+                    if line.startswith("# dino-script-hash:"):
+                        return line.split(":", 1)[1].strip()
+        except OSError:
+            return None
+        return None
+    
+    @staticmethod
+    def script_filename(mode: str, catalog_name: str, schema_name: str, table_name: str) -> str:
+        """Nome do script gerado para a tabela (o mesmo usado pelas tasks dos workflows)"""
+        return f"ingestion_{mode}_{catalog_name}_{schema_name}_{table_name}.py"
+    
+    @contextmanager
+    def _script_index_lock(self):
+        """
+        Exclusão mútua na leitura-alteração-escrita do índice de scripts
+        
+        Entre threads, um lock do processo; entre processos, um lock de
+        arquivo (fcntl, quando disponível) ao lado do índice.
+        """
+        with self._SCRIPT_INDEX_LOCK:
+            try:
+                import fcntl
+            except ImportError:
+                yield
+                return
+            
+            if self.output_dir:
+                os.makedirs(self.output_dir, exist_ok=True)
+            with open(f"{self._get_index_file()}.lock", 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _get_index_file(self) -> str:
+        """Caminho do índice tabela → hash do script atual"""
+        return os.path.join(self.output_dir, ".dino_script_index.json")
+    
+    def _load_script_index(self) -> Dict[str, Any]:
+        """Lê o índice de scripts do diretório de saída"""
+        index_file = self._get_index_file()
+        if not os.path.exists(index_file):
+            return {}
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _update_script_index(self, mode: str, script_file: str, script_hash: str) -> None:
+        """Registra o hash atual do script da tabela no índice (escrita atômica; chamar com _script_index_lock)"""
+        index = self._load_script_index()
+        entry = index.setdefault(self.get_table_full_name(), {})
+        entry[mode] = {
+            'hash': script_hash,
+            'file': os.path.basename(script_file),
+            'updated_at': datetime.now().isoformat()
+        }
+        
+        index_file = self._get_index_file()
+        temp_file = f"{index_file}.{os.getpid()}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, sort_keys=True, ensure_ascii=False)
+        os.replace(temp_file, index_file)
+    
+    def write_script(self, is_automated: bool = False, force: bool = False) -> Dict[str, Any]:
+        """
+        Grava o script no diretório de saída, pulando a escrita se o mesmo hash já existe
+        
+        Só o hash gravado no cabeçalho do arquivo em disco decide se o script
+        é reaproveitado; o índice apenas registra o hash atual de cada tabela.
+        
+        Args:
+            is_automated: Se True, script streaming; se False, batch
+            force: Se True, grava mesmo que o hash seja igual
+        
+        Returns:
+            Dict com arquivo, hash e se o script em cache foi reaproveitado
+        """
+        mode = "streaming" if is_automated else "batch"
+        filename = self.script_filename(mode, self.catalog_name, self.target_schema, self.table_name)
+        script_file = os.path.join(self.output_dir, filename)
+        
+        script, script_hash = self.build_script(is_automated)
+        
+        cached = not force and self._read_script_hash(script_file) == script_hash
+        
+        if not cached:
+            if self.output_dir:
+                os.makedirs(self.output_dir, exist_ok=True)
+            with open(script_file, 'w', encoding='utf-8') as f:
+                f.write(script)
+        
+        with self._script_index_lock():
+            index_entry = self._load_script_index().get(self.get_table_full_name(), {}).get(mode, {})
+            if index_entry.get('hash') != script_hash or index_entry.get('file') != filename or not cached:
+                self._update_script_index(mode, script_file, script_hash)
+        
+        return {
+            'ingestion_file': script_file,
+            'script_hash': script_hash,
+            'script_cached': cached
+        }
+    
+    def _generate_source_paths_code(self) -> str:
+        """Gera a constante SOURCE_PATHS quando há lista explícita de origens"""
+        if not self.source_paths:
+            return ""
+        paths = ",\n".join(f'    "{path}"' for path in self.source_paths)
+        return f"\nSOURCE_PATHS = [\n{paths}\n]"
+    
+    def _generate_cdf_read_code(self) -> str:
+        """
+        Gera código de leitura incremental via Change Data Feed
+        
+        A última versão processada da origem fica registrada em uma tabela de
+        estado (uma linha por tabela de destino). Cada execução lê apenas as
+        versões posteriores; se não houver versão registrada ou se ela já foi
+        removida pelo VACUUM/retenção do histórico, faz um snapshot completo.
+        """
+        return f'''# Leitura incremental via Change Data Feed
+STATE_TABLE = "{self.cdf_state_table}"
+CDF_COLUMNS = ["_change_type", "_commit_version", "_commit_timestamp"]
+
+spark.sql(f"""
+    CREATE TABLE IF NOT EXISTS {{STATE_TABLE}} (
+        target_table STRING,
+        source_path STRING,
+        last_version BIGINT,
+        updated_at TIMESTAMP
+    ) USING DELTA
+""")
+
+source_history = spark.sql(f"DESCRIBE HISTORY delta.`{{SOURCE_PATH}}`")
+version_bounds = source_history.agg(
+    min("version").alias("earliest"), max("version").alias("latest")
+).collect()[0]
+EARLIEST_VERSION = version_bounds["earliest"]
+CURRENT_VERSION = version_bounds["latest"]
+
+tracked = (spark.table(STATE_TABLE)
+    .filter((col("target_table") == TARGET_TABLE) & (col("source_path") == SOURCE_PATH))
+    .select("last_version")
+    .collect())
+LAST_VERSION = tracked[0]["last_version"] if tracked else None
+
+# Erros de versão/arquivo removido pelo VACUUM ou pela retenção do histórico
+VERSION_UNAVAILABLE_ERROR_CLASSES = {{
+    "DELTA_CHANGE_DATA_FILE_NOT_FOUND", "DELTA_MISSING_CHANGE_DATA",
+    "DELTA_FILE_NOT_FOUND_DETAILED", "DELTA_VERSION_NOT_FOUND",
+    "FAILED_READ_FILE.FILE_NOT_EXIST"
+}}
+VERSION_UNAVAILABLE_JAVA_CLASSES = {{
+    "java.io.FileNotFoundException",
+    "org.apache.spark.sql.delta.VersionNotFoundException"
+}}
+
+def _is_version_unavailable(error):
+    # Classe de erro do Spark/Delta (getCondition no Spark 4, getErrorClass no 3.x)
+    for getter in ("getCondition", "getErrorClass"):
+        if hasattr(error, getter) and getattr(error, getter)() in VERSION_UNAVAILABLE_ERROR_CLASSES:
+            return True
+    # Exceções Java sem classe de erro (ex: FileNotFoundException), incluindo as causas
+    cause = getattr(error, "java_exception", None)
+    while cause is not None:
+        if cause.getClass().getName() in VERSION_UNAVAILABLE_JAVA_CLASSES:
+            return True
+        cause = cause.getCause()
+    return False
+
+if LAST_VERSION is not None and LAST_VERSION >= CURRENT_VERSION:
+    READ_STRATEGY = "noop"
+elif LAST_VERSION is None or LAST_VERSION + 1 < EARLIEST_VERSION:
+    READ_STRATEGY = "snapshot"
+else:
+    READ_STRATEGY = "cdf"
+
+if READ_STRATEGY == "cdf":
+    try:
+        df_source = (spark.read
+            .format("delta")
+            .option("readChangeFeed", "true")
+            .option("startingVersion", LAST_VERSION + 1)
+            .option("endingVersion", CURRENT_VERSION)
+            .load(SOURCE_PATH)
+            .filter(col("_change_type") != "update_preimage"))
+        df_source.persist()
+        print(f"🔁 Mudanças lidas via CDF (versões {{LAST_VERSION + 1}}..{{CURRENT_VERSION}}): {{df_source.count()}}")
+    except Exception as e:
+        if not _is_version_unavailable(e):
+            raise
+        print(f"⚠️ Versão {{LAST_VERSION + 1}} não está mais disponível (vacuum) - usando snapshot completo")
+        READ_STRATEGY = "snapshot"
+
+if READ_STRATEGY == "snapshot":
+    print(f"📸 Snapshot completo da versão {{CURRENT_VERSION}}")
+    df_source = (spark.read
+        .format("delta")
+        .option("versionAsOf", CURRENT_VERSION)
+        .load(SOURCE_PATH))
+elif READ_STRATEGY == "noop":
+    print(f"✅ Nenhuma versão nova na origem (última processada: {{LAST_VERSION}})")
+    df_source = spark.read.format("delta").option("versionAsOf", CURRENT_VERSION).load(SOURCE_PATH).limit(0)'''
+    
+    def _generate_cdf_write_code(self) -> str:
+        """Gera código de aplicação das mudanças do CDF (MERGE) e registro da versão"""
+        merge_keys = ", ".join(f'"{key}"' for key in self.merge_keys)
+        partition_code = ""
+        if self.partition_columns:
+            partition_cols = '", "'.join(self.partition_columns)
+            partition_code = f'\n        .partitionBy("{partition_cols}")'
+        
+        return f'''# Aplicar mudanças do Change Data Feed
+from pyspark.sql.window import Window
+
+MERGE_KEYS = [{merge_keys}]
+
+if READ_STRATEGY == "cdf":
+    print("🔄 Aplicando inserts/updates/deletes via MERGE...")
+    # Manter apenas a última mudança de cada chave no intervalo de versões.
+    # Na mesma versão, insert/update_postimage vence o delete: overwrite,
+    # replaceWhere e reescritas de arquivos emitem o par delete+insert para
+    # linhas que continuam existindo
+    latest_change = Window.partitionBy(*MERGE_KEYS).orderBy(
+        col("_commit_version").desc(),
+        when(col("_change_type") == "delete", 1).otherwise(0)
+    )
+    df_changes = (df_with_metadata
+        .withColumn("_dino_change_rank", row_number().over(latest_change))
+        .filter(col("_dino_change_rank") == 1)
+        .drop("_dino_change_rank"))
+    
+    data_columns = [c for c in df_changes.columns if c not in CDF_COLUMNS]
+    merge_condition = " AND ".join(f"target.`{{k}}` <=> source.`{{k}}`" for k in MERGE_KEYS)
+    assignments = {{f"`{{c}}`": f"source.`{{c}}`" for c in data_columns}}
+    
+    if not spark.catalog.tableExists(TARGET_TABLE):
+        (df_changes.filter(col("_change_type") != "delete").limit(0).drop(*CDF_COLUMNS)
+            .write.format("delta"){partition_code}
+            .saveAsTable(TARGET_TABLE))
+    
+    (DeltaTable.forName(spark, TARGET_TABLE).alias("target")
+        .merge(df_changes.alias("source"), merge_condition)
+        .whenMatchedDelete(condition="source._change_type = 'delete'")
+        .whenMatchedUpdate(condition="source._change_type != 'delete'", set=assignments)
+        .whenNotMatchedInsert(condition="source._change_type != 'delete'", values=assignments)
+        .execute())
+    df_source.unpersist()
+
+elif READ_STRATEGY == "snapshot":
+    print("💾 Salvando snapshot completo (overwrite)...")
+    (df_with_metadata.drop(*[c for c in CDF_COLUMNS if c in df_with_metadata.columns])
+        .write
+        .format("delta")
+        .mode("overwrite")
+        .option("overwriteSchema", "true"){partition_code}
+        .saveAsTable(TARGET_TABLE))
+
+# Registrar a última versão processada da origem
+if READ_STRATEGY != "noop":
+    spark.sql(f"""
+        MERGE INTO {{STATE_TABLE}} AS state
+        USING (SELECT '{{TARGET_TABLE}}' AS target_table,
+                      '{{SOURCE_PATH}}' AS source_path,
+                      CAST({{CURRENT_VERSION}} AS BIGINT) AS last_version,
+                      current_timestamp() AS updated_at) AS latest
+        ON state.target_table = latest.target_table AND state.source_path = latest.source_path
+        WHEN MATCHED THEN UPDATE SET *
+        WHEN NOT MATCHED THEN INSERT *
+    """)
+    print(f"📌 Versão {{CURRENT_VERSION}} registrada em {{STATE_TABLE}}")'''
     
     def _generate_write_code(self) -> str:
         """Gera código de escrita baseado no modo e particionamento"""
+        if self.use_change_data_feed:
+            return self._generate_cdf_write_code()
+        
         partition_code = ""
         if self.partition_columns:
             partition_cols = '", "'.join(self.partition_columns)
@@ -394,13 +876,64 @@ print("💾 Salvando dados (append)...")
     .option("mergeSchema", "true"){partition_code}
     .saveAsTable(TARGET_TABLE))'''
     
-    def execute_ingestion(self, is_automated: bool = False) -> Dict[str, Any]:
+    def estimate_resources(
+        self,
+        local_paths: Optional[List[str]] = None,
+        estimator: Optional[IngestionEstimator] = None,
+        target_runtime_minutes: float = 15.0
+    ) -> Dict[str, Any]:
+        """
+        Estima tempo de execução e dimensionamento a partir do perfil local da origem
+        
+        As configurações Spark recomendadas são incorporadas ao script gerado,
+        sem sobrescrever valores informados explicitamente em spark_conf.
+        
+        Args:
+            local_paths: Caminhos locais equivalentes à origem (padrão: file_path
+                ou source_paths)
+            estimator: Estimador a usar (padrão: IngestionEstimator())
+            target_runtime_minutes: Tempo de processamento desejado
+        
+        Returns:
+            Dict com a estimativa (ver IngestionEstimator.estimate)
+        """
+        estimator = estimator or IngestionEstimator()
+        profile = estimator.profile_source(
+            local_paths or self.source_paths or [self.file_path], self.file_format, self._get_read_options()
+        )
+        
+        estimate = estimator.estimate(profile, target_runtime_minutes=target_runtime_minutes)
+        if not estimate['available']:
+            print("⚠️ Origem não visível localmente - sem estimativa nem configurações Spark recomendadas")
+            return estimate
+        
+        for key, value in estimate['spark_conf'].items():
+            self.spark_conf.setdefault(key, value)
+        
+        print(f"📐 Estimativa: ~{estimate['predicted_runtime_seconds'] / 60:.1f} min "
+              f"com {estimate['recommended_workers']} workers ({estimate['sizing_profile']})")
+        return estimate
+    
+    def execute_ingestion(
+        self,
+        is_automated: bool = False,
+        estimate: bool = False,
+        submit: bool = False,
+        submitter: Optional[JobSubmitter] = None
+    ) -> Dict[str, Any]:
         """
         Executa a ingestão (batch ou streaming)
         
         Args:
             is_automated: Se True, gera código para streaming com file arrival
                          Se False, gera código para ingestão batch
+            estimate: Se True, estima recursos antes de gerar o código e inclui
+                     as configurações Spark recomendadas no script
+            submit: Se True, envia o script ao workspace, executa via
+                   jobs/runs/submit e aguarda o fim (streaming roda com
+                   --available-now e termina após processar os pendentes)
+            submitter: Executor a usar (padrão: JobSubmitter() com as
+                      variáveis DATABRICKS_HOST/DATABRICKS_TOKEN)
         
         Returns:
             Dict com resultado da operação
@@ -415,20 +948,18 @@ print("💾 Salvando dados (append)...")
             if not self._check_schema_exists():
                 raise ValueError(f"Schema {self.target_schema} não existe. Crie o schema antes da ingestão.")
             
-            # Gerar código de ingestão baseado no modo
-            if is_automated:
-                ingestion_code = self._generate_streaming_code()
-                filename = f"ingestion_streaming_{self.target_schema}_{self.table_name}.py"
-            else:
-                ingestion_code = self._generate_batch_code()
-                filename = f"ingestion_batch_{self.target_schema}_{self.table_name}.py"
+            resource_estimate = self.estimate_resources() if estimate else None
             
-            # Salvar código em arquivo para execução manual
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(ingestion_code)
+            # Gerar código de ingestão baseado no modo e salvar para execução manual
+            script_info = self.write_script(is_automated)
+            filename = script_info['ingestion_file']
             
-            print(f"📝 Código de ingestão salvo em: {filename}")
-            print(f"💡 Execute este código em um notebook Databricks para realizar a ingestão")
+            if script_info['script_cached']:
+                print(f"♻️ Script inalterado (hash {script_info['script_hash'][:12]}): {filename}")
+            else:
+                print(f"📝 Código de ingestão salvo em: {filename}")
+            if not submit:
+                print(f"💡 Execute este código em um notebook Databricks para realizar a ingestão")
             
             result = {
                 'success': True,
@@ -440,6 +971,9 @@ print("💾 Salvando dados (append)...")
                 'table_name': self.table_name,
                 'source_path': self.file_path,
                 'ingestion_file': filename,
+                'script_hash': script_info['script_hash'],
+                'script_cached': script_info['script_cached'],
+                'change_data_feed': self.use_change_data_feed,
                 'is_automated': is_automated,
                 'timestamp': datetime.now().isoformat()
             }
@@ -448,6 +982,22 @@ print("💾 Salvando dados (append)...")
             if is_automated:
                 result['checkpoint_location'] = self.checkpoint_location
             
+            if resource_estimate:
+                result['estimate'] = resource_estimate
+            
+            if submit:
+                submitter = submitter or JobSubmitter()
+                submission = submitter.run_script(
+                    filename,
+                    run_name=f"dino_{mode}_{self.target_schema}_{self.table_name}",
+                    parameters=["--available-now"] if is_automated else []
+                )
+                result['submission'] = submission
+                result['rows_loaded'] = submission.get('rows_loaded')
+                if not submission['success']:
+                    result['success'] = False
+                    result['error'] = submission['error']
+            
             return result
             
         except Exception as e:
@@ -0,0 +1,336 @@
+"""
+Dino SDK - Ingestion Estimator
+Estimativa de tempo de execução e dimensionamento de cluster antes da geração
+"""
+
+import json
+import math
+import os
+import statistics
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+
+MB = 1024 * 1024
+
+
+class IngestionEstimator:
+    """
+    Estimador de custo e tempo de ingestão
+    
+    Funcionalidades:
+    - Perfil local da origem (bytes, arquivos, formato, compressão, divisibilidade)
+    - Previsão de tempo de execução por coeficientes de vazão por formato
+    - Recomendação de workers e das configurações Spark do script gerado
+    - Calibração dos coeficientes a partir de execuções anteriores
+    
+    Os coeficientes representam MB/s processados por core para cada formato
+    sem compressão; a compressão aplica um fator multiplicativo.
+    """
+    
+    DEFAULT_THROUGHPUT_MB_PER_CORE = {
+        'csv': 25.0,
+        'json': 12.0,
+        'parquet': 80.0,
+        'delta': 80.0,
+        'avro': 40.0,
+        'fixedwidth': 30.0
+    }
+    
+    COMPRESSION_FACTORS = {
+        'none': 1.0,
+        'snappy': 0.9,
+        'lz4': 0.9,
+        'zstd': 0.8,
+        'gzip': 0.6,
+        'bzip2': 0.3,
+        'zip': 0.6
+    }
+    
+    COMPRESSION_EXTENSIONS = {
+        '.gz': 'gzip',
+        '.gzip': 'gzip',
+        '.bz2': 'bzip2',
+        '.snappy': 'snappy',
+        '.lz4': 'lz4',
+        '.zst': 'zstd',
+        '.zip': 'zip'
+    }
+    
+    FORMAT_EXTENSIONS = {
+        '.csv': 'csv',
+        '.txt': 'csv',
+        '.json': 'json',
+        '.jsonl': 'json',
+        '.parquet': 'parquet',
+        '.avro': 'avro'
+    }
+    
+    # Formatos com compressão interna por bloco sempre podem ser divididos
+    SPLITTABLE_CONTAINER_FORMATS = ['parquet', 'delta', 'avro']
+    SPLITTABLE_CODECS = ['none', 'bzip2']
+    
+    # Formatos lidos arquivo a arquivo com a opção multiline (uma task por arquivo)
+    MULTILINE_FORMATS = ['json', 'csv']
+    
+    def __init__(
+        self,
+        coefficients_file: Optional[str] = None,
+        cluster_startup_seconds: float = 300.0,
+        per_file_overhead_seconds: float = 0.05,
+        cores_per_worker: int = 4,
+        max_workers: int = 20
+    ):
+        """
+        Inicializa o estimador
+        
+        Args:
+            coefficients_file: Arquivo JSON com coeficientes calibrados
+                (padrão: variável DINO_ESTIMATOR_COEFFICIENTS)
+            cluster_startup_seconds: Tempo fixo de inicialização do cluster
+            per_file_overhead_seconds: Custo fixo por arquivo (listagem/abertura)
+            cores_per_worker: Cores por worker do tipo de nó usado
+            max_workers: Limite superior de workers recomendados
+        """
+        self.coefficients_file = coefficients_file or os.getenv("DINO_ESTIMATOR_COEFFICIENTS")
+        self.cluster_startup_seconds = cluster_startup_seconds
+        self.per_file_overhead_seconds = per_file_overhead_seconds
+        self.cores_per_worker = cores_per_worker
+        self.max_workers = max_workers
+        self.throughput = dict(self.DEFAULT_THROUGHPUT_MB_PER_CORE)
+        
+        if self.coefficients_file and os.path.exists(self.coefficients_file):
+            self.load_coefficients(self.coefficients_file)
+    
+    def profile_source(
+        self,
+        paths,
+        file_format: Optional[str] = None,
+        read_options: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Levanta o perfil local de uma origem (arquivo, diretório ou lista)
+        
+        Args:
+            paths: Caminho ou lista de caminhos visíveis localmente
+            file_format: Formato conhecido (inferido pelas extensões se None)
+            read_options: Opções de leitura do script gerado; com multiline,
+                JSON/CSV não são divisíveis mesmo sem compressão
+        
+        Returns:
+            Dict com bytes, arquivos, formato, compressão e divisibilidade
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        
+        file_sizes = []
+        codec_bytes: Dict[str, int] = {}
+        format_bytes: Dict[str, int] = {}
+        
+        for root in paths:
+            for file_path, size in self._iter_files(root):
+                file_sizes.append(size)
+                suffixes = [suffix.lower() for suffix in Path(file_path).suffixes]
+                codec = 'none'
+                for suffix in suffixes:
+                    codec = self.COMPRESSION_EXTENSIONS.get(suffix, codec)
+                    if suffix in self.FORMAT_EXTENSIONS:
+                        detected = self.FORMAT_EXTENSIONS[suffix]
+                        format_bytes[detected] = format_bytes.get(detected, 0) + size
+                codec_bytes[codec] = codec_bytes.get(codec, 0) + size
+        
+        if not file_format:
+            file_format = max(format_bytes, key=format_bytes.get) if format_bytes else 'csv'
+        
+        compression = max(codec_bytes, key=codec_bytes.get) if codec_bytes else 'none'
+        multiline = str((read_options or {}).get('multiline', 'false')).lower() == 'true'
+        splittable = (
+            file_format in self.SPLITTABLE_CONTAINER_FORMATS or
+            (compression in self.SPLITTABLE_CODECS and not (multiline and file_format in self.MULTILINE_FORMATS))
+        )
+        total_bytes = sum(file_sizes)
+        
+        return {
+            'available': bool(file_sizes),
+            'total_bytes': total_bytes,
+            'file_count': len(file_sizes),
+            'largest_file_bytes': max(file_sizes) if file_sizes else 0,
+            'avg_file_bytes': int(total_bytes / len(file_sizes)) if file_sizes else 0,
+            'file_format': file_format,
+            'compression': compression,
+            'splittable': splittable
+        }
+    
+    @staticmethod
+    def _iter_files(root: str):
+        """Percorre arquivos de dados sob um caminho local (ignora _delta_log e ocultos)"""
+        if os.path.isfile(root):
+            yield root, os.path.getsize(root)
+            return
+        
+        stack = [root]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.name.startswith(('_', '.')):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path, entry.stat().st_size
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+    
+    def _throughput_bytes_per_core(self, file_format: str, compression: str) -> float:
+        """Vazão efetiva (bytes/s por core) para formato e compressão"""
+        mb_per_second = self.throughput.get(file_format, self.DEFAULT_THROUGHPUT_MB_PER_CORE['csv'])
+        return mb_per_second * MB * self.COMPRESSION_FACTORS.get(compression, 1.0)
+    
+    def estimate(
+        self,
+        profile: Dict[str, Any],
+        target_runtime_minutes: float = 15.0
+    ) -> Dict[str, Any]:
+        """
+        Prevê tempo de execução e recomenda cluster e configurações Spark
+        
+        Args:
+            profile: Perfil retornado por profile_source
+            target_runtime_minutes: Tempo de processamento desejado (sem startup)
+        
+        Returns:
+            Dict com previsão, workers recomendados e spark_conf sugerido;
+            se a origem não foi perfilada (available False), sem previsão,
+            sem workers e com spark_conf vazio
+        """
+        if not profile.get('available', True):
+            # Sem volume conhecido, qualquer recomendação seria arbitrária
+            return {
+                'available': False,
+                'predicted_runtime_seconds': None,
+                'processing_seconds': None,
+                'startup_seconds': self.cluster_startup_seconds,
+                'recommended_workers': None,
+                'total_cores': None,
+                'useful_tasks': None,
+                'sizing_profile': None,
+                'spark_conf': {},
+                'profile': profile
+            }
+        
+        total_bytes = profile.get('total_bytes', 0)
+        file_count = max(profile.get('file_count', 0), 1)
+        throughput = self._throughput_bytes_per_core(
+            profile.get('file_format', 'csv'), profile.get('compression', 'none')
+        )
+        
+        core_seconds = total_bytes / throughput + file_count * self.per_file_overhead_seconds
+        
+        # Arquivos não divisíveis são lidos por uma única task cada
+        max_partition_bytes = self._recommend_max_partition_bytes(profile)
+        if profile.get('splittable', True):
+            useful_tasks = max(math.ceil(total_bytes / max_partition_bytes), 1)
+        else:
+            useful_tasks = file_count
+        
+        target_seconds = max(target_runtime_minutes * 60, 1)
+        required_cores = min(max(math.ceil(core_seconds / target_seconds), 1), useful_tasks)
+        workers = min(max(math.ceil(required_cores / self.cores_per_worker), 1), self.max_workers)
+        total_cores = workers * self.cores_per_worker
+        
+        effective_parallelism = min(total_cores, useful_tasks)
+        processing_seconds = core_seconds / effective_parallelism
+        if not profile.get('splittable', True) and profile.get('largest_file_bytes'):
+            # O maior arquivo não divisível limita o tempo mínimo
+            processing_seconds = max(processing_seconds, profile['largest_file_bytes'] / throughput)
+        
+        shuffle_partitions = max(total_cores * 2, math.ceil(total_bytes / (128 * MB)))
+        shuffle_partitions = math.ceil(shuffle_partitions / total_cores) * total_cores
+        
+        return {
+            'available': True,
+            'predicted_runtime_seconds': round(self.cluster_startup_seconds + processing_seconds, 1),
+            'processing_seconds': round(processing_seconds, 1),
+            'startup_seconds': self.cluster_startup_seconds,
+            'recommended_workers': workers,
+            'total_cores': total_cores,
+            'useful_tasks': useful_tasks,
+            'sizing_profile': self.sizing_profile(total_bytes),
+            'spark_conf': {
+                'spark.sql.files.maxPartitionBytes': str(max_partition_bytes),
+                'spark.sql.shuffle.partitions': str(shuffle_partitions)
+            },
+            'profile': profile
+        }
+    
+    def _recommend_max_partition_bytes(self, profile: Dict[str, Any]) -> int:
+        """Escolhe maxPartitionBytes para ~3 ondas de tasks, entre 32MB e 512MB"""
+        total_bytes = profile.get('total_bytes', 0)
+        if not profile.get('splittable', True) or total_bytes <= 0:
+            return 128 * MB
+        
+        cores = min(self.max_workers * self.cores_per_worker,
+                    max(math.ceil(total_bytes / (128 * MB)), 1))
+        target = total_bytes / (cores * 3)
+        candidate = 32 * MB
+        while candidate < target and candidate < 512 * MB:
+            candidate *= 2
+        return candidate
+    
+    @staticmethod
+    def sizing_profile(total_bytes: int) -> str:
+        """Classifica o volume da origem em small/medium/large"""
+        if total_bytes < 10 * 1024 * MB:
+            return 'small'
+        elif total_bytes < 200 * 1024 * MB:
+            return 'medium'
+        else:
+            return 'large'
+    
+    def calibrate(self, run_records: List[Dict[str, Any]]) -> Dict[str, float]:
+        """
+        Recalcula os coeficientes de vazão a partir de execuções anteriores
+        
+        Cada registro deve conter file_format, total_bytes, runtime_seconds e
+        total_cores; compression e startup_seconds são opcionais. O coeficiente
+        de cada formato passa a ser a mediana da vazão observada por core,
+        normalizada para o formato sem compressão.
+        
+        Returns:
+            Coeficientes atualizados (MB/s por core)
+        """
+        observed: Dict[str, List[float]] = {}
+        for record in run_records:
+            processing = record['runtime_seconds'] - record.get('startup_seconds', 0)
+            if processing <= 0 or record.get('total_cores', 0) <= 0 or record['total_bytes'] <= 0:
+                continue
+            
+            factor = self.COMPRESSION_FACTORS.get(record.get('compression', 'none'), 1.0)
+            mb_per_core = record['total_bytes'] / MB / processing / record['total_cores'] / factor
+            observed.setdefault(record['file_format'], []).append(mb_per_core)
+        
+        for file_format, values in observed.items():
+            self.throughput[file_format] = round(statistics.median(values), 3)
+            print(f"📐 Coeficiente {file_format}: {self.throughput[file_format]} MB/s por core "
+                  f"({len(values)} execuções)")
+        
+        return dict(self.throughput)
+    
+    def load_coefficients(self, coefficients_file: str) -> None:
+        """Carrega coeficientes calibrados de um arquivo JSON"""
+        with open(coefficients_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.throughput.update(data.get('throughput_mb_per_core', {}))
+    
+    def save_coefficients(self, coefficients_file: Optional[str] = None) -> str:
+        """Salva os coeficientes atuais em um arquivo JSON"""
+        coefficients_file = coefficients_file or self.coefficients_file or "dino_estimator_coefficients.json"
+        with open(coefficients_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'throughput_mb_per_core': self.throughput,
+                'updated_at': datetime.now().isoformat()
+            }, f, indent=2)
+        return coefficients_file
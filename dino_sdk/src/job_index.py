@@ -0,0 +1,96 @@
+"""
+Dino SDK - Job Index
+Índice local (SQLite) dos jobs Databricks gerenciados pelo Dino SDK
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+
+class JobIndex:
+    """
+    Índice local nome do job -> job_id e hash das configurações
+    
+    Evita listar todos os jobs do workspace a cada deploy: uma consulta ao
+    índice responde se o job já existe e se as configurações mudaram.
+    As entradas são separadas por workspace.
+    """
+    
+    def __init__(self, index_file: str, workspace: str = ""):
+        """
+        Inicializa o índice
+        
+        Args:
+            index_file: Arquivo SQLite do índice (criado se não existir)
+            workspace: Host do workspace ao qual os job_ids pertencem
+        """
+        self.index_file = index_file
+        self.workspace = workspace
+        
+        index_dir = os.path.dirname(index_file)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+        
+        self._connection = sqlite3.connect(index_file)
+        self._connection.row_factory = sqlite3.Row
+        with self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    workspace TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    job_id INTEGER NOT NULL,
+                    settings_hash TEXT,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (workspace, name)
+                )
+            """)
+    
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Retorna a entrada do job pelo nome (None se não indexado)"""
+        row = self._connection.execute(
+            "SELECT name, job_id, settings_hash, updated_at FROM jobs WHERE workspace = ? AND name = ?",
+            (self.workspace, name)
+        ).fetchone()
+        return dict(row) if row else None
+    
+    def put(self, name: str, job_id: int, settings_hash: Optional[str]) -> None:
+        """Registra ou atualiza um job"""
+        self.put_many([{'name': name, 'job_id': job_id, 'settings_hash': settings_hash}])
+    
+    def put_many(self, jobs: List[Dict[str, Any]], replace: bool = False) -> None:
+        """
+        Registra ou atualiza vários jobs em uma única transação
+        
+        Args:
+            jobs: Lista de {name, job_id, settings_hash}
+            replace: Remove antes as entradas do workspace (sincronização completa)
+        """
+        updated_at = datetime.now().isoformat()
+        with self._connection:
+            if replace:
+                self._connection.execute("DELETE FROM jobs WHERE workspace = ?", (self.workspace,))
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO jobs (workspace, name, job_id, settings_hash, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(self.workspace, job['name'], job['job_id'], job.get('settings_hash'), updated_at)
+                 for job in jobs]
+            )
+    
+    def remove(self, name: str) -> None:
+        """Remove um job do índice"""
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM jobs WHERE workspace = ? AND name = ?", (self.workspace, name)
+            )
+    
+    def count(self) -> int:
+        """Número de jobs indexados no workspace"""
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM jobs WHERE workspace = ?", (self.workspace,)
+        ).fetchone()[0]
+    
+    def close(self):
+        """Fecha a conexão com o arquivo do índice"""
+        self._connection.close()
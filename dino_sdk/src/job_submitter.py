@@ -0,0 +1,364 @@
+"""
+Dino SDK - Job Submitter
+Envio dos scripts gerados ao workspace e execução via Jobs runs/submit
+"""
+
+import base64
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterator, Union
+
+try:
+    from .databricks_client import DatabricksClient
+except ImportError:
+    from databricks_client import DatabricksClient
+
+
+class JobSubmitter:
+    """
+    Executa scripts de ingestão gerados diretamente no workspace
+    
+    Funcionalidades:
+    - Upload do script para o workspace (workspace/import)
+    - Execução avulsa via jobs/runs/submit (sem criar job)
+    - Acompanhamento por polling com backoff exponencial e jitter
+    - Resultado com estado final, registros carregados e tempos da execução
+    - Execução de várias tabelas em paralelo com limite de concorrência
+    
+    Todas as chamadas passam pela mesma sessão HTTP do DatabricksClient, então
+    o polling de várias execuções reaproveita as conexões abertas.
+    """
+    
+    JOBS_API = "/api/2.1/jobs"
+    WORKSPACE_API = "/api/2.0/workspace"
+    TERMINAL_STATES = ['TERMINATED', 'SKIPPED', 'INTERNAL_ERROR']
+    SERVERLESS_ENVIRONMENT_KEY = "dino_default"
+    
+    # Linha impressa pelos scripts gerados com as métricas da carga
+    METRICS_MARKER = "DINO_METRICS "
+    
+    def __init__(
+        self,
+        client: Optional[DatabricksClient] = None,
+        workspace_dir: Optional[str] = None,
+        new_cluster: Optional[Dict[str, Any]] = None,
+        existing_cluster_id: Optional[str] = None,
+        poll_interval_seconds: float = 5.0,
+        max_poll_interval_seconds: float = 60.0,
+        backoff_factor: float = 2.0,
+        jitter: float = 0.2,
+        run_timeout_seconds: int = 3600,
+        max_concurrency: int = 4
+    ):
+        """
+        Inicializa o executor
+        
+        Args:
+            client: Cliente REST do workspace (padrão: DATABRICKS_HOST/DATABRICKS_TOKEN)
+            workspace_dir: Pasta do workspace que recebe os scripts (padrão:
+                variável DINO_WORKSPACE_DIR ou /Workspace/Shared/dino)
+            new_cluster: Especificação do cluster criado para a execução
+            existing_cluster_id: Cluster all-purpose já existente
+                (sem new_cluster nem existing_cluster_id a execução é serverless)
+            poll_interval_seconds: Intervalo inicial entre consultas do estado
+            max_poll_interval_seconds: Teto do intervalo entre consultas
+            backoff_factor: Multiplicador do intervalo a cada consulta
+            jitter: Fração aleatória removida de cada intervalo (0 a 1), para
+                que execuções simultâneas não consultem a API em sincronia
+            run_timeout_seconds: Timeout da execução no workspace e do acompanhamento
+            max_concurrency: Execuções simultâneas em run_many
+        """
+        if new_cluster and existing_cluster_id:
+            raise ValueError("Informe new_cluster ou existing_cluster_id, não ambos")
+        if not 0 <= jitter < 1:
+            raise ValueError("jitter deve estar entre 0 e 1")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency deve ser pelo menos 1")
+        
+        self.client = client or DatabricksClient(pool_maxsize=max(10, max_concurrency))
+        self.workspace_dir = (workspace_dir or os.getenv("DINO_WORKSPACE_DIR", "/Workspace/Shared/dino")).rstrip('/')
+        self.new_cluster = new_cluster
+        self.existing_cluster_id = existing_cluster_id
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_poll_interval_seconds = max_poll_interval_seconds
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.run_timeout_seconds = run_timeout_seconds
+        self.max_concurrency = max_concurrency
+        
+        self._created_dirs = set()
+    
+    def upload_script(self, local_file: str) -> str:
+        """
+        Envia o script para a pasta do workspace (sobrescreve a versão anterior)
+        
+        Args:
+            local_file: Script gerado localmente
+        
+        Returns:
+            Caminho do script no workspace
+        """
+        with open(local_file, 'rb') as f:
+            content = f.read()
+        
+        if self.workspace_dir not in self._created_dirs:
+            self.client.post(f"{self.WORKSPACE_API}/mkdirs", {'path': self.workspace_dir})
+            self._created_dirs.add(self.workspace_dir)
+        
+        workspace_path = f"{self.workspace_dir}/{os.path.basename(local_file)}"
+        # AUTO com extensão .py importa como arquivo do workspace (não notebook)
+        self.client.post(f"{self.WORKSPACE_API}/import", {
+            'path': workspace_path,
+            'format': 'AUTO',
+            'content': base64.b64encode(content).decode('ascii'),
+            'overwrite': True
+        })
+        
+        print(f"📤 Script enviado para {workspace_path}")
+        return workspace_path
+    
+    def build_submit_payload(
+        self,
+        workspace_path: str,
+        run_name: str,
+        parameters: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Monta o corpo de jobs/runs/submit com uma task spark_python_task"""
+        task = {
+            'task_key': "dino_ingestion",
+            'spark_python_task': {
+                'python_file': workspace_path,
+                'parameters': list(parameters or [])
+            },
+            'timeout_seconds': self.run_timeout_seconds
+        }
+        
+        payload = {
+            'run_name': run_name,
+            'timeout_seconds': self.run_timeout_seconds,
+            'tasks': [task]
+        }
+        
+        if self.existing_cluster_id:
+            task['existing_cluster_id'] = self.existing_cluster_id
+        elif self.new_cluster:
+            task['new_cluster'] = self.new_cluster
+        else:
+            task['environment_key'] = self.SERVERLESS_ENVIRONMENT_KEY
+            payload['environments'] = [{
+                'environment_key': self.SERVERLESS_ENVIRONMENT_KEY,
+                'spec': {'client': '1'}
+            }]
+        
+        return payload
+    
+    def submit(self, local_file: str, run_name: Optional[str] = None, parameters: Optional[List[str]] = None) -> int:
+        """
+        Envia o script e dispara uma execução avulsa
+        
+        Returns:
+            run_id da execução
+        """
+        workspace_path = self.upload_script(local_file)
+        run_name = run_name or f"dino_{os.path.splitext(os.path.basename(local_file))[0]}"
+        
+        response = self.client.post(
+            f"{self.JOBS_API}/runs/submit",
+            self.build_submit_payload(workspace_path, run_name, parameters)
+        )
+        print(f"🚀 Execução {response['run_id']} submetida: {run_name}")
+        return response['run_id']
+    
+    def _poll_delays(self) -> Iterator[float]:
+        """Intervalos de polling: backoff exponencial limitado, com jitter"""
+        delay = self.poll_interval_seconds
+        while True:
+            yield delay * (1 - random.uniform(0, self.jitter))
+            delay = min(delay * self.backoff_factor, self.max_poll_interval_seconds)
+    
+    def wait_for_run(self, run_id: int) -> Dict[str, Any]:
+        """
+        Aguarda a execução chegar a um estado terminal
+        
+        Raises:
+            TimeoutError: Execução não terminou dentro de run_timeout_seconds
+        
+        Returns:
+            Execução retornada por jobs/runs/get
+        """
+        deadline = time.monotonic() + self.run_timeout_seconds
+        delays = self._poll_delays()
+        
+        while True:
+            run = self.client.get(f"{self.JOBS_API}/runs/get", params={'run_id': run_id})
+            if run.get('state', {}).get('life_cycle_state') in self.TERMINAL_STATES:
+                return run
+            
+            delay = next(delays)
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f"Execução {run_id} não terminou em {self.run_timeout_seconds}s")
+            time.sleep(delay)
+    
+    def cancel_run(self, run_id: int) -> bool:
+        """
+        Cancela uma execução em andamento (jobs/runs/cancel)
+        
+        Returns:
+            True se o cancelamento foi aceito pela API
+        """
+        try:
+            self.client.post(f"{self.JOBS_API}/runs/cancel", {'run_id': run_id})
+            print(f"🛑 Execução {run_id} cancelada")
+            return True
+        except Exception as e:
+            print(f"⚠️  Não foi possível cancelar a execução {run_id}: {str(e)}")
+            return False
+    
+    def _read_metrics(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        """Lê a linha DINO_METRICS da saída da task (vazio se ausente)"""
+        tasks = run.get('tasks') or [run]
+        output = self.client.get(f"{self.JOBS_API}/runs/get-output", params={'run_id': tasks[0]['run_id']})
+        
+        for line in reversed((output.get('logs') or '').splitlines()):
+            if line.startswith(self.METRICS_MARKER):
+                try:
+                    return json.loads(line[len(self.METRICS_MARKER):])
+                except ValueError:
+                    break
+        return {}
+    
+    @staticmethod
+    def _timings(run: Dict[str, Any]) -> Dict[str, Optional[float]]:
+        """Tempos da execução em segundos"""
+        def seconds(key: str) -> Optional[float]:
+            value = run.get(key)
+            return round(value / 1000.0, 1) if value is not None else None
+        
+        run_duration = run.get('run_duration')
+        if run_duration is None:
+            stages = [run.get(key) or 0 for key in ['setup_duration', 'execution_duration', 'cleanup_duration']]
+            run_duration = sum(stages) if any(stages) else None
+        
+        return {
+            'queue_seconds': seconds('queue_duration'),
+            'setup_seconds': seconds('setup_duration'),
+            'execution_seconds': seconds('execution_duration'),
+            'run_seconds': round(run_duration / 1000.0, 1) if run_duration is not None else None
+        }
+    
+    def run_script(
+        self,
+        local_file: str,
+        run_name: Optional[str] = None,
+        parameters: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Envia, executa e acompanha um script até o fim
+        
+        Args:
+            local_file: Script gerado localmente
+            run_name: Nome da execução (padrão: dino_<arquivo>)
+            parameters: Argumentos do script (ex: ['--available-now'])
+        
+        Returns:
+            Dict com estado final, registros carregados e tempos da execução
+            (em timeout, a execução é cancelada e o run_id é devolvido)
+        """
+        run_id = None
+        try:
+            started = time.monotonic()
+            run_id = self.submit(local_file, run_name, parameters)
+            try:
+                run = self.wait_for_run(run_id)
+            except TimeoutError as e:
+                # Não deixa a execução rodando (e consumindo) sem ninguém acompanhar
+                print(f"⏰ {str(e)}")
+                cancelled = self.cancel_run(run_id)
+                return {
+                    'success': False,
+                    'run_id': run_id,
+                    'script_file': local_file,
+                    'life_cycle_state': 'TIMED_OUT',
+                    'result_state': None,
+                    'cancelled': cancelled,
+                    'error': str(e),
+                    'wait_seconds': round(time.monotonic() - started, 1),
+                    'timestamp': datetime.now().isoformat()
+                }
+            
+            state = run.get('state', {})
+            result_state = state.get('result_state')
+            try:
+                metrics = self._read_metrics(run)
+            except Exception as e:
+                # As métricas são informativas: o estado final da execução prevalece
+                print(f"⚠️  Métricas da execução {run_id} indisponíveis: {str(e)}")
+                metrics = {}
+            success = result_state == 'SUCCESS'
+            
+            print(f"{'✅' if success else '❌'} Execução {run_id}: {result_state or state.get('life_cycle_state')}")
+            
+            result = {
+                'success': success,
+                'run_id': run_id,
+                'run_page_url': run.get('run_page_url'),
+                'script_file': local_file,
+                'life_cycle_state': state.get('life_cycle_state'),
+                'result_state': result_state,
+                'rows_loaded': metrics.get('rows_loaded'),
+                'metrics': metrics,
+                'timings': self._timings(run),
+                'wait_seconds': round(time.monotonic() - started, 1),
+                'timestamp': datetime.now().isoformat()
+            }
+            if not success:
+                result['error'] = state.get('state_message') or f"Execução terminou com {result_state}"
+            return result
+        
+        except Exception as e:
+            print(f"❌ Erro ao executar {os.path.basename(local_file)}: {str(e)}")
+            result = {
+                'success': False,
+                'error': str(e),
+                'script_file': local_file,
+                'timestamp': datetime.now().isoformat()
+            }
+            if run_id is not None:
+                result['run_id'] = run_id
+            return result
+    
+    def run_many(
+        self,
+        scripts: List[Union[str, Dict[str, Any]]],
+        max_concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Executa vários scripts com no máximo max_concurrency execuções simultâneas
+        
+        Args:
+            scripts: Caminhos dos scripts ou dicts {local_file, run_name, parameters}
+            max_concurrency: Limite de execuções simultâneas (padrão: o do construtor)
+        
+        Returns:
+            Dict com o resultado de cada script (na ordem recebida) e o resumo
+        """
+        max_concurrency = max_concurrency or self.max_concurrency
+        items = [{'local_file': script} if isinstance(script, str) else script for script in scripts]
+        print(f"🚀 Executando {len(items)} scripts (concorrência: {max_concurrency})")
+        
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            results = list(executor.map(lambda item: self.run_script(**item), items))
+        
+        failed = [result['script_file'] for result in results if not result['success']]
+        return {
+            'success': not failed,
+            'total': len(results),
+            'succeeded': len(results) - len(failed),
+            'failed': failed,
+            'results': results,
+            'timestamp': datetime.now().isoformat()
+        }
@@ -0,0 +1,254 @@
+"""
+Dino SDK - PII Detector
+Detecção de dados pessoais pelo conteúdo de uma amostra das colunas
+"""
+
+from typing import Optional, Dict, Any, List, Callable
+
+try:
+    from .column_profiler import ColumnProfiler
+except ImportError:
+    from column_profiler import ColumnProfiler
+
+
+class PIIDetector:
+    """
+    Identifica colunas com dados pessoais a partir dos valores, não do nome
+    
+    Uma amostra limitada das colunas de texto é lida em uma única consulta
+    (TABLESAMPLE opcional + LIMIT) como tabela Arrow. Os padrões são avaliados
+    com pyarrow.compute sobre a coluna inteira (sem loop por valor em Python):
+    - email
+    - cpf e cnpj, com validação dos dígitos verificadores
+    - phone (telefone brasileiro: com pontuação, ou só dígitos com DDD e
+      número de celular/fixo, para não confundir datas, CEPs e códigos)
+    - credit_card, com validação de Luhn
+    - ip_address (IPv4)
+    
+    Para cada coluna é reportada a proporção de valores não vazios que
+    casam com cada tipo; o tipo com maior proporção é atribuído à coluna
+    quando atinge threshold.
+    """
+    
+    PII_EMAIL = "email"
+    PII_CPF = "cpf"
+    PII_CNPJ = "cnpj"
+    PII_PHONE = "phone"
+    PII_CREDIT_CARD = "credit_card"
+    PII_IP_ADDRESS = "ip_address"
+    
+    # Padrões RE2 (pyarrow.compute), na ordem de prioridade em caso de empate
+    PATTERNS = {
+        PII_CPF: r"^\d{3}\.?\d{3}\.?\d{3}-?\d{2}$",
+        PII_CNPJ: r"^\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}$",
+        PII_CREDIT_CARD: r"^\d{4}([ -]?\d{4}){2}[ -]?\d{1,7}$",
+        PII_EMAIL: r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}$",
+        PII_PHONE: (
+            r"^(\+?55[ -]?)?(\(?[1-9]{2}\)?[ -]?)?(9[6-9]\d{3}|[2-5]\d{3})[ -]\d{4}$"
+            r"|^(\+?55[ -]?)?\([1-9]{2}\) ?(9[6-9]\d{3}|[2-5]\d{3})\d{4}$"
+            r"|^(\+?55)?[1-9]{2}(9[6-9]\d{3}|[2-5]\d{3})\d{4}$"
+        ),
+        PII_IP_ADDRESS: r"^((25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)$"
+    }
+    
+    # Dígitos (após remover a pontuação) exigidos pela validação de cada tipo
+    CHECKED_WIDTHS = {PII_CPF: 11, PII_CNPJ: 14, PII_CREDIT_CARD: 19}
+    
+    CNPJ_WEIGHTS = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+    
+    def __init__(
+        self,
+        sample_rows: int = 1000,
+        sample_percent: Optional[float] = None,
+        threshold: float = 0.8,
+        min_samples: int = 10
+    ):
+        """
+        Inicializa o detector
+        
+        Args:
+            sample_rows: Máximo de linhas lidas da tabela (LIMIT)
+            sample_percent: Percentual da tabela amostrado antes do LIMIT
+                via TABLESAMPLE (None lê as primeiras linhas)
+            threshold: Proporção mínima de valores reconhecidos para marcar
+                a coluna como dado pessoal
+            min_samples: Valores não vazios necessários para avaliar a coluna
+        """
+        if sample_rows < 1:
+            raise ValueError("sample_rows deve ser pelo menos 1")
+        if sample_percent is not None and not 0 < sample_percent <= 100:
+            raise ValueError("sample_percent deve estar entre 0 e 100")
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold deve estar entre 0 e 1")
+        
+        self.sample_rows = sample_rows
+        self.sample_percent = sample_percent
+        self.threshold = threshold
+        self.min_samples = min_samples
+    
+    @staticmethod
+    def candidate_columns(columns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Colunas de texto (as únicas avaliadas)"""
+        return [
+            column for column in columns
+            if ColumnProfiler.column_kind(column['type']) == ColumnProfiler.KIND_STRING
+        ]
+    
+    def build_sample_query(self, table_full_name: str, columns: List[Dict[str, Any]]) -> str:
+        """SELECT da amostra com uma coluna c{i} por coluna avaliada"""
+        select = [f"{ColumnProfiler._quote(column['name'])} AS c{index}" for index, column in enumerate(columns)]
+        source = table_full_name
+        if self.sample_percent is not None and self.sample_percent < 100:
+            source += f" TABLESAMPLE ({self.sample_percent} PERCENT)"
+        return "SELECT " + ", ".join(select) + f" FROM {source} LIMIT {self.sample_rows}"
+    
+    @staticmethod
+    def _digit_matrix(digits, width: int):
+        """
+        Matriz NumPy (linhas x width) de textos só com dígitos
+        
+        Os textos são alinhados à direita com zeros à esquerda (que não
+        alteram os dígitos verificadores nem a soma de Luhn).
+        """
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        if len(digits) == 0:
+            return np.zeros((0, width), dtype=np.int64)
+        
+        padded = pc.utf8_lpad(digits, width=width, padding='0').cast(pa.string())
+        offsets = np.frombuffer(padded.buffers()[1], dtype=np.int32)
+        start = offsets[padded.offset]
+        data = np.frombuffer(padded.buffers()[2], dtype=np.uint8)[start:start + len(padded) * width]
+        return data.reshape(-1, width).astype(np.int64) - 48
+    
+    @staticmethod
+    def _mod11_digit(total):
+        """Dígito verificador módulo 11 (CPF e CNPJ)"""
+        import numpy as np
+        
+        remainder = total % 11
+        return np.where(remainder < 2, 0, 11 - remainder)
+    
+    @classmethod
+    def _valid_cpf(cls, digits):
+        """Valida os dígitos verificadores de CPFs (matriz n x 11)"""
+        import numpy as np
+        
+        first = cls._mod11_digit(digits[:, :9] @ np.arange(10, 1, -1))
+        second = cls._mod11_digit(digits[:, :10] @ np.arange(11, 1, -1))
+        # Sequências repetidas (000.000.000-00) passam no cálculo, mas não são CPFs
+        repeated = (digits == digits[:, :1]).all(axis=1)
+        return (digits[:, 9] == first) & (digits[:, 10] == second) & ~repeated
+    
+    @classmethod
+    def _valid_cnpj(cls, digits):
+        """Valida os dígitos verificadores de CNPJs (matriz n x 14)"""
+        import numpy as np
+        
+        weights = np.array(cls.CNPJ_WEIGHTS)
+        first = cls._mod11_digit(digits[:, :12] @ weights[1:])
+        second = cls._mod11_digit(digits[:, :13] @ weights)
+        repeated = (digits == digits[:, :1]).all(axis=1)
+        return (digits[:, 12] == first) & (digits[:, 13] == second) & ~repeated
+    
+    @staticmethod
+    def _valid_luhn(digits):
+        """Valida a soma de Luhn de números de cartão (alinhados à direita)"""
+        import numpy as np
+        
+        width = digits.shape[1]
+        # Dobra um dígito a cada dois, a partir do penúltimo
+        doubled = (np.arange(width) % 2) != ((width - 1) % 2)
+        values = np.where(doubled, digits * 2, digits)
+        values = np.where(values > 9, values - 9, values)
+        return values.sum(axis=1) % 10 == 0
+    
+    def match_ratios(self, values) -> Dict[str, Any]:
+        """
+        Proporção de valores que casam com cada tipo
+        
+        Args:
+            values: Coluna Arrow (Array ou ChunkedArray) de qualquer tipo
+        
+        Returns:
+            Dict com sample_size (valores não vazios) e ratios {tipo: proporção}
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        
+        if isinstance(values, pa.ChunkedArray):
+            values = values.combine_chunks()
+        values = pc.utf8_trim_whitespace(values.cast(pa.string()))
+        values = pc.filter(values, pc.fill_null(pc.not_equal(values, ""), False))
+        
+        sample_size = len(values)
+        ratios = {}
+        if not sample_size:
+            return {'sample_size': 0, 'ratios': ratios}
+        
+        validators = {
+            self.PII_CPF: self._valid_cpf,
+            self.PII_CNPJ: self._valid_cnpj,
+            self.PII_CREDIT_CARD: self._valid_luhn
+        }
+        
+        for pii_type, pattern in self.PATTERNS.items():
+            matched = pc.match_substring_regex(values, pattern)
+            if pii_type in validators:
+                candidates = pc.filter(values, matched)
+                digits = pc.replace_substring_regex(candidates, r"\D", "")
+                matrix = self._digit_matrix(digits, self.CHECKED_WIDTHS[pii_type])
+                count = int(validators[pii_type](matrix).sum())
+            else:
+                count = pc.sum(matched).as_py() or 0
+            
+            if count:
+                ratios[pii_type] = round(count / sample_size, 4)
+        
+        return {'sample_size': sample_size, 'ratios': ratios}
+    
+    def classify(self, ratios: Dict[str, float], sample_size: int) -> Optional[str]:
+        """Tipo atribuído à coluna (None abaixo do threshold ou com amostra pequena)"""
+        if sample_size < self.min_samples or not ratios:
+            return None
+        
+        priority = list(self.PATTERNS)
+        pii_type = max(ratios, key=lambda name: (ratios[name], -priority.index(name)))
+        return pii_type if ratios[pii_type] >= self.threshold else None
+    
+    def detect(
+        self,
+        run_arrow_query: Callable[[str], Any],
+        table_full_name: str,
+        columns: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Lê a amostra e avalia as colunas de texto
+        
+        Args:
+            run_arrow_query: Função que executa uma consulta e retorna pyarrow.Table
+            table_full_name: Tabela avaliada
+            columns: Colunas com 'name' e 'type'
+        
+        Returns:
+            Dict {coluna: {pii_type, confidence, sample_size, ratios}} das colunas avaliadas
+        """
+        candidates = self.candidate_columns(columns)
+        if not candidates:
+            return {}
+        
+        sample = run_arrow_query(self.build_sample_query(table_full_name, candidates))
+        
+        results = {}
+        for index, column in enumerate(candidates):
+            matches = self.match_ratios(sample.column(f"c{index}"))
+            pii_type = self.classify(matches['ratios'], matches['sample_size'])
+            results[column['name']] = {
+                'pii_type': pii_type,
+                'confidence': matches['ratios'].get(pii_type, 0.0) if pii_type else 0.0,
+                'sample_size': matches['sample_size'],
+                'ratios': matches['ratios']
+            }
+        return results
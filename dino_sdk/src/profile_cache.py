@@ -0,0 +1,131 @@
+"""
+Dino SDK - Profile Cache
+Cache local (SQLite) das análises de tabela por versão Delta
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+
+
+class ProfileCache:
+    """
+    Cache das análises de tabela (estrutura, estatísticas e perfil das colunas)
+    
+    Cada entrada é identificada pelo nome completo da tabela e pela versão
+    Delta analisada: enquanto a versão não muda, a análise é reaproveitada
+    sem ler a tabela. A entrada mais recente de uma tabela serve de base para
+    o perfil incremental quando apenas novos dados foram acrescentados.
+    
+    Entradas são removidas por idade (último uso) e por quantidade total.
+    Uma mesma instância pode ser compartilhada entre threads.
+    """
+    
+    DEFAULT_MAX_ENTRIES = 500
+    
+    def __init__(self, cache_file: str, max_entries: int = DEFAULT_MAX_ENTRIES, max_age_days: int = 30):
+        """
+        Inicializa o cache
+        
+        Args:
+            cache_file: Arquivo SQLite do cache (criado se não existir)
+            max_entries: Máximo de entradas mantidas (as menos usadas saem primeiro)
+            max_age_days: Entradas sem uso há mais dias que isso são removidas
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries deve ser pelo menos 1")
+        
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(cache_file, check_same_thread=False)
+        with self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS profiles (
+                    table_name TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    analysis TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    used_at TEXT NOT NULL,
+                    PRIMARY KEY (table_name, version)
+                )
+            """)
+    
+    def get(self, table_name: str, version: int) -> Optional[Dict[str, Any]]:
+        """Retorna a análise da tabela na versão informada (None se ausente)"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT analysis FROM profiles WHERE table_name = ? AND version = ?",
+                (table_name, version)
+            ).fetchone()
+            if not row:
+                return None
+            
+            with self._connection:
+                self._connection.execute(
+                    "UPDATE profiles SET used_at = ? WHERE table_name = ? AND version = ?",
+                    (datetime.now().isoformat(), table_name, version)
+                )
+        return json.loads(row[0])
+    
+    def latest(self, table_name: str, before_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Retorna a análise mais recente da tabela (opcionalmente anterior a uma versão)"""
+        query = "SELECT analysis FROM profiles WHERE table_name = ?"
+        params = [table_name]
+        if before_version is not None:
+            query += " AND version < ?"
+            params.append(before_version)
+        
+        with self._lock:
+            row = self._connection.execute(query + " ORDER BY version DESC LIMIT 1", params).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def put(self, table_name: str, version: int, analysis: Dict[str, Any]) -> None:
+        """Registra a análise da versão e aplica a política de remoção"""
+        now = datetime.now().isoformat()
+        with self._lock, self._connection:
+            # Versões anteriores da mesma tabela não são mais consultadas
+            self._connection.execute(
+                "DELETE FROM profiles WHERE table_name = ? AND version < ?", (table_name, version)
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO profiles (table_name, version, analysis, created_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (table_name, version, json.dumps(analysis, default=str), now, now)
+            )
+        self.evict()
+    
+    def evict(self) -> int:
+        """
+        Remove entradas antigas e o excedente de max_entries
+        
+        Returns:
+            Número de entradas removidas
+        """
+        cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+        with self._lock, self._connection:
+            expired = self._connection.execute("DELETE FROM profiles WHERE used_at < ?", (cutoff,)).rowcount
+            excess = self._connection.execute(
+                "DELETE FROM profiles WHERE rowid NOT IN "
+                "(SELECT rowid FROM profiles ORDER BY used_at DESC LIMIT ?)",
+                (self.max_entries,)
+            ).rowcount
+        return expired + excess
+    
+    def count(self) -> int:
+        """Número de entradas no cache"""
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+    
+    def close(self):
+        """Fecha a conexão com o arquivo do cache"""
+        self._connection.close()
@@ -0,0 +1,251 @@
+"""
+Dino SDK - Statement Backend
+Execução de SQL em um SQL warehouse via Statement Execution API
+"""
+
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Iterator
+
+try:
+    from .databricks_client import DatabricksClient, DatabricksAPIError
+except ImportError:
+    from databricks_client import DatabricksClient, DatabricksAPIError
+
+
+class StatementExecutionBackend:
+    """
+    Executa SQL em um SQL warehouse, sem sessão Spark local
+    
+    Funcionalidades:
+    - Submissão assíncrona (POST /api/2.0/sql/statements) com espera curta
+      no servidor; consultas longas seguem por polling com backoff e jitter
+    - Resultados em Arrow (ARROW_STREAM + EXTERNAL_LINKS): os chunks são
+      baixados em paralelo direto do armazenamento e lidos sem conversão
+      linha a linha
+    - Todas as chamadas à API passam pela sessão HTTP do DatabricksClient
+      (pool de conexões keep-alive); os downloads usam uma sessão própria,
+      também com pool, sem o token do workspace (os links são pré-assinados)
+    - Cancelamento da instrução quando o tempo limite é atingido
+    
+    Usado pelo GenieAssistant e pelo BatchCataloger no lugar de spark.sql.
+    """
+    
+    STATEMENTS_API = "/api/2.0/sql/statements"
+    TERMINAL_STATES = ['SUCCEEDED', 'FAILED', 'CANCELED', 'CLOSED']
+    
+    def __init__(
+        self,
+        warehouse_id: Optional[str] = None,
+        client: Optional[DatabricksClient] = None,
+        catalog: Optional[str] = None,
+        schema: Optional[str] = None,
+        wait_timeout_seconds: int = 10,
+        poll_interval_seconds: float = 0.5,
+        max_poll_interval_seconds: float = 5.0,
+        backoff_factor: float = 2.0,
+        jitter: float = 0.2,
+        statement_timeout_seconds: int = 600,
+        download_workers: int = 4
+    ):
+        """
+        Inicializa o backend
+        
+        Args:
+            warehouse_id: SQL warehouse que executa as instruções (padrão:
+                variável DINO_WAREHOUSE_ID)
+            client: Cliente REST do workspace (padrão: DATABRICKS_HOST/DATABRICKS_TOKEN)
+            catalog: Catálogo padrão das instruções
+            schema: Schema padrão das instruções
+            wait_timeout_seconds: Espera no servidor antes do polling (0 ou
+                5 a 50); instruções rápidas, como DDLs, terminam em uma chamada
+            poll_interval_seconds: Intervalo inicial entre consultas do estado
+            max_poll_interval_seconds: Teto do intervalo entre consultas
+            backoff_factor: Multiplicador do intervalo a cada consulta
+            jitter: Fração aleatória removida de cada intervalo (0 a 1)
+            statement_timeout_seconds: Tempo máximo de uma instrução (cancelada ao atingir)
+            download_workers: Chunks de resultado baixados simultaneamente
+        """
+        warehouse_id = warehouse_id or os.getenv("DINO_WAREHOUSE_ID")
+        if not warehouse_id:
+            raise ValueError("warehouse_id não informado (defina DINO_WAREHOUSE_ID)")
+        if wait_timeout_seconds != 0 and not 5 <= wait_timeout_seconds <= 50:
+            raise ValueError("wait_timeout_seconds deve ser 0 ou estar entre 5 e 50")
+        if not 0 <= jitter < 1:
+            raise ValueError("jitter deve estar entre 0 e 1")
+        if download_workers < 1:
+            raise ValueError("download_workers deve ser pelo menos 1")
+        
+        self.warehouse_id = warehouse_id
+        self.client = client or DatabricksClient()
+        self.catalog = catalog
+        self.schema = schema
+        self.wait_timeout_seconds = wait_timeout_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_poll_interval_seconds = max_poll_interval_seconds
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.statement_timeout_seconds = statement_timeout_seconds
+        self.download_workers = download_workers
+        
+        self._download_session = None
+    
+    def _get_download_session(self):
+        """Sessão HTTP dos links externos (pool próprio, sem Authorization)"""
+        if self._download_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(10, self.download_workers))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._download_session = session
+        return self._download_session
+    
+    def submit(self, statement: str) -> Dict[str, Any]:
+        """
+        Submete a instrução e retorna a resposta inicial
+        
+        Com wait_timeout_seconds > 0 o servidor espera até esse tempo antes
+        de responder; se a instrução não terminou, ela continua executando
+        (on_wait_timeout CONTINUE) e a resposta traz apenas o statement_id.
+        """
+        payload = {
+            'statement': statement,
+            'warehouse_id': self.warehouse_id,
+            'wait_timeout': f"{self.wait_timeout_seconds}s",
+            'format': 'ARROW_STREAM',
+            'disposition': 'EXTERNAL_LINKS'
+        }
+        if self.wait_timeout_seconds:
+            payload['on_wait_timeout'] = 'CONTINUE'
+        if self.catalog:
+            payload['catalog'] = self.catalog
+        if self.schema:
+            payload['schema'] = self.schema
+        
+        return self.client.post(self.STATEMENTS_API, payload)
+    
+    def _poll_delays(self) -> Iterator[float]:
+        """Intervalos de polling: backoff exponencial limitado, com jitter"""
+        delay = self.poll_interval_seconds
+        while True:
+            yield delay * (1 - random.uniform(0, self.jitter))
+            delay = min(delay * self.backoff_factor, self.max_poll_interval_seconds)
+    
+    def wait(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Acompanha a instrução até um estado terminal
+        
+        Raises:
+            TimeoutError: Instrução não terminou em statement_timeout_seconds (é cancelada)
+            DatabricksAPIError: Instrução falhou ou foi cancelada
+        
+        Returns:
+            Resposta final, com manifest e o primeiro chunk do resultado
+        """
+        statement_id = response['statement_id']
+        deadline = time.monotonic() + self.statement_timeout_seconds
+        delays = self._poll_delays()
+        
+        while response.get('status', {}).get('state') not in self.TERMINAL_STATES:
+            delay = next(delays)
+            if time.monotonic() + delay > deadline:
+                self.cancel(statement_id)
+                raise TimeoutError(f"Instrução {statement_id} não terminou em {self.statement_timeout_seconds}s")
+            time.sleep(delay)
+            response = self.client.get(f"{self.STATEMENTS_API}/{statement_id}")
+        
+        status = response['status']
+        if status['state'] != 'SUCCEEDED':
+            error = status.get('error') or {}
+            raise DatabricksAPIError(
+                f"Instrução {statement_id} terminou com {status['state']}: {error.get('message', '')}",
+                error_code=error.get('error_code')
+            )
+        return response
+    
+    def cancel(self, statement_id: str) -> None:
+        """Cancela uma instrução em execução (falhas são ignoradas)"""
+        try:
+            self.client.post(f"{self.STATEMENTS_API}/{statement_id}/cancel")
+        except DatabricksAPIError:
+            pass
+    
+    def _chunk_links(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Links externos de todos os chunks, na ordem do resultado"""
+        statement_id = response['statement_id']
+        total_chunks = (response.get('manifest') or {}).get('total_chunk_count') or 0
+        first = response.get('result') or {}
+        
+        def links(chunk_index: int) -> List[Dict[str, Any]]:
+            if chunk_index == first.get('chunk_index', 0) and first.get('external_links'):
+                return first['external_links']
+            chunk = self.client.get(f"{self.STATEMENTS_API}/{statement_id}/result/chunks/{chunk_index}")
+            return chunk.get('external_links') or []
+        
+        with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+            return [link for chunk in executor.map(links, range(total_chunks)) for link in chunk]
+    
+    def _download(self, link: Dict[str, Any]):
+        """Baixa um chunk Arrow IPC stream"""
+        import pyarrow as pa
+        
+        response = self._get_download_session().get(link['external_link'], timeout=self.client.timeout)
+        response.raise_for_status()
+        return pa.ipc.open_stream(pa.BufferReader(response.content)).read_all()
+    
+    def fetch_arrow(self, response: Dict[str, Any]):
+        """
+        Lê o resultado de uma instrução concluída como pyarrow.Table
+        
+        Instruções sem resultado (ex: DDL) retornam uma tabela vazia com as
+        colunas do manifest.
+        """
+        import pyarrow as pa
+        
+        links = self._chunk_links(response)
+        if not links:
+            columns = ((response.get('manifest') or {}).get('schema') or {}).get('columns') or []
+            return pa.table({column['name']: pa.array([], type=pa.string()) for column in columns})
+        
+        with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+            tables = list(executor.map(self._download, links))
+        return pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+    
+    def execute_arrow(self, statement: str):
+        """Executa a instrução e retorna o resultado como pyarrow.Table"""
+        return self.fetch_arrow(self.wait(self.submit(statement)))
+    
+    @staticmethod
+    def _python_value(value: Any) -> Any:
+        """Converte mapas Arrow (listas de pares) em dicts, recursivamente"""
+        if isinstance(value, list):
+            if value and all(isinstance(item, tuple) and len(item) == 2 for item in value):
+                return {key: StatementExecutionBackend._python_value(item) for key, item in value}
+            return [StatementExecutionBackend._python_value(item) for item in value]
+        if isinstance(value, dict):
+            return {key: StatementExecutionBackend._python_value(item) for key, item in value.items()}
+        return value
+    
+    def execute(self, statement: str) -> List[Dict[str, Any]]:
+        """
+        Executa a instrução e retorna as linhas como dicts
+        
+        Colunas MAP (ex: properties do DESCRIBE DETAIL) viram dicts, como em
+        Row.asDict() do Spark.
+        """
+        table = self.execute_arrow(statement)
+        return [
+            {key: self._python_value(value) for key, value in row.items()}
+            for row in table.to_pylist()
+        ]
+    
+    def close(self):
+        """Fecha a sessão de downloads (o cliente da API é do chamador)"""
+        if self._download_session is not None:
+            self._download_session.close()
+            self._download_session = None
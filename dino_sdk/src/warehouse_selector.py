@@ -0,0 +1,233 @@
+"""
+Dino SDK - Warehouse Selector
+Escolha automática do SQL warehouse das salas Genie por porte, carga e custo
+"""
+
+import hashlib
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+try:
+    from .databricks_client import DatabricksClient
+except ImportError:
+    from databricks_client import DatabricksClient
+
+
+class WarehouseSelector:
+    """
+    Recomenda o SQL warehouse serverless mais adequado para uma tabela
+    
+    Funcionalidades:
+    - Listagem dos warehouses feita uma vez e mantida em memória por
+      cache_ttl_seconds (compartilhável entre tabelas e threads)
+    - Tamanho alvo por faixa de registros da tabela (a mesma de
+      GenieAssistant._categorize_row_count): quanto mais distante do alvo,
+      pior (maior custa mais, menor responde devagar)
+    - Carga estimada pelas sessões ativas em relação à capacidade máxima
+      (clusters x consultas simultâneas por cluster); warehouses saturados
+      só são escolhidos se não houver alternativa
+    - Desempate determinístico por hash da tabela e do warehouse
+      (rendezvous hashing): a mesma tabela cai sempre no mesmo warehouse e
+      salas de muitas tabelas se distribuem entre os equivalentes
+    
+    Critérios, em ordem: não saturado, distância do tamanho alvo, estado
+    (RUNNING antes de STARTING e STOPPED), faixa de carga, menor tamanho
+    e o hash.
+    
+    Estado e carga mudam a todo momento (ex: auto-stop), então uma sala que
+    já tem warehouse o mantém enquanto ele existir e não estiver saturado;
+    a recomendação só vale para salas novas ou sem warehouse utilizável.
+    """
+    
+    WAREHOUSES_API = "/api/2.0/sql/warehouses"
+    
+    # Tamanhos de warehouse, do menor (mais barato) ao maior
+    CLUSTER_SIZES = [
+        '2X-Small', 'X-Small', 'Small', 'Medium', 'Large',
+        'X-Large', '2X-Large', '3X-Large', '4X-Large'
+    ]
+    
+    # Tamanho alvo por faixa de registros da tabela
+    SIZE_TARGETS = {
+        'small': '2X-Small',
+        'medium': 'X-Small',
+        'large': 'Small',
+        'very_large': 'Medium'
+    }
+    
+    # Estados utilizáveis, do preferido ao menos preferido
+    STATE_RANKS = {'RUNNING': 0, 'STARTING': 1, 'STOPPED': 2, 'STOPPING': 2}
+    
+    # Consultas simultâneas que um cluster do warehouse atende sem fila
+    QUERIES_PER_CLUSTER = 10
+    
+    # Limites das faixas de carga; a partir do último o warehouse está saturado
+    LOAD_BUCKETS = [0.5, 1.0]
+    
+    def __init__(
+        self,
+        client: Optional[DatabricksClient] = None,
+        cache_ttl_seconds: float = 300.0,
+        serverless_only: bool = True
+    ):
+        """
+        Inicializa o seletor
+        
+        Args:
+            client: Cliente REST do workspace (padrão: DATABRICKS_HOST/DATABRICKS_TOKEN)
+            cache_ttl_seconds: Validade da listagem de warehouses em memória
+            serverless_only: Se False, warehouses PRO/CLASSIC também são
+                considerados (depois de todos os serverless)
+        """
+        if cache_ttl_seconds < 0:
+            raise ValueError("cache_ttl_seconds não pode ser negativo")
+        
+        self.client = client or DatabricksClient()
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.serverless_only = serverless_only
+        
+        self._warehouses: Optional[List[Dict[str, Any]]] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+    
+    def list_warehouses(self, refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Warehouses do workspace (listagem reaproveitada dentro do TTL)
+        
+        Args:
+            refresh: Se True, ignora a listagem em memória
+        """
+        with self._lock:
+            expired = time.monotonic() - self._fetched_at > self.cache_ttl_seconds
+            if self._warehouses is None or refresh or expired:
+                warehouses = []
+                params = {}
+                while True:
+                    data = self.client.get(self.WAREHOUSES_API, params=params)
+                    warehouses.extend(data.get('warehouses', []))
+                    
+                    next_page_token = data.get('next_page_token')
+                    if not next_page_token:
+                        break
+                    params['page_token'] = next_page_token
+                self._warehouses = warehouses
+                self._fetched_at = time.monotonic()
+            return self._warehouses
+    
+    @classmethod
+    def load(cls, warehouse: Dict[str, Any]) -> float:
+        """Sessões ativas em relação à capacidade máxima do warehouse"""
+        max_clusters = warehouse.get('max_num_clusters') or warehouse.get('num_clusters') or 1
+        return round((warehouse.get('num_active_sessions') or 0) / (max_clusters * cls.QUERIES_PER_CLUSTER), 4)
+    
+    @classmethod
+    def load_bucket(cls, load: float) -> int:
+        """Faixa de carga (0 = ociosa; len(LOAD_BUCKETS) = saturada)"""
+        return sum(1 for limit in cls.LOAD_BUCKETS if load >= limit)
+    
+    @staticmethod
+    def _candidate(warehouse: Dict[str, Any], load: float) -> Dict[str, Any]:
+        """Resumo do warehouse devolvido por rank e select"""
+        return {
+            'warehouse_id': warehouse['id'],
+            'name': warehouse.get('name'),
+            'cluster_size': warehouse.get('cluster_size'),
+            'state': warehouse.get('state'),
+            'serverless': bool(warehouse.get('enable_serverless_compute')),
+            'load': load
+        }
+    
+    @staticmethod
+    def _spread_hash(key: str, warehouse_id: str) -> int:
+        """Peso determinístico do par tabela/warehouse (rendezvous hashing)"""
+        return int(hashlib.sha256(f"{key}|{warehouse_id}".encode('utf-8')).hexdigest()[:16], 16)
+    
+    def rank(self, size_class: str, key: str) -> List[Dict[str, Any]]:
+        """
+        Warehouses candidatos, do mais ao menos adequado
+        
+        Args:
+            size_class: Faixa de registros da tabela (small, medium, large, very_large)
+            key: Identificador usado no desempate (ex: nome completo da tabela)
+        
+        Returns:
+            Lista de dicts com warehouse_id, name, cluster_size, state,
+            serverless e load
+        """
+        if size_class not in self.SIZE_TARGETS:
+            raise ValueError(f"Faixa de tamanho inválida: {size_class}")
+        
+        target = self.CLUSTER_SIZES.index(self.SIZE_TARGETS[size_class])
+        saturated = len(self.LOAD_BUCKETS)
+        ranked = []
+        
+        for warehouse in self.list_warehouses():
+            state = warehouse.get('state')
+            size = warehouse.get('cluster_size')
+            serverless = bool(warehouse.get('enable_serverless_compute'))
+            if state not in self.STATE_RANKS or size not in self.CLUSTER_SIZES:
+                continue
+            if self.serverless_only and not serverless:
+                continue
+            
+            size_index = self.CLUSTER_SIZES.index(size)
+            load = self.load(warehouse)
+            bucket = self.load_bucket(load)
+            score = (
+                not serverless,
+                bucket == saturated,
+                abs(size_index - target),
+                self.STATE_RANKS[state],
+                bucket,
+                size_index,
+                -self._spread_hash(key, warehouse['id'])
+            )
+            ranked.append((score, self._candidate(warehouse, load)))
+        
+        ranked.sort(key=lambda item: item[0])
+        return [candidate for score, candidate in ranked]
+    
+    def current(self, warehouse_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Warehouse em uso, se ainda existir, estiver utilizável e não saturado
+        
+        Returns:
+            Dict no formato de rank; None se o warehouse precisa ser trocado
+        """
+        for warehouse in self.list_warehouses():
+            if warehouse.get('id') != warehouse_id:
+                continue
+            load = self.load(warehouse)
+            if warehouse.get('state') not in self.STATE_RANKS or self.load_bucket(load) == len(self.LOAD_BUCKETS):
+                return None
+            return self._candidate(warehouse, load)
+        return None
+    
+    def select(self, size_class: str, key: str, current_warehouse_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Warehouse recomendado para a tabela
+        
+        Args:
+            size_class: Faixa de registros da tabela (small, medium, large, very_large)
+            key: Identificador usado no desempate (ex: nome completo da tabela)
+            current_warehouse_id: Warehouse que a sala já usa; é mantido
+                enquanto existir e não estiver saturado
+        
+        Returns:
+            Dict do warehouse mantido ou do melhor candidato (ver rank), com
+            size_class, target_size, candidates e kept; None se nenhum
+            warehouse for utilizável
+        """
+        ranked = self.rank(size_class, key)
+        kept = self.current(current_warehouse_id) if current_warehouse_id else None
+        if kept is None and not ranked:
+            return None
+        
+        return dict(
+            kept or ranked[0],
+            size_class=size_class,
+            target_size=self.SIZE_TARGETS[size_class],
+            candidates=len(ranked),
+            kept=kept is not None
+        )
@@ -0,0 +1,1579 @@
+"""
+Dino SDK - Workflow Manager
+Geração de workflows (Databricks Jobs 2.1) para ingestões automatizadas
+"""
+
+import copy
+import glob
+import hashlib
+import heapq
+import json
+import math
+import os
+import statistics
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Union
+
+try:
+    from .ingestion_estimator import IngestionEstimator
+    from .databricks_client import DatabricksClient, DatabricksAPIError
+    from .job_index import JobIndex
+    from .workflow_metrics import WorkflowMetricsStore
+    from .cron_schedule import CronSchedule
+    from .ingestion_engine import IngestionEngine
+except ImportError:
+    from ingestion_estimator import IngestionEstimator
+    from databricks_client import DatabricksClient, DatabricksAPIError
+    from job_index import JobIndex
+    from workflow_metrics import WorkflowMetricsStore
+    from cron_schedule import CronSchedule
+    from ingestion_engine import IngestionEngine
+
+
+class WorkflowManager:
+    """
+    Gerenciador de workflows Databricks para o Dino SDK
+
+    Funcionalidades:
+    - Workflow de ingestão automatizada (streaming com Auto Loader) por tabela
+    - Workflow multi-tabela com várias tasks compartilhando um único job cluster
+    - Exportação da definição do job em JSON (Jobs API 2.1)
+    - Compute por workflow: job cluster, instance pool ou serverless
+    - Perfil de dimensionamento (small/medium/large) pelo volume da origem
+    - Trigger de chegada de arquivo ajustado ao padrão de chegada da origem
+    - Deploy idempotente (create/reset/skip) com índice local dos jobs
+    - Métricas operacionais das execuções a partir de um cache local
+    - Agendamento cron com detecção de picos e escalonamento dos horários
+    - Workflows em DAG (bronze -> silver -> gold) com caminho crítico e
+      largura máxima de paralelismo
+    - Política de retry por task (backoff, timeout) e condições run_if
+    - Exportação incremental como Databricks Asset Bundle
+
+    Consolidar as tasks de várias tabelas em um job com um único
+    job_clusters faz com que o custo de inicialização do cluster seja pago
+    uma vez por execução, e não uma vez por tabela.
+    """
+
+    SHARED_CLUSTER_KEY = "dino_shared_cluster"
+    SETTINGS_HASH_TAG = "dino_settings_hash"
+    JOBS_API = "/api/2.1/jobs"
+    SERVERLESS_ENVIRONMENT_KEY = "dino_default"
+    
+    COMPUTE_TYPES = ["job_cluster", "instance_pool", "serverless"]
+    
+    # Limites aceitos pelo trigger file_arrival (segundos)
+    FILE_ARRIVAL_MIN_SECONDS = 60
+    FILE_ARRIVAL_MAX_SECONDS = 3600
+    
+    # Arquivos separados por até este intervalo pertencem à mesma rajada
+    BURST_GAP_SECONDS = 300
+    
+    MINUTES_PER_DAY = 1440
+    
+    # Limite de workers do job cluster dimensionado pela largura do DAG
+    MAX_CLUSTER_WORKERS = 64
+    
+    # Políticas de retry por task: intervalo base e multiplicador do backoff
+    RETRY_POLICIES = {
+        'none': {
+            'max_retries': 0,
+            'base_interval_seconds': 0,
+            'backoff_multiplier': 1.0,
+            'retry_on_timeout': False
+        },
+        'transient': {
+            'max_retries': 3,
+            'base_interval_seconds': 60,
+            'backoff_multiplier': 2.0,
+            'retry_on_timeout': True
+        }
+    }
+    
+    DEFAULT_BUNDLE_TARGETS = {
+        'dev': {'mode': 'development', 'default': True},
+        'prod': {'mode': 'production'}
+    }
+    
+    RUN_IF_CONDITIONS = [
+        'ALL_SUCCESS', 'AT_LEAST_ONE_SUCCESS', 'NONE_FAILED',
+        'ALL_DONE', 'AT_LEAST_ONE_FAILED', 'ALL_FAILED'
+    ]
+    
+    SIZING_PROFILES = {
+        'small': {
+            'node_type_id': 'Standard_DS3_v2',
+            'num_workers': 1
+        },
+        'medium': {
+            'node_type_id': 'Standard_DS3_v2',
+            'autoscale': {'min_workers': 2, 'max_workers': 6}
+        },
+        'large': {
+            'node_type_id': 'Standard_DS4_v2',
+            'autoscale': {'min_workers': 4, 'max_workers': 16}
+        }
+    }
+
+    def __init__(
+        self,
+        schema_name: str,
+        table_name: str,
+        output_dir: Optional[str] = None,
+        scripts_base_path: Optional[str] = None,
+        notification_emails: Optional[List[str]] = None,
+        spark_version: str = "13.3.x-scala2.12",
+        node_type_id: Optional[str] = None,
+        num_workers: Optional[int] = None,
+        compute: str = "job_cluster",
+        instance_pool_id: Optional[str] = None,
+        driver_instance_pool_id: Optional[str] = None,
+        sizing_profile: Optional[str] = None,
+        source_bytes: Optional[int] = None,
+        client: Optional[DatabricksClient] = None,
+        job_index_file: Optional[str] = None,
+        metrics_file: Optional[str] = None,
+        retry_policy: Union[str, Dict[str, Any], None] = None,
+        task_timeout_seconds: Optional[int] = None,
+        catalog_name: Optional[str] = None
+    ):
+        """
+        Inicializa o gerenciador de workflows
+
+        Args:
+            schema_name: Schema da tabela de destino
+            table_name: Nome da tabela de destino
+            output_dir: Diretório dos JSONs gerados (padrão: variável
+                DINO_OUTPUT_DIR ou diretório atual)
+            scripts_base_path: Pasta do workspace onde os scripts de ingestão
+                são publicados (padrão: variável DINO_SCRIPTS_BASE_PATH)
+            notification_emails: E-mails notificados em caso de falha
+            spark_version: Versão do Databricks Runtime do job cluster
+            node_type_id: Tipo de nó do job cluster (padrão: do perfil de dimensionamento)
+            num_workers: Número fixo de workers (padrão: do perfil de dimensionamento)
+            compute: job_cluster, instance_pool (nós pré-aquecidos de um pool)
+                ou serverless (job compute serverless, sem cluster próprio)
+            instance_pool_id: Pool dos workers (obrigatório com instance_pool)
+            driver_instance_pool_id: Pool do driver (padrão: instance_pool_id)
+            sizing_profile: small, medium ou large (padrão: derivado do volume)
+            source_bytes: Volume da origem em bytes, usado para derivar o perfil
+            client: Cliente REST do workspace (padrão: criado no primeiro deploy
+                a partir de DATABRICKS_HOST/DATABRICKS_TOKEN)
+            job_index_file: Arquivo SQLite do índice de jobs (padrão:
+                .dino_job_index.sqlite no output_dir)
+            metrics_file: Arquivo SQLite do cache de execuções (padrão:
+                .dino_workflow_metrics.sqlite no output_dir)
+            retry_policy: Nome de uma política de RETRY_POLICIES ou dict com
+                max_retries, base_interval_seconds, backoff_multiplier e
+                retry_on_timeout (padrão: transient, exceto nas tasks batch
+                em modo append, que ficam sem retry: uma nova tentativa
+                acrescentaria de novo as linhas já gravadas)
+            task_timeout_seconds: Timeout padrão de cada task (sem timeout se None)
+            catalog_name: Catálogo das tabelas, parte do nome dos scripts
+                gerados (padrão: variável DINO_DEFAULT_CATALOG ou main)
+        """
+        self.schema_name = schema_name
+        self.table_name = table_name
+        self.catalog_name = catalog_name or os.getenv("DINO_DEFAULT_CATALOG", "main")
+        self.output_dir = output_dir or os.getenv("DINO_OUTPUT_DIR", "")
+        self.scripts_base_path = (
+            scripts_base_path or
+            os.getenv("DINO_SCRIPTS_BASE_PATH", "/Workspace/Shared/dino_sdk/ingestion")
+        ).rstrip('/')
+        self.notification_emails = notification_emails or []
+        self.spark_version = spark_version
+        self.node_type_id = node_type_id
+        self.num_workers = num_workers
+        self.compute = compute
+        self.instance_pool_id = instance_pool_id
+        self.driver_instance_pool_id = driver_instance_pool_id or instance_pool_id
+        self.sizing_profile = sizing_profile
+        self.source_bytes = source_bytes
+        self.client = client
+        self.job_index_file = job_index_file or os.path.join(self.output_dir, ".dino_job_index.sqlite")
+        self._job_index: Optional[JobIndex] = None
+        self.metrics_file = metrics_file or os.path.join(self.output_dir, ".dino_workflow_metrics.sqlite")
+        self._metrics_store: Optional[WorkflowMetricsStore] = None
+        self.retry_policy = self._resolve_retry_policy(retry_policy or "transient")
+        self._retry_policy_explicit = retry_policy is not None
+        self.task_timeout_seconds = task_timeout_seconds
+        self.workflow_name = f"dino_auto_ingestion_{schema_name}_{table_name}"
+
+        self._validate_parameters()
+    
+    def _validate_parameters(self):
+        """Valida os parâmetros de compute"""
+        if self.compute not in self.COMPUTE_TYPES:
+            raise ValueError(f"compute deve ser um de: {self.COMPUTE_TYPES}")
+        
+        if self.compute == "instance_pool" and not self.instance_pool_id:
+            raise ValueError("instance_pool_id é obrigatório quando compute='instance_pool'")
+        
+        if self.sizing_profile and self.sizing_profile not in self.SIZING_PROFILES:
+            raise ValueError(f"sizing_profile deve ser um de: {list(self.SIZING_PROFILES)}")
+    
+    def _resolve_retry_policy(self, retry_policy: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Valida e completa uma política de retry"""
+        if isinstance(retry_policy, str):
+            if retry_policy not in self.RETRY_POLICIES:
+                raise ValueError(f"retry_policy deve ser um de: {list(self.RETRY_POLICIES)}")
+            return dict(self.RETRY_POLICIES[retry_policy])
+        
+        policy = dict(self.RETRY_POLICIES['transient'])
+        policy.update(retry_policy)
+        if policy['max_retries'] < 0 or policy['base_interval_seconds'] < 0 or policy['backoff_multiplier'] < 1:
+            raise ValueError("max_retries e base_interval_seconds devem ser >= 0 e backoff_multiplier >= 1")
+        return policy
+    
+    def build_retry_settings(
+        self,
+        retry_policy: Optional[Union[str, Dict[str, Any]]] = None,
+        timeout_seconds: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Converte uma política de retry nos campos de task da Jobs API
+        
+        A Jobs API aplica o mesmo min_retry_interval_millis a todas as
+        tentativas. O intervalo emitido é a média do backoff exponencial
+        (base, base*m, base*m², ...), de modo que as tentativas cubram a
+        mesma janela total que o backoff cobriria; uma janela de throttling
+        do storage é atravessada sem esgotar as tentativas logo no início.
+        
+        Args:
+            retry_policy: Política (padrão: a do gerenciador)
+            timeout_seconds: Timeout da task (padrão: task_timeout_seconds)
+        
+        Returns:
+            Dict com max_retries, min_retry_interval_millis, retry_on_timeout
+            e timeout_seconds
+        """
+        policy = self._resolve_retry_policy(retry_policy) if retry_policy else self.retry_policy
+        timeout_seconds = timeout_seconds if timeout_seconds is not None else self.task_timeout_seconds
+        
+        max_retries = int(policy['max_retries'])
+        if max_retries > 0:
+            schedule = [
+                policy['base_interval_seconds'] * policy['backoff_multiplier'] ** attempt
+                for attempt in range(max_retries)
+            ]
+            interval_millis = int(round(sum(schedule) / max_retries * 1000))
+        else:
+            interval_millis = 0
+        
+        settings = {
+            'max_retries': max_retries,
+            'min_retry_interval_millis': interval_millis,
+            'retry_on_timeout': bool(policy['retry_on_timeout']) and max_retries > 0
+        }
+        if timeout_seconds:
+            settings['timeout_seconds'] = int(timeout_seconds)
+        return settings
+    
+    def resolve_sizing_profile(self, source_path: Optional[str] = None) -> str:
+        """
+        Define o perfil de dimensionamento do workflow
+        
+        Ordem: sizing_profile explícito, source_bytes informado, volume da
+        origem quando visível localmente e, por fim, small.
+        """
+        if self.sizing_profile:
+            return self.sizing_profile
+        
+        if self.source_bytes is not None:
+            return IngestionEstimator.sizing_profile(self.source_bytes)
+        
+        if source_path:
+            profile = IngestionEstimator().profile_source(source_path)
+            if profile['available']:
+                return IngestionEstimator.sizing_profile(profile['total_bytes'])
+        
+        return 'small'
+    
+    def _build_job_cluster(self, sizing_profile: str = "small", parallel_tasks: int = 1) -> Dict[str, Any]:
+        """
+        Cria a entrada de job_clusters compartilhada pelas tasks
+        
+        Com instance_pool, driver e workers vêm de pools com instâncias já
+        provisionadas, eliminando a maior parte do tempo de cold start.
+        Com parallel_tasks > 1, o autoscale cresce até comportar essa
+        quantidade de tasks simultâneas com o tamanho do perfil cada.
+        """
+        profile = self.SIZING_PROFILES[sizing_profile]
+        new_cluster: Dict[str, Any] = {
+            'spark_version': self.spark_version,
+            'data_security_mode': 'SINGLE_USER',
+            'custom_tags': {
+                'dino_sdk_managed': 'true',
+                'dino_sizing_profile': sizing_profile
+            }
+        }
+        
+        if self.compute == "instance_pool":
+            new_cluster['instance_pool_id'] = self.instance_pool_id
+            new_cluster['driver_instance_pool_id'] = self.driver_instance_pool_id
+        else:
+            new_cluster['node_type_id'] = self.node_type_id or profile['node_type_id']
+        
+        if self.num_workers is not None:
+            new_cluster['num_workers'] = self.num_workers
+        elif 'autoscale' in profile:
+            new_cluster['autoscale'] = dict(profile['autoscale'])
+        else:
+            new_cluster['num_workers'] = profile['num_workers']
+        
+        if parallel_tasks > 1:
+            workers = new_cluster.pop('num_workers', None)
+            autoscale = new_cluster.pop('autoscale', None) or {'min_workers': workers, 'max_workers': workers}
+            new_cluster['autoscale'] = {
+                'min_workers': autoscale['min_workers'],
+                'max_workers': min(autoscale['max_workers'] * parallel_tasks, self.MAX_CLUSTER_WORKERS)
+            }
+        
+        return {
+            'job_cluster_key': self.SHARED_CLUSTER_KEY,
+            'new_cluster': new_cluster
+        }
+
+    def _build_ingestion_task(
+        self,
+        schema_name: str,
+        table_name: str,
+        mode: str = "streaming",
+        parameters: Optional[List[str]] = None,
+        output_mode: str = "append"
+    ) -> Dict[str, Any]:
+        """
+        Cria a task que executa o script de ingestão gerado pelo IngestionEngine
+
+        Args:
+            schema_name: Schema da tabela
+            table_name: Nome da tabela
+            mode: streaming ou batch (define o script executado)
+            parameters: Parâmetros de linha de comando do script
+            output_mode: Modo de escrita do script (append, overwrite, merge);
+                batch append não é idempotente e fica sem retry por padrão
+        """
+        spark_python_task: Dict[str, Any] = {
+            'python_file': f"{self.scripts_base_path}/"
+                           f"{IngestionEngine.script_filename(mode, self.catalog_name, schema_name, table_name)}"
+        }
+        if parameters:
+            spark_python_task['parameters'] = parameters
+
+        task = {
+            'task_key': f"ingest_{schema_name}_{table_name}",
+            'description': f"Ingestão {mode} de {schema_name}.{table_name}",
+            'spark_python_task': spark_python_task
+        }
+        if mode == "batch" and output_mode == "append" and not self._retry_policy_explicit:
+            # Sem checkpoint, repetir a task duplicaria as linhas já acrescentadas
+            task.update(self.build_retry_settings("none"))
+        else:
+            task.update(self.build_retry_settings())
+
+        if self.compute == "serverless":
+            task['environment_key'] = self.SERVERLESS_ENVIRONMENT_KEY
+        else:
+            task['job_cluster_key'] = self.SHARED_CLUSTER_KEY
+        
+        return task
+    
+    def build_job_definition(
+        self,
+        workflow_name: str,
+        tasks: List[Dict[str, Any]],
+        sizing_profile: str = "small",
+        trigger: Optional[Dict[str, Any]] = None,
+        max_concurrent_runs: int = 1,
+        queue: bool = False,
+        schedule: Optional[Dict[str, Any]] = None,
+        parallel_tasks: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Monta a definição completa do job (Jobs API 2.1)
+
+        Args:
+            workflow_name: Nome do job
+            tasks: Tasks do job (todas usando o compute compartilhado)
+            sizing_profile: Perfil de dimensionamento do job cluster
+            trigger: Trigger do job (ex: file_arrival)
+            max_concurrent_runs: Máximo de execuções simultâneas do job
+            queue: Enfileira disparos que chegam com o job em execução
+            schedule: Agendamento cron do job (quartz_cron_expression)
+            parallel_tasks: Máximo de tasks executando ao mesmo tempo
+        """
+        job_definition: Dict[str, Any] = {
+            'name': workflow_name,
+            'format': 'MULTI_TASK',
+            'max_concurrent_runs': max_concurrent_runs,
+            'tasks': tasks,
+            'email_notifications': {
+                'on_failure': list(self.notification_emails),
+                'no_alert_for_skipped_runs': True
+            },
+            'tags': {
+                'dino_sdk_managed': 'true',
+                'dino_schema': self.schema_name,
+                'dino_compute': self.compute
+            }
+        }
+        
+        if self.compute == "serverless":
+            job_definition['environments'] = [{
+                'environment_key': self.SERVERLESS_ENVIRONMENT_KEY,
+                'spec': {'client': '1'}
+            }]
+        else:
+            job_definition['job_clusters'] = [self._build_job_cluster(sizing_profile, parallel_tasks)]
+        
+        if trigger:
+            job_definition['trigger'] = trigger
+        if schedule:
+            job_definition['schedule'] = schedule
+        if queue:
+            job_definition['queue'] = {'enabled': True}
+        
+        return job_definition
+    
+    def analyze_arrival_pattern(
+        self,
+        source_path: str,
+        burst_gap_seconds: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Levanta o padrão de chegada dos arquivos de um diretório de landing
+        
+        Usa o horário de modificação dos arquivos visíveis localmente e agrupa
+        em rajadas os arquivos separados por até burst_gap_seconds.
+        
+        Args:
+            source_path: Diretório de landing monitorado
+            burst_gap_seconds: Intervalo máximo entre arquivos de uma mesma
+                rajada (padrão: BURST_GAP_SECONDS)
+        
+        Returns:
+            Dict com rajadas, duração da maior rajada, intervalo típico entre
+            arquivos de uma rajada e intervalo mediano entre rajadas
+        """
+        burst_gap_seconds = burst_gap_seconds or self.BURST_GAP_SECONDS
+        arrivals = sorted(self._iter_modification_times(source_path))
+        
+        if not arrivals:
+            return {'available': False, 'file_count': 0, 'burst_count': 0}
+        
+        bursts = [[arrivals[0]]]
+        intra_burst_gaps = []
+        for previous, current in zip(arrivals, arrivals[1:]):
+            gap = current - previous
+            if gap <= burst_gap_seconds:
+                bursts[-1].append(current)
+                intra_burst_gaps.append(gap)
+            else:
+                bursts.append([current])
+        
+        burst_starts = [burst[0] for burst in bursts]
+        burst_intervals = [current - previous for previous, current in zip(burst_starts, burst_starts[1:])]
+        
+        if intra_burst_gaps:
+            intra_burst_gaps.sort()
+            gap_p95 = intra_burst_gaps[min(int(len(intra_burst_gaps) * 0.95), len(intra_burst_gaps) - 1)]
+        else:
+            gap_p95 = 0.0
+        
+        return {
+            'available': True,
+            'file_count': len(arrivals),
+            'burst_count': len(bursts),
+            'max_files_per_burst': max(len(burst) for burst in bursts),
+            'max_burst_duration_seconds': round(max(burst[-1] - burst[0] for burst in bursts), 1),
+            'intra_burst_gap_p95_seconds': round(gap_p95, 1),
+            'median_burst_interval_seconds': (
+                round(statistics.median(burst_intervals), 1) if burst_intervals else None
+            )
+        }
+    
+    @staticmethod
+    def _iter_modification_times(root: str):
+        """Percorre os arquivos de dados sob um caminho local e retorna seus mtimes"""
+        stack = [root]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.name.startswith(('_', '.')):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.stat().st_mtime
+            except (FileNotFoundError, NotADirectoryError, PermissionError):
+                continue
+    
+    def recommend_trigger_settings(self, arrival_pattern: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Escolhe os parâmetros do trigger de chegada de arquivo
+        
+        - wait_after_last_change_seconds: 1,5x o intervalo p95 entre arquivos
+          de uma rajada, para disparar só depois que a rajada termina
+        - min_time_between_triggers_seconds: duração da maior rajada, limitada
+          à metade do intervalo mediano entre rajadas
+        - max_concurrent_runs=1 com fila: uma rajada que chega durante uma
+          execução gera no máximo uma execução enfileirada
+        
+        Sem padrão de chegada conhecido, usa os valores mínimos aceitos.
+        """
+        wait_after_last_change = self.FILE_ARRIVAL_MIN_SECONDS
+        min_time_between_triggers = self.FILE_ARRIVAL_MIN_SECONDS
+        
+        if arrival_pattern.get('available'):
+            wait_after_last_change = math.ceil(arrival_pattern['intra_burst_gap_p95_seconds'] * 1.5)
+            min_time_between_triggers = math.ceil(arrival_pattern['max_burst_duration_seconds'])
+            
+            burst_interval = arrival_pattern.get('median_burst_interval_seconds')
+            if burst_interval:
+                min_time_between_triggers = min(min_time_between_triggers, math.ceil(burst_interval / 2))
+        
+        return {
+            'min_time_between_triggers_seconds': self._clamp_trigger_seconds(min_time_between_triggers),
+            'wait_after_last_change_seconds': self._clamp_trigger_seconds(wait_after_last_change),
+            'max_concurrent_runs': 1,
+            'queue': True
+        }
+    
+    def _clamp_trigger_seconds(self, seconds: int) -> int:
+        """Limita um intervalo do trigger à faixa aceita pelo file_arrival"""
+        return max(self.FILE_ARRIVAL_MIN_SECONDS, min(int(seconds), self.FILE_ARRIVAL_MAX_SECONDS))
+    
+    def _validate_trigger_settings(self, trigger_settings: Dict[str, Any]):
+        """Valida parâmetros de trigger informados explicitamente"""
+        for key in ['min_time_between_triggers_seconds', 'wait_after_last_change_seconds']:
+            value = trigger_settings.get(key)
+            if value is not None and not (
+                self.FILE_ARRIVAL_MIN_SECONDS <= value <= self.FILE_ARRIVAL_MAX_SECONDS
+            ):
+                raise ValueError(
+                    f"{key} deve estar entre {self.FILE_ARRIVAL_MIN_SECONDS} e "
+                    f"{self.FILE_ARRIVAL_MAX_SECONDS} segundos"
+                )
+        
+        if trigger_settings.get('max_concurrent_runs', 1) < 1:
+            raise ValueError("max_concurrent_runs deve ser >= 1")
+    
+    def _build_file_arrival_trigger(self, source_path: str, trigger_settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Cria o trigger file_arrival monitorando o diretório de landing"""
+        return {
+            'pause_status': 'UNPAUSED',
+            'file_arrival': {
+                'url': source_path.rstrip('/') + '/',
+                'min_time_between_triggers_seconds': trigger_settings['min_time_between_triggers_seconds'],
+                'wait_after_last_change_seconds': trigger_settings['wait_after_last_change_seconds']
+            }
+        }
+
+    def _save_workflow(self, job_definition: Dict[str, Any]) -> str:
+        """Salva a definição do job em JSON e retorna o caminho do arquivo"""
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+
+        workflow_file = os.path.join(self.output_dir, f"workflow_{job_definition['name']}.json")
+        with open(workflow_file, 'w', encoding='utf-8') as f:
+            json.dump(job_definition, f, indent=2, ensure_ascii=False)
+
+        print(f"📝 Workflow salvo em: {workflow_file}")
+        return workflow_file
+
+    def _load_saved_workflows(self) -> List[Dict[str, Any]]:
+        """Lê as definições de job salvas (workflow_*.json) no output_dir"""
+        job_definitions = []
+        for workflow_file in sorted(glob.glob(os.path.join(self.output_dir, "workflow_*.json"))):
+            with open(workflow_file, 'r', encoding='utf-8') as f:
+                job_definitions.append(json.load(f))
+        return job_definitions
+    
+    def _bundle_job_resource(self, job_definition: Dict[str, Any], scripts_dir: str, scripts: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Converte uma definição de job em recurso do bundle
+        
+        Tasks cujo script gerado existe em scripts_dir passam a apontar para a
+        cópia em src/ do bundle (caminho relativo ao arquivo do recurso).
+        """
+        settings = copy.deepcopy(job_definition)
+        settings.get('tags', {}).pop(self.SETTINGS_HASH_TAG, None)
+        
+        for task in settings.get('tasks', []):
+            python_task = task.get('spark_python_task')
+            if not python_task:
+                continue
+            script_name = os.path.basename(python_task['python_file'])
+            local_script = os.path.join(scripts_dir, script_name)
+            if os.path.exists(local_script):
+                scripts[script_name] = local_script
+                python_task['python_file'] = f"../src/{script_name}"
+        
+        return {'resources': {'jobs': {settings['name']: settings}}}
+    
+    def export_bundle(
+        self,
+        bundle_dir: str,
+        bundle_name: str = "dino_ingestion",
+        job_definitions: Optional[List[Dict[str, Any]]] = None,
+        targets: Optional[Dict[str, Dict[str, Any]]] = None,
+        scripts_dir: Optional[str] = None,
+        prune: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Exporta os workflows como Databricks Asset Bundle
+        
+        Estrutura gerada:
+        - databricks.yml: nome do bundle, include dos recursos e targets
+        - resources/<job>.job.yml: um recurso por job
+        - src/: scripts de ingestão gerados referenciados pelas tasks
+        
+        A exportação é incremental: o hash do conteúdo de cada arquivo é
+        comparado com o índice .dino_bundle_index.json e apenas arquivos
+        alterados são reescritos, então `databricks bundle deploy` e o
+        controle de versão enxergam só o que mudou.
+        
+        Args:
+            bundle_dir: Diretório raiz do bundle
+            bundle_name: Nome do bundle
+            job_definitions: Jobs exportados (padrão: workflow_*.json do output_dir)
+            targets: Ambientes do bundle {nome: {mode, default, host, root_path}}
+                (padrão: dev em development e prod em production)
+            scripts_dir: Onde procurar os scripts gerados (padrão: output_dir)
+            prune: Remove arquivos exportados antes e que saíram do bundle
+        
+        Returns:
+            Dict com resultado da operação e arquivos escritos, inalterados e removidos
+        """
+        try:
+            import yaml
+            
+            if job_definitions is None:
+                job_definitions = self._load_saved_workflows()
+            if not job_definitions:
+                raise ValueError("Nenhum workflow para exportar")
+            
+            scripts_dir = scripts_dir if scripts_dir is not None else self.output_dir
+            print(f"📦 Exportando bundle {bundle_name} com {len(job_definitions)} jobs...")
+            
+            # Conteúdo de cada arquivo do bundle (caminho relativo -> bytes)
+            files: Dict[str, bytes] = {}
+            scripts: Dict[str, str] = {}
+            for job_definition in job_definitions:
+                resource = self._bundle_job_resource(job_definition, scripts_dir, scripts)
+                files[f"resources/{job_definition['name']}.job.yml"] = yaml.safe_dump(
+                    resource, sort_keys=False, allow_unicode=True
+                ).encode('utf-8')
+            
+            for script_name, local_script in sorted(scripts.items()):
+                with open(local_script, 'rb') as f:
+                    files[f"src/{script_name}"] = f.read()
+            
+            bundle_targets = {}
+            for target_name, target in (targets or self.DEFAULT_BUNDLE_TARGETS).items():
+                entry = {key: target[key] for key in ['mode', 'default'] if key in target}
+                workspace = {key: target[key] for key in ['host', 'root_path'] if key in target}
+                if workspace:
+                    entry['workspace'] = workspace
+                bundle_targets[target_name] = entry
+            
+            files["databricks.yml"] = yaml.safe_dump({
+                'bundle': {'name': bundle_name},
+                'include': ['resources/*.yml'],
+                'targets': bundle_targets
+            }, sort_keys=False, allow_unicode=True).encode('utf-8')
+            
+            index_file = os.path.join(bundle_dir, ".dino_bundle_index.json")
+            previous: Dict[str, str] = {}
+            if os.path.exists(index_file):
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    previous = json.load(f)
+            
+            written, unchanged, removed = [], [], []
+            current: Dict[str, str] = {}
+            for relative_path, content in sorted(files.items()):
+                content_hash = hashlib.sha256(content).hexdigest()
+                current[relative_path] = content_hash
+                target_file = os.path.join(bundle_dir, relative_path)
+                
+                if previous.get(relative_path) == content_hash and os.path.exists(target_file):
+                    unchanged.append(relative_path)
+                    continue
+                
+                os.makedirs(os.path.dirname(target_file), exist_ok=True)
+                with open(target_file, 'wb') as f:
+                    f.write(content)
+                written.append(relative_path)
+            
+            if prune:
+                for relative_path in sorted(set(previous) - set(current)):
+                    stale_file = os.path.join(bundle_dir, relative_path)
+                    if os.path.exists(stale_file):
+                        os.remove(stale_file)
+                    removed.append(relative_path)
+            
+            temp_file = f"{index_file}.{os.getpid()}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(current, f, indent=2, sort_keys=True)
+            os.replace(temp_file, index_file)
+            
+            print(f"   ✏️ {len(written)} arquivos escritos, {len(unchanged)} inalterados, {len(removed)} removidos")
+            
+            return {
+                'success': True,
+                'bundle_dir': bundle_dir,
+                'bundle_name': bundle_name,
+                'job_count': len(job_definitions),
+                'written': written,
+                'unchanged': unchanged,
+                'removed': removed,
+                'timestamp': datetime.now().isoformat()
+            }
+        
+        except Exception as e:
+            print(f"❌ Erro ao exportar bundle: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+    
+    def _get_client(self) -> DatabricksClient:
+        """Retorna o cliente REST, criando-o na primeira chamada"""
+        if self.client is None:
+            self.client = DatabricksClient()
+        return self.client
+    
+    def _get_job_index(self) -> JobIndex:
+        """Retorna o índice local de jobs do workspace do cliente"""
+        if self._job_index is None:
+            self._job_index = JobIndex(self.job_index_file, workspace=self._get_client().host)
+        return self._job_index
+    
+    @classmethod
+    def settings_hash(cls, job_definition: Dict[str, Any]) -> str:
+        """Hash SHA-256 das configurações do job (sem a tag do próprio hash)"""
+        settings = dict(job_definition)
+        tags = dict(settings.get('tags', {}))
+        tags.pop(cls.SETTINGS_HASH_TAG, None)
+        settings['tags'] = tags
+        canonical = json.dumps(settings, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def refresh_job_index(self) -> int:
+        """
+        Reconstrói o índice com todos os jobs gerenciados do workspace
+        
+        Percorre jobs/list página a página e grava em uma única transação
+        apenas os jobs com a tag dino_sdk_managed; jobs removidos do
+        workspace saem do índice.
+        
+        Returns:
+            Número de jobs indexados
+        """
+        jobs = []
+        for job in self._get_client().iter_pages(f"{self.JOBS_API}/list", 'jobs'):
+            settings = job.get('settings', {})
+            tags = settings.get('tags', {})
+            if tags.get('dino_sdk_managed') == 'true' and settings.get('name'):
+                jobs.append({
+                    'name': settings['name'],
+                    'job_id': job['job_id'],
+                    'settings_hash': tags.get(self.SETTINGS_HASH_TAG)
+                })
+        
+        self._get_job_index().put_many(jobs, replace=True)
+        print(f"🗂️ Índice de jobs atualizado: {len(jobs)} jobs gerenciados")
+        return len(jobs)
+    
+    def _find_remote_job(self, name: str) -> Optional[Dict[str, Any]]:
+        """Busca um job pelo nome com o filtro name de jobs/list"""
+        for job in self._get_client().iter_pages(f"{self.JOBS_API}/list", 'jobs', params={'name': name}):
+            settings = job.get('settings', {})
+            if settings.get('name') == name:
+                return {
+                    'name': name,
+                    'job_id': job['job_id'],
+                    'settings_hash': settings.get('tags', {}).get(self.SETTINGS_HASH_TAG)
+                }
+        return None
+    
+    def _remote_job_exists(self, job_id: int) -> bool:
+        """Confere em jobs/get se o job ainda existe no workspace"""
+        try:
+            self._get_client().get(f"{self.JOBS_API}/get", params={'job_id': job_id})
+            return True
+        except DatabricksAPIError as e:
+            if not e.is_not_found:
+                raise
+            return False
+    
+    def deploy_workflow(self, job_definition: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Cria ou atualiza o job no workspace de forma idempotente
+        
+        O hash das configurações é gravado na tag dino_settings_hash do job e
+        no índice local:
+        - Job no índice com o mesmo hash: apenas jobs/get confirma que o job
+          ainda existe (skipped); se foi removido, é criado novamente
+        - Job no índice com hash diferente: jobs/reset (updated); se o job foi
+          removido do workspace, é criado novamente
+        - Job fora do índice: busca pelo nome em jobs/list e faz reset, skip
+          ou jobs/create (created)
+        
+        Args:
+            job_definition: Definição do job (Jobs API 2.1)
+        
+        Returns:
+            Dict com resultado da operação (action, job_id, settings_hash)
+        """
+        try:
+            name = job_definition['name']
+            settings_hash = self.settings_hash(job_definition)
+            settings = dict(job_definition)
+            settings['tags'] = dict(settings.get('tags', {}), **{self.SETTINGS_HASH_TAG: settings_hash})
+            
+            job_index = self._get_job_index()
+            existing = job_index.get(name)
+            if existing and existing['settings_hash'] == settings_hash \
+                    and not self._remote_job_exists(existing['job_id']):
+                # Job removido do workspace: a entrada do índice não vale mais
+                job_index.remove(name)
+                existing = None
+            existing = existing or self._find_remote_job(name)
+            action = 'created'
+            job_id = None
+            
+            if existing and existing['settings_hash'] == settings_hash:
+                action = 'skipped'
+                job_id = existing['job_id']
+            elif existing:
+                try:
+                    self._get_client().post(f"{self.JOBS_API}/reset", {
+                        'job_id': existing['job_id'],
+                        'new_settings': settings
+                    })
+                    action = 'updated'
+                    job_id = existing['job_id']
+                except DatabricksAPIError as e:
+                    if not e.is_not_found:
+                        raise
+                    job_index.remove(name)
+            
+            if job_id is None:
+                job_id = self._get_client().post(f"{self.JOBS_API}/create", settings)['job_id']
+            
+            job_index.put(name, job_id, settings_hash)
+            
+            icons = {'created': '🆕', 'updated': '🔁', 'skipped': '⏭️'}
+            print(f"{icons[action]} Job {name} ({job_id}): {action}")
+            
+            return {
+                'success': True,
+                'workflow_name': name,
+                'job_id': job_id,
+                'action': action,
+                'settings_hash': settings_hash,
+                'timestamp': datetime.now().isoformat()
+            }
+        
+        except Exception as e:
+            print(f"❌ Erro ao publicar workflow: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+    
+    def create_auto_ingestion_workflow(
+        self,
+        source_path: str,
+        target_table: str,
+        checkpoint_location: str,
+        file_format: str = "csv",
+        delimiter: str = ",",
+        max_files_per_trigger: int = 100,
+        file_arrival: bool = True,
+        trigger_settings: Optional[Dict[str, Any]] = None,
+        schedule_cron: Optional[str] = None,
+        timezone_id: str = "America/Sao_Paulo"
+    ) -> Dict[str, Any]:
+        """
+        Cria o workflow de ingestão automatizada da tabela
+        
+        Com file_arrival, o job é disparado pela chegada de arquivos em
+        source_path e o script processa os arquivos pendentes e termina
+        (--available-now). Os parâmetros do trigger são derivados do padrão
+        de chegada da origem, para que uma rajada de uploads gere uma única
+        execução.
+
+        Args:
+            source_path: Diretório monitorado pelo Auto Loader
+            target_table: Nome completo da tabela de destino
+            checkpoint_location: Checkpoint do streaming
+            file_format: Formato dos arquivos de origem
+            delimiter: Delimitador para arquivos CSV
+            max_files_per_trigger: Máximo de arquivos processados por micro-batch
+            file_arrival: Dispara o job pela chegada de arquivos
+            trigger_settings: Sobrescreve os parâmetros recomendados do trigger
+                (min_time_between_triggers_seconds, wait_after_last_change_seconds,
+                max_concurrent_runs, queue)
+            schedule_cron: Expressão cron (5 campos) do agendamento; substitui
+                o trigger de chegada de arquivo
+            timezone_id: Fuso horário do agendamento
+
+        Returns:
+            Dict com resultado da operação
+        """
+        try:
+            print(f"🔄 Gerando workflow {self.workflow_name}...")
+
+            parameters = ["--max-files-per-trigger", str(max_files_per_trigger)]
+            arrival_pattern = None
+            trigger = None
+            resolved_trigger_settings = None
+            
+            schedule = None
+            if schedule_cron:
+                file_arrival = False
+                schedule = {
+                    'quartz_cron_expression': CronSchedule(schedule_cron).to_quartz(),
+                    'timezone_id': timezone_id,
+                    'pause_status': 'UNPAUSED'
+                }
+                parameters.append("--available-now")
+            
+            if file_arrival:
+                arrival_pattern = self.analyze_arrival_pattern(source_path)
+                resolved_trigger_settings = self.recommend_trigger_settings(arrival_pattern)
+                if trigger_settings:
+                    self._validate_trigger_settings(trigger_settings)
+                    resolved_trigger_settings.update(trigger_settings)
+                trigger = self._build_file_arrival_trigger(source_path, resolved_trigger_settings)
+                parameters.append("--available-now")
+            
+            task = self._build_ingestion_task(
+                self.schema_name,
+                self.table_name,
+                mode="streaming",
+                parameters=parameters
+            )
+            sizing_profile = self.resolve_sizing_profile(source_path)
+            job_definition = self.build_job_definition(
+                self.workflow_name,
+                [task],
+                sizing_profile,
+                trigger=trigger,
+                max_concurrent_runs=(resolved_trigger_settings or {}).get('max_concurrent_runs', 1),
+                queue=(resolved_trigger_settings or {}).get('queue', False),
+                schedule=schedule
+            )
+            workflow_file = self._save_workflow(job_definition)
+
+            return {
+                'success': True,
+                'workflow_name': self.workflow_name,
+                'workflow_file': workflow_file,
+                'source_path': source_path,
+                'target_table': target_table,
+                'checkpoint_location': checkpoint_location,
+                'file_format': file_format,
+                'delimiter': delimiter,
+                'max_files_per_trigger': max_files_per_trigger,
+                'compute': self.compute,
+                'sizing_profile': sizing_profile,
+                'file_arrival': file_arrival,
+                'arrival_pattern': arrival_pattern,
+                'trigger_settings': resolved_trigger_settings,
+                'schedule': schedule,
+                'job_definition': job_definition,
+                'timestamp': datetime.now().isoformat()
+            }
+
+        except Exception as e:
+            print(f"❌ Erro ao criar workflow: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+
+    def create_multi_table_workflow(
+        self,
+        tables: List[Dict[str, Any]],
+        workflow_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Consolida a ingestão de várias tabelas em um único job
+
+        Todas as tasks apontam para a mesma entrada de job_clusters, então o
+        cluster sobe uma única vez por execução do job.
+
+        Args:
+            tables: Lista de tabelas {schema_name, table_name[, mode,
+                output_mode, source_bytes]}; mode padrão é batch e
+                output_mode padrão é append; a soma de source_bytes define o perfil
+                de dimensionamento quando não há sizing_profile explícito
+            workflow_name: Nome do job (padrão: dino_multi_ingestion_<schema>)
+
+        Returns:
+            Dict com resultado da operação
+        """
+        try:
+            if not tables:
+                raise ValueError("tables deve conter ao menos uma tabela")
+
+            workflow_name = workflow_name or f"dino_multi_ingestion_{self.schema_name}"
+            print(f"🔄 Gerando workflow {workflow_name} com {len(tables)} tabelas...")
+
+            tasks = []
+            task_keys = set()
+            for table in tables:
+                task = self._build_ingestion_task(
+                    table.get('schema_name', self.schema_name),
+                    table['table_name'],
+                    mode=table.get('mode', 'batch'),
+                    output_mode=table.get('output_mode', 'append')
+                )
+                if task['task_key'] in task_keys:
+                    raise ValueError(f"Tabela duplicada no workflow: {task['task_key']}")
+                task_keys.add(task['task_key'])
+                tasks.append(task)
+
+            table_bytes = [table['source_bytes'] for table in tables if table.get('source_bytes') is not None]
+            if table_bytes and not self.sizing_profile:
+                sizing_profile = IngestionEstimator.sizing_profile(sum(table_bytes))
+            else:
+                sizing_profile = self.resolve_sizing_profile()
+            job_definition = self.build_job_definition(workflow_name, tasks, sizing_profile)
+            workflow_file = self._save_workflow(job_definition)
+
+            return {
+                'success': True,
+                'workflow_name': workflow_name,
+                'workflow_file': workflow_file,
+                'task_count': len(tasks),
+                'compute': self.compute,
+                'sizing_profile': sizing_profile,
+                'job_definition': job_definition,
+                'timestamp': datetime.now().isoformat()
+            }
+
+        except Exception as e:
+            print(f"❌ Erro ao criar workflow: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+
+    @staticmethod
+    def topological_sort(dependencies: Dict[str, List[str]]) -> List[str]:
+        """
+        Ordena as tasks de forma que cada uma venha depois das suas dependências
+        
+        Entre tasks liberadas ao mesmo tempo, mantém a ordem de declaração.
+        
+        Args:
+            dependencies: task_key -> lista de task_keys das quais depende
+        
+        Raises:
+            ValueError: Dependência inexistente ou ciclo no grafo
+        """
+        position = {task_key: index for index, task_key in enumerate(dependencies)}
+        dependents: Dict[str, List[str]] = {task_key: [] for task_key in dependencies}
+        pending = {}
+        for task_key, upstream in dependencies.items():
+            for dependency in upstream:
+                if dependency not in dependencies:
+                    raise ValueError(f"Task {task_key} depende de task inexistente: {dependency}")
+                dependents[dependency].append(task_key)
+            pending[task_key] = len(set(upstream))
+        
+        ready = [(position[key], key) for key, count in pending.items() if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            _, task_key = heapq.heappop(ready)
+            order.append(task_key)
+            for dependent in dict.fromkeys(dependents[task_key]):
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    heapq.heappush(ready, (position[dependent], dependent))
+        
+        if len(order) < len(dependencies):
+            cycle = sorted(task_key for task_key, count in pending.items() if count > 0)
+            raise ValueError(f"Ciclo de dependências entre as tasks: {cycle}")
+        
+        return order
+    
+    def analyze_dag(
+        self,
+        dependencies: Dict[str, List[str]],
+        durations: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Analisa o DAG com todas as tasks iniciando assim que possível
+        
+        Args:
+            dependencies: task_key -> lista de task_keys das quais depende
+            durations: Duração estimada por task em minutos (padrão: 1)
+        
+        Returns:
+            Dict com ordem topológica, níveis, início mais cedo de cada task,
+            caminho crítico (maior soma de durações até o fim) e largura
+            máxima (tasks simultâneas no plano mais cedo)
+        """
+        durations = durations or {}
+        order = self.topological_sort(dependencies)
+        
+        earliest_start: Dict[str, float] = {}
+        level: Dict[str, int] = {}
+        critical_parent: Dict[str, Optional[str]] = {}
+        for task_key in order:
+            upstream = dependencies[task_key]
+            parent = max(upstream, key=lambda key: earliest_start[key] + durations.get(key, 1), default=None)
+            earliest_start[task_key] = (earliest_start[parent] + durations.get(parent, 1)) if parent else 0
+            level[task_key] = max((level[key] + 1 for key in upstream), default=0)
+            critical_parent[task_key] = parent
+        
+        finish = {key: earliest_start[key] + durations.get(key, 1) for key in order}
+        last = max(order, key=lambda key: finish[key]) if order else None
+        critical_path = []
+        while last is not None:
+            critical_path.append(last)
+            last = critical_parent[last]
+        critical_path.reverse()
+        
+        # Varredura de eventos: término antes de início no mesmo instante
+        events = sorted(
+            [(earliest_start[key], 1) for key in order] + [(finish[key], -1) for key in order],
+            key=lambda event: (event[0], event[1])
+        )
+        running = max_parallel_width = 0
+        for _, change in events:
+            running += change
+            max_parallel_width = max(max_parallel_width, running)
+        
+        levels = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for task_key in order:
+            levels[level[task_key]].append(task_key)
+        
+        return {
+            'order': order,
+            'levels': levels,
+            'earliest_start_minutes': earliest_start,
+            'critical_path': critical_path,
+            'critical_path_minutes': max(finish.values(), default=0),
+            'max_parallel_width': max_parallel_width
+        }
+    
+    def _build_dag_task(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Cria uma task do DAG: ingestão (schema_name/table_name) ou transformação"""
+        if spec.get('table_name'):
+            task = self._build_ingestion_task(
+                spec.get('schema_name', self.schema_name),
+                spec['table_name'],
+                mode=spec.get('mode', 'batch'),
+                parameters=spec.get('parameters'),
+                output_mode=spec.get('output_mode', 'append')
+            )
+            if spec.get('task_key'):
+                task['task_key'] = spec['task_key']
+        else:
+            task = self._build_transform_task(spec)
+        
+        if spec.get('retry_policy') or spec.get('timeout_seconds'):
+            task.update(self.build_retry_settings(spec.get('retry_policy'), spec.get('timeout_seconds')))
+        
+        run_if = spec.get('run_if')
+        if run_if:
+            if run_if not in self.RUN_IF_CONDITIONS:
+                raise ValueError(f"run_if da task {task['task_key']} deve ser um de: {self.RUN_IF_CONDITIONS}")
+            if not spec.get('depends_on'):
+                raise ValueError(f"run_if da task {task['task_key']} exige depends_on")
+            task['run_if'] = run_if
+        
+        return task
+    
+    def _build_transform_task(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Cria uma task de transformação (notebook ou script Python)"""
+        if not spec.get('task_key'):
+            raise ValueError("Tasks de transformação precisam de task_key")
+        
+        task: Dict[str, Any] = {
+            'task_key': spec['task_key'],
+            'description': spec.get('description', f"Transformação {spec['task_key']}")
+        }
+        if spec.get('notebook_path'):
+            task['notebook_task'] = {'notebook_path': spec['notebook_path']}
+            if spec.get('parameters'):
+                task['notebook_task']['base_parameters'] = dict(spec['parameters'])
+        elif spec.get('python_file'):
+            task['spark_python_task'] = {'python_file': spec['python_file']}
+            if spec.get('parameters'):
+                task['spark_python_task']['parameters'] = list(spec['parameters'])
+        else:
+            raise ValueError(f"Task {spec['task_key']} precisa de notebook_path ou python_file")
+        
+        if self.compute == "serverless":
+            task['environment_key'] = self.SERVERLESS_ENVIRONMENT_KEY
+        else:
+            task['job_cluster_key'] = self.SHARED_CLUSTER_KEY
+        task.update(self.build_retry_settings())
+        return task
+    
+    def create_dag_workflow(
+        self,
+        tasks: List[Dict[str, Any]],
+        workflow_name: Optional[str] = None,
+        default_duration_minutes: float = 10
+    ) -> Dict[str, Any]:
+        """
+        Cria um workflow com dependências entre ingestões e transformações
+        
+        As tasks são emitidas em ordem topológica com depends_on, então cada
+        camada (ex: silver) só começa quando as tabelas das quais depende
+        (ex: bronze) terminam. O job cluster é dimensionado pela largura
+        máxima do DAG, para que as tasks de um mesmo nível rodem em paralelo.
+        
+        Args:
+            tasks: Lista de tasks. Ingestão: {schema_name, table_name[, mode,
+                output_mode, task_key]}; transformação: {task_key, notebook_path ou
+                python_file[, parameters]}. Ambas aceitam depends_on (lista de
+                task_keys), duration_minutes (estimativa), run_if (ex:
+                ALL_DONE para uma task de limpeza/alerta), retry_policy e
+                timeout_seconds
+            workflow_name: Nome do job (padrão: dino_dag_<schema>)
+            default_duration_minutes: Duração de tasks sem estimativa
+        
+        Returns:
+            Dict com resultado da operação, caminho crítico e largura máxima
+        """
+        try:
+            if not tasks:
+                raise ValueError("tasks deve conter ao menos uma task")
+            
+            workflow_name = workflow_name or f"dino_dag_{self.schema_name}"
+            print(f"🔄 Gerando workflow {workflow_name} com {len(tasks)} tasks...")
+            
+            built: Dict[str, Dict[str, Any]] = {}
+            dependencies: Dict[str, List[str]] = {}
+            durations: Dict[str, float] = {}
+            for spec in tasks:
+                task = self._build_dag_task(spec)
+                task_key = task['task_key']
+                if task_key in built:
+                    raise ValueError(f"Task duplicada no workflow: {task_key}")
+                built[task_key] = task
+                dependencies[task_key] = list(spec.get('depends_on', []))
+                durations[task_key] = spec.get('duration_minutes', default_duration_minutes)
+            
+            analysis = self.analyze_dag(dependencies, durations)
+            
+            ordered_tasks = []
+            for task_key in analysis['order']:
+                task = built[task_key]
+                if dependencies[task_key]:
+                    task['depends_on'] = [{'task_key': key} for key in dict.fromkeys(dependencies[task_key])]
+                ordered_tasks.append(task)
+            
+            sizing_profile = self.resolve_sizing_profile()
+            job_definition = self.build_job_definition(
+                workflow_name,
+                ordered_tasks,
+                sizing_profile,
+                queue=True,
+                parallel_tasks=analysis['max_parallel_width']
+            )
+            workflow_file = self._save_workflow(job_definition)
+            
+            print(f"   🧭 Caminho crítico: {' -> '.join(analysis['critical_path'])} "
+                  f"({analysis['critical_path_minutes']:.0f} min)")
+            print(f"   🔀 Largura máxima: {analysis['max_parallel_width']} tasks simultâneas")
+            
+            return {
+                'success': True,
+                'workflow_name': workflow_name,
+                'workflow_file': workflow_file,
+                'task_count': len(ordered_tasks),
+                'levels': analysis['levels'],
+                'critical_path': analysis['critical_path'],
+                'critical_path_minutes': analysis['critical_path_minutes'],
+                'max_parallel_width': analysis['max_parallel_width'],
+                'compute': self.compute,
+                'sizing_profile': sizing_profile,
+                'job_definition': job_definition,
+                'timestamp': datetime.now().isoformat()
+            }
+        
+        except Exception as e:
+            print(f"❌ Erro ao criar workflow: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'timestamp': datetime.now().isoformat()
+            }
+    
+    def collect_managed_schedules(self, default_duration_minutes: int = 30) -> List[Dict[str, Any]]:
+        """
+        Lista os agendamentos de todos os jobs gerenciados do workspace
+        
+        A duração de cada job vem do p95 do cache de métricas quando houver
+        execuções sincronizadas; senão usa default_duration_minutes.
+        
+        Returns:
+            Lista de {name, cron, duration_minutes}
+        """
+        store = self._get_metrics_store()
+        schedules = []
+        for job in self._get_client().iter_pages(f"{self.JOBS_API}/list", 'jobs'):
+            settings = job.get('settings', {})
+            quartz = settings.get('schedule', {}).get('quartz_cron_expression')
+            if settings.get('tags', {}).get('dino_sdk_managed') != 'true' or not quartz:
+                continue
+            
+            p95 = store.compute_stats(job['job_id'])['run_duration_seconds']['p95']
+            schedules.append({
+                'name': settings.get('name', str(job['job_id'])),
+                'cron': CronSchedule.from_quartz(quartz).expression,
+                'duration_minutes': math.ceil(p95 / 60) if p95 else default_duration_minutes
+            })
+        return schedules
+    
+    def _expand_schedules(self, schedules: List[Dict[str, Any]], default_duration_minutes: int):
+        """Interpreta os agendamentos e retorna (crons, arrays de início, durações)"""
+        import numpy as np
+        
+        crons = [CronSchedule(schedule['cron']) for schedule in schedules]
+        starts = [np.array(cron.start_minutes(), dtype=np.int64) for cron in crons]
+        durations = [
+            max(1, min(int(schedule.get('duration_minutes') or default_duration_minutes), self.MINUTES_PER_DAY))
+            for schedule in schedules
+        ]
+        return crons, starts, durations
+    
+    def schedule_occupancy(
+        self,
+        schedules: List[Dict[str, Any]],
+        default_duration_minutes: int = 30
+    ):
+        """
+        Histograma de ocupação por minuto do dia (jobs simultâneos em execução)
+        
+        Cada disparo soma +1 no minuto inicial e -1 no minuto final em um
+        vetor de diferenças; a soma acumulada dá a ocupação dos 1440 minutos.
+        Execuções que atravessam a meia-noite continuam no início do dia.
+        
+        Args:
+            schedules: Lista de {name, cron[, duration_minutes]}
+            default_duration_minutes: Duração de jobs sem duration_minutes
+        
+        Returns:
+            numpy.ndarray com 1440 posições
+        """
+        import numpy as np
+        
+        if not schedules:
+            return np.zeros(self.MINUTES_PER_DAY, dtype=np.int64)
+        
+        _, starts, durations = self._expand_schedules(schedules, default_duration_minutes)
+        all_starts = np.concatenate(starts)
+        all_ends = all_starts + np.repeat(durations, [len(start) for start in starts])
+        
+        # Dois dias de diferenças para acomodar a virada da meia-noite
+        diff = np.zeros(2 * self.MINUTES_PER_DAY + 1, dtype=np.int64)
+        np.add.at(diff, all_starts, 1)
+        np.add.at(diff, all_ends, -1)
+        occupancy = np.cumsum(diff)[:2 * self.MINUTES_PER_DAY]
+        return occupancy[:self.MINUTES_PER_DAY] + occupancy[self.MINUTES_PER_DAY:]
+    
+    def detect_schedule_peaks(
+        self,
+        schedules: List[Dict[str, Any]],
+        max_concurrent: int,
+        default_duration_minutes: int = 30
+    ) -> List[Dict[str, Any]]:
+        """
+        Encontra as janelas do dia com mais jobs simultâneos que max_concurrent
+        
+        Returns:
+            Lista de {start, end (HH:MM), peak_concurrency, jobs} com os jobs
+            que disparam dentro de cada janela
+        """
+        import numpy as np
+        
+        occupancy = self.schedule_occupancy(schedules, default_duration_minutes)
+        over = np.concatenate([[False], occupancy > max_concurrent, [False]])
+        edges = np.flatnonzero(np.diff(over.astype(np.int8)))
+        
+        peaks = []
+        for start, end in zip(edges[::2], edges[1::2]):
+            jobs = [
+                schedule['name']
+                for schedule in schedules
+                if any(start <= minute < end for minute in CronSchedule(schedule['cron']).start_minutes())
+            ]
+            peaks.append({
+                'start': self._format_minute(start),
+                'end': self._format_minute(end - 1),
+                'peak_concurrency': int(occupancy[start:end].max()),
+                'jobs': jobs
+            })
+        return peaks
+    
+    def stagger_schedules(
+        self,
+        schedules: List[Dict[str, Any]],
+        max_delay_minutes: int = 60,
+        default_duration_minutes: int = 30
+    ) -> Dict[str, Any]:
+        """
+        Propõe atrasos nos agendamentos para achatar os picos de concorrência
+        
+        Cada job só pode ser atrasado (nunca adiantado), dentro da sua janela
+        de prontidão dos dados: o horário original marca quando os dados
+        estão prontos e max_delay_minutes o atraso máximo tolerado. Os jobs
+        são posicionados um a um, os mais restritos primeiro, no atraso que
+        minimiza a ocupação máxima durante as suas execuções; no empate, o
+        que minimiza a soma da ocupação (sobreposição total com os demais) e,
+        por fim, o menor atraso. O custo de todos os atrasos candidatos de um
+        job é calculado de uma vez com máximos e somas em janela deslizante
+        sobre o histograma de ocupação.
+        
+        Args:
+            schedules: Lista de {name, cron[, duration_minutes, max_delay_minutes]}
+            max_delay_minutes: Atraso máximo padrão
+            default_duration_minutes: Duração de jobs sem duration_minutes
+        
+        Returns:
+            Dict com o agendamento proposto por job e o pico antes/depois
+        """
+        import numpy as np
+        from numpy.lib.stride_tricks import sliding_window_view
+        
+        crons, starts, durations = self._expand_schedules(schedules, default_duration_minutes)
+        max_delays = [int(schedule.get('max_delay_minutes', max_delay_minutes)) for schedule in schedules]
+        
+        # Mais restritos primeiro: menor janela, maior duração, mais disparos
+        order = sorted(
+            range(len(schedules)),
+            key=lambda i: (max_delays[i], -durations[i], -len(starts[i]), schedules[i]['name'])
+        )
+        
+        occupancy = np.zeros(self.MINUTES_PER_DAY, dtype=np.int64)
+        proposals: List[Optional[Dict[str, Any]]] = [None] * len(schedules)
+        
+        for i in order:
+            duration = durations[i]
+            delays = np.array(
+                [delay for delay in range(max_delays[i] + 1) if crons[i].can_shift(delay)],
+                dtype=np.int64
+            )
+            
+            # Maior ocupação e ocupação somada em [c, c + duration) para todo minuto inicial c
+            extended = np.concatenate([occupancy, occupancy[:duration - 1]])
+            windows = sliding_window_view(extended, duration)
+            window_peak = windows.max(axis=1)
+            window_sum = windows.sum(axis=1)
+            
+            candidate_starts = (starts[i][None, :] + delays[:, None]) % self.MINUTES_PER_DAY
+            cost = window_peak[candidate_starts].max(axis=1)
+            overlap = window_sum[candidate_starts].sum(axis=1)
+            # np.lexsort ordena pela última chave primeiro: pico, sobreposição, atraso
+            delay = int(delays[np.lexsort((delays, overlap, cost))[0]])
+            
+            minutes = (starts[i][:, None] + delay + np.arange(duration)[None, :]) % self.MINUTES_PER_DAY
+            np.add.at(occupancy, minutes.ravel(), 1)
+            
+            proposals[i] = {
+                'name': schedules[i]['name'],
+                'original_cron': crons[i].expression,
+                'proposed_cron': crons[i].shifted(delay).expression,
+                'delay_minutes': delay,
+                'duration_minutes': duration
+            }
+        
+        peak_before = int(self.schedule_occupancy(schedules, default_duration_minutes).max()) if schedules else 0
+        peak_after = int(occupancy.max()) if schedules else 0
+        print(f"📅 Escalonamento de {len(schedules)} jobs: pico de {peak_before} -> {peak_after} execuções simultâneas")
+        
+        return {
+            'schedules': proposals,
+            'peak_before': peak_before,
+            'peak_after': peak_after,
+            'changed_jobs': sum(1 for proposal in proposals if proposal['delay_minutes'] > 0)
+        }
+    
+    @staticmethod
+    def _format_minute(minute_of_day: int) -> str:
+        """Formata um minuto do dia como HH:MM"""
+        return f"{int(minute_of_day) // 60:02d}:{int(minute_of_day) % 60:02d}"
+    
+    def _get_metrics_store(self) -> WorkflowMetricsStore:
+        """Retorna o cache de execuções do workspace do cliente"""
+        if self._metrics_store is None:
+            self._metrics_store = WorkflowMetricsStore(self.metrics_file, workspace=self._get_client().host)
+        return self._metrics_store
+    
+    def _lookup_job_id(self) -> Optional[int]:
+        """job_id do workflow no workspace (None sem workspace configurado ou job publicado)"""
+        if self.client is None and not os.getenv("DATABRICKS_HOST"):
+            return None
+        
+        existing = self._get_job_index().get(self.workflow_name) or self._find_remote_job(self.workflow_name)
+        return existing['job_id'] if existing else None
+    
+    def get_workflow_metrics(self, sync: bool = True, window_days: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Retorna métricas operacionais do workflow
+        
+        As execuções novas são sincronizadas de forma incremental para o
+        cache local e as estatísticas são calculadas sobre o cache, sem
+        rebuscar o histórico completo a cada chamada.
+        
+        Args:
+            sync: Sincroniza as execuções novas antes de calcular
+            window_days: Considera apenas execuções dos últimos N dias
+        
+        Returns:
+            Dict com status, contagens de execuções, percentis p50/p95/p99
+            (duração, fila e setup do cluster) e tendência da taxa de falhas
+        """
+        try:
+            job_id = self._lookup_job_id()
+            if job_id is None:
+                return {
+                    'status': 'not_deployed',
+                    'workflow_name': self.workflow_name,
+                    'total_runs': 0,
+                    'successful_runs': 0,
+                    'failed_runs': 0,
+                    'last_check': datetime.now().isoformat()
+                }
+            
+            store = self._get_metrics_store()
+            if sync:
+                store.sync(self._get_client(), job_id)
+            
+            metrics = {
+                'status': 'deployed',
+                'workflow_name': self.workflow_name,
+                'job_id': job_id
+            }
+            metrics.update(store.compute_stats(job_id, window_days))
+            metrics['last_check'] = datetime.now().isoformat()
+            return metrics
+        
+        except Exception as e:
+            print(f"❌ Erro ao obter métricas do workflow: {str(e)}")
+            return {
+                'status': 'error',
+                'workflow_name': self.workflow_name,
+                'error': str(e),
+                'total_runs': 0,
+                'successful_runs': 0,
+                'failed_runs': 0,
+                'last_check': datetime.now().isoformat()
+            }
@@ -0,0 +1,246 @@
+"""
+Dino SDK - Workflow Metrics
+Cache local (SQLite) das execuções dos jobs e estatísticas operacionais
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+try:
+    from .databricks_client import DatabricksClient
+except ImportError:
+    from databricks_client import DatabricksClient
+
+
+class WorkflowMetricsStore:
+    """
+    Armazena as execuções de jobs e calcula métricas a partir do cache
+    
+    Funcionalidades:
+    - Sincronização incremental de jobs/runs/list a partir da última
+      execução vista (as páginas chegam da mais recente para a mais antiga
+      e a leitura para ao alcançar execuções já consolidadas)
+    - Percentis p50/p95/p99 de duração, fila e setup do cluster
+    - Tendência diária da taxa de falhas
+    
+    Execuções ainda em andamento na sincronização anterior são buscadas de
+    novo até terminarem, para que o estado final seja registrado.
+    """
+    
+    TERMINAL_STATES = ['TERMINATED', 'SKIPPED', 'INTERNAL_ERROR']
+    FAILED_RESULTS = ['FAILED', 'TIMEDOUT', 'MAXIMUM_CONCURRENT_RUNS_REACHED']
+    
+    # Limite de execuções por página aceito por jobs/runs/list
+    RUNS_PAGE_SIZE = 25
+    
+    def __init__(self, metrics_file: str, workspace: str = ""):
+        """
+        Inicializa o cache de métricas
+        
+        Args:
+            metrics_file: Arquivo SQLite do cache (criado se não existir)
+            workspace: Host do workspace ao qual os job_ids pertencem
+        """
+        self.metrics_file = metrics_file
+        self.workspace = workspace
+        
+        metrics_dir = os.path.dirname(metrics_file)
+        if metrics_dir:
+            os.makedirs(metrics_dir, exist_ok=True)
+        
+        self._connection = sqlite3.connect(metrics_file)
+        with self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    workspace TEXT NOT NULL,
+                    job_id INTEGER NOT NULL,
+                    run_id INTEGER NOT NULL,
+                    start_time INTEGER,
+                    end_time INTEGER,
+                    life_cycle_state TEXT,
+                    result_state TEXT,
+                    run_duration_ms INTEGER,
+                    queue_duration_ms INTEGER,
+                    setup_duration_ms INTEGER,
+                    PRIMARY KEY (workspace, run_id)
+                )
+            """)
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS runs_by_job ON runs (workspace, job_id, start_time)"
+            )
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS sync_state (
+                    workspace TEXT NOT NULL,
+                    job_id INTEGER NOT NULL,
+                    resume_run_id INTEGER,
+                    synced_at TEXT,
+                    PRIMARY KEY (workspace, job_id)
+                )
+            """)
+    
+    def sync(self, client: DatabricksClient, job_id: int) -> int:
+        """
+        Busca no workspace apenas as execuções novas ou ainda em andamento
+        
+        Args:
+            client: Cliente REST do workspace
+            job_id: Job cujas execuções são sincronizadas
+        
+        Returns:
+            Número de execuções recebidas
+        """
+        state = self._connection.execute(
+            "SELECT resume_run_id FROM sync_state WHERE workspace = ? AND job_id = ?",
+            (self.workspace, job_id)
+        ).fetchone()
+        resume_run_id = state[0] if state else None
+        
+        rows = []
+        for run in client.iter_pages(
+            "/api/2.1/jobs/runs/list", 'runs', params={'job_id': job_id}, page_size=self.RUNS_PAGE_SIZE
+        ):
+            if resume_run_id is not None and run['run_id'] < resume_run_id:
+                break
+            rows.append(self._run_row(job_id, run))
+        
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO runs (workspace, job_id, run_id, start_time, end_time, "
+                "life_cycle_state, result_state, run_duration_ms, queue_duration_ms, setup_duration_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            
+            # Próxima leitura começa na execução mais antiga ainda em andamento
+            # ou, se todas terminaram, na mais recente conhecida
+            placeholders = ', '.join('?' * len(self.TERMINAL_STATES))
+            pending = self._connection.execute(
+                f"SELECT MIN(run_id) FROM runs WHERE workspace = ? AND job_id = ? "
+                f"AND life_cycle_state NOT IN ({placeholders})",
+                (self.workspace, job_id, *self.TERMINAL_STATES)
+            ).fetchone()[0]
+            latest = self._connection.execute(
+                "SELECT MAX(run_id) FROM runs WHERE workspace = ? AND job_id = ?",
+                (self.workspace, job_id)
+            ).fetchone()[0]
+            
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sync_state (workspace, job_id, resume_run_id, synced_at) "
+                "VALUES (?, ?, ?, ?)",
+                (self.workspace, job_id, pending if pending is not None else latest, datetime.now().isoformat())
+            )
+        
+        print(f"📥 {len(rows)} execuções sincronizadas do job {job_id}")
+        return len(rows)
+    
+    def _run_row(self, job_id: int, run: Dict[str, Any]) -> tuple:
+        """Converte uma execução da API em linha do cache"""
+        state = run.get('state', {})
+        start_time = run.get('start_time') or None
+        end_time = run.get('end_time') or None
+        
+        run_duration = run.get('run_duration')
+        if not run_duration:
+            stages = [run.get(key) for key in ['setup_duration', 'execution_duration', 'cleanup_duration']]
+            if any(stages):
+                run_duration = sum(stage or 0 for stage in stages)
+            elif start_time and end_time:
+                run_duration = end_time - start_time
+        
+        return (
+            self.workspace,
+            job_id,
+            run['run_id'],
+            start_time,
+            end_time,
+            state.get('life_cycle_state'),
+            state.get('result_state'),
+            run_duration,
+            run.get('queue_duration'),
+            run.get('setup_duration')
+        )
+    
+    def compute_stats(self, job_id: int, window_days: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Calcula as métricas do job a partir do cache
+        
+        Args:
+            job_id: Job analisado
+            window_days: Considera apenas execuções iniciadas nos últimos N dias
+        
+        Returns:
+            Dict com contagens, percentis (segundos) e tendência diária de falhas
+        """
+        import numpy as np
+        
+        conditions = "workspace = ? AND job_id = ?"
+        params: List[Any] = [self.workspace, job_id]
+        if window_days:
+            conditions += " AND start_time >= ?"
+            params.append(int((datetime.now().timestamp() - window_days * 86400) * 1000))
+        
+        terminal = ', '.join('?' * len(self.TERMINAL_STATES))
+        failed = ', '.join('?' * len(self.FAILED_RESULTS))
+        failure_condition = f"(result_state IN ({failed}) OR life_cycle_state = 'INTERNAL_ERROR')"
+        
+        total_runs, successful_runs, failed_runs, running_runs = self._connection.execute(
+            f"SELECT COUNT(*), "
+            f"COALESCE(SUM(result_state = 'SUCCESS'), 0), "
+            f"COALESCE(SUM({failure_condition}), 0), "
+            f"COALESCE(SUM(life_cycle_state NOT IN ({terminal})), 0) "
+            f"FROM runs WHERE {conditions}",
+            (*self.FAILED_RESULTS, *self.TERMINAL_STATES, *params)
+        ).fetchone()
+        
+        durations = np.array(self._connection.execute(
+            f"SELECT run_duration_ms, queue_duration_ms, setup_duration_ms FROM runs "
+            f"WHERE {conditions} AND life_cycle_state IN ({terminal})",
+            (*params, *self.TERMINAL_STATES)
+        ).fetchall(), dtype=float).reshape(-1, 3)
+        
+        trend = [
+            {
+                'date': day,
+                'runs': runs,
+                'failed_runs': failures,
+                'failure_rate': round(failures / runs, 4) if runs else 0.0
+            }
+            for day, runs, failures in self._connection.execute(
+                f"SELECT date(start_time / 1000, 'unixepoch') AS day, COUNT(*), "
+                f"COALESCE(SUM({failure_condition}), 0) "
+                f"FROM runs WHERE {conditions} AND life_cycle_state IN ({terminal}) "
+                f"GROUP BY day ORDER BY day",
+                (*self.FAILED_RESULTS, *params, *self.TERMINAL_STATES)
+            )
+        ]
+        
+        finished_runs = successful_runs + failed_runs
+        return {
+            'total_runs': total_runs,
+            'successful_runs': successful_runs,
+            'failed_runs': failed_runs,
+            'running_runs': running_runs,
+            'failure_rate': round(failed_runs / finished_runs, 4) if finished_runs else 0.0,
+            'run_duration_seconds': self._percentiles(durations[:, 0]),
+            'queue_duration_seconds': self._percentiles(durations[:, 1]),
+            'setup_duration_seconds': self._percentiles(durations[:, 2]),
+            'failure_rate_trend': trend
+        }
+    
+    @staticmethod
+    def _percentiles(values_ms) -> Dict[str, Optional[float]]:
+        """p50/p95/p99 em segundos, ignorando valores ausentes"""
+        import numpy as np
+        
+        values_ms = values_ms[~np.isnan(values_ms)]
+        if values_ms.size == 0:
+            return {'p50': None, 'p95': None, 'p99': None}
+        
+        p50, p95, p99 = np.percentile(values_ms, [50, 95, 99]) / 1000.0
+        return {'p50': round(float(p50), 1), 'p95': round(float(p95), 1), 'p99': round(float(p99), 1)}
+    
+    def close(self):
+        """Fecha a conexão com o arquivo do cache"""
+        self._connection.close()
@@ -0,0 +1,390 @@
+"""
+Servidor HTTP local que simula as APIs REST do Databricks usadas nos testes
+"""
+
+import base64
+import io
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeDatabricksServer:
+    """
+    Stand-in das APIs REST do workspace
+    
+    Rotas são registradas por (método, caminho) e recebem (params, body);
+    cada handler retorna (status, corpo JSON). Todas as requisições ficam
+    registradas em self.requests para conferência nos testes.
+    """
+    
+    def __init__(self):
+        self.jobs = {}
+        self.next_job_id = 1000
+        self.runs = []
+        self.requests = []
+        self.workspace_files = {}
+        self.submitted_runs = {}
+        self.next_run_id = 5000
+        # Comportamento das execuções submetidas: consultas até terminar,
+        # resultado final e saída (logs) da task
+        self.run_polls = 2
+        self.run_result_state = 'SUCCESS'
+        self.run_logs = 'DINO_METRICS {"rows_loaded": 42}'
+        self.max_active_runs = 0
+        # Statement Execution API: respostas por expressão regular, consultas
+        # RUNNING antes de concluir e linhas por chunk do resultado
+        self.sql_responses = []
+        self.statement_polls = 0
+        self.chunk_rows = 1000
+        self.statements = {}
+        self.download_authorization = []
+        self.base_url = None
+        # Genie spaces por space_id
+        self.genie_spaces = {}
+        self.next_space_id = 1
+        # SQL warehouses por id
+        self.warehouses = {}
+        # Status (ex: 429, 503) devolvidos, em ordem, antes de atender as
+        # próximas requisições
+        self.transient_errors = []
+        self._lock = threading.Lock()
+        self.routes = {
+            ('GET', '/api/2.1/jobs/list'): self._jobs_list,
+            ('POST', '/api/2.1/jobs/create'): self._jobs_create,
+            ('POST', '/api/2.1/jobs/reset'): self._jobs_reset,
+            ('GET', '/api/2.1/jobs/get'): self._jobs_get,
+            ('GET', '/api/2.1/jobs/runs/list'): self._runs_list,
+            ('POST', '/api/2.0/workspace/mkdirs'): self._workspace_mkdirs,
+            ('POST', '/api/2.0/workspace/import'): self._workspace_import,
+            ('POST', '/api/2.1/jobs/runs/submit'): self._runs_submit,
+            ('GET', '/api/2.1/jobs/runs/get'): self._runs_get,
+            ('GET', '/api/2.1/jobs/runs/get-output'): self._runs_get_output,
+            ('POST', '/api/2.1/jobs/runs/cancel'): self._runs_cancel,
+            ('POST', '/api/2.0/sql/statements'): self._statements_submit,
+            ('GET', '/api/2.0/genie/spaces'): self._spaces_list,
+            ('POST', '/api/2.0/genie/spaces'): self._spaces_create,
+            ('GET', '/api/2.0/sql/warehouses'): self._warehouses_list
+        }
+        # Rotas com parâmetros no caminho: handler recebe (params, body, match)
+        self.pattern_routes = [
+            ('GET', re.compile(r'^/api/2\.0/sql/statements/([^/]+)$'), self._statements_get),
+            ('GET', re.compile(r'^/api/2\.0/sql/statements/([^/]+)/result/chunks/(\d+)$'), self._statements_chunk),
+            ('POST', re.compile(r'^/api/2\.0/sql/statements/([^/]+)/cancel$'), self._statements_cancel),
+            ('GET', re.compile(r'^/files/([^/]+)/(\d+)$'), self._statements_file),
+            ('PATCH', re.compile(r'^/api/2\.0/genie/spaces/([^/]+)$'), self._spaces_update)
+        ]
+        self._server = None
+    
+    def start(self) -> str:
+        """Sobe o servidor em uma porta livre e retorna a URL base"""
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self, method):
+                parsed = urlparse(self.path)
+                params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                stub.requests.append((method, parsed.path, params, body))
+                
+                with stub._lock:
+                    transient = stub.transient_errors.pop(0) if stub.transient_errors else None
+                handler = stub.routes.get((method, parsed.path))
+                if transient:
+                    status, payload = transient, {'error_code': 'TEMPORARILY_UNAVAILABLE', 'message': 'retry later'}
+                elif handler:
+                    status, payload = handler(params, body)
+                else:
+                    status, payload = 404, {'error_code': 'ENDPOINT_NOT_FOUND'}
+                    for route_method, pattern, pattern_handler in stub.pattern_routes:
+                        match = pattern.match(parsed.path)
+                        if route_method == method and match:
+                            if parsed.path.startswith('/files/'):
+                                stub.download_authorization.append(self.headers.get('Authorization'))
+                            status, payload = pattern_handler(params, body, match)
+                            break
+                
+                if isinstance(payload, bytes):
+                    data, content_type = payload, 'application/vnd.apache.arrow.stream'
+                else:
+                    data, content_type = json.dumps(payload).encode('utf-8'), 'application/json'
+                
+                self.send_response(status)
+                if transient:
+                    self.send_header('Retry-After', '0')
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def do_GET(self):
+                self._handle('GET')
+            
+            def do_POST(self):
+                self._handle('POST')
+            
+            def do_PATCH(self):
+                self._handle('PATCH')
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self._server.server_port}"
+        return self.base_url
+    
+    def stop(self):
+        """Encerra o servidor"""
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def count(self, method: str, path: str) -> int:
+        """Número de requisições recebidas em uma rota"""
+        return sum(1 for request in self.requests if request[0] == method and request[1] == path)
+    
+    def add_job(self, settings):
+        """Cria um job diretamente no estado do servidor"""
+        job_id = self.next_job_id
+        self.next_job_id += 1
+        self.jobs[job_id] = settings
+        return job_id
+    
+    @staticmethod
+    def _page(items_key, items, params):
+        offset = int(params.get('page_token', 0))
+        limit = int(params.get('limit', 20))
+        has_more = offset + limit < len(items)
+        
+        payload = {items_key: items[offset:offset + limit], 'has_more': has_more}
+        if has_more:
+            payload['next_page_token'] = str(offset + limit)
+        return 200, payload
+    
+    def _jobs_list(self, params, body):
+        jobs = [
+            {'job_id': job_id, 'settings': settings}
+            for job_id, settings in sorted(self.jobs.items())
+            if 'name' not in params or settings.get('name') == params['name']
+        ]
+        return self._page('jobs', jobs, params)
+    
+    def _runs_list(self, params, body):
+        # Mais recentes primeiro, como na API
+        runs = sorted(
+            (run for run in self.runs if str(run['job_id']) == params.get('job_id')),
+            key=lambda run: run['run_id'],
+            reverse=True
+        )
+        return self._page('runs', runs, params)
+    
+    def _jobs_create(self, params, body):
+        return 200, {'job_id': self.add_job(body)}
+    
+    def _jobs_get(self, params, body):
+        job_id = int(params['job_id'])
+        if job_id not in self.jobs:
+            return 400, {'error_code': 'RESOURCE_DOES_NOT_EXIST', 'message': f"Job {job_id} does not exist."}
+        return 200, {'job_id': job_id, 'settings': self.jobs[job_id]}
+    
+    def _jobs_reset(self, params, body):
+        if body['job_id'] not in self.jobs:
+            return 400, {'error_code': 'RESOURCE_DOES_NOT_EXIST', 'message': f"Job {body['job_id']} does not exist."}
+        self.jobs[body['job_id']] = body['new_settings']
+        return 200, {}
+    
+    def _workspace_mkdirs(self, params, body):
+        return 200, {}
+    
+    def _workspace_import(self, params, body):
+        self.workspace_files[body['path']] = base64.b64decode(body['content'])
+        return 200, {}
+    
+    def _active_runs(self):
+        return sum(1 for run in self.submitted_runs.values() if run['polls_left'] > 0)
+    
+    def _runs_submit(self, params, body):
+        with self._lock:
+            run_id = self.next_run_id
+            self.next_run_id += 2
+            self.submitted_runs[run_id] = {'body': body, 'polls_left': self.run_polls}
+            self.max_active_runs = max(self.max_active_runs, self._active_runs())
+        return 200, {'run_id': run_id}
+    
+    def _runs_get(self, params, body):
+        run_id = int(params['run_id'])
+        with self._lock:
+            run = self.submitted_runs[run_id]
+            if run['polls_left'] > 0:
+                run['polls_left'] -= 1
+            done = run['polls_left'] == 0
+        
+        state = {'life_cycle_state': 'TERMINATED', 'result_state': self.run_result_state} if done \
+            else {'life_cycle_state': 'RUNNING'}
+        return 200, {
+            'run_id': run_id,
+            'state': state,
+            'tasks': [{'run_id': run_id + 1, 'task_key': 'dino_ingestion'}],
+            'queue_duration': 1000,
+            'setup_duration': 30000,
+            'execution_duration': 90000,
+            'cleanup_duration': 500,
+            'run_page_url': f"https://workspace/#job/runs/{run_id}"
+        }
+    
+    def _runs_get_output(self, params, body):
+        return 200, {'logs': f"🚀 Iniciando ingestão batch\n{self.run_logs}\n"}
+    
+    def _runs_cancel(self, params, body):
+        with self._lock:
+            run = self.submitted_runs[int(body['run_id'])]
+            run['polls_left'] = 0
+            run['cancelled'] = True
+        return 200, {}
+    
+    def respond_sql(self, pattern, rows):
+        """
+        Registra o resultado de instruções que casam com pattern
+        
+        rows pode ser lista de dicts, pyarrow.Table ou função que recebe o
+        match; exceções da função viram instruções FAILED.
+        """
+        handler = rows if callable(rows) else (lambda match, rows=rows: rows)
+        self.sql_responses.insert(0, (re.compile(pattern, re.IGNORECASE | re.DOTALL), handler))
+    
+    def executed_sql(self):
+        """Instruções recebidas, na ordem de submissão"""
+        return [body['statement'] for method, path, params, body in self.requests
+                if method == 'POST' and path == '/api/2.0/sql/statements']
+    
+    def _statements_submit(self, params, body):
+        import pyarrow as pa
+        
+        table, error = pa.table({}), None
+        for pattern, handler in self.sql_responses:
+            match = pattern.search(body['statement'])
+            if match:
+                try:
+                    rows = handler(match)
+                    table = rows if isinstance(rows, pa.Table) else pa.Table.from_pylist(rows)
+                except Exception as e:
+                    error = str(e)
+                break
+        
+        with self._lock:
+            statement_id = f"stmt-{len(self.statements) + 1}"
+            self.statements[statement_id] = {
+                'body': body, 'table': table, 'error': error,
+                'polls_left': self.statement_polls, 'canceled': False
+            }
+        return 200, self._statement_response(statement_id)
+    
+    def _statement_response(self, statement_id):
+        statement = self.statements[statement_id]
+        if statement['canceled']:
+            return {'statement_id': statement_id, 'status': {'state': 'CANCELED'}}
+        if statement['polls_left'] > 0:
+            return {'statement_id': statement_id, 'status': {'state': 'RUNNING'}}
+        if statement['error']:
+            return {'statement_id': statement_id, 'status': {
+                'state': 'FAILED', 'error': {'error_code': 'BAD_REQUEST', 'message': statement['error']}
+            }}
+        
+        table = statement['table']
+        total_chunks = (table.num_rows + self.chunk_rows - 1) // self.chunk_rows
+        response = {
+            'statement_id': statement_id,
+            'status': {'state': 'SUCCEEDED'},
+            'manifest': {
+                'format': 'ARROW_STREAM',
+                'schema': {'columns': [{'name': name, 'position': index} for index, name in enumerate(table.column_names)]},
+                'total_chunk_count': total_chunks
+            }
+        }
+        if total_chunks:
+            response['result'] = self._chunk(statement_id, 0)
+        return response
+    
+    def _chunk(self, statement_id, chunk_index):
+        return {
+            'chunk_index': chunk_index,
+            'external_links': [{
+                'chunk_index': chunk_index,
+                'external_link': f"{self.base_url}/files/{statement_id}/{chunk_index}"
+            }]
+        }
+    
+    def _statements_get(self, params, body, match):
+        statement_id = match.group(1)
+        with self._lock:
+            statement = self.statements[statement_id]
+            if statement['polls_left'] > 0:
+                statement['polls_left'] -= 1
+        return 200, self._statement_response(statement_id)
+    
+    def _statements_chunk(self, params, body, match):
+        return 200, self._chunk(match.group(1), int(match.group(2)))
+    
+    def _statements_cancel(self, params, body, match):
+        self.statements[match.group(1)]['canceled'] = True
+        return 200, {}
+    
+    def _statements_file(self, params, body, match):
+        import pyarrow as pa
+        
+        table = self.statements[match.group(1)]['table']
+        chunk = table.slice(int(match.group(2)) * self.chunk_rows, self.chunk_rows)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, chunk.schema) as writer:
+            writer.write_table(chunk)
+        return 200, sink.getvalue()
+    
+    def add_space(self, title, description="", warehouse_id="wh-1"):
+        """Cria uma sala Genie diretamente no estado do servidor"""
+        return self._spaces_create({}, {'title': title, 'description': description, 'warehouse_id': warehouse_id})[1]['space_id']
+    
+    def _spaces_list(self, params, body):
+        spaces = [{'space_id': space_id, 'title': space['title'], 'description': space['description'],
+                   'warehouse_id': space['warehouse_id']} for space_id, space in self.genie_spaces.items()]
+        offset = int(params.get('page_token', 0))
+        limit = int(params.get('page_size', 20))
+        payload = {'spaces': spaces[offset:offset + limit]}
+        if offset + limit < len(spaces):
+            payload['next_page_token'] = str(offset + limit)
+        return 200, payload
+    
+    def _spaces_create(self, params, body):
+        with self._lock:
+            space_id = f"space-{self.next_space_id}"
+            self.next_space_id += 1
+            self.genie_spaces[space_id] = dict(body)
+        return 200, dict(body, space_id=space_id)
+    
+    def _spaces_update(self, params, body, match):
+        space_id = match.group(1)
+        if space_id not in self.genie_spaces:
+            return 404, {'error_code': 'RESOURCE_DOES_NOT_EXIST', 'message': f"Space {space_id} does not exist"}
+        self.genie_spaces[space_id].update(body)
+        return 200, dict(self.genie_spaces[space_id], space_id=space_id)
+    
+    def add_warehouse(self, warehouse_id, cluster_size="Small", state="RUNNING", serverless=True,
+                      active_sessions=0, max_clusters=1):
+        """Registra um SQL warehouse no estado do servidor"""
+        self.warehouses[warehouse_id] = {
+            'id': warehouse_id,
+            'name': f"warehouse_{warehouse_id}",
+            'cluster_size': cluster_size,
+            'state': state,
+            'enable_serverless_compute': serverless,
+            'warehouse_type': 'PRO' if serverless else 'CLASSIC',
+            'num_active_sessions': active_sessions,
+            'num_clusters': 1 if state == 'RUNNING' else 0,
+            'min_num_clusters': 1,
+            'max_num_clusters': max_clusters
+        }
+    
+    def _warehouses_list(self, params, body):
+        return 200, {'warehouses': list(self.warehouses.values())}
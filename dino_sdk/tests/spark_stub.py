@@ -0,0 +1,97 @@
+"""
+Sessão Spark mínima para testar a geração e o consumo de consultas SQL
+"""
+
+import json
+import re
+
+
+class FakeRow:
+    """Linha com a interface asDict() de pyspark.sql.Row"""
+    
+    def __init__(self, values):
+        self._values = dict(values)
+    
+    def asDict(self):
+        return dict(self._values)
+    
+    def __getitem__(self, key):
+        return self._values[key]
+
+
+class FakeResult:
+    """Resultado de spark.sql() com collect()"""
+    
+    def __init__(self, rows):
+        self._rows = [FakeRow(row) for row in rows]
+    
+    def collect(self):
+        return list(self._rows)
+    
+    def toArrow(self):
+        import pyarrow as pa
+        return pa.Table.from_pylist([row.asDict() for row in self._rows])
+
+
+class FakeField:
+    """Campo de schema com a interface de pyspark.sql.types.StructField"""
+    
+    def __init__(self, name, data_type, nullable=True):
+        self.name = name
+        self.dataType = data_type
+        self.nullable = nullable
+        self.metadata = {}
+
+
+class FakeSchema:
+    """Schema com fields e json()"""
+    
+    def __init__(self, columns):
+        self.fields = [FakeField(name, data_type) for name, data_type in columns]
+    
+    def json(self):
+        return json.dumps([[field.name, field.dataType] for field in self.fields])
+
+
+class FakeTable:
+    """Resultado de spark.table() (apenas o schema)"""
+    
+    def __init__(self, columns):
+        self.schema = FakeSchema(columns)
+
+
+class FakeSparkSession:
+    """
+    Stand-in de SparkSession.sql
+    
+    Respostas são registradas por expressão regular e recebem o match; cada
+    handler retorna a lista de linhas (dicts). Todas as consultas ficam em
+    self.statements para conferência nos testes.
+    """
+    
+    def __init__(self):
+        self.statements = []
+        self.responses = []
+        self.tables = {}
+    
+    def respond(self, pattern, rows):
+        """Registra as linhas retornadas para consultas que casam com pattern"""
+        handler = rows if callable(rows) else (lambda match, rows=rows: rows)
+        self.responses.insert(0, (re.compile(pattern, re.IGNORECASE | re.DOTALL), handler))
+    
+    def table(self, name):
+        """Retorna a tabela registrada em self.tables ({nome: [(coluna, tipo)]})"""
+        return FakeTable(self.tables[name])
+    
+    def sql(self, statement):
+        self.statements.append(statement)
+        for pattern, handler in self.responses:
+            match = pattern.search(statement)
+            if match:
+                return FakeResult(handler(match))
+        return FakeResult([])
+    
+    def count(self, pattern):
+        """Número de consultas executadas que casam com pattern"""
+        regex = re.compile(pattern, re.IGNORECASE | re.DOTALL)
+        return sum(1 for statement in self.statements if regex.search(statement))
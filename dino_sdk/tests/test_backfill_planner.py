@@ -0,0 +1,146 @@
+"""
+Testes para o módulo BackfillPlanner do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+import json
+import tempfile
+import shutil
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backfill_planner import BackfillPlanner
+
+
+class TestBackfillPlanner(unittest.TestCase):
+    """Testes para a classe BackfillPlanner"""
+    
+    def setUp(self):
+        """Cria partições diárias locais com tamanhos diferentes"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.landing = os.path.join(self.temp_dir, "landing")
+        sizes = {"01": 100, "02": 100, "03": 100, "04": 700, "05": 100, "06": 100}
+        for day, size in sizes.items():
+            day_dir = os.path.join(self.landing, "2024", "01", day)
+            os.makedirs(day_dir)
+            with open(os.path.join(day_dir, "part-0.csv"), "wb") as f:
+                f.write(b"x" * size)
+        
+        self.planner = BackfillPlanner(
+            target_schema="bronze",
+            table_name="events",
+            path_pattern="/Volumes/main/raw/events/%Y/%m/%d/",
+            local_path_pattern=os.path.join(self.landing, "%Y", "%m", "%d"),
+            start_date="2024-01-01",
+            end_date="2024-01-08",
+            num_chunks=3,
+            file_format="csv",
+            output_dir=os.path.join(self.temp_dir, "out")
+        )
+    
+    def tearDown(self):
+        """Remove os arquivos temporários"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_plan_balances_chunks_by_bytes(self):
+        """Testa a divisão contígua balanceada pelo tamanho das partições"""
+        chunks = self.planner.plan()
+        
+        self.assertEqual([chunk['total_bytes'] for chunk in chunks], [300, 700, 200])
+        self.assertEqual(chunks[1]['start_date'], "2024-01-04")
+        self.assertEqual(chunks[1]['paths'], ["/Volumes/main/raw/events/2024/01/04/"])
+        # Datas sem arquivos (07 e 08) não entram no plano
+        self.assertEqual(chunks[-1]['end_date'], "2024-01-06")
+    
+    def test_plan_without_local_listing(self):
+        """Testa a divisão por dias quando a listagem local não está disponível"""
+        planner = BackfillPlanner(
+            target_schema="bronze",
+            table_name="events",
+            path_pattern="/Volumes/main/raw/events/%Y/%m/%d/",
+            start_date="2024-01-01",
+            end_date="2024-01-09",
+            num_chunks=3,
+            file_format="csv",
+            output_dir=os.path.join(self.temp_dir, "remote")
+        )
+        
+        chunks = planner.plan()
+        
+        self.assertEqual([len(chunk['paths']) for chunk in chunks], [3, 3, 3])
+    
+    def test_generate_chunk_scripts(self):
+        """Testa a geração de um script por bloco lendo todas as suas partições"""
+        scripts = self.planner.generate_chunk_scripts()
+        
+        self.assertEqual(len(scripts), 3)
+        with open(scripts[0], 'r', encoding='utf-8') as f:
+            code = f.read()
+        compile(code, scripts[0], "exec")
+        self.assertIn('"/Volumes/main/raw/events/2024/01/03/"', code)
+        self.assertIn(".load(SOURCE_PATHS))", code)
+    
+    def test_generate_job_definition(self):
+        """Testa o job multi-task com tasks paralelas e retry por bloco"""
+        job = self.planner.generate_job_definition("/Workspace/dino/backfill", max_retries=3)
+        
+        self.assertEqual(len(job['tasks']), 3)
+        self.assertEqual(len(job['job_clusters']), 1)
+        for task in job['tasks']:
+            self.assertNotIn('depends_on', task)
+            self.assertEqual(task['max_retries'], 3)
+            self.assertTrue(task['spark_python_task']['python_file'].startswith("/Workspace/dino/backfill/"))
+    
+    def test_run_retries_and_resumes(self):
+        """Testa retry individual dos blocos e retomada pelo arquivo de estado"""
+        calls = []
+        
+        def flaky_runner(chunk, engine):
+            calls.append(chunk['chunk_id'])
+            if chunk['chunk_id'] == "chunk_001":
+                raise RuntimeError("storage throttled")
+        
+        status = self.planner.run(flaky_runner, max_workers=2, max_retries=1)
+        
+        self.assertFalse(status['success'])
+        self.assertEqual(status['failed_chunks'], ["chunk_001"])
+        self.assertEqual(calls.count("chunk_001"), 2)
+        
+        # Retomada: apenas o bloco que falhou é executado novamente
+        calls.clear()
+        resumed = BackfillPlanner(
+            target_schema="bronze",
+            table_name="events",
+            path_pattern="/Volumes/main/raw/events/%Y/%m/%d/",
+            start_date="2024-01-01",
+            end_date="2024-01-08",
+            num_chunks=3,
+            file_format="csv",
+            output_dir=os.path.join(self.temp_dir, "out")
+        )
+        status = resumed.run(lambda chunk, engine: calls.append(chunk['chunk_id']))
+        
+        self.assertTrue(status['success'])
+        self.assertEqual(calls, ["chunk_001"])
+        with open(resumed.state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self.assertEqual(state['chunks'][1]['attempts'], 3)
+    
+    def test_overwrite_mode_is_rejected(self):
+        """Testa que overwrite não é aceito em blocos paralelos"""
+        with self.assertRaises(ValueError):
+            BackfillPlanner(
+                target_schema="bronze",
+                table_name="events",
+                path_pattern="/raw/%Y/%m/%d/",
+                start_date="2024-01-01",
+                end_date="2024-01-02",
+                output_mode="overwrite"
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Testes para o módulo BatchCataloger do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+import threading
+import time
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from batch_cataloger import BatchCataloger
+from profile_cache import ProfileCache
+from spark_stub import FakeSparkSession
+
+
+class TestBatchCataloger(unittest.TestCase):
+    """Testes para a classe BatchCataloger"""
+    
+    def setUp(self):
+        """Schema com três tabelas simulado em uma sessão Spark local"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        
+        self.spark = FakeSparkSession()
+        self.spark.respond(r"information_schema\.columns c\b", [
+            {'table_schema': 'vendas', 'table_name': 'clientes', 'column_name': 'customer_id',
+             'full_data_type': 'bigint', 'is_nullable': 'NO'},
+            {'table_schema': 'vendas', 'table_name': 'clientes', 'column_name': 'email',
+             'full_data_type': 'string', 'is_nullable': 'YES'},
+            {'table_schema': 'vendas', 'table_name': 'itens', 'column_name': 'item_id',
+             'full_data_type': 'bigint', 'is_nullable': 'NO'},
+            {'table_schema': 'vendas', 'table_name': 'pedidos', 'column_name': 'order_id',
+             'full_data_type': 'bigint', 'is_nullable': 'NO'},
+            {'table_schema': 'vendas', 'table_name': 'pedidos', 'column_name': 'amount',
+             'full_data_type': 'decimal(10,2)', 'is_nullable': 'YES'}
+        ])
+        self.spark.respond(r"^DESCRIBE DETAIL main\.vendas\.(clientes|pedidos)$", self._detail)
+        self.spark.respond(r"^DESCRIBE HISTORY \S+ LIMIT (\d+)", [{
+            'version': 3, 'operation': 'WRITE', 'operationParameters': {'mode': 'Append'},
+            'operationMetrics': {'numOutputRows': '100', 'numOutputBytes': '1000'}
+        }])
+        
+        self.cache_file = os.path.join(self.temp_dir, "profiles.sqlite")
+    
+    def tearDown(self):
+        """Remove o diretório temporário"""
+        shutil.rmtree(self.temp_dir)
+    
+    def _detail(self, match):
+        """DESCRIBE DETAIL lento, registrando quantas tabelas são analisadas ao mesmo tempo"""
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        return [{'format': 'delta', 'location': None, 'numFiles': 1, 'sizeInBytes': 1000, 'properties': {}}]
+    
+    def _cataloger(self, **kwargs):
+        """Catalogador do schema vendas sem perfil de colunas"""
+        return BatchCataloger(
+            "main", "vendas", spark=self.spark, profile_cache_file=self.cache_file,
+            profile_columns=False, **kwargs
+        )
+    
+    def test_columns_read_in_single_query(self):
+        """Testa a enumeração de tabelas e colunas em uma consulta"""
+        tables = self._cataloger().list_tables()
+        
+        self.assertEqual(len(self.spark.statements), 1)
+        self.assertIn("t.table_schema = 'vendas'", self.spark.statements[0])
+        self.assertIn("'MANAGED', 'EXTERNAL'", self.spark.statements[0])
+        self.assertEqual(sorted(tables), [('vendas', 'clientes'), ('vendas', 'itens'), ('vendas', 'pedidos')])
+        self.assertEqual(tables[('vendas', 'pedidos')][1], {'name': 'amount', 'type': 'decimal(10,2)', 'nullable': True})
+        self.assertFalse(tables[('vendas', 'clientes')][0]['nullable'])
+    
+    def test_run_summarizes_failures_and_timings(self):
+        """Testa o resumo com falhas isoladas e tempo por tabela"""
+        result = self._cataloger(max_workers=2).run()
+        
+        self.assertFalse(result['success'])
+        self.assertEqual(result['total_tables'], 3)
+        self.assertEqual(result['succeeded'], 2)
+        self.assertEqual([failure['table'] for failure in result['failed']], ["main.vendas.itens"])
+        self.assertEqual(sorted(result['timings']), ["main.vendas.clientes", "main.vendas.itens", "main.vendas.pedidos"])
+        self.assertEqual(len(result['slowest']), 3)
+        # Schema vindo do information_schema: uma única consulta de colunas
+        self.assertEqual(self.spark.count(r"information_schema\.columns c\b"), 1)
+    
+    def test_column_ddl_failures_are_reported(self):
+        """Testa que a falha no comentário de uma coluna marca a tabela como falha"""
+        def denied(match):
+            raise Exception("PERMISSION_DENIED: ALTER em amount")
+        
+        self.spark.respond(r"ALTER COLUMN `amount` COMMENT", denied)
+        result = self._cataloger(tables=["pedidos"]).run()
+        
+        self.assertFalse(result['success'])
+        self.assertEqual([failure['table'] for failure in result['failed']], ["main.vendas.pedidos"])
+        self.assertIn("amount", result['failed'][0]['error'])
+    
+    def test_concurrency_is_bounded(self):
+        """Testa o limite de tabelas catalogadas simultaneamente"""
+        self._cataloger(max_workers=1).run()
+        self.assertEqual(self.max_active, 1)
+        
+        # Novo cache para que as tabelas sejam analisadas de novo
+        self.max_active = 0
+        self.cache_file = os.path.join(self.temp_dir, "profiles_2.sqlite")
+        self._cataloger(max_workers=2).run()
+        self.assertEqual(self.max_active, 2)
+    
+    def test_unchanged_tables_served_from_shared_cache(self):
+        """Testa o cache de análises compartilhado entre execuções"""
+        self._cataloger().run()
+        result = self._cataloger().run()
+        
+        self.assertEqual(result['cache_hits'], 2)
+    
+    def test_cache_sized_by_table_count(self):
+        """Testa o cache dimensionado pelo número de tabelas do schema"""
+        cataloger = self._cataloger()
+        
+        self.assertEqual(cataloger.cache_max_entries(3), ProfileCache.DEFAULT_MAX_ENTRIES)
+        self.assertEqual(cataloger.cache_max_entries(600), 1200)
+        self.assertEqual(self._cataloger(profile_cache_max_entries=50).cache_max_entries(600), 50)
+        with self.assertRaises(ValueError):
+            self._cataloger(profile_cache_max_entries=0)
+    
+    def test_table_filter_and_validation(self):
+        """Testa o filtro por nome de tabela e a validação dos parâmetros"""
+        tables = self._cataloger(tables=["pedidos"]).list_tables()
+        self.assertEqual(list(tables), [('vendas', 'pedidos')])
+        
+        with self.assertRaises(ValueError):
+            BatchCataloger("main", "vendas; DROP", spark=self.spark)
+        with self.assertRaises(ValueError):
+            BatchCataloger("main", max_workers=0, spark=self.spark)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""
+Testes para o módulo ColumnClassifier do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from column_classifier import ColumnClassifier
+from genie_assistant import GenieAssistant
+from spark_stub import FakeSparkSession
+
+
+POLICY_YAML = """
+default_category: general
+categories:
+  personal_data:
+    priority: 300
+    description: Dados pessoais sensíveis
+    tags:
+      privacy: sensitive
+  identifier:
+    priority: 200
+    description: Identificador único
+  financial:
+    priority: 100
+    description: Dados financeiros
+rules:
+  - name: documentos
+    category: personal_data
+    pattern: "^doc_(cliente|fornecedor)$"
+    tags:
+      document: "true"
+  - name: chaves
+    category: identifier
+    names: ["*_id", "id"]
+    kinds: [numeric]
+  - name: chaves_texto
+    category: identifier
+    names: ["*_id"]
+    priority: 50
+    profile:
+      min_distinct_ratio: 0.99
+  - name: valores
+    category: financial
+    names: ["vl_*"]
+    types: ["decimal*", "double"]
+"""
+
+
+class TestColumnClassifier(unittest.TestCase):
+    """Testes para a classe ColumnClassifier"""
+    
+    def setUp(self):
+        """Política YAML em diretório temporário"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.policy_file = os.path.join(self.temp_dir, "policy.yml")
+        with open(self.policy_file, 'w', encoding='utf-8') as f:
+            f.write(POLICY_YAML)
+        self.classifier = ColumnClassifier.from_yaml(self.policy_file)
+    
+    def tearDown(self):
+        """Remove o diretório temporário"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_default_policy_matches_name_heuristics(self):
+        """Testa a política padrão (equivalente às regras por nome anteriores)"""
+        classifier = ColumnClassifier()
+        expected = {
+            'order_id': 'identifier', 'ID': 'identifier', 'created_at': 'temporal',
+            'Email': 'personal_data', 'total_amount': 'financial', 'descricao': 'general'
+        }
+        for name, category in expected.items():
+            self.assertEqual(classifier.classify({'name': name, 'type': 'string'})['category'], category, name)
+        
+        channel = {'name': 'channel', 'type': 'string', 'profile': {'distinct_count': 3, 'non_null_count': 10}}
+        self.assertEqual(classifier.classify(channel)['category'], 'categorical')
+        self.assertEqual(classifier.describe('categorical'), "Campo categórico")
+    
+    def test_regex_glob_and_type_conditions(self):
+        """Testa as condições de nome (regex e glob) e de tipo"""
+        document = self.classifier.classify({'name': 'DOC_CLIENTE', 'type': 'string'})
+        self.assertEqual(document['category'], 'personal_data')
+        self.assertEqual(document['rule'], 'documentos')
+        self.assertEqual(document['tags'], {'privacy': 'sensitive', 'document': 'true'})
+        
+        self.assertEqual(self.classifier.classify({'name': 'vl_total', 'type': 'decimal(10,2)'})['category'], 'financial')
+        self.assertEqual(self.classifier.classify({'name': 'vl_total', 'type': 'string'})['category'], 'general')
+    
+    def test_type_globs_match_spark_type_names(self):
+        """Testa os globs de tipo contra tipos no formato do Spark (ex: DecimalType(10,2))"""
+        self.assertEqual(self.classifier.classify({'name': 'vl_total', 'type': 'DecimalType(10,2)'})['rule'], 'valores')
+        self.assertEqual(self.classifier.classify({'name': 'vl_total', 'type': 'DoubleType()'})['rule'], 'valores')
+        
+        classifier = ColumnClassifier({'rules': [{'name': 'inteiros', 'category': 'a', 'types': ['bigint', 'string']}]})
+        self.assertEqual(classifier.classify({'name': 'x', 'type': 'LongType()'})['rule'], 'inteiros')
+        self.assertEqual(classifier.classify({'name': 'x', 'type': 'StringType()'})['rule'], 'inteiros')
+        self.assertIsNone(classifier.classify({'name': 'x', 'type': 'IntegerType()'})['rule'])
+    
+    def test_next_rule_when_conditions_fail(self):
+        """Testa a regra seguinte quando tipo ou perfil da vencedora não casam"""
+        numeric = self.classifier.classify({'name': 'cliente_id', 'type': 'bigint'})
+        self.assertEqual(numeric['rule'], 'chaves')
+        
+        text_key = {'name': 'cliente_id', 'type': 'string',
+                    'profile': {'distinct_count': 1000, 'non_null_count': 1000}}
+        self.assertEqual(self.classifier.classify(text_key)['rule'], 'chaves_texto')
+        
+        repeated = {'name': 'cliente_id', 'type': 'string', 'profile': {'distinct_count': 10, 'non_null_count': 1000}}
+        self.assertIsNone(self.classifier.classify(repeated)['rule'])
+    
+    def test_precedence_by_priority_then_file_order(self):
+        """Testa a precedência pela priority e, no empate, pela ordem da política"""
+        classifier = ColumnClassifier({'rules': [
+            {'name': 'primeira', 'category': 'a', 'names': ['x_*']},
+            {'name': 'segunda', 'category': 'b', 'names': ['x_*']},
+            {'name': 'prioritaria', 'category': 'c', 'names': ['x_y'], 'priority': 10}
+        ]})
+        
+        self.assertEqual(classifier.classify({'name': 'x_z', 'type': 'int'})['rule'], 'primeira')
+        self.assertEqual(classifier.classify({'name': 'x_y', 'type': 'int'})['rule'], 'prioritaria')
+    
+    def test_wide_table_in_one_pass(self):
+        """Testa a classificação de milhares de colunas"""
+        columns = [{'name': f"col_{index}_id" if index % 2 else f"vl_{index}", 'type': 'double'}
+                   for index in range(5000)]
+        
+        categories = [result['category'] for result in self.classifier.classify_columns(columns)]
+        
+        self.assertEqual(categories.count('identifier'), 2500)
+        self.assertEqual(categories.count('financial'), 2500)
+    
+    def test_invalid_policy(self):
+        """Testa a validação da política"""
+        with self.assertRaises(ValueError):
+            ColumnClassifier({'rules': [{'names': ['x']}]})
+        with self.assertRaises(ValueError):
+            ColumnClassifier({'rules': [{'category': 'a', 'profile': {'max_rows': 1}}]})
+        with self.assertRaises(ValueError):
+            ColumnClassifier({'rules': [{'category': 'a', 'pattern': '(doc'}]})
+    
+    def test_pattern_constructs_incompatible_with_combined_regex(self):
+        """Testa a rejeição de flags globais e grupos nomeados no pattern"""
+        for pattern in ['(?i)^doc_.*', '^(?P<tipo>doc)_.*', '^(?P<rule_0>doc)_.*']:
+            with self.assertRaises(ValueError, msg=pattern):
+                ColumnClassifier({'rules': [{'category': 'a', 'pattern': pattern}]})
+        
+        classifier = ColumnClassifier({'case_sensitive': True, 'rules': [
+            {'name': 'local', 'category': 'a', 'pattern': '(?i:doc)_.*'},
+            {'name': 'escapado', 'category': 'b', 'pattern': r'x\(\?i\)'}
+        ]})
+        self.assertEqual(classifier.classify({'name': 'DOC_x', 'type': 'string'})['rule'], 'local')
+        self.assertEqual(classifier.classify({'name': 'x(?i)', 'type': 'string'})['rule'], 'escapado')
+    
+    def test_policy_drives_genie_categories_tags_and_comments(self):
+        """Testa a política no GenieAssistant"""
+        genie = GenieAssistant(
+            "main", "crm", "clientes", spark=FakeSparkSession(), profile_columns=False,
+            use_profile_cache=False, detect_pii=False, classification_policy=self.policy_file
+        )
+        columns = [{'name': "doc_cliente", 'type': "string"}, {'name': "obs", 'type': "string"}]
+        genie._classify_columns(columns)
+        
+        self.assertEqual(columns[0]['category'], 'personal_data')
+        self.assertEqual(genie._column_tags(columns[0]),
+                         {'dino_category': 'personal_data', 'privacy': 'sensitive', 'document': 'true'})
+        self.assertEqual(genie._column_comment(columns[0]), "Dados pessoais sensíveis - doc_cliente")
+        self.assertEqual(genie._column_comment(columns[1]), "Campo de dados - obs")
+        self.assertEqual(genie._column_tags(columns[1]), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Testes para o módulo ColumnProfiler do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from column_profiler import ColumnProfiler
+from spark_stub import FakeSparkSession
+
+
+COLUMNS = [
+    {'name': "order_id", 'type': "bigint"},
+    {'name': "status", 'type': "StringType()"},
+    {'name': "amount", 'type': "DecimalType(10,2)"},
+    {'name': "created_at", 'type': "timestamp"},
+    {'name': "items", 'type': "array<struct<sku:string>>"}
+]
+
+
+class TestColumnProfiler(unittest.TestCase):
+    """Testes para a classe ColumnProfiler"""
+    
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.profiler = ColumnProfiler(top_k=3)
+    
+    def test_column_kind(self):
+        """Testa a classificação dos tipos Spark"""
+        self.assertEqual(ColumnProfiler.column_kind("IntegerType()"), ColumnProfiler.KIND_NUMERIC)
+        self.assertEqual(ColumnProfiler.column_kind("decimal(10,2)"), ColumnProfiler.KIND_NUMERIC)
+        self.assertEqual(ColumnProfiler.column_kind("string"), ColumnProfiler.KIND_STRING)
+        self.assertEqual(ColumnProfiler.column_kind("TimestampNTZType()"), ColumnProfiler.KIND_TEMPORAL)
+        self.assertEqual(ColumnProfiler.column_kind("BooleanType()"), ColumnProfiler.KIND_BOOLEAN)
+        self.assertEqual(ColumnProfiler.column_kind("ArrayType(StringType(), True)"), ColumnProfiler.KIND_COMPLEX)
+        self.assertEqual(ColumnProfiler.column_kind("struct<a:string>"), ColumnProfiler.KIND_COMPLEX)
+    
+    def test_single_pass_query(self):
+        """Testa que todas as colunas ficam em um único SELECT"""
+        query = self.profiler.build_query("main.vendas.pedidos", COLUMNS)
+        
+        self.assertEqual(query.count("SELECT"), 1)
+        self.assertEqual(query.count("FROM"), 1)
+        self.assertIn("APPROX_COUNT_DISTINCT(`order_id`) AS c0_distinct", query)
+        self.assertIn("AVG(LENGTH(`status`)) AS c1_avg_length", query)
+        self.assertIn("APPROX_TOP_K(CAST(`status` AS STRING), 3) AS c1_top", query)
+        self.assertIn("COUNT(`items`) AS c4_non_null", query)
+        self.assertNotIn("c4_distinct", query)
+        self.assertNotIn("TABLESAMPLE", query)
+    
+    def test_sampled_query(self):
+        """Testa a leitura por amostra"""
+        query = ColumnProfiler(sample_percent=10).build_query("main.vendas.pedidos", COLUMNS)
+        
+        self.assertIn("FROM main.vendas.pedidos TABLESAMPLE (10 PERCENT)", query)
+    
+    def test_profile(self):
+        """Testa a conversão da linha agregada no perfil por coluna"""
+        spark = FakeSparkSession()
+        spark.respond(r"^SELECT", [{
+            'profiled_rows': 200,
+            'c0_non_null': 200, 'c0_distinct': 198, 'c0_min': "1", 'c0_max': "200",
+            'c0_top': [{'item': "1", 'count': 1}],
+            'c1_non_null': 150, 'c1_distinct': 3, 'c1_min': "cancelado", 'c1_max': "pago",
+            'c1_avg_length': 6.25, 'c1_top': [{'item': "pago", 'count': 100}, {'item': "aberto", 'count': 40}],
+            'c2_non_null': 190, 'c2_distinct': 120, 'c2_min': "0.50", 'c2_max': "999.90", 'c2_top': [],
+            'c3_non_null': 200, 'c3_distinct': 200, 'c3_min': "2024-01-01 00:00:00",
+            'c3_max': "2024-12-31 23:00:00", 'c3_top': [],
+            'c4_non_null': 20
+        }])
+        
+        profile = self.profiler.profile(
+            lambda statement: [row.asDict() for row in spark.sql(statement).collect()],
+            "main.vendas.pedidos", COLUMNS
+        )
+        columns = profile['columns']
+        
+        self.assertEqual(spark.count(r"^SELECT"), 1)
+        self.assertEqual(profile['profiled_rows'], 200)
+        self.assertEqual(columns['status']['null_ratio'], 0.25)
+        self.assertEqual(columns['status']['avg_length'], 6.25)
+        self.assertEqual(columns['status']['top_values'][0], {'value': "pago", 'count': 100})
+        self.assertEqual(columns['amount']['max'], "999.90")
+        self.assertEqual(columns['items']['null_count'], 180)
+        self.assertNotIn('distinct_count', columns['items'])
+    
+    def test_invalid_sample_percent(self):
+        """Testa a validação do percentual de amostra"""
+        with self.assertRaises(ValueError):
+            ColumnProfiler(sample_percent=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
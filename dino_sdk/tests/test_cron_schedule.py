@@ -0,0 +1,62 @@
+"""
+Testes para o módulo CronSchedule do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from cron_schedule import CronSchedule
+
+
+class TestCronSchedule(unittest.TestCase):
+    """Testes para a classe CronSchedule"""
+    
+    def test_expand_fields(self):
+        """Testa a expansão de listas, intervalos, passos e nomes"""
+        cron = CronSchedule("*/15 8-10 * JAN-MAR MON,FRI")
+        
+        self.assertEqual(cron.values['minute'], [0, 15, 30, 45])
+        self.assertEqual(cron.values['hour'], [8, 9, 10])
+        self.assertEqual(cron.values['month'], [1, 2, 3])
+        self.assertEqual(cron.values['day_of_week'], [1, 5])
+        self.assertEqual(len(cron.start_minutes()), 12)
+        self.assertEqual(CronSchedule("5/20 0 * * 7").values['minute'], [5, 25, 45])
+        self.assertEqual(CronSchedule("5/20 0 * * 7").values['day_of_week'], [0])
+    
+    def test_invalid_expressions(self):
+        """Testa a rejeição de expressões inválidas"""
+        for expression in ["0 6 * *", "60 6 * * *", "0 6 * * L", "*/0 * * * *", "0 10-2 * * *"]:
+            with self.assertRaises(ValueError, msg=expression):
+                CronSchedule(expression)
+    
+    def test_quartz_round_trip(self):
+        """Testa a conversão de e para Quartz"""
+        self.assertEqual(CronSchedule("0 6 * * *").to_quartz(), "0 0 6 * * ?")
+        self.assertEqual(CronSchedule("30 7 * * 1-5").to_quartz(), "0 30 7 ? * 2-6")
+        self.assertEqual(CronSchedule.from_quartz("0 30 7 ? * 2-6").expression, "30 7 * * 1-5")
+        self.assertEqual(CronSchedule.from_quartz("0 0 6 ? * MON-FRI").values['day_of_week'], [1, 2, 3, 4, 5])
+        self.assertEqual(CronSchedule("0 6 1 * *").to_quartz(), "0 0 6 1 * ?")
+    
+    def test_quartz_rejects_day_of_month_and_weekday(self):
+        """Testa que dia do mês e dia da semana juntos não geram Quartz inválido"""
+        with self.assertRaises(ValueError):
+            CronSchedule("0 6 1 * MON").to_quartz()
+    
+    def test_shifted(self):
+        """Testa o atraso dos disparos mantendo a expressão representável"""
+        self.assertEqual(CronSchedule("0 6 * * *").shifted(75).expression, "15 7 * * *")
+        self.assertEqual(CronSchedule("50 23 * * *").shifted(20).expression, "10 0 * * *")
+        self.assertEqual(CronSchedule("*/15 * * * *").shifted(5).expression, "5-50/15 * * * *")
+        
+        # Atravessar a meia-noite mudaria o dia da semana
+        self.assertIsNone(CronSchedule("50 23 * * 1").shifted(20))
+        # Parte dos disparos mudaria de hora e parte não
+        self.assertIsNone(CronSchedule("0,30 6 * * *").shifted(40))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Testes para o módulo DatabricksClient do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from databricks_client import DatabricksClient, DatabricksAPIError
+from databricks_stub import FakeDatabricksServer
+
+
+class TestDatabricksClient(unittest.TestCase):
+    """Testes para a classe DatabricksClient"""
+    
+    def setUp(self):
+        """Sobe o stand-in local das APIs"""
+        self.server = FakeDatabricksServer()
+        self.client = DatabricksClient(host=self.server.start(), token="dapi-test")
+    
+    def tearDown(self):
+        """Encerra o cliente e o servidor"""
+        self.client.close()
+        self.server.stop()
+    
+    def test_host_is_required(self):
+        """Testa que o host do workspace é obrigatório"""
+        with patch.dict(os.environ, {}, clear=True):
+            with self.assertRaises(ValueError):
+                DatabricksClient()
+    
+    def test_iter_pages_follows_page_tokens(self):
+        """Testa a iteração por todas as páginas da listagem"""
+        for index in range(7):
+            self.server.add_job({'name': f"job_{index}"})
+        
+        names = [job['settings']['name'] for job in self.client.iter_pages("/api/2.1/jobs/list", 'jobs', page_size=3)]
+        
+        self.assertEqual(names, [f"job_{index}" for index in range(7)])
+        self.assertEqual(self.server.count('GET', "/api/2.1/jobs/list"), 3)
+    
+    def test_iter_pages_is_lazy(self):
+        """Testa que páginas seguintes só são buscadas se consumidas"""
+        for index in range(7):
+            self.server.add_job({'name': f"job_{index}"})
+        
+        first = next(self.client.iter_pages("/api/2.1/jobs/list", 'jobs', page_size=3))
+        
+        self.assertEqual(first['settings']['name'], "job_0")
+        self.assertEqual(self.server.count('GET', "/api/2.1/jobs/list"), 1)
+    
+    def test_throttled_request_is_retried(self):
+        """Testa as novas tentativas em 429 e 503"""
+        self.server.transient_errors = [429, 503]
+        
+        self.assertEqual(self.client.get("/api/2.1/jobs/list")['jobs'], [])
+        self.assertEqual(self.server.count('GET', "/api/2.1/jobs/list"), 3)
+    
+    def test_post_not_retried_on_unavailable(self):
+        """Testa que POST não é repetido em 503 (pode já ter sido processado), só em 429"""
+        self.server.transient_errors = [503]
+        with self.assertRaises(DatabricksAPIError) as context:
+            self.client.post("/api/2.1/jobs/create", {'name': "job"})
+        self.assertEqual(context.exception.status_code, 503)
+        self.assertEqual(self.server.count('POST', "/api/2.1/jobs/create"), 1)
+        
+        self.server.transient_errors = [429]
+        self.assertIn('job_id', self.client.post("/api/2.1/jobs/create", {'name': "job"}))
+        self.assertEqual(self.server.count('POST', "/api/2.1/jobs/create"), 3)
+        self.assertEqual(len(self.server.jobs), 1)
+    
+    def test_retries_are_limited(self):
+        """Testa o erro após esgotar as novas tentativas"""
+        self.server.transient_errors = [429] * 5
+        client = DatabricksClient(host=self.server.base_url, token="dapi-test", max_retries=2)
+        
+        with self.assertRaises(DatabricksAPIError) as context:
+            client.get("/api/2.1/jobs/list")
+        client.close()
+        
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertEqual(self.server.count('GET', "/api/2.1/jobs/list"), 3)
+    
+    def test_api_error(self):
+        """Testa o erro com status e error_code da API"""
+        with self.assertRaises(DatabricksAPIError) as context:
+            self.client.post("/api/2.1/jobs/reset", {'job_id': 1, 'new_settings': {}})
+        
+        self.assertEqual(context.exception.status_code, 400)
+        self.assertTrue(context.exception.is_not_found)
+
+
+if __name__ == '__main__':
+    unittest.main()
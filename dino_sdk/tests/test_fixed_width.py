@@ -0,0 +1,249 @@
+"""
+Testes para o módulo FixedWidthLayout do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+import datetime
+import decimal
+import json
+import tempfile
+import shutil
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fixed_width import FixedWidthLayout
+from ingestion_engine import IngestionEngine
+
+try:
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+LAYOUT = [
+    {'name': 'id', 'start': 1, 'length': 5, 'type': 'int'},
+    {'name': 'nome', 'start': 6, 'length': 10, 'type': 'string'},
+    {'name': 'valor', 'start': 16, 'length': 8, 'type': 'decimal(8,2)'},
+    {'name': 'data_cadastro', 'start': 24, 'length': 8, 'type': 'date', 'format': 'yyyyMMdd'}
+]
+
+
+class TestFixedWidthLayout(unittest.TestCase):
+    """Testes para a classe FixedWidthLayout"""
+    
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.layout = FixedWidthLayout(LAYOUT)
+    
+    def tearDown(self):
+        """Remove os arquivos temporários"""
+        shutil.rmtree(self.temp_dir)
+    
+    def _write_source(self, lines, newline=b"\n"):
+        source = os.path.join(self.temp_dir, "clientes.txt")
+        with open(source, "wb") as f:
+            f.write(newline.join(lines) + newline)
+        return source
+    
+    def test_record_length(self):
+        """Testa o comprimento do registro calculado pelo layout"""
+        self.assertEqual(self.layout.record_length, 31)
+    
+    def test_overlapping_columns_are_rejected(self):
+        """Testa a rejeição de colunas sobrepostas"""
+        with self.assertRaises(ValueError):
+            FixedWidthLayout([
+                {'name': 'a', 'start': 1, 'length': 5},
+                {'name': 'b', 'start': 5, 'length': 2}
+            ])
+    
+    def test_spark_select_expressions(self):
+        """Testa as expressões substring da projeção Spark"""
+        expressions = self.layout.spark_select_expressions()
+        
+        self.assertEqual(expressions[0], "try_cast(nullif(trim(substring(value, 1, 5)), '') as int) as `id`")
+        self.assertEqual(expressions[2],
+                         "try_cast(nullif(trim(substring(value, 16, 8)), '') as decimal(8,2)) as `valor`")
+        self.assertEqual(expressions[3],
+                         "to_date(try_to_timestamp(nullif(trim(substring(value, 24, 8)), ''), 'yyyyMMdd')) as `data_cadastro`")
+    
+    def test_spark_expressions_do_not_fail_under_ansi(self):
+        """Testa que nenhuma conversão Spark falha com ANSI (valor inválido vira NULL)"""
+        layout = FixedWidthLayout(LAYOUT + [
+            {'name': 'atualizado_em', 'start': 32, 'length': 14, 'type': 'timestamp', 'format': 'yyyyMMddHHmmss'},
+            {'name': 'nascimento', 'start': 46, 'length': 10, 'type': 'date'}
+        ])
+        expressions = layout.spark_select_expressions()
+        
+        self.assertTrue(expressions[4].startswith("try_to_timestamp(nullif(trim(substring(value, 32, 14)), ''), 'yyyyMMddHHmmss')"))
+        self.assertTrue(expressions[5].startswith("try_cast(nullif(trim(substring(value, 46, 10)), '') as date)"))
+        for expression in expressions:
+            self.assertNotRegex(expression, r"(?<!try_)(cast|to_timestamp)\(")
+            self.assertNotIn("to_date(nullif", expression)
+    
+    def test_engine_generates_single_projection_reader(self):
+        """Testa o leitor Spark gerado pelo IngestionEngine"""
+        engine = IngestionEngine(
+            target_schema="bronze",
+            table_name="clientes",
+            file_path="/Volumes/main/raw/clientes.txt",
+            file_format="fixedwidth",
+            fixed_width_layout=LAYOUT
+        )
+        code = engine._generate_batch_code()
+        
+        compile(code, "ingestion_batch.py", "exec")
+        self.assertEqual(code.count(".selectExpr("), 1)
+        # latin-1 (padrão): leitura binária decodificada no charset do layout
+        self.assertIn('.format("binaryFile")', code)
+        self.assertIn('decode(col("content"), "ISO-8859-1")', code)
+        self.assertNotIn(".text(SOURCE_PATH)", code)
+    
+    def test_engine_reads_with_layout_encoding(self):
+        """Testa o charset do layout no script Spark (batch e streaming)"""
+        def engine(encoding):
+            return IngestionEngine(
+                target_schema="bronze",
+                table_name="clientes",
+                file_path="/Volumes/main/raw/clientes/",
+                file_format="fixedwidth",
+                fixed_width_layout={'encoding': encoding, 'columns': LAYOUT}
+            )
+        
+        utf8 = engine("utf-8")
+        self.assertIn(".text(SOURCE_PATH)", utf8._generate_batch_code())
+        self.assertIn('auto_loader_options["cloudFiles.format"] = "text"', utf8._generate_streaming_code())
+        
+        streaming = engine("ISO-8859-1")._generate_streaming_code()
+        compile(streaming, "ingestion_streaming.py", "exec")
+        self.assertIn('auto_loader_options["cloudFiles.format"] = "binaryFile"', streaming)
+        self.assertIn(r'"ISO-8859-1"), r"\r?\n\z", ""), r"\r?\n")).alias("value"), col("_metadata"))', streaming)
+        
+        # EBCDIC não é suportado pelo decode do Spark: conversão local
+        with self.assertRaises(ValueError):
+            engine("cp037")
+        with self.assertRaises(ValueError):
+            FixedWidthLayout(LAYOUT, encoding="inexistente")
+    
+    def test_engine_requires_layout(self):
+        """Testa que o formato fixedwidth exige layout"""
+        with self.assertRaises(ValueError):
+            IngestionEngine(
+                target_schema="bronze",
+                table_name="clientes",
+                file_path="/Volumes/main/raw/clientes.txt",
+                file_format="fixedwidth"
+            )
+    
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow não instalado")
+    def test_convert_to_parquet(self):
+        """Testa a conversão local em blocos para Parquet"""
+        lines = [
+            b"00001Ana       00123.45" + b"20240131",
+            b"00002Bruno     00000099" + b"20231201",
+            b"00003          " + b" " * 8 + b"        "
+        ] * 50
+        source = self._write_source(lines)
+        output = os.path.join(self.temp_dir, "out", "clientes.parquet")
+        
+        result = self.layout.convert_to_parquet(source, output, block_size_bytes=200)
+        table = pq.read_table(output)
+        
+        self.assertEqual(result['rows'], 150)
+        self.assertGreater(result['row_groups'], 1)
+        self.assertEqual(table.column('id').to_pylist()[:3], [1, 2, 3])
+        self.assertEqual(table.column('nome').to_pylist()[:3], ["Ana", "Bruno", None])
+        self.assertEqual(table.column('valor').to_pylist()[0], decimal.Decimal("123.45"))
+        self.assertEqual(table.column('data_cadastro').to_pylist()[0], datetime.date(2024, 1, 31))
+    
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow não instalado")
+    def test_convert_irregular_lines(self):
+        """Testa linhas com \\r\\n e registros curtos"""
+        lines = [b"00001Ana       00123.45" + b"20240131", b"00002Bruno"]
+        source = self._write_source(lines, newline=b"\r\n")
+        output = os.path.join(self.temp_dir, "irregular.parquet")
+        
+        self.layout.convert_to_parquet(source, output)
+        table = pq.read_table(output)
+        
+        self.assertEqual(table.column('nome').to_pylist(), ["Ana", "Bruno"])
+        self.assertEqual(table.column('valor').to_pylist(), [decimal.Decimal("123.45"), None])
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow não instalado")
+    def test_convert_utf8_slices_by_character(self):
+        """Testa que as posições contam caracteres em UTF-8, como o substring do Spark"""
+        lines = [
+            "00001José      00123.45".encode("utf-8") + b"20240131",
+            b"00002Bruno     00000099" + b"20231201"
+        ]
+        source = self._write_source(lines)
+        output = os.path.join(self.temp_dir, "utf8.parquet")
+        
+        self.layout.convert_to_parquet(source, output, encoding="utf-8")
+        table = pq.read_table(output)
+        
+        self.assertEqual(table.column('nome').to_pylist(), ["José", "Bruno"])
+        self.assertEqual(table.column('valor').to_pylist()[0], decimal.Decimal("123.45"))
+        self.assertEqual(table.column('data_cadastro').to_pylist()[0], datetime.date(2024, 1, 31))
+    
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow não instalado")
+    def test_convert_invalid_values_become_null(self):
+        """Testa que valores inválidos viram NULL em vez de abortar o arquivo"""
+        lines = [
+            b"0000XAna       00123.45" + b"20241399",
+            b"00002Bruno     abc.defg" + b"20231201"
+        ]
+        source = self._write_source(lines)
+        output = os.path.join(self.temp_dir, "invalid.parquet")
+        
+        self.layout.convert_to_parquet(source, output)
+        table = pq.read_table(output)
+        
+        self.assertEqual(table.column('id').to_pylist(), [None, 2])
+        self.assertEqual(table.column('valor').to_pylist(), [decimal.Decimal("123.45"), None])
+        self.assertEqual(table.column('data_cadastro').to_pylist(), [None, datetime.date(2023, 12, 1)])
+    
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow não instalado")
+    def test_convert_uses_layout_encoding(self):
+        """Testa a codificação do arquivo JSON do layout na conversão local"""
+        layout_file = os.path.join(self.temp_dir, "layout.json")
+        with open(layout_file, "w", encoding="utf-8") as f:
+            json.dump({'encoding': 'utf-8', 'columns': LAYOUT}, f)
+        source = self._write_source(["00001José      00123.45".encode("utf-8") + b"20240131"])
+        output = os.path.join(self.temp_dir, "layout.parquet")
+        
+        FixedWidthLayout.from_spec(layout_file).convert_to_parquet(source, output)
+        
+        self.assertEqual(pq.read_table(output).column('nome').to_pylist(), ["José"])
+    
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow não instalado")
+    def test_convert_ebcdic_records(self):
+        """Testa extrações de mainframe em cp037 terminadas em NL (0x15) ou LF (0x25)"""
+        record = "00001João      00123.4520240131".encode("cp037")
+        short = "00002Bruno".encode("cp037")
+        for newline in [b"\x15", b"\x25"]:
+            source = self._write_source([record] * 20 + [short], newline=newline)
+            output = os.path.join(self.temp_dir, "ebcdic.parquet")
+            
+            result = self.layout.convert_to_parquet(source, output, block_size_bytes=100, encoding="cp037")
+            table = pq.read_table(output)
+            
+            self.assertEqual(result['rows'], 21)
+            self.assertEqual(table.column('nome').to_pylist()[0], "João")
+            self.assertEqual(table.column('nome').to_pylist()[-1], "Bruno")
+            self.assertEqual(table.column('valor').to_pylist()[0], decimal.Decimal("123.45"))
+            self.assertEqual(table.column('data_cadastro').to_pylist()[-1], None)
+    
+    def test_convert_rejects_multibyte_newline_encoding(self):
+        """Testa a rejeição de codificações sem \\n de um byte"""
+        with self.assertRaises(ValueError):
+            self.layout.convert_to_parquet("entrada.txt", os.path.join(self.temp_dir, "x.parquet"), encoding="utf-16")
+
+
+if __name__ == '__main__':
+    unittest.main()
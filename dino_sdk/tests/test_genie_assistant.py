@@ -5,11 +5,24 @@ Testes para o módulo GenieAssistant do Dino SDK
 import unittest
 import sys
 import os
+import json
+import tempfile
+import shutil
+from datetime import datetime, timedelta
+from unittest.mock import patch
 
 # Adicionar src ao path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
 
 from genie_assistant import GenieAssistant
+from spark_stub import FakeSparkSession
+
+try:
+    from pyspark.sql import SparkSession
+    HAS_PYSPARK = True
+except ImportError:
+    HAS_PYSPARK = False
 
 
 class TestGenieAssistant(unittest.TestCase):
@@ -88,5 +101,278 @@ class TestGenieAssistant(unittest.TestCase):
         self.assertIn('success', result)
 
 
+
+class TestGenieAssistantStatistics(unittest.TestCase):
+    """Testes da contagem de registros pelos metadados da tabela"""
+    
+    def setUp(self):
+        """Sessão Spark com DESCRIBE DETAIL e DESCRIBE HISTORY simulados"""
+        self.spark = FakeSparkSession()
+        self.spark.respond(r"^DESCRIBE DETAIL", [
+            {'format': 'parquet', 'location': "s3://bucket/vendas", 'numFiles': 12, 'sizeInBytes': 4_000_000}
+        ])
+        self.spark.respond(r"^DESCRIBE HISTORY", [
+            {'version': 3, 'operationMetrics': {'numOutputRows': '1000', 'numOutputBytes': '2000'}},
+            {'version': 2, 'operationMetrics': {'numOutputRows': '3000', 'numOutputBytes': '6000'}},
+            {'version': 1, 'operationMetrics': {}}
+        ])
+        self.spark.respond(r"^SELECT COUNT\(\*\)", [{'row_count': 1_999_999}])
+    
+    def test_estimate_without_scanning(self):
+        """Testa a estimativa pelo histórico sem COUNT(*)"""
+        genie = GenieAssistant("main", "vendas", "pedidos", spark=self.spark)
+        
+        statistics = genie._get_table_statistics()
+        
+        self.assertEqual(statistics['row_count'], 2_000_000)
+        self.assertEqual(statistics['row_count_source'], GenieAssistant.ROW_COUNT_ESTIMATE)
+        self.assertEqual(statistics['num_files'], 12)
+        self.assertEqual(statistics['size_in_bytes'], 4_000_000)
+        self.assertEqual(self.spark.count(r"COUNT\(\*\)"), 0)
+    
+    def test_exact_count_opt_in(self):
+        """Testa a contagem exata quando solicitada"""
+        genie = GenieAssistant("main", "vendas", "pedidos", exact_count=True, spark=self.spark)
+        
+        statistics = genie._get_table_statistics()
+        
+        self.assertEqual(statistics['row_count'], 1_999_999)
+        self.assertEqual(statistics['row_count_source'], GenieAssistant.ROW_COUNT_EXACT)
+    
+    def test_unknown_without_history(self):
+        """Testa a origem desconhecida quando não há métricas de escrita"""
+        self.spark.respond(r"^DESCRIBE HISTORY", [{'version': 0, 'operationMetrics': None}])
+        genie = GenieAssistant("main", "vendas", "pedidos", spark=self.spark)
+        
+        statistics = genie._get_table_statistics()
+        table_analysis = {'row_count': 0, 'row_count_source': statistics['row_count_source'], 'columns': []}
+        
+        self.assertIsNone(statistics['row_count'])
+        self.assertEqual(statistics['row_count_source'], GenieAssistant.ROW_COUNT_UNKNOWN)
+        self.assertIn("(indisponível)", genie._generate_table_description(table_analysis))
+    
+    
+    def test_profile_feeds_description_and_tags(self):
+        """Testa o perfil das colunas na descrição e nas tags"""
+        self.spark.respond(r"^SELECT\s+COUNT\(\*\) AS profiled_rows", [{
+            'profiled_rows': 100,
+            'c0_non_null': 100, 'c0_distinct': 100, 'c0_min': "1", 'c0_max': "100", 'c0_top': [],
+            'c1_non_null': 30, 'c1_distinct': 2, 'c1_min': "B2B", 'c1_max': "B2C", 'c1_avg_length': 3.0,
+            'c1_top': [{'item': "B2C", 'count': 20}, {'item': "B2B", 'count': 10}]
+        }])
+        genie = GenieAssistant("main", "vendas", "pedidos", spark=self.spark)
+        columns = [
+            {'name': "order_id", 'type': "bigint", 'category': 'identifier'},
+            {'name': "channel", 'type': "string", 'category': 'general'}
+        ]
+        
+        profile = genie._profile_columns(columns)
+        table_analysis = {'row_count': 100, 'row_count_source': 'stats', 'columns': columns, 'profile': profile}
+        description = genie._generate_table_description(table_analysis)
+        tags = genie._apply_unity_catalog_tags(table_analysis)['tags_applied']
+        
+        self.assertEqual(profile['profiled_rows'], 100)
+        self.assertEqual(columns[1]['category'], 'categorical')
+        self.assertIn("channel: 70.0% nulos, ~2 distintos", description)
+        self.assertIn("frequentes: B2C, B2B", description)
+        self.assertEqual(tags['sparse_columns'], '1')
+
+    def test_profile_never_exposes_personal_values(self):
+        """Testa que valores da amostra de colunas pessoais não vão para comentários nem descrição"""
+        self.spark.respond(r"^SELECT\s+COUNT\(\*\) AS profiled_rows", [{
+            'profiled_rows': 100,
+            'c0_non_null': 100, 'c0_distinct': 90, 'c0_min': "joao.silva@gmail.com", 'c0_max': "maria@x.com",
+            'c0_avg_length': 18.0,
+            'c0_top': [{'item': "joao.silva@gmail.com", 'count': 5}, {'item': "maria@x.com", 'count': 3}],
+            'c1_non_null': 100, 'c1_distinct': 100, 'c1_min': "11144477735", 'c1_max': "52998224725",
+            'c1_top': [{'item': "11144477735", 'count': 2}],
+            'c2_non_null': 100, 'c2_distinct': 80, 'c2_min': "(11) 98765-4321", 'c2_max': "(21) 3456-7890",
+            'c2_avg_length': 15.0, 'c2_top': [{'item': "(11) 98765-4321", 'count': 4}]
+        }])
+        genie = GenieAssistant("main", "vendas", "pedidos", spark=self.spark)
+        columns = [
+            {'name': "email", 'type': "string"},
+            {'name': "cpf", 'type': "bigint"},
+            {'name': "contato", 'type': "string", 'pii': {'type': 'phone', 'confidence': 0.97}}
+        ]
+        genie._classify_columns(columns)
+        
+        genie._profile_columns(columns)
+        description = genie._generate_table_description({
+            'row_count': 100, 'row_count_source': 'stats', 'columns': columns,
+            'profile': {'sampled': False}
+        })
+        comments = [genie._column_comment(column) for column in columns]
+        
+        for value in ["joao.silva@gmail.com", "maria@x.com", "11144477735", "52998224725", "98765-4321", "3456-7890"]:
+            self.assertNotIn(value, description)
+            for comment in comments:
+                self.assertNotIn(value, comment)
+        self.assertIn("email: 0.0% nulos, ~90 distintos, comprimento médio 18.0", description)
+        self.assertIn("[phone em 97% da amostra]", comments[2])
+
+
+@unittest.skipUnless(HAS_PYSPARK, "pyspark não instalado")
+class TestGenieAssistantDeltaLog(unittest.TestCase):
+    """Testes da contagem de registros pelo log de transações Delta"""
+    
+    def setUp(self):
+        """Log Delta local com dois arquivos e um deletion vector"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.spark = SparkSession.builder.master("local[1]").getOrCreate()
+        os.makedirs(os.path.join(self.temp_dir, "_delta_log"))
+    
+    def tearDown(self):
+        """Remove o diretório temporário"""
+        shutil.rmtree(self.temp_dir)
+    
+    def _commit(self, version, actions):
+        path = os.path.join(self.temp_dir, "_delta_log", f"{version:020d}.json")
+        with open(path, "w") as f:
+            f.write("\n".join(json.dumps(action) for action in actions) + "\n")
+    
+    @staticmethod
+    def _add(path, records, deleted=None):
+        add = {'path': path, 'size': 100, 'modificationTime': 0, 'dataChange': True,
+               'stats': json.dumps({'numRecords': records})}
+        if deleted is not None:
+            add['deletionVector'] = {'storageType': 'u', 'pathOrInlineDv': 'dv', 'offset': 1,
+                                     'sizeInBytes': 36, 'cardinality': deleted}
+        return {'add': add}
+    
+    def test_deletion_vectors_are_subtracted(self):
+        """Testa que as linhas marcadas em deletion vectors não são contadas"""
+        self._commit(0, [self._add("a.parquet", 10), self._add("b.parquet", 5)])
+        genie = GenieAssistant("main", "vendas", "pedidos", spark=self.spark)
+        self.assertEqual(genie._read_log_row_count(self.temp_dir), 15)
+        
+        # DELETE com deletion vector: remove e add do mesmo arquivo no mesmo commit
+        self._commit(1, [
+            {'remove': {'path': "a.parquet", 'deletionTimestamp': 1, 'dataChange': True}},
+            self._add("a.parquet", 10, deleted=3)
+        ])
+        self.assertEqual(genie._read_log_row_count(self.temp_dir), 12)
+
+
+class TestGenieAssistantMetadataDiff(unittest.TestCase):
+    """Testes da aplicação de tags e comentários apenas onde diferem dos atuais"""
+    
+    def setUp(self):
+        """Tabela com tags e comentários já aplicados no Unity Catalog"""
+        self.spark = FakeSparkSession()
+        self.spark.respond(r"information_schema\.table_tags", [
+            {'column_name': None, 'tag_name': 'dino_sdk_managed', 'tag_value': 'true'},
+            {'column_name': None, 'tag_name': 'data_classification', 'tag_value': 'silver'},
+            {'column_name': 'order_id', 'tag_name': 'dino_category', 'tag_value': 'identifier'}
+        ])
+        self.spark.respond(r"information_schema\.tables", [
+            {'column_name': 'order_id', 'comment': "Identificador único - order_id"},
+            {'column_name': 'amount', 'comment': "Valor antigo"}
+        ])
+        self.genie = GenieAssistant("main", "vendas", "pedidos", spark=self.spark, use_profile_cache=False)
+        self.table_analysis = {
+            'row_count': 10,
+            'row_count_source': 'stats',
+            'columns': [
+                {'name': "order_id", 'type': "bigint", 'category': 'identifier'},
+                {'name': "amount", 'type': "double", 'category': 'financial'},
+                {'name': "it's", 'type': "string", 'category': 'general'}
+            ]
+        }
+    
+    def test_only_changed_tags_in_single_statement(self):
+        """Testa um único SET TAGS com as tags alteradas"""
+        result = self.genie._apply_unity_catalog_tags(self.table_analysis)
+        tag_statements = [statement for statement in self.spark.statements if 'SET TAGS' in statement]
+        
+        self.assertEqual(result['statements_executed'], 1)
+        self.assertEqual(len(tag_statements), 1)
+        self.assertIn("'data_classification' = 'bronze'", tag_statements[0])
+        self.assertIn("'contains_financial' = 'true'", tag_statements[0])
+        self.assertNotIn('dino_sdk_managed', tag_statements[0])
+        
+        # Segunda execução: nada mudou
+        self.assertEqual(self.genie._apply_unity_catalog_tags(self.table_analysis)['statements_executed'], 0)
+    
+    def test_metadata_lookup_uses_lowercase_literals(self):
+        """Testa os nomes em minúsculas e escapados nos filtros do information_schema"""
+        genie = GenieAssistant("Main", "Vendas", "Pedidos_D'Oeste", spark=self.spark, use_profile_cache=False)
+        
+        metadata = genie._get_current_metadata()
+        
+        self.assertEqual(metadata['table_tags']['data_classification'], 'silver')
+        self.assertEqual(self.spark.count(
+            r"catalog_name = 'main' AND schema_name = 'vendas' AND table_name = 'pedidos_d\\'oeste'"
+        ), 1)
+        self.assertEqual(self.spark.count(
+            r"table_catalog = 'main' AND table_schema = 'vendas' AND table_name = 'pedidos_d\\'oeste'"
+        ), 1)
+    
+    def test_only_changed_columns_are_updated(self):
+        """Testa que colunas inalteradas não geram DDL"""
+        result = self.genie._apply_table_comments(self.table_analysis)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['columns_unchanged'], 1)
+        self.assertEqual(result['columns_updated'], 2)
+        self.assertEqual(self.spark.count(r"ALTER COLUMN `order_id`"), 0)
+        self.assertEqual(self.spark.count(r"ALTER COLUMN `amount` COMMENT 'Dados financeiros - amount'"), 1)
+        self.assertEqual(self.spark.count(r"ALTER COLUMN `amount` SET TAGS \('dino_category' = 'financial'\)"), 1)
+        self.assertEqual(self.spark.count(r"ALTER COLUMN `it's` COMMENT 'Campo de dados - it\\'s'"), 1)
+        self.assertEqual(self.spark.count(r"^COMMENT ON TABLE"), 1)
+        # Metadados atuais lidos uma única vez
+        self.assertEqual(self.spark.count(r"information_schema"), 2)
+        
+        statements = len(self.spark.statements)
+        self.assertEqual(self.genie._apply_table_comments(self.table_analysis)['statements_executed'], 0)
+        self.assertEqual(len(self.spark.statements), statements)
+    
+    def test_second_run_with_fresh_instance_is_noop(self):
+        """Testa que uma nova execução, em outro dia e outra instância, não gera DDL"""
+        self.genie._apply_unity_catalog_tags(self.table_analysis)
+        self.genie._apply_table_comments(self.table_analysis)
+        applied = self.genie._current_metadata
+        
+        spark = FakeSparkSession()
+        spark.respond(r"information_schema\.table_tags", [
+            {'column_name': None, 'tag_name': name, 'tag_value': value}
+            for name, value in applied['table_tags'].items()
+        ] + [
+            {'column_name': column, 'tag_name': name, 'tag_value': value}
+            for column, tags in applied['column_tags'].items() for name, value in tags.items()
+        ])
+        spark.respond(r"information_schema\.tables", [{'column_name': None, 'comment': applied['table_comment']}] + [
+            {'column_name': column, 'comment': comment} for column, comment in applied['column_comments'].items()
+        ])
+        genie = GenieAssistant("main", "vendas", "pedidos", spark=spark, use_profile_cache=False)
+        
+        tomorrow = datetime.now() + timedelta(days=1)
+        with patch('genie_assistant.datetime') as fake_datetime:
+            fake_datetime.now.return_value = tomorrow
+            tags_result = genie._apply_unity_catalog_tags(self.table_analysis)
+            comments_result = genie._apply_table_comments(self.table_analysis)
+        
+        self.assertEqual(tags_result['statements_executed'], 0)
+        self.assertEqual(comments_result['statements_executed'], 0)
+        self.assertEqual(tags_result['tags_applied']['ingestion_date'], applied['table_tags']['ingestion_date'])
+        self.assertEqual(spark.count(r"^(ALTER|COMMENT)"), 0)
+    
+    def test_conflicting_ddl_is_retried(self):
+        """Testa a repetição de DDL em conflito com outra alteração da tabela"""
+        attempts = []
+        
+        def conflict(match):
+            attempts.append(match.group(0))
+            if len(attempts) == 1:
+                raise Exception("[DELTA_METADATA_CHANGED] MetadataChangedException")
+            return []
+        
+        self.spark.respond(r"ALTER COLUMN `amount` COMMENT", conflict)
+        result = self.genie._apply_table_comments(self.table_analysis)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(len(attempts), 2)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,204 @@
+"""
+Testes para o módulo GenieSpaceClient do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from genie_space_client import GenieSpaceClient
+from databricks_client import DatabricksClient
+from genie_assistant import GenieAssistant
+from batch_cataloger import BatchCataloger
+from databricks_stub import FakeDatabricksServer
+from spark_stub import FakeSparkSession
+
+
+SPACES_API = "/api/2.0/genie/spaces"
+
+
+class TestGenieSpaceClient(unittest.TestCase):
+    """Testes para a classe GenieSpaceClient"""
+    
+    def setUp(self):
+        """Sobe o stand-in local da API de Genie spaces"""
+        self.server = FakeDatabricksServer()
+        self.client = DatabricksClient(host=self.server.start(), token="dapi-test")
+        self.spaces = GenieSpaceClient(client=self.client, warehouse_id="wh-1")
+    
+    def tearDown(self):
+        """Encerra o cliente e o servidor"""
+        self.client.close()
+        self.server.stop()
+    
+    def _config(self, table_name="pedidos", description="Tabela de pedidos"):
+        """Configuração de sala como a gerada pelo GenieAssistant"""
+        return {
+            'room_name': f"Sala_Genie_vendas_{table_name}",
+            'display_name': f"Análise de {table_name.title()}",
+            'description': description,
+            'sql_warehouse_id': None,
+            'instructions': f"Use o nome completo da tabela: main.vendas.{table_name}",
+            'table_identifiers': [{'catalog_name': 'main', 'schema_name': 'vendas', 'table_name': table_name}]
+        }
+    
+    def test_creates_space(self):
+        """Testa a criação da sala com tabela, instruções e hash"""
+        result = self.spaces.ensure_space(self._config())
+        
+        self.assertEqual(result['action'], 'created')
+        self.assertEqual(result['room_url'], f"{self.server.base_url}/genie/rooms/{result['space_id']}")
+        space = self.server.genie_spaces[result['space_id']]
+        self.assertEqual(space['title'], "Sala_Genie_vendas_pedidos")
+        self.assertEqual(space['warehouse_id'], "wh-1")
+        self.assertIn('"identifier": "main.vendas.pedidos"', space['serialized_space'])
+        self.assertEqual(GenieSpaceClient.stored_hash(space), result['config_hash'])
+    
+    def test_unchanged_config_is_skipped(self):
+        """Testa que a mesma configuração não gera escrita, nem em um novo cliente"""
+        space_id = self.spaces.ensure_space(self._config())['space_id']
+        
+        self.assertEqual(self.spaces.ensure_space(self._config())['action'], 'skipped')
+        result = GenieSpaceClient(client=self.client, warehouse_id="wh-1").ensure_space(self._config())
+        
+        self.assertEqual(result['action'], 'skipped')
+        self.assertEqual(result['space_id'], space_id)
+        self.assertEqual(self.server.count('POST', SPACES_API), 1)
+        self.assertEqual(len([request for request in self.server.requests if request[0] == 'PATCH']), 0)
+    
+    def test_description_alone_does_not_update(self):
+        """Testa que só título, definição e warehouse entram no hash"""
+        self.spaces.ensure_space(self._config(description="Gerado em 2024-01-01 10:00:00"))
+        
+        result = self.spaces.ensure_space(self._config(description="Gerado em 2024-01-01 10:00:01"))
+        
+        self.assertEqual(result['action'], 'skipped')
+        config = self._config()
+        config['sql_warehouse_id'] = "wh-2"
+        self.assertEqual(self.spaces.ensure_space(config)['action'], 'updated')
+    
+    def test_changed_config_updates_in_place(self):
+        """Testa a atualização da sala existente quando a configuração muda"""
+        space_id = self.server.add_space("Sala_Genie_vendas_pedidos", description="criada manualmente")
+        
+        config = self._config(description="Nova descrição")
+        result = self.spaces.ensure_space(config)
+        
+        self.assertEqual(result['action'], 'updated')
+        self.assertEqual(result['space_id'], space_id)
+        self.assertEqual(self.server.count('PATCH', f"{SPACES_API}/{space_id}"), 1)
+        self.assertTrue(self.server.genie_spaces[space_id]['description'].startswith("Nova descrição"))
+        config['instructions'] += "\nPrefira consultas com LIMIT"
+        self.assertEqual(self.spaces.ensure_space(config)['action'], 'updated')
+        self.assertEqual(self.server.count('PATCH', f"{SPACES_API}/{space_id}"), 2)
+    
+    def test_deleted_space_is_recreated(self):
+        """Testa a recriação da sala removida do workspace após a listagem"""
+        space_id = self.server.add_space("Sala_Genie_vendas_pedidos")
+        self.spaces.list_spaces()
+        del self.server.genie_spaces[space_id]
+        
+        result = self.spaces.ensure_space(self._config())
+        
+        self.assertEqual(result['action'], 'created')
+        self.assertNotEqual(result['space_id'], space_id)
+    
+    def test_spaces_listed_once_for_many_tables(self):
+        """Testa a listagem paginada feita uma única vez em lote"""
+        for index in range(5):
+            self.server.add_space(f"outra_sala_{index}")
+        spaces = GenieSpaceClient(client=self.client, warehouse_id="wh-1", page_size=2)
+        
+        for table_name in ["pedidos", "clientes", "itens"]:
+            spaces.ensure_space(self._config(table_name))
+        
+        self.assertEqual(self.server.count('GET', SPACES_API), 3)
+        self.assertEqual(self.server.count('POST', SPACES_API), 3)
+        self.assertEqual(len(spaces.list_spaces()), 8)
+    
+    def test_throttled_calls_are_retried(self):
+        """Testa as novas tentativas em 429/503 na mesma sessão"""
+        self.server.transient_errors = [429, 503]
+        
+        result = self.spaces.ensure_space(self._config())
+        
+        self.assertEqual(result['action'], 'created')
+        self.assertEqual(self.server.count('GET', SPACES_API), 3)
+    
+    def test_warehouse_is_required(self):
+        """Testa que a sala precisa de um SQL warehouse"""
+        spaces = GenieSpaceClient(client=self.client)
+        spaces.warehouse_id = None
+        
+        with self.assertRaises(ValueError):
+            spaces.ensure_space(self._config())
+
+
+class TestGenieRoomsFromAssistant(unittest.TestCase):
+    """Testes da publicação de salas pelo GenieAssistant e pelo BatchCataloger"""
+    
+    def setUp(self):
+        """Sessão Spark local e stand-in da API de Genie spaces"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.server = FakeDatabricksServer()
+        self.client = DatabricksClient(host=self.server.start(), token="dapi-test")
+        self.spaces = GenieSpaceClient(client=self.client, warehouse_id="wh-1")
+        
+        self.spark = FakeSparkSession()
+        self.spark.respond(r"information_schema\.columns c\b", [
+            {'table_schema': 'vendas', 'table_name': table_name, 'column_name': 'order_id',
+             'full_data_type': 'bigint', 'is_nullable': 'NO'}
+            for table_name in ['clientes', 'itens', 'pedidos']
+        ])
+        self.spark.respond(r"^DESCRIBE DETAIL", [
+            {'format': 'delta', 'location': None, 'numFiles': 1, 'sizeInBytes': 1000, 'properties': {}}
+        ])
+        self.spark.respond(r"^DESCRIBE HISTORY \S+ LIMIT (\d+)", [{
+            'version': 3, 'operation': 'WRITE', 'operationParameters': {'mode': 'Append'},
+            'operationMetrics': {'numOutputRows': '100', 'numOutputBytes': '1000'}
+        }])
+    
+    def tearDown(self):
+        """Encerra o cliente e o servidor"""
+        self.client.close()
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_catalog_table_publishes_room(self):
+        """Testa a sala publicada junto com a catalogação"""
+        genie = GenieAssistant(
+            "main", "vendas", "pedidos", spark=self.spark, genie_client=self.spaces,
+            profile_columns=False, use_profile_cache=False
+        )
+        
+        first = genie.catalog_table(schema_columns=[{'name': 'order_id', 'type': 'bigint', 'nullable': False}], genie_room=True)
+        second = genie.catalog_table(schema_columns=[{'name': 'order_id', 'type': 'bigint', 'nullable': False}], genie_room=True)
+        
+        self.assertTrue(first['success'], first.get('error'))
+        self.assertEqual(first['genie_room']['action'], 'created')
+        self.assertEqual(second['genie_room']['action'], 'skipped')
+        self.assertTrue(first['genie_room']['room_url'].startswith(self.server.base_url))
+    
+    def test_batch_shares_one_client(self):
+        """Testa as salas de um schema inteiro com uma única listagem"""
+        cataloger = BatchCataloger(
+            "main", "vendas", spark=self.spark, genie_rooms=True, genie_client=self.spaces,
+            profile_cache_file=os.path.join(self.temp_dir, "profiles.sqlite"), profile_columns=False
+        )
+        
+        result = cataloger.run()
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['genie_rooms'], {'created': 3})
+        self.assertEqual(self.server.count('GET', SPACES_API), 1)
+        self.assertEqual(len(self.server.genie_spaces), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,10 @@ Testes para o módulo IngestionEngine do Dino SDK
 import unittest
 import sys
 import os
+import json
+import tempfile
+import shutil
+import threading
 
 # Adicionar src ao path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -89,5 +93,283 @@ class TestIngestionEngine(unittest.TestCase):
         self.assertIn('success', result)
 
 
+class TestIngestionEngineChangeDataFeed(unittest.TestCase):
+    """Testes para a leitura incremental de origens Delta via Change Data Feed"""
+    
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.engine = IngestionEngine(
+            target_schema="bronze",
+            table_name="orders",
+            file_path="/mnt/silver/orders/",
+            file_format="delta",
+            catalog_name="main",
+            output_mode="merge",
+            use_change_data_feed=True,
+            merge_keys=["order_id"]
+        )
+    
+    def test_cdf_code_is_valid_python(self):
+        """Testa se o código gerado com CDF é Python válido"""
+        code = self.engine._generate_batch_code()
+        compile(code, "ingestion_batch_cdf.py", "exec")
+    
+    def test_cdf_reads_changes_from_tracked_version(self):
+        """Testa a leitura com readChangeFeed a partir da versão registrada"""
+        code = self.engine._generate_batch_code()
+        
+        self.assertIn('.option("readChangeFeed", "true")', code)
+        self.assertIn('.option("startingVersion", LAST_VERSION + 1)', code)
+        self.assertIn('STATE_TABLE = "main.bronze._dino_cdf_state"', code)
+        self.assertNotIn('.format("delta")\n    .load(SOURCE_PATH))', code)
+    
+    def test_cdf_applies_changes_with_merge(self):
+        """Testa a aplicação de inserts/updates/deletes via MERGE"""
+        code = self.engine._generate_batch_code()
+        
+        self.assertIn('MERGE_KEYS = ["order_id"]', code)
+        self.assertIn("whenMatchedDelete", code)
+        self.assertIn("whenMatchedUpdate", code)
+        self.assertIn("whenNotMatchedInsert", code)
+    
+    def test_cdf_falls_back_to_snapshot(self):
+        """Testa o fallback para snapshot quando a versão foi removida pelo vacuum"""
+        code = self.engine._generate_batch_code()
+        
+        self.assertIn("LAST_VERSION + 1 < EARLIEST_VERSION", code)
+        self.assertIn('READ_STRATEGY = "snapshot"', code)
+        self.assertIn('.mode("overwrite")', code)
+    
+    def test_same_version_insert_wins_over_delete(self):
+        """Testa que o par delete+insert da mesma versão mantém a linha"""
+        code = self.engine._generate_batch_code()
+        start = code.index("Window.partitionBy(*MERGE_KEYS).orderBy(") + len("Window.partitionBy(*MERGE_KEYS).orderBy(")
+        order_by = code[start:code.index("\n    )", start)]
+        
+        class Expression:
+            """Avalia a ordenação da janela gerada sobre dicts (col, when, desc)"""
+            def __init__(self, evaluate, descending=False):
+                self.evaluate, self.descending = evaluate, descending
+            
+            def __eq__(self, other):
+                return Expression(lambda row: self.evaluate(row) == other)
+            
+            def desc(self):
+                return Expression(self.evaluate, descending=True)
+            
+            def otherwise(self, value):
+                return Expression(lambda row: self.when_value if self.condition(row) else value)
+        
+        def when(condition, value):
+            expression = Expression(None)
+            expression.condition, expression.when_value = condition.evaluate, value
+            return expression
+        
+        namespace = {'col': lambda name: Expression(lambda row: row[name]), 'when': when}
+        expressions = eval(f"[{order_by}]", namespace)
+        
+        def latest(changes):
+            return sorted(changes, key=lambda row: [
+                -expression.evaluate(row) if expression.descending else expression.evaluate(row)
+                for expression in expressions
+            ])[0]
+        
+        rewrite = [
+            {'_commit_version': 7, '_change_type': 'delete'},
+            {'_commit_version': 7, '_change_type': 'insert'},
+            {'_commit_version': 6, '_change_type': 'update_postimage'}
+        ]
+        self.assertEqual(latest(rewrite)['_change_type'], 'insert')
+        self.assertEqual(latest(list(reversed(rewrite)))['_change_type'], 'insert')
+        
+        deleted = [{'_commit_version': 8, '_change_type': 'delete'}] + rewrite
+        self.assertEqual(latest(deleted)['_change_type'], 'delete')
+    
+    def test_vacuumed_version_detected_by_error_class(self):
+        """Testa a detecção da versão removida pela classe do erro, não pela mensagem"""
+        code = self.engine._generate_batch_code()
+        start = code.index("VERSION_UNAVAILABLE_ERROR_CLASSES = ")
+        namespace = {}
+        exec(code[start:code.index("if LAST_VERSION is not None")], namespace)
+        is_version_unavailable = namespace['_is_version_unavailable']
+        
+        class SparkError(Exception):
+            def __init__(self, error_class):
+                super().__init__("is not available")
+                self.error_class = error_class
+            
+            def getErrorClass(self):
+                return self.error_class
+        
+        class JavaClass:
+            def __init__(self, name):
+                self.name = name
+            
+            def getName(self):
+                return self.name
+        
+        class JavaException:
+            def __init__(self, name, cause=None):
+                self.name, self.cause = name, cause
+            
+            def getClass(self):
+                return JavaClass(self.name)
+            
+            def getCause(self):
+                return self.cause
+        
+        wrapped = Exception("An error occurred while calling o42.load")
+        wrapped.java_exception = JavaException(
+            "org.apache.spark.SparkException", JavaException("java.io.FileNotFoundException")
+        )
+        
+        self.assertTrue(is_version_unavailable(SparkError("DELTA_CHANGE_DATA_FILE_NOT_FOUND")))
+        self.assertTrue(is_version_unavailable(wrapped))
+        self.assertFalse(is_version_unavailable(SparkError("DELTA_CONCURRENT_APPEND")))
+        self.assertFalse(is_version_unavailable(Exception("VersionNotFound: is not available")))
+    
+    def test_cdf_rejected_for_automated_ingestion(self):
+        """Testa que CDF não é ignorado silenciosamente no modo streaming"""
+        with self.assertRaises(ValueError):
+            self.engine.build_script(is_automated=True)
+    
+    def test_cdf_requires_delta_format(self):
+        """Testa que CDF só é aceito para origens Delta"""
+        with self.assertRaises(ValueError):
+            IngestionEngine(
+                target_schema="bronze",
+                table_name="orders",
+                file_path="/mnt/raw/orders.csv",
+                use_change_data_feed=True,
+                merge_keys=["order_id"]
+            )
+    
+    def test_cdf_requires_merge_keys(self):
+        """Testa que CDF exige colunas chave para o MERGE"""
+        with self.assertRaises(ValueError):
+            IngestionEngine(
+                target_schema="bronze",
+                table_name="orders",
+                file_path="/mnt/silver/orders/",
+                file_format="delta",
+                use_change_data_feed=True
+            )
+    
+    def test_full_read_without_cdf(self):
+        """Testa que sem CDF a leitura Delta continua completa"""
+        engine = IngestionEngine(
+            target_schema="bronze",
+            table_name="orders",
+            file_path="/mnt/silver/orders/",
+            file_format="delta"
+        )
+        code = engine._generate_batch_code()
+        
+        self.assertNotIn("readChangeFeed", code)
+
+
+class TestIngestionEngineScriptCache(unittest.TestCase):
+    """Testes para o diretório de saída e o cache de scripts por hash"""
+    
+    def setUp(self):
+        """Configuração antes de cada teste"""
+        self.output_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        """Remove os arquivos temporários"""
+        shutil.rmtree(self.output_dir)
+    
+    def _create_engine(self, delimiter=",", catalog_name="main", table_name="customers"):
+        return IngestionEngine(
+            target_schema="bronze",
+            table_name=table_name,
+            file_path="/Volumes/main/raw/customers.csv",
+            delimiter=delimiter,
+            catalog_name=catalog_name,
+            output_dir=self.output_dir
+        )
+    
+    def test_script_written_to_output_dir(self):
+        """Testa a gravação do script no diretório configurado"""
+        result = self._create_engine().execute_ingestion()
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(os.path.dirname(result['ingestion_file']), self.output_dir)
+        self.assertTrue(os.path.exists(result['ingestion_file']))
+        self.assertFalse(result['script_cached'])
+    
+    def test_hash_ignores_generation_timestamp(self):
+        """Testa que o hash não depende do cabeçalho com a data de geração"""
+        engine = self._create_engine()
+        
+        first_script, first_hash = engine.build_script()
+        second_script, second_hash = engine.build_script()
+        
+        self.assertEqual(first_hash, second_hash)
+        self.assertIn(f"# dino-script-hash: {first_hash}", first_script)
+    
+    def test_unchanged_config_skips_regeneration(self):
+        """Testa que a mesma configuração não reescreve o script"""
+        first = self._create_engine().execute_ingestion()
+        modified_time = os.path.getmtime(first['ingestion_file'])
+        os.utime(first['ingestion_file'], (modified_time - 100, modified_time - 100))
+        
+        second = self._create_engine().execute_ingestion()
+        
+        self.assertTrue(second['script_cached'])
+        self.assertEqual(first['script_hash'], second['script_hash'])
+        self.assertEqual(os.path.getmtime(second['ingestion_file']), modified_time - 100)
+    
+    def test_changed_config_regenerates_and_updates_index(self):
+        """Testa que mudanças na configuração regeneram o script e o índice"""
+        first = self._create_engine().execute_ingestion()
+        second = self._create_engine(delimiter=";").execute_ingestion()
+        
+        self.assertFalse(second['script_cached'])
+        self.assertNotEqual(first['script_hash'], second['script_hash'])
+        
+        with open(os.path.join(self.output_dir, ".dino_script_index.json"), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        
+        entry = index["main.bronze.customers"]["batch"]
+        self.assertEqual(entry['hash'], second['script_hash'])
+        self.assertEqual(entry['file'], "ingestion_batch_main_bronze_customers.py")
+    
+    def test_catalogs_get_separate_scripts(self):
+        """Testa que a mesma tabela em catálogos diferentes não compartilha o script"""
+        main = self._create_engine().execute_ingestion()
+        dev = self._create_engine(catalog_name="dev").execute_ingestion()
+        
+        self.assertNotEqual(main['ingestion_file'], dev['ingestion_file'])
+        self.assertFalse(dev['script_cached'])
+        self.assertTrue(self._create_engine().execute_ingestion()['script_cached'])
+    
+    def test_cache_decided_by_file_on_disk(self):
+        """Testa que um script alterado em disco é regravado mesmo com o índice atualizado"""
+        first = self._create_engine().execute_ingestion()
+        with open(first['ingestion_file'], 'w', encoding='utf-8') as f:
+            f.write("# editado manualmente\n")
+        
+        second = self._create_engine().execute_ingestion()
+        
+        self.assertFalse(second['script_cached'])
+        self.assertEqual(IngestionEngine._read_script_hash(second['ingestion_file']), first['script_hash'])
+    
+    def test_concurrent_writes_keep_every_index_entry(self):
+        """Testa o índice com scripts de várias tabelas gravados em paralelo"""
+        threads = [
+            threading.Thread(target=self._create_engine(table_name=f"t{index}").write_script)
+            for index in range(16)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        with open(os.path.join(self.output_dir, ".dino_script_index.json"), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        self.assertEqual(len(index), 16)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,161 @@
+"""
+Testes para o módulo IngestionEstimator do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from ingestion_estimator import IngestionEstimator, MB
+from ingestion_engine import IngestionEngine
+
+
+class TestIngestionEstimator(unittest.TestCase):
+    """Testes para a classe IngestionEstimator"""
+    
+    def setUp(self):
+        """Cria uma origem local com arquivos CSV e CSV.gz"""
+        self.temp_dir = tempfile.mkdtemp()
+        for index in range(3):
+            with open(os.path.join(self.temp_dir, f"part-{index}.csv"), "wb") as f:
+                f.write(b"a,b\n" * 1000)
+        with open(os.path.join(self.temp_dir, "_SUCCESS"), "wb") as f:
+            f.write(b"")
+        self.estimator = IngestionEstimator(cluster_startup_seconds=0)
+    
+    def tearDown(self):
+        """Remove os arquivos temporários"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_profile_source(self):
+        """Testa o perfil local (bytes, arquivos, formato e compressão)"""
+        profile = self.estimator.profile_source(self.temp_dir)
+        
+        self.assertTrue(profile['available'])
+        self.assertEqual(profile['file_count'], 3)
+        self.assertEqual(profile['total_bytes'], 12000)
+        self.assertEqual(profile['file_format'], 'csv')
+        self.assertEqual(profile['compression'], 'none')
+        self.assertTrue(profile['splittable'])
+    
+    def test_gzip_is_not_splittable(self):
+        """Testa que CSV com gzip é marcado como não divisível"""
+        with open(os.path.join(self.temp_dir, "big.csv.gz"), "wb") as f:
+            f.write(b"x" * 50000)
+        
+        profile = self.estimator.profile_source(self.temp_dir)
+        
+        self.assertEqual(profile['compression'], 'gzip')
+        self.assertFalse(profile['splittable'])
+    
+    def test_multiline_json_is_not_splittable(self):
+        """Testa que JSON lido com multiline é tratado como uma task por arquivo"""
+        json_dir = os.path.join(self.temp_dir, "json")
+        os.makedirs(json_dir)
+        with open(os.path.join(json_dir, "eventos.json"), "w") as f:
+            f.write('[{"id": 1}]')
+        
+        self.assertTrue(self.estimator.profile_source(json_dir)['splittable'])
+        multiline = self.estimator.profile_source(json_dir, read_options={'multiline': 'true'})
+        self.assertEqual(multiline['compression'], 'none')
+        self.assertFalse(multiline['splittable'])
+        
+        engine = IngestionEngine(
+            target_schema="bronze",
+            table_name="events",
+            file_path="/Volumes/main/raw/events/",
+            file_format="json"
+        )
+        estimate = engine.estimate_resources(local_paths=[json_dir], estimator=self.estimator)
+        self.assertFalse(estimate['profile']['splittable'])
+    
+    def test_estimate_scales_workers_with_volume(self):
+        """Testa que volumes maiores recebem mais workers"""
+        small = {'total_bytes': 1 * 1024 * MB, 'file_count': 10, 'file_format': 'parquet',
+                 'compression': 'none', 'splittable': True}
+        large = dict(small, total_bytes=2000 * 1024 * MB, file_count=5000)
+        
+        small_estimate = self.estimator.estimate(small)
+        large_estimate = self.estimator.estimate(large)
+        
+        self.assertEqual(small_estimate['recommended_workers'], 1)
+        self.assertGreater(large_estimate['recommended_workers'], small_estimate['recommended_workers'])
+        self.assertLessEqual(large_estimate['recommended_workers'], self.estimator.max_workers)
+        self.assertEqual(large_estimate['sizing_profile'], 'large')
+        self.assertIn('spark.sql.files.maxPartitionBytes', large_estimate['spark_conf'])
+        self.assertIn('spark.sql.shuffle.partitions', large_estimate['spark_conf'])
+    
+    def test_non_splittable_limits_parallelism(self):
+        """Testa que arquivos não divisíveis limitam as tasks úteis"""
+        profile = {'total_bytes': 100 * 1024 * MB, 'file_count': 2, 'file_format': 'csv',
+                   'compression': 'gzip', 'splittable': False, 'largest_file_bytes': 50 * 1024 * MB}
+        
+        estimate = self.estimator.estimate(profile)
+        
+        self.assertEqual(estimate['useful_tasks'], 2)
+        self.assertEqual(estimate['recommended_workers'], 1)
+    
+    def test_unavailable_profile_has_no_recommendation(self):
+        """Testa que uma origem não perfilada não gera spark_conf nem previsão"""
+        engine = IngestionEngine(
+            target_schema="bronze",
+            table_name="events",
+            file_path="/Volumes/main/raw/events/",
+            file_format="csv"
+        )
+        
+        estimate = engine.estimate_resources(
+            local_paths=[os.path.join(self.temp_dir, "inexistente")], estimator=self.estimator
+        )
+        
+        self.assertFalse(estimate['available'])
+        self.assertEqual(estimate['spark_conf'], {})
+        self.assertIsNone(estimate['predicted_runtime_seconds'])
+        self.assertIsNone(estimate['sizing_profile'])
+        self.assertEqual(engine.spark_conf, {})
+        self.assertNotIn('spark.sql.shuffle.partitions', engine._generate_batch_code())
+    
+    def test_calibrate_and_persist_coefficients(self):
+        """Testa a calibração dos coeficientes a partir de execuções anteriores"""
+        records = [
+            {'file_format': 'csv', 'total_bytes': 100 * MB, 'runtime_seconds': 10, 'total_cores': 1},
+            {'file_format': 'csv', 'total_bytes': 200 * MB, 'runtime_seconds': 15, 'total_cores': 2,
+             'startup_seconds': 5},
+            {'file_format': 'csv', 'total_bytes': 300 * MB, 'runtime_seconds': 5, 'total_cores': 4}
+        ]
+        
+        coefficients = self.estimator.calibrate(records)
+        self.assertEqual(coefficients['csv'], 10.0)
+        
+        coefficients_file = os.path.join(self.temp_dir, "coefficients.json")
+        self.estimator.save_coefficients(coefficients_file)
+        reloaded = IngestionEstimator(coefficients_file=coefficients_file)
+        self.assertEqual(reloaded.throughput['csv'], 10.0)
+    
+    def test_engine_emits_recommended_spark_conf(self):
+        """Testa que o script gerado inclui as configurações recomendadas"""
+        engine = IngestionEngine(
+            target_schema="bronze",
+            table_name="events",
+            file_path="/Volumes/main/raw/events/",
+            file_format="csv",
+            spark_conf={'spark.sql.shuffle.partitions': '64'}
+        )
+        
+        estimate = engine.estimate_resources(local_paths=[self.temp_dir], estimator=self.estimator)
+        code = engine._generate_batch_code()
+        
+        self.assertEqual(estimate['profile']['file_count'], 3)
+        self.assertIn('spark.conf.set("spark.sql.files.maxPartitionBytes"', code)
+        # Valores informados explicitamente têm precedência
+        self.assertIn('spark.conf.set("spark.sql.shuffle.partitions", "64")', code)
+        compile(code, "ingestion_batch.py", "exec")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+Testes para o módulo JobSubmitter do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from job_submitter import JobSubmitter
+from ingestion_engine import IngestionEngine
+from databricks_client import DatabricksClient
+from databricks_stub import FakeDatabricksServer
+
+
+class TestJobSubmitter(unittest.TestCase):
+    """Testes para a classe JobSubmitter"""
+    
+    def setUp(self):
+        """Sobe o stand-in das APIs e gera scripts de exemplo"""
+        self.server = FakeDatabricksServer()
+        self.client = DatabricksClient(host=self.server.start(), token="dapi-test")
+        self.submitter = JobSubmitter(
+            client=self.client,
+            workspace_dir="/Workspace/Shared/dino_test",
+            poll_interval_seconds=0.01,
+            max_poll_interval_seconds=0.02
+        )
+        self.temp_dir = tempfile.mkdtemp()
+        self.scripts = []
+        for index in range(5):
+            script_file = os.path.join(self.temp_dir, f"ingestion_batch_vendas_t{index}.py")
+            with open(script_file, 'w') as f:
+                f.write(f"print('t{index}')\n")
+            self.scripts.append(script_file)
+    
+    def tearDown(self):
+        """Encerra cliente, servidor e remove os scripts"""
+        self.client.close()
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_run_script_uploads_submits_and_polls(self):
+        """Testa upload, submissão serverless e acompanhamento até o fim"""
+        result = self.submitter.run_script(self.scripts[0], parameters=["--available-now"])
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['result_state'], 'SUCCESS')
+        self.assertEqual(result['rows_loaded'], 42)
+        self.assertEqual(result['timings']['setup_seconds'], 30.0)
+        self.assertEqual(result['timings']['run_seconds'], 120.5)
+        
+        workspace_path = "/Workspace/Shared/dino_test/ingestion_batch_vendas_t0.py"
+        self.assertEqual(self.server.workspace_files[workspace_path], b"print('t0')\n")
+        
+        body = self.server.submitted_runs[result['run_id']]['body']
+        task = body['tasks'][0]
+        self.assertEqual(task['spark_python_task']['python_file'], workspace_path)
+        self.assertEqual(task['spark_python_task']['parameters'], ["--available-now"])
+        self.assertEqual(task['environment_key'], body['environments'][0]['environment_key'])
+        self.assertEqual(self.server.count('GET', "/api/2.1/jobs/runs/get"), 2)
+    
+    def test_failed_run(self):
+        """Testa o resultado de uma execução que falha"""
+        self.server.run_result_state = 'FAILED'
+        self.server.run_logs = "Traceback (most recent call last):"
+        
+        result = self.submitter.run_script(self.scripts[0])
+        
+        self.assertFalse(result['success'])
+        self.assertEqual(result['result_state'], 'FAILED')
+        self.assertIsNone(result['rows_loaded'])
+        self.assertIn('error', result)
+    
+    def test_poll_delays_backoff_with_jitter(self):
+        """Testa o backoff exponencial limitado com jitter"""
+        submitter = JobSubmitter(client=self.client, poll_interval_seconds=1, max_poll_interval_seconds=8, jitter=0.2)
+        delays = submitter._poll_delays()
+        
+        for ceiling in [1, 2, 4, 8, 8]:
+            delay = next(delays)
+            self.assertLessEqual(delay, ceiling)
+            self.assertGreaterEqual(delay, ceiling * 0.8)
+    
+    def test_wait_for_run_timeout(self):
+        """Testa o timeout do acompanhamento"""
+        self.server.run_polls = 1000
+        self.submitter.run_timeout_seconds = 0.05
+        
+        result = self.submitter.run_script(self.scripts[0])
+        
+        self.assertFalse(result['success'])
+        self.assertIn("não terminou", result['error'])
+        self.assertTrue(result['cancelled'])
+        self.assertTrue(self.server.submitted_runs[result['run_id']]['cancelled'])
+        self.assertEqual(self.server.count('POST', "/api/2.1/jobs/runs/cancel"), 1)
+    
+    def test_metrics_failure_is_not_fatal(self):
+        """Testa que uma falha em runs/get-output não derruba a execução bem-sucedida"""
+        self.server.routes[('GET', '/api/2.1/jobs/runs/get-output')] = \
+            lambda params, body: (500, {'error_code': 'INTERNAL_ERROR', 'message': 'boom'})
+        
+        result = self.submitter.run_script(self.scripts[0])
+        
+        self.assertTrue(result['success'])
+        self.assertIn('run_id', result)
+        self.assertEqual(result['result_state'], 'SUCCESS')
+        self.assertIsNone(result['rows_loaded'])
+        self.assertEqual(result['metrics'], {})
+    
+    def test_run_many_respects_concurrency_limit(self):
+        """Testa execuções simultâneas limitadas por max_concurrency"""
+        self.server.run_polls = 4
+        
+        summary = self.submitter.run_many(self.scripts, max_concurrency=2)
+        
+        self.assertTrue(summary['success'])
+        self.assertEqual(summary['succeeded'], 5)
+        self.assertEqual([result['script_file'] for result in summary['results']], self.scripts)
+        self.assertLessEqual(self.server.max_active_runs, 2)
+        self.assertEqual(len(self.server.submitted_runs), 5)
+    
+    def test_execute_ingestion_submit(self):
+        """Testa a submissão integrada ao IngestionEngine"""
+        engine = IngestionEngine("vendas", "pedidos", "/mnt/landing/pedidos.csv", output_dir=self.temp_dir)
+        
+        result = engine.execute_ingestion(submit=True, submitter=self.submitter)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['rows_loaded'], 42)
+        self.assertEqual(result['submission']['result_state'], 'SUCCESS')
+        uploaded = self.server.workspace_files["/Workspace/Shared/dino_test/ingestion_batch_main_vendas_pedidos.py"]
+        self.assertIn(b"DINO_METRICS", uploaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
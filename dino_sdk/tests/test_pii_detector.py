@@ -0,0 +1,130 @@
+"""
+Testes para o módulo PIIDetector do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+
+import pyarrow as pa
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from pii_detector import PIIDetector
+from genie_assistant import GenieAssistant
+from spark_stub import FakeSparkSession
+
+
+class TestPIIDetector(unittest.TestCase):
+    """Testes para a classe PIIDetector"""
+    
+    def setUp(self):
+        """Detector com amostra mínima reduzida"""
+        self.detector = PIIDetector(threshold=0.8, min_samples=2)
+    
+    def _ratios(self, values):
+        return self.detector.match_ratios(pa.array(values, type=pa.string()))['ratios']
+    
+    def test_check_digits_are_validated(self):
+        """Testa CPF e CNPJ com dígitos verificadores válidos e inválidos"""
+        self.assertEqual(self._ratios(["529.982.247-25", "12345678909"]), {'cpf': 1.0})
+        self.assertEqual(self._ratios(["529.982.247-26", "111.111.111-11"]), {})
+        self.assertEqual(self._ratios(["11.444.777/0001-61", "34028316000103"]), {'cnpj': 1.0})
+        self.assertEqual(self._ratios(["11.444.777/0001-62"]), {})
+    
+    def test_luhn_and_other_patterns(self):
+        """Testa cartões (Luhn), email, telefone e IP"""
+        self.assertEqual(self._ratios(["5555 5555 5555 4444", "4111-1111-1111-1112"]), {'credit_card': 0.5})
+        self.assertEqual(self._ratios(["ana@empresa.com.br"]), {'email': 1.0})
+        self.assertEqual(self._ratios(["(11) 98765-4321", "+55 21 3456-7890"]), {'phone': 1.0})
+        self.assertEqual(self._ratios(["10.0.0.1", "256.1.1.1"]), {'ip_address': 0.5})
+    
+    def test_phone_requires_ddd_or_separators(self):
+        """Testa telefones só com dígitos e códigos numéricos que não são telefones"""
+        self.assertEqual(self._ratios(["11987654321", "5521987654321", "(11)987654321", "2134567890"]),
+                         {'phone': 1.0})
+        # Datas yyyymmdd, CEPs e números de pedido
+        self.assertEqual(self._ratios(["20240131", "19991231", "01310100", "01310-100"]), {})
+        self.assertEqual(self._ratios(["12345678", "87654321", "12345678901", "0012345678"]), {})
+    
+    def test_nulls_and_blanks_are_ignored(self):
+        """Testa que nulos e vazios não entram na proporção"""
+        matches = self.detector.match_ratios(pa.chunked_array([
+            pa.array(["ana@empresa.com", None]), pa.array(["  ", "sem email"])
+        ]))
+        
+        self.assertEqual(matches['sample_size'], 2)
+        self.assertEqual(matches['ratios'], {'email': 0.5})
+    
+    def test_classify_uses_threshold_and_priority(self):
+        """Testa o threshold, a amostra mínima e o desempate por prioridade"""
+        self.assertEqual(self.detector.classify({'cpf': 0.9, 'phone': 0.9}, 100), 'cpf')
+        self.assertIsNone(self.detector.classify({'email': 0.5}, 100))
+        self.assertIsNone(self.detector.classify({'email': 1.0}, 1))
+    
+    def test_detect_reads_single_sample(self):
+        """Testa a amostra única apenas das colunas de texto"""
+        queries = []
+        
+        def run_arrow_query(statement):
+            queries.append(statement)
+            return pa.table({
+                'c0': ["529.982.247-25", "123.456.789-09", "111.444.777-35"],
+                'c1': ["Centro", "Zona Sul", None]
+            })
+        
+        detector = PIIDetector(sample_rows=500, sample_percent=10, min_samples=2)
+        result = detector.detect(run_arrow_query, "main.crm.clientes", [
+            {'name': "doc_cliente", 'type': "string"},
+            {'name': "bairro", 'type': "string"},
+            {'name': "idade", 'type': "int"}
+        ])
+        
+        self.assertEqual(queries, [
+            "SELECT `doc_cliente` AS c0, `bairro` AS c1 FROM main.crm.clientes TABLESAMPLE (10 PERCENT) LIMIT 500"
+        ])
+        self.assertEqual(result['doc_cliente']['pii_type'], 'cpf')
+        self.assertEqual(result['doc_cliente']['confidence'], 1.0)
+        self.assertIsNone(result['bairro']['pii_type'])
+        self.assertNotIn('idade', result)
+    
+    def test_validation(self):
+        """Testa a validação dos parâmetros"""
+        with self.assertRaises(ValueError):
+            PIIDetector(threshold=0)
+        with self.assertRaises(ValueError):
+            PIIDetector(sample_rows=0)
+
+
+class TestGenieAssistantPII(unittest.TestCase):
+    """Testes da detecção de dados pessoais na análise da tabela"""
+    
+    def test_content_drives_pii_tags(self):
+        """Testa que uma coluna com CPFs e nome genérico gera as tags de PII"""
+        spark = FakeSparkSession()
+        spark.respond(r"^DESCRIBE DETAIL", [{'format': 'delta', 'location': None, 'numFiles': 1, 'sizeInBytes': 100}])
+        spark.respond(r"LIMIT 1000$", [
+            {'c0': cpf, 'c1': "Centro"}
+            for cpf in ["529.982.247-25", "123.456.789-09", "111.444.777-35"] * 4
+        ])
+        genie = GenieAssistant("main", "crm", "clientes", spark=spark, profile_columns=False, use_profile_cache=False)
+        
+        analysis = genie._analyze_table_structure([
+            {'name': "doc_cliente", 'type': "string"},
+            {'name': "bairro", 'type': "string"}
+        ])
+        tags = genie._apply_unity_catalog_tags(analysis)['tags_applied']
+        
+        self.assertEqual(analysis['pii_columns'], ["doc_cliente"])
+        self.assertEqual(analysis['columns'][0]['category'], 'personal_data')
+        self.assertEqual(tags['contains_pii'], 'true')
+        self.assertEqual(tags['pii_types'], 'cpf')
+        self.assertEqual(genie._column_tags(analysis['columns'][0]),
+                         {'dino_category': 'personal_data', 'pii_type': 'cpf'})
+        self.assertNotIn('contains_pii', genie._column_tags(analysis['columns'][1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
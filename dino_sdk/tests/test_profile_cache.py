@@ -0,0 +1,175 @@
+"""
+Testes para o módulo ProfileCache do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+from datetime import datetime, timedelta
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from profile_cache import ProfileCache
+from genie_assistant import GenieAssistant
+from column_classifier import ColumnClassifier
+from spark_stub import FakeSparkSession
+
+
+class TestProfileCache(unittest.TestCase):
+    """Testes para a classe ProfileCache"""
+    
+    def setUp(self):
+        """Cache em diretório temporário"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = ProfileCache(os.path.join(self.temp_dir, "profiles.sqlite"), max_entries=3)
+    
+    def tearDown(self):
+        """Fecha o cache e remove o diretório"""
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_get_by_version(self):
+        """Testa a consulta por tabela e versão"""
+        self.cache.put("main.vendas.pedidos", 4, {'row_count': 10})
+        
+        self.assertEqual(self.cache.get("main.vendas.pedidos", 4), {'row_count': 10})
+        self.assertIsNone(self.cache.get("main.vendas.pedidos", 5))
+        self.assertEqual(self.cache.latest("main.vendas.pedidos", before_version=5), {'row_count': 10})
+    
+    def test_new_version_replaces_previous(self):
+        """Testa que apenas a versão mais recente da tabela é mantida"""
+        self.cache.put("main.vendas.pedidos", 4, {'row_count': 10})
+        self.cache.put("main.vendas.pedidos", 6, {'row_count': 12})
+        
+        self.assertEqual(self.cache.count(), 1)
+        self.assertIsNone(self.cache.get("main.vendas.pedidos", 4))
+    
+    def test_eviction_by_count_and_age(self):
+        """Testa a remoção pelas menos usadas e por idade"""
+        for index in range(4):
+            self.cache.put(f"main.vendas.t{index}", 1, {'index': index})
+        
+        self.assertEqual(self.cache.count(), 3)
+        self.assertIsNone(self.cache.get("main.vendas.t0", 1))
+        
+        stale = (datetime.now() - timedelta(days=60)).isoformat()
+        with self.cache._connection:
+            self.cache._connection.execute(
+                "UPDATE profiles SET used_at = ? WHERE table_name = ?", (stale, "main.vendas.t1")
+            )
+        
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertEqual(self.cache.count(), 2)
+
+
+class TestGenieAssistantProfileCache(unittest.TestCase):
+    """Testes da análise em cache por versão Delta"""
+    
+    def setUp(self):
+        """Tabela Delta com CDF simulada em uma sessão Spark local"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.version = 5
+        self.history = []
+        
+        self.spark = FakeSparkSession()
+        self.spark.tables["main.vendas.pedidos"] = [("order_id", "bigint"), ("channel", "string")]
+        self.spark.respond(r"^DESCRIBE DETAIL", [{
+            'format': 'delta', 'location': None, 'numFiles': 3, 'sizeInBytes': 3000,
+            'properties': {'delta.enableChangeDataFeed': 'true'}
+        }])
+        self.spark.respond(r"^DESCRIBE HISTORY \S+ LIMIT (\d+)", self._history)
+        self.spark.respond(r"FROM main\.vendas\.pedidos$", lambda match: [{
+            'profiled_rows': 100,
+            'c0_non_null': 100, 'c0_distinct': 100, 'c0_min': "1", 'c0_max': "100", 'c0_top': [],
+            'c1_non_null': 100, 'c1_distinct': 2, 'c1_min': "B2B", 'c1_max': "B2C", 'c1_avg_length': 3.0,
+            'c1_top': [{'item': "B2C", 'count': 60}, {'item': "B2B", 'count': 40}]
+        }])
+        self.spark.respond(r"FROM table_changes", lambda match: [{
+            'profiled_rows': 20,
+            'c0_non_null': 20, 'c0_distinct': 20, 'c0_min': "101", 'c0_max': "120", 'c0_top': [],
+            'c1_non_null': 10, 'c1_distinct': 1, 'c1_min': "B2B", 'c1_max': "B2B", 'c1_avg_length': 3.0,
+            'c1_top': [{'item': "B2B", 'count': 10}]
+        }])
+        
+        self.genie = GenieAssistant(
+            "main", "vendas", "pedidos", spark=self.spark,
+            profile_cache_file=os.path.join(self.temp_dir, "profiles.sqlite")
+        )
+    
+    def tearDown(self):
+        """Fecha o cache e remove o diretório"""
+        self.genie._get_profile_cache().close()
+        shutil.rmtree(self.temp_dir)
+    
+    def _history(self, match):
+        """DESCRIBE HISTORY: versão atual e commits registrados em self.history"""
+        commits = [{'version': self.version, 'operation': 'WRITE',
+                    'operationParameters': {'mode': 'Append'}, 'operationMetrics': {}}]
+        commits += self.history
+        return commits[:int(match.group(1))]
+    
+    def test_same_version_is_served_from_cache(self):
+        """Testa que a mesma versão não consulta a tabela de novo"""
+        first = self.genie._analyze_table_structure()
+        statements = len(self.spark.statements)
+        second = self.genie._analyze_table_structure()
+        
+        self.assertEqual(first['cache_status'], 'miss')
+        self.assertEqual(second['cache_status'], 'hit')
+        self.assertEqual(second['columns'][1]['profile']['top_values'][0]['value'], "B2C")
+        self.assertEqual(self.spark.statements[statements:], ["DESCRIBE HISTORY main.vendas.pedidos LIMIT 1"])
+    
+    def test_changed_settings_are_not_served_from_cache(self):
+        """Testa que a mesma versão é analisada de novo quando as opções mudam"""
+        self.genie._analyze_table_structure()
+        self.spark.respond(r"^SELECT COUNT\(\*\)", [{'row_count': 100}])
+        cache = self.genie._get_profile_cache()
+        
+        same = GenieAssistant("main", "vendas", "pedidos", spark=self.spark, profile_cache=cache)
+        self.assertEqual(same._analyze_table_structure()['cache_status'], 'hit')
+        
+        for options in [{'profile_top_k': 2}, {'exact_count': True}, {'detect_pii': False},
+                        {'classification_policy': ColumnClassifier({'rules': []})}]:
+            genie = GenieAssistant("main", "vendas", "pedidos", spark=self.spark, profile_cache=cache, **options)
+            self.assertEqual(genie._analyze_table_structure()['cache_status'], 'miss', options)
+    
+    def test_appended_data_is_profiled_incrementally(self):
+        """Testa o perfil incremental via Change Data Feed"""
+        self.genie._analyze_table_structure()
+        self.version = 7
+        self.history = [{'version': 6, 'operation': 'OPTIMIZE', 'operationParameters': {}}]
+        
+        analysis = self.genie._analyze_table_structure()
+        channel = analysis['columns'][1]['profile']
+        
+        self.assertEqual(analysis['cache_status'], 'incremental')
+        self.assertEqual(self.spark.count(r"table_changes\('main\.vendas\.pedidos', 6, 7\)"), 1)
+        self.assertEqual(self.spark.count(r"FROM main\.vendas\.pedidos$"), 1)
+        self.assertEqual(analysis['profile']['profiled_rows'], 120)
+        self.assertEqual(analysis['columns'][0]['profile']['distinct_count'], 120)
+        self.assertEqual(analysis['columns'][0]['profile']['max'], "120")
+        self.assertEqual(channel['null_count'], 10)
+        self.assertEqual(channel['distinct_count'], 2)
+        self.assertEqual(channel['top_values'], [{'value': "B2C", 'count': 60}, {'value': "B2B", 'count': 50}])
+    
+    def test_non_append_change_reprofiles(self):
+        """Testa o perfil completo após um MERGE"""
+        self.genie._analyze_table_structure()
+        self.version = 6
+        self.spark.respond(r"^DESCRIBE HISTORY \S+ LIMIT (\d+)", lambda match: [
+            {'version': 6, 'operation': 'MERGE', 'operationParameters': {}, 'operationMetrics': {}}
+        ])
+        
+        analysis = self.genie._analyze_table_structure()
+        
+        self.assertEqual(analysis['cache_status'], 'miss')
+        self.assertEqual(self.spark.count(r"table_changes"), 0)
+        self.assertEqual(self.spark.count(r"FROM main\.vendas\.pedidos$"), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
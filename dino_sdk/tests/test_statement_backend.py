@@ -0,0 +1,158 @@
+"""
+Testes para o módulo StatementExecutionBackend do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+
+import pyarrow as pa
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from statement_backend import StatementExecutionBackend
+from databricks_client import DatabricksClient, DatabricksAPIError
+from genie_assistant import GenieAssistant
+from databricks_stub import FakeDatabricksServer
+
+
+class TestStatementExecutionBackend(unittest.TestCase):
+    """Testes para a classe StatementExecutionBackend"""
+    
+    def setUp(self):
+        """Sobe o stand-in da Statement Execution API"""
+        self.server = FakeDatabricksServer()
+        self.client = DatabricksClient(host=self.server.start(), token="dapi-test")
+        self.backend = StatementExecutionBackend(
+            warehouse_id="wh-123", client=self.client,
+            poll_interval_seconds=0.01, max_poll_interval_seconds=0.02
+        )
+    
+    def tearDown(self):
+        """Encerra backend, cliente e servidor"""
+        self.backend.close()
+        self.client.close()
+        self.server.stop()
+    
+    def test_fast_statement_needs_single_call(self):
+        """Testa que instruções rápidas terminam na própria submissão"""
+        rows = self.backend.execute("ALTER TABLE main.vendas.pedidos SET TAGS ('a' = 'b')")
+        
+        self.assertEqual(rows, [])
+        self.assertEqual(len(self.server.requests), 1)
+        body = self.server.requests[0][3]
+        self.assertEqual(body['warehouse_id'], "wh-123")
+        self.assertEqual(body['format'], 'ARROW_STREAM')
+        self.assertEqual(body['disposition'], 'EXTERNAL_LINKS')
+        self.assertEqual(body['wait_timeout'], '10s')
+        self.assertEqual(body['on_wait_timeout'], 'CONTINUE')
+    
+    def test_long_statement_is_polled(self):
+        """Testa o polling até a conclusão"""
+        self.server.statement_polls = 3
+        self.server.respond_sql(r"^SELECT 1", [{'value': 1}])
+        
+        self.assertEqual(self.backend.execute("SELECT 1"), [{'value': 1}])
+        self.assertEqual(self.server.count('GET', '/api/2.0/sql/statements/stmt-1'), 3)
+    
+    def test_chunks_downloaded_without_workspace_token(self):
+        """Testa o resultado em vários chunks Arrow, na ordem"""
+        self.server.chunk_rows = 1000
+        self.server.respond_sql(r"FROM main\.vendas\.pedidos", [{'order_id': index} for index in range(2500)])
+        
+        table = self.backend.execute_arrow("SELECT order_id FROM main.vendas.pedidos")
+        
+        self.assertEqual(table.num_rows, 2500)
+        self.assertEqual(table.column('order_id').to_pylist(), list(range(2500)))
+        # O primeiro chunk vem na resposta da submissão
+        self.assertEqual(self.server.count('GET', '/api/2.0/sql/statements/stmt-1/result/chunks/1'), 1)
+        self.assertEqual(self.server.count('GET', '/api/2.0/sql/statements/stmt-1/result/chunks/0'), 0)
+        self.assertEqual(self.server.download_authorization, [None, None, None])
+    
+    def test_map_columns_become_dicts(self):
+        """Testa colunas MAP como dicts (como Row.asDict)"""
+        detail = pa.table({
+            'format': ['delta'],
+            'properties': pa.array([[('delta.enableChangeDataFeed', 'true')]], type=pa.map_(pa.string(), pa.string()))
+        })
+        self.server.respond_sql(r"^DESCRIBE DETAIL", detail)
+        
+        rows = self.backend.execute("DESCRIBE DETAIL main.vendas.pedidos")
+        
+        self.assertEqual(rows, [{'format': 'delta', 'properties': {'delta.enableChangeDataFeed': 'true'}}])
+    
+    def test_failed_statement_raises(self):
+        """Testa a instrução com erro"""
+        def fail(match):
+            raise Exception("[TABLE_OR_VIEW_NOT_FOUND] main.vendas.x")
+        self.server.respond_sql(r"main\.vendas\.x", fail)
+        
+        with self.assertRaises(DatabricksAPIError) as context:
+            self.backend.execute("SELECT * FROM main.vendas.x")
+        self.assertIn("TABLE_OR_VIEW_NOT_FOUND", str(context.exception))
+    
+    def test_timeout_cancels_statement(self):
+        """Testa o cancelamento ao atingir o tempo limite"""
+        self.server.statement_polls = 1000
+        self.backend.statement_timeout_seconds = 0.05
+        
+        with self.assertRaises(TimeoutError):
+            self.backend.execute("SELECT 1")
+        self.assertEqual(self.server.count('POST', '/api/2.0/sql/statements/stmt-1/cancel'), 1)
+    
+    def test_validation(self):
+        """Testa a validação dos parâmetros"""
+        with self.assertRaises(ValueError):
+            StatementExecutionBackend(warehouse_id="wh", client=self.client, wait_timeout_seconds=3)
+    
+    def test_genie_catalogs_without_spark(self):
+        """Testa a catalogação completa pelo warehouse, sem sessão Spark"""
+        self.server.respond_sql(r"information_schema\.columns\s+WHERE", [
+            {'column_name': 'order_id', 'full_data_type': 'bigint', 'is_nullable': 'NO'},
+            {'column_name': 'email', 'full_data_type': 'string', 'is_nullable': 'YES'}
+        ])
+        self.server.respond_sql(r"^DESCRIBE DETAIL", [
+            {'format': 'delta', 'location': 's3://bucket/pedidos', 'numFiles': 2, 'sizeInBytes': 5000}
+        ])
+        self.server.respond_sql(r"^DESCRIBE HISTORY", [
+            {'version': 1, 'operation': 'WRITE', 'operationMetrics': {'numOutputRows': '100', 'numOutputBytes': '5000'}}
+        ])
+        genie = GenieAssistant(
+            "main", "vendas", "pedidos", sql_backend=self.backend,
+            profile_columns=False, detect_pii=False, use_profile_cache=False
+        )
+        
+        result = genie.catalog_table()
+        executed = self.server.executed_sql()
+        
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertEqual(result['column_count'], 2)
+        self.assertEqual(result['row_count'], 100)
+        self.assertEqual(result['row_count_source'], GenieAssistant.ROW_COUNT_ESTIMATE)
+        self.assertEqual(len([statement for statement in executed if statement.startswith("ALTER TABLE main.vendas.pedidos SET TAGS")]), 1)
+        self.assertTrue(any("ALTER COLUMN `email` COMMENT" in statement for statement in executed))
+
+    def test_genie_schema_lookup_uses_lowercase_names(self):
+        """Testa o schema de uma tabela com nome em maiúsculas pelo information_schema"""
+        self.server.respond_sql(r"information_schema\.columns\s+WHERE", [
+            {'column_name': 'order_id', 'full_data_type': 'bigint', 'is_nullable': 'NO'}
+        ])
+        self.server.respond_sql(r"^DESCRIBE DETAIL", [
+            {'format': 'delta', 'location': 's3://bucket/pedidos', 'numFiles': 1, 'sizeInBytes': 100}
+        ])
+        genie = GenieAssistant(
+            "main", "Vendas", "Pedidos", sql_backend=self.backend,
+            profile_columns=False, detect_pii=False, use_profile_cache=False
+        )
+        
+        analysis = genie._analyze_table_structure()
+        columns_query = [statement for statement in self.server.executed_sql() if 'information_schema' in statement]
+        
+        self.assertEqual([column['name'] for column in analysis['columns']], ['order_id'])
+        self.assertIn("WHERE table_schema = 'vendas' AND table_name = 'pedidos' ", columns_query[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+"""
+Testes para o módulo WarehouseSelector do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from warehouse_selector import WarehouseSelector
+from databricks_client import DatabricksClient
+from genie_space_client import GenieSpaceClient
+from genie_assistant import GenieAssistant
+from batch_cataloger import BatchCataloger
+from databricks_stub import FakeDatabricksServer
+from spark_stub import FakeSparkSession
+
+
+WAREHOUSES_API = "/api/2.0/sql/warehouses"
+
+
+class TestWarehouseSelector(unittest.TestCase):
+    """Testes para a classe WarehouseSelector"""
+    
+    def setUp(self):
+        """Sobe o stand-in local da API de SQL warehouses"""
+        self.server = FakeDatabricksServer()
+        self.client = DatabricksClient(host=self.server.start(), token="dapi-test")
+        self.selector = WarehouseSelector(client=self.client)
+    
+    def tearDown(self):
+        """Encerra o cliente e o servidor"""
+        self.client.close()
+        self.server.stop()
+    
+    def test_size_matches_table_size_class(self):
+        """Testa o tamanho alvo por faixa de registros"""
+        self.server.add_warehouse("wh-xs", cluster_size="2X-Small")
+        self.server.add_warehouse("wh-m", cluster_size="Medium")
+        
+        self.assertEqual(self.selector.select('small', "main.vendas.pedidos")['warehouse_id'], "wh-xs")
+        selection = self.selector.select('very_large', "main.vendas.pedidos")
+        self.assertEqual(selection['warehouse_id'], "wh-m")
+        self.assertEqual(selection['target_size'], "Medium")
+        self.assertEqual(selection['candidates'], 2)
+    
+    def test_saturated_and_classic_warehouses_are_avoided(self):
+        """Testa que warehouses saturados ou não serverless ficam por último"""
+        self.server.add_warehouse("wh-busy", cluster_size="Small", active_sessions=25, max_clusters=2)
+        self.server.add_warehouse("wh-classic", cluster_size="Small", serverless=False)
+        self.server.add_warehouse("wh-big", cluster_size="Large", state="STOPPED")
+        self.server.add_warehouse("wh-gone", cluster_size="Small", state="DELETED")
+        
+        ranked = [candidate['warehouse_id'] for candidate in self.selector.rank('large', "main.vendas.pedidos")]
+        
+        self.assertEqual(ranked, ["wh-big", "wh-busy"])
+        self.assertEqual(self.selector.rank('large', "t")[1]['load'], 1.25)
+        everything = WarehouseSelector(client=self.client, serverless_only=False).rank('large', "t")
+        self.assertEqual(everything[-1]['warehouse_id'], "wh-classic")
+    
+    def test_running_warehouse_preferred(self):
+        """Testa a preferência por warehouses já ligados"""
+        self.server.add_warehouse("wh-stopped", cluster_size="Small", state="STOPPED")
+        self.server.add_warehouse("wh-running", cluster_size="Small", active_sessions=3)
+        
+        self.assertEqual(self.selector.select('large', "main.vendas.pedidos")['warehouse_id'], "wh-running")
+    
+    def test_equivalent_warehouses_are_spread_deterministically(self):
+        """Testa o desempate estável e distribuído entre warehouses equivalentes"""
+        for index in range(3):
+            self.server.add_warehouse(f"wh-{index}", cluster_size="X-Small")
+        tables = [f"main.vendas.tabela_{index}" for index in range(60)]
+        
+        chosen = [self.selector.select('medium', table)['warehouse_id'] for table in tables]
+        
+        self.assertEqual(chosen, [WarehouseSelector(client=self.client).select('medium', table)['warehouse_id'] for table in tables])
+        self.assertEqual(set(chosen), {"wh-0", "wh-1", "wh-2"})
+    
+    def test_current_warehouse_kept_unless_gone_or_saturated(self):
+        """Testa que o warehouse em uso só é trocado se sumir ou saturar"""
+        self.server.add_warehouse("wh-running", cluster_size="Small")
+        self.server.add_warehouse("wh-stopped", cluster_size="Small", state="STOPPED")
+        self.server.add_warehouse("wh-busy", cluster_size="Small", active_sessions=10)
+        
+        kept = self.selector.select('large', "t", current_warehouse_id="wh-stopped")
+        self.assertEqual(kept['warehouse_id'], "wh-stopped")
+        self.assertTrue(kept['kept'])
+        self.assertEqual(kept['candidates'], 3)
+        
+        for current in ["wh-busy", "wh-removido", None]:
+            selection = self.selector.select('large', "t", current_warehouse_id=current)
+            self.assertEqual(selection['warehouse_id'], "wh-running", current)
+            self.assertFalse(selection['kept'])
+    
+    def test_listing_cached_with_ttl(self):
+        """Testa a listagem reaproveitada dentro do TTL"""
+        self.server.add_warehouse("wh-1")
+        for table in ["a", "b", "c"]:
+            self.selector.select('small', table)
+        self.assertEqual(self.server.count('GET', WAREHOUSES_API), 1)
+        
+        expired = WarehouseSelector(client=self.client, cache_ttl_seconds=0)
+        expired.select('small', "a")
+        expired.select('small', "b")
+        self.assertEqual(self.server.count('GET', WAREHOUSES_API), 3)
+    
+    def test_no_usable_warehouse(self):
+        """Testa a ausência de warehouses utilizáveis"""
+        self.server.add_warehouse("wh-classic", serverless=False)
+        
+        self.assertIsNone(self.selector.select('small', "main.vendas.pedidos"))
+        with self.assertRaises(ValueError):
+            self.selector.select('gigantic', "main.vendas.pedidos")
+
+
+class TestWarehouseSelectionForRooms(unittest.TestCase):
+    """Testes da escolha do warehouse nas salas do GenieAssistant e do BatchCataloger"""
+    
+    def setUp(self):
+        """Sessão Spark local e stand-ins das APIs de warehouses e Genie spaces"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.server = FakeDatabricksServer()
+        self.client = DatabricksClient(host=self.server.start(), token="dapi-test")
+        self.spaces = GenieSpaceClient(client=self.client, warehouse_id="wh-default")
+        for index in range(3):
+            self.server.add_warehouse(f"wh-{index}", cluster_size="2X-Small")
+        
+        self.spark = FakeSparkSession()
+        self.spark.respond(r"information_schema\.columns c\b", [
+            {'table_schema': 'vendas', 'table_name': f"tabela_{index}", 'column_name': 'order_id',
+             'full_data_type': 'bigint', 'is_nullable': 'NO'}
+            for index in range(12)
+        ])
+        self.spark.respond(r"^DESCRIBE DETAIL", [
+            {'format': 'delta', 'location': None, 'numFiles': 1, 'sizeInBytes': 1000, 'properties': {}}
+        ])
+        self.spark.respond(r"^DESCRIBE HISTORY \S+ LIMIT (\d+)", [{
+            'version': 3, 'operation': 'WRITE', 'operationParameters': {'mode': 'Append'},
+            'operationMetrics': {'numOutputRows': '100', 'numOutputBytes': '1000'}
+        }])
+    
+    def tearDown(self):
+        """Encerra o cliente e o servidor"""
+        self.client.close()
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+    
+    def _genie(self, **kwargs):
+        return GenieAssistant(
+            "main", "vendas", "tabela_0", spark=self.spark, genie_client=self.spaces,
+            profile_columns=False, use_profile_cache=False, **kwargs
+        )
+    
+    def test_room_config_gets_selected_warehouse(self):
+        """Testa o sql_warehouse_id preenchido pela recomendação"""
+        genie = self._genie()
+        
+        config = genie._create_genie_room_config({'row_count': 100, 'columns': []})
+        
+        self.assertIn(config['sql_warehouse_id'], ["wh-0", "wh-1", "wh-2"])
+        self.assertEqual(genie.warehouse_selection['size_class'], 'small')
+    
+    def test_existing_room_keeps_its_warehouse(self):
+        """Testa que a sala publicada não muda de warehouse quando o estado muda"""
+        genie = self._genie()
+        first = genie._create_genie_room_config({'row_count': 100, 'columns': []})['sql_warehouse_id']
+        self.server.add_space(genie.genie_room_name, warehouse_id=first)
+        self.spaces.list_spaces(refresh=True)
+        # Warehouse escolhido desligou (auto-stop) e um equivalente está ligado
+        self.server.warehouses[first]['state'] = 'STOPPED'
+        
+        config = self._genie(warehouse_selector=WarehouseSelector(client=self.client))._create_genie_room_config(
+            {'row_count': 100, 'columns': []}
+        )
+        
+        self.assertEqual(config['sql_warehouse_id'], first)
+    
+    def test_selection_can_be_disabled(self):
+        """Testa a sala no warehouse padrão do genie_client"""
+        result = self._genie(auto_select_warehouse=False).catalog_table(
+            schema_columns=[{'name': 'order_id', 'type': 'bigint', 'nullable': False}], genie_room=True
+        )
+        
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertEqual(self.server.genie_spaces[result['genie_room']['room_id']]['warehouse_id'], "wh-default")
+        self.assertEqual(self.server.count('GET', WAREHOUSES_API), 0)
+    
+    def test_selection_failure_keeps_default(self):
+        """Testa que a falha na listagem não impede a sala"""
+        self.server.routes.pop(('GET', WAREHOUSES_API))
+        
+        self.assertIsNone(self._genie()._create_genie_room_config({'row_count': 100, 'columns': []})['sql_warehouse_id'])
+    
+    def test_batch_spreads_rooms_across_warehouses(self):
+        """Testa as salas de um schema distribuídas com uma única listagem"""
+        cataloger = BatchCataloger(
+            "main", "vendas", spark=self.spark, genie_rooms=True, genie_client=self.spaces,
+            profile_cache_file=os.path.join(self.temp_dir, "profiles.sqlite"), profile_columns=False
+        )
+        
+        result = cataloger.run()
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(self.server.count('GET', WAREHOUSES_API), 1)
+        warehouses = [space['warehouse_id'] for space in self.server.genie_spaces.values()]
+        self.assertEqual(len(warehouses), 12)
+        self.assertEqual(set(warehouses), {"wh-0", "wh-1", "wh-2"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,11 +6,17 @@ import unittest
 import sys
 import os
 import json
+import tempfile
+import shutil
+import time
 
 # Adicionar src ao path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
 
 from workflow_manager import WorkflowManager
+from databricks_client import DatabricksClient
+from databricks_stub import FakeDatabricksServer
 
 
 class TestWorkflowManager(unittest.TestCase):
@@ -105,6 +111,612 @@ class TestWorkflowManager(unittest.TestCase):
         # Limpar arquivo de teste
         if os.path.exists(workflow_file):
             os.remove(workflow_file)
+    
+    def test_multi_table_workflow_shares_one_job_cluster(self):
+        """Testa a consolidação de várias tabelas em um job com um único job cluster"""
+        tables = [{'table_name': f"table_{index}"} for index in range(50)]
+        
+        result = self.workflow_manager.create_multi_table_workflow(tables)
+        
+        self.assertTrue(result['success'])
+        job = result['job_definition']
+        self.assertEqual(len(job['job_clusters']), 1)
+        self.assertEqual(len(job['tasks']), 50)
+        cluster_key = job['job_clusters'][0]['job_cluster_key']
+        for task in job['tasks']:
+            self.assertEqual(task['job_cluster_key'], cluster_key)
+            self.assertNotIn('new_cluster', task)
+        self.assertTrue(job['tasks'][0]['spark_python_task']['python_file'].endswith(
+            f"ingestion_batch_main_{self.schema_name}_table_0.py"))
+        
+        with open(result['workflow_file'], 'r', encoding='utf-8') as f:
+            workflow_json = json.load(f)
+        self.assertIn('name', workflow_json)
+        self.assertIn('tasks', workflow_json)
+        self.assertIn('email_notifications', workflow_json)
+        os.remove(result['workflow_file'])
+    
+    def test_multi_table_workflow_rejects_duplicates(self):
+        """Testa a rejeição de tabelas duplicadas no mesmo workflow"""
+        result = self.workflow_manager.create_multi_table_workflow([
+            {'table_name': "orders"},
+            {'table_name': "orders"}
+        ])
+        
+        self.assertFalse(result['success'])
+    
+    def test_instance_pool_compute(self):
+        """Testa job cluster com driver e workers vindos de instance pools"""
+        manager = WorkflowManager(
+            self.schema_name, self.table_name,
+            compute="instance_pool",
+            instance_pool_id="pool-workers",
+            driver_instance_pool_id="pool-driver"
+        )
+        
+        job = manager.build_job_definition("job", [manager._build_ingestion_task(self.schema_name, self.table_name)])
+        new_cluster = job['job_clusters'][0]['new_cluster']
+        
+        self.assertEqual(new_cluster['instance_pool_id'], "pool-workers")
+        self.assertEqual(new_cluster['driver_instance_pool_id'], "pool-driver")
+        self.assertNotIn('node_type_id', new_cluster)
+    
+    def test_instance_pool_requires_pool_id(self):
+        """Testa que instance_pool exige instance_pool_id"""
+        with self.assertRaises(ValueError):
+            WorkflowManager(self.schema_name, self.table_name, compute="instance_pool")
+    
+    def test_serverless_compute(self):
+        """Testa workflow serverless sem job cluster"""
+        manager = WorkflowManager(self.schema_name, self.table_name, compute="serverless")
+        
+        result = manager.create_multi_table_workflow([{'table_name': "a"}, {'table_name': "b"}])
+        job = result['job_definition']
+        
+        self.assertNotIn('job_clusters', job)
+        self.assertEqual(job['environments'][0]['environment_key'], "dino_default")
+        for task in job['tasks']:
+            self.assertEqual(task['environment_key'], "dino_default")
+            self.assertNotIn('job_cluster_key', task)
+        os.remove(result['workflow_file'])
+    
+    def test_sizing_profile_from_source_volume(self):
+        """Testa o perfil de dimensionamento derivado do volume da origem"""
+        gigabyte = 1024 ** 3
+        small = WorkflowManager(self.schema_name, self.table_name, source_bytes=1 * gigabyte)
+        large = WorkflowManager(self.schema_name, self.table_name, source_bytes=500 * gigabyte)
+        
+        self.assertEqual(small.resolve_sizing_profile(), 'small')
+        self.assertEqual(large.resolve_sizing_profile(), 'large')
+        
+        large_cluster = large._build_job_cluster(large.resolve_sizing_profile())['new_cluster']
+        self.assertEqual(large_cluster['autoscale']['max_workers'], 16)
+        
+        result = small.create_multi_table_workflow([
+            {'table_name': "a", 'source_bytes': 30 * gigabyte},
+            {'table_name': "b", 'source_bytes': 30 * gigabyte}
+        ])
+        self.assertEqual(result['sizing_profile'], 'medium')
+        os.remove(result['workflow_file'])
+    
+    def _create_landing(self, bursts):
+        """Cria um diretório de landing com arquivos nos instantes informados"""
+        landing = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, landing)
+        base = time.time() - 86400
+        for index, offset in enumerate(offset for burst in bursts for offset in burst):
+            file_path = os.path.join(landing, f"part-{index:04d}.csv")
+            with open(file_path, "w") as f:
+                f.write("id\n1\n")
+            os.utime(file_path, (base + offset, base + offset))
+        return landing
+    
+    def test_file_arrival_trigger_from_arrival_pattern(self):
+        """Testa o trigger file_arrival ajustado para rajadas de upload"""
+        # Duas rajadas de 6 arquivos (um por minuto), separadas por 2 horas
+        landing = self._create_landing([
+            [0, 60, 120, 180, 240, 300],
+            [7200, 7260, 7320, 7380, 7440, 7500]
+        ])
+        
+        pattern = self.workflow_manager.analyze_arrival_pattern(landing)
+        self.assertEqual(pattern['burst_count'], 2)
+        self.assertEqual(pattern['max_files_per_burst'], 6)
+        self.assertEqual(pattern['max_burst_duration_seconds'], 300)
+        
+        result = self.workflow_manager.create_auto_ingestion_workflow(
+            source_path=landing,
+            target_table=f"{self.schema_name}.{self.table_name}",
+            checkpoint_location="/mnt/checkpoints/test"
+        )
+        job = result['job_definition']
+        file_arrival = job['trigger']['file_arrival']
+        
+        self.assertEqual(file_arrival['url'], landing + "/")
+        self.assertEqual(file_arrival['wait_after_last_change_seconds'], 90)
+        self.assertEqual(file_arrival['min_time_between_triggers_seconds'], 300)
+        self.assertEqual(job['max_concurrent_runs'], 1)
+        self.assertEqual(job['queue'], {'enabled': True})
+        self.assertIn("--available-now", job['tasks'][0]['spark_python_task']['parameters'])
+        os.remove(result['workflow_file'])
+    
+    def test_file_arrival_defaults_without_local_listing(self):
+        """Testa os valores mínimos quando a origem não é visível localmente"""
+        settings = self.workflow_manager.recommend_trigger_settings(
+            self.workflow_manager.analyze_arrival_pattern("/mnt/landing/inexistente/")
+        )
+        
+        self.assertEqual(settings['min_time_between_triggers_seconds'], 60)
+        self.assertEqual(settings['wait_after_last_change_seconds'], 60)
+    
+    def test_file_arrival_trigger_settings_override(self):
+        """Testa a validação e a sobrescrita dos parâmetros do trigger"""
+        result = self.workflow_manager.create_auto_ingestion_workflow(
+            source_path="/mnt/landing/test/",
+            target_table=f"{self.schema_name}.{self.table_name}",
+            checkpoint_location="/mnt/checkpoints/test",
+            trigger_settings={'wait_after_last_change_seconds': 10}
+        )
+        self.assertFalse(result['success'])
+        
+        result = self.workflow_manager.create_auto_ingestion_workflow(
+            source_path="/mnt/landing/test/",
+            target_table=f"{self.schema_name}.{self.table_name}",
+            checkpoint_location="/mnt/checkpoints/test",
+            trigger_settings={'wait_after_last_change_seconds': 600}
+        )
+        self.assertEqual(result['job_definition']['trigger']['file_arrival']['wait_after_last_change_seconds'], 600)
+        os.remove(result['workflow_file'])
+    
+    def test_workflow_without_file_arrival(self):
+        """Testa workflow sem trigger de chegada de arquivo"""
+        result = self.workflow_manager.create_auto_ingestion_workflow(
+            source_path="/mnt/landing/test/",
+            target_table=f"{self.schema_name}.{self.table_name}",
+            checkpoint_location="/mnt/checkpoints/test",
+            file_arrival=False
+        )
+        
+        self.assertNotIn('trigger', result['job_definition'])
+        self.assertNotIn('queue', result['job_definition'])
+        os.remove(result['workflow_file'])
+    
+    
+    def test_scheduled_workflow(self):
+        """Testa o workflow agendado por cron em vez de chegada de arquivo"""
+        result = self.workflow_manager.create_auto_ingestion_workflow(
+            source_path="/mnt/landing/test/",
+            target_table=f"{self.schema_name}.{self.table_name}",
+            checkpoint_location="/mnt/checkpoints/test",
+            schedule_cron="30 6 * * 1-5"
+        )
+        job = result['job_definition']
+        
+        self.assertEqual(job['schedule']['quartz_cron_expression'], "0 30 6 ? * 2-6")
+        self.assertNotIn('trigger', job)
+        os.remove(result['workflow_file'])
+    
+    def test_schedule_occupancy_and_peaks(self):
+        """Testa o histograma de ocupação e a detecção de picos"""
+        schedules = [{'name': f"job_{index}", 'cron': "0 6 * * *", 'duration_minutes': 30} for index in range(10)]
+        schedules.append({'name': "nightly", 'cron': "50 23 * * *", 'duration_minutes': 20})
+        
+        occupancy = self.workflow_manager.schedule_occupancy(schedules)
+        
+        self.assertEqual(occupancy[6 * 60], 10)
+        self.assertEqual(occupancy[6 * 60 + 30], 0)
+        self.assertEqual(occupancy[5], 1)  # Execução que atravessa a meia-noite
+        
+        peaks = self.workflow_manager.detect_schedule_peaks(schedules, max_concurrent=5)
+        self.assertEqual(len(peaks), 1)
+        self.assertEqual(peaks[0]['start'], "06:00")
+        self.assertEqual(peaks[0]['end'], "06:29")
+        self.assertEqual(peaks[0]['peak_concurrency'], 10)
+        self.assertEqual(len(peaks[0]['jobs']), 10)
+    
+    def test_stagger_schedules(self):
+        """Testa o escalonamento dentro das janelas de prontidão"""
+        schedules = [{'name': f"job_{index:03d}", 'cron': "0 6 * * *", 'duration_minutes': 20} for index in range(300)]
+        schedules.append({'name': "urgent", 'cron': "0 6 * * *", 'duration_minutes': 20, 'max_delay_minutes': 0})
+        schedules.append({'name': "weekly", 'cron': "50 23 * * 1", 'duration_minutes': 20})
+        
+        result = self.workflow_manager.stagger_schedules(schedules, max_delay_minutes=120)
+        proposals = {proposal['name']: proposal for proposal in result['schedules']}
+        
+        self.assertEqual(result['peak_before'], 301)
+        self.assertLessEqual(result['peak_after'], 60)
+        self.assertEqual(proposals['urgent']['delay_minutes'], 0)
+        for proposal in result['schedules']:
+            self.assertLessEqual(proposal['delay_minutes'], 120)
+        # Dia da semana fixo: não pode passar da meia-noite
+        self.assertEqual(proposals['weekly']['proposed_cron'], "50 23 * * 1")
+        
+        after = self.workflow_manager.schedule_occupancy(
+            [{'name': p['name'], 'cron': p['proposed_cron'], 'duration_minutes': 20} for p in result['schedules']]
+        )
+        self.assertEqual(int(after.max()), result['peak_after'])
+    
+    def test_stagger_breaks_peak_ties_by_overlap(self):
+        """Testa o desempate pela sobreposição quando todo atraso tem o mesmo pico"""
+        schedules = [
+            {'name': "a", 'cron': "0 6 * * *", 'duration_minutes': 30, 'max_delay_minutes': 0},
+            {'name': "b", 'cron': "40 6 * * *", 'duration_minutes': 30, 'max_delay_minutes': 0},
+            {'name': "c", 'cron': "0 6 * * *", 'duration_minutes': 30, 'max_delay_minutes': 30}
+        ]
+        
+        result = self.workflow_manager.stagger_schedules(schedules)
+        proposals = {proposal['name']: proposal for proposal in result['schedules']}
+        
+        # Qualquer atraso de c colide com a ou b (pico 2); a partir de 10 min a sobreposição cai de 30 para 20
+        self.assertEqual(result['peak_after'], 2)
+        self.assertEqual(proposals['c']['delay_minutes'], 10)
+        self.assertEqual(proposals['c']['proposed_cron'], "10 6 * * *")
+    
+    def _medallion_tasks(self):
+        """DAG bronze -> silver -> gold com duas origens"""
+        return [
+            {'schema_name': "bronze", 'table_name': "orders", 'duration_minutes': 20},
+            {'schema_name': "bronze", 'table_name': "customers", 'duration_minutes': 5},
+            {'task_key': "silver_orders", 'notebook_path': "/Repos/dados/silver/orders",
+             'depends_on': ["ingest_bronze_orders", "ingest_bronze_customers"], 'duration_minutes': 15},
+            {'task_key': "silver_customers", 'python_file': "/Workspace/dados/silver_customers.py",
+             'depends_on': ["ingest_bronze_customers"], 'duration_minutes': 10},
+            {'task_key': "gold_sales", 'notebook_path': "/Repos/dados/gold/sales",
+             'depends_on': ["silver_orders", "silver_customers"], 'duration_minutes': 5}
+        ]
+    
+    def test_dag_workflow(self):
+        """Testa o DAG com depends_on, caminho crítico e largura máxima"""
+        result = self.workflow_manager.create_dag_workflow(list(reversed(self._medallion_tasks())))
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['critical_path'], ["ingest_bronze_orders", "silver_orders", "gold_sales"])
+        self.assertEqual(result['critical_path_minutes'], 40)
+        self.assertEqual(result['max_parallel_width'], 2)
+        self.assertEqual(result['levels'][0], ["ingest_bronze_customers", "ingest_bronze_orders"])
+        
+        job = result['job_definition']
+        task_keys = [task['task_key'] for task in job['tasks']]
+        for task in job['tasks']:
+            for dependency in task.get('depends_on', []):
+                self.assertLess(task_keys.index(dependency['task_key']), task_keys.index(task['task_key']))
+        
+        gold = job['tasks'][-1]
+        self.assertEqual(gold['task_key'], "gold_sales")
+        self.assertEqual({d['task_key'] for d in gold['depends_on']}, {"silver_orders", "silver_customers"})
+        self.assertEqual(job['job_clusters'][0]['new_cluster']['autoscale'], {'min_workers': 1, 'max_workers': 2})
+        os.remove(result['workflow_file'])
+    
+    def test_dag_rejects_cycles_and_unknown_dependencies(self):
+        """Testa a rejeição de ciclos e dependências inexistentes"""
+        with self.assertRaises(ValueError):
+            WorkflowManager.topological_sort({'a': ['b'], 'b': ['c'], 'c': ['a'], 'd': []})
+        with self.assertRaises(ValueError):
+            WorkflowManager.topological_sort({'a': ['x']})
+        
+        result = self.workflow_manager.create_dag_workflow([
+            {'task_key': "a", 'notebook_path': "/a", 'depends_on': ["b"]},
+            {'task_key': "b", 'notebook_path': "/b", 'depends_on': ["a"]}
+        ])
+        self.assertFalse(result['success'])
+    
+    def test_dag_width_with_durations(self):
+        """Testa a largura considerando a sobreposição real das tasks"""
+        analysis = self.workflow_manager.analyze_dag(
+            {'a': [], 'b': [], 'c': ['a'], 'd': ['b']},
+            {'a': 30, 'b': 5, 'c': 5, 'd': 5}
+        )
+        
+        # b e d terminam antes de a: no máximo 2 tasks ao mesmo tempo
+        self.assertEqual(analysis['max_parallel_width'], 2)
+        self.assertEqual(analysis['critical_path'], ['a', 'c'])
+        self.assertEqual(analysis['earliest_start_minutes']['d'], 5)
+    
+    def test_retry_settings_with_backoff(self):
+        """Testa os campos de retry emitidos a partir da política"""
+        settings = self.workflow_manager.build_retry_settings()
+        
+        # Backoff 60s, 120s, 240s: intervalo médio de 140s
+        self.assertEqual(settings['max_retries'], 3)
+        self.assertEqual(settings['min_retry_interval_millis'], 140000)
+        self.assertTrue(settings['retry_on_timeout'])
+        self.assertNotIn('timeout_seconds', settings)
+        
+        manager = WorkflowManager(self.schema_name, self.table_name, retry_policy="none", task_timeout_seconds=3600)
+        settings = manager.build_retry_settings()
+        self.assertEqual(settings['max_retries'], 0)
+        self.assertFalse(settings['retry_on_timeout'])
+        self.assertEqual(settings['timeout_seconds'], 3600)
+        
+        with self.assertRaises(ValueError):
+            WorkflowManager(self.schema_name, self.table_name, retry_policy="infinite")
+    
+    def test_ingestion_task_retry_fields(self):
+        """Testa que a task de ingestão sai com retry"""
+        result = self.workflow_manager.create_auto_ingestion_workflow(
+            source_path="/mnt/landing/test/",
+            target_table=f"{self.schema_name}.{self.table_name}",
+            checkpoint_location="/mnt/checkpoints/test"
+        )
+        task = result['job_definition']['tasks'][0]
+        
+        self.assertEqual(task['max_retries'], 3)
+        self.assertIn('min_retry_interval_millis', task)
+        os.remove(result['workflow_file'])
+    
+    def test_batch_append_tasks_are_not_retried_by_default(self):
+        """Testa que tasks batch em append ficam sem retry, salvo política explícita"""
+        tables = [
+            {'table_name': "append_table"},
+            {'table_name': "merge_table", 'output_mode': "merge"},
+            {'table_name': "stream_table", 'mode': "streaming"}
+        ]
+        result = self.workflow_manager.create_multi_table_workflow(tables)
+        job_tasks = {task['task_key']: task for task in result['job_definition']['tasks']}
+        os.remove(result['workflow_file'])
+        
+        self.assertEqual(job_tasks[f"ingest_{self.schema_name}_append_table"]['max_retries'], 0)
+        self.assertEqual(job_tasks[f"ingest_{self.schema_name}_merge_table"]['max_retries'], 3)
+        self.assertEqual(job_tasks[f"ingest_{self.schema_name}_stream_table"]['max_retries'], 3)
+        
+        manager = WorkflowManager(self.schema_name, self.table_name, output_dir=self.workflow_manager.output_dir,
+                                  retry_policy="transient")
+        result = manager.create_multi_table_workflow(tables[:1])
+        os.remove(result['workflow_file'])
+        self.assertEqual(result['job_definition']['tasks'][0]['max_retries'], 3)
+    
+    def test_dag_run_if_and_task_overrides(self):
+        """Testa run_if e política de retry por task no DAG"""
+        tasks = self._medallion_tasks()
+        tasks[4]['timeout_seconds'] = 1800
+        tasks[4]['retry_policy'] = {'max_retries': 1, 'base_interval_seconds': 30}
+        tasks.append({'task_key': "notify", 'notebook_path': "/Repos/dados/notify",
+                      'depends_on': ["gold_sales"], 'run_if': "ALL_DONE", 'retry_policy': "none"})
+        
+        result = self.workflow_manager.create_dag_workflow(tasks)
+        job_tasks = {task['task_key']: task for task in result['job_definition']['tasks']}
+        
+        self.assertEqual(job_tasks['gold_sales']['max_retries'], 1)
+        self.assertEqual(job_tasks['gold_sales']['min_retry_interval_millis'], 30000)
+        self.assertEqual(job_tasks['gold_sales']['timeout_seconds'], 1800)
+        self.assertEqual(job_tasks['notify']['run_if'], "ALL_DONE")
+        self.assertEqual(job_tasks['notify']['max_retries'], 0)
+        self.assertNotIn('run_if', job_tasks['silver_orders'])
+        os.remove(result['workflow_file'])
+        
+        invalid = self.workflow_manager.create_dag_workflow([
+            {'task_key': "a", 'notebook_path': "/a", 'run_if': "ALL_DONE"}
+        ])
+        self.assertFalse(invalid['success'])
+
+
+class TestWorkflowManagerBundle(unittest.TestCase):
+    """Testes da exportação como Databricks Asset Bundle"""
+    
+    def setUp(self):
+        """Gera dois workflows e o script de ingestão de um deles"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.temp_dir, "out")
+        self.bundle_dir = os.path.join(self.temp_dir, "bundle")
+        self.workflow_manager = WorkflowManager("vendas", "pedidos", output_dir=self.output_dir)
+        
+        self.workflow_manager.create_auto_ingestion_workflow(
+            source_path="/mnt/landing/pedidos/",
+            target_table="vendas.pedidos",
+            checkpoint_location="/mnt/checkpoints/pedidos",
+            file_arrival=False
+        )
+        WorkflowManager("vendas", "clientes", output_dir=self.output_dir).create_auto_ingestion_workflow(
+            source_path="/mnt/landing/clientes/",
+            target_table="vendas.clientes",
+            checkpoint_location="/mnt/checkpoints/clientes",
+            file_arrival=False
+        )
+        with open(os.path.join(self.output_dir, "ingestion_streaming_main_vendas_pedidos.py"), 'w') as f:
+            f.write("print('pedidos')\n")
+    
+    def tearDown(self):
+        """Remove os diretórios temporários"""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_export_bundle_layout(self):
+        """Testa databricks.yml, recursos dos jobs e scripts copiados"""
+        import yaml
+        
+        result = self.workflow_manager.export_bundle(self.bundle_dir, targets={
+            'dev': {'mode': 'development', 'default': True},
+            'prod': {'mode': 'production', 'host': "https://prod.cloud.databricks.com"}
+        })
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['job_count'], 2)
+        self.assertIn("src/ingestion_streaming_main_vendas_pedidos.py", result['written'])
+        
+        with open(os.path.join(self.bundle_dir, "databricks.yml")) as f:
+            config = yaml.safe_load(f)
+        self.assertEqual(config['include'], ['resources/*.yml'])
+        self.assertTrue(config['targets']['dev']['default'])
+        self.assertEqual(config['targets']['prod']['workspace']['host'], "https://prod.cloud.databricks.com")
+        
+        resource_file = next(path for path in result['written'] if 'pedidos' in path and path.startswith('resources/'))
+        with open(os.path.join(self.bundle_dir, resource_file)) as f:
+            jobs = yaml.safe_load(f)['resources']['jobs']
+        settings = next(iter(jobs.values()))
+        self.assertEqual(settings['tasks'][0]['spark_python_task']['python_file'],
+                         "../src/ingestion_streaming_main_vendas_pedidos.py")
+        self.assertNotIn(WorkflowManager.SETTINGS_HASH_TAG, settings.get('tags', {}))
+    
+    def test_export_bundle_is_incremental(self):
+        """Testa que apenas arquivos alterados são reescritos"""
+        first = self.workflow_manager.export_bundle(self.bundle_dir)
+        second = self.workflow_manager.export_bundle(self.bundle_dir)
+        
+        self.assertEqual(len(first['written']), 4)
+        self.assertEqual(second['written'], [])
+        self.assertEqual(len(second['unchanged']), 4)
+        
+        with open(os.path.join(self.output_dir, "ingestion_streaming_main_vendas_pedidos.py"), 'w') as f:
+            f.write("print('pedidos v2')\n")
+        third = self.workflow_manager.export_bundle(self.bundle_dir)
+        
+        self.assertEqual(third['written'], ["src/ingestion_streaming_main_vendas_pedidos.py"])
+    
+    def test_export_bundle_prunes_removed_jobs(self):
+        """Testa a remoção de recursos de jobs que saíram do bundle"""
+        first = self.workflow_manager.export_bundle(self.bundle_dir)
+        resources = [path for path in first['written'] if path.startswith('resources/')]
+        
+        job_definitions = [
+            job for job in self.workflow_manager._load_saved_workflows() if 'pedidos' in job['name']
+        ]
+        result = self.workflow_manager.export_bundle(self.bundle_dir, job_definitions=job_definitions)
+        
+        self.assertEqual(len(result['removed']), 1)
+        self.assertIn(result['removed'][0], resources)
+        self.assertFalse(os.path.exists(os.path.join(self.bundle_dir, result['removed'][0])))
+
+
+class TestWorkflowManagerDeploy(unittest.TestCase):
+    """Testes do deploy idempotente de jobs contra um stand-in da Jobs API"""
+    
+    def setUp(self):
+        """Sobe o stand-in local e cria o gerenciador com índice temporário"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.server = FakeDatabricksServer()
+        self.client = DatabricksClient(host=self.server.start())
+        self.manager = self._create_manager()
+        
+        # Workspace com vários jobs de outros times
+        for index in range(250):
+            self.server.add_job({'name': f"other_job_{index}", 'tags': {}})
+    
+    def tearDown(self):
+        """Encerra o servidor e remove os arquivos temporários"""
+        self.client.close()
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+    
+    def _create_manager(self, **kwargs):
+        return WorkflowManager(
+            "bronze", "orders",
+            output_dir=self.temp_dir,
+            client=self.client,
+            **kwargs
+        )
+    
+    def _job_definition(self, manager):
+        return manager.create_auto_ingestion_workflow(
+            source_path="/Volumes/main/raw/orders/",
+            target_table="main.bronze.orders",
+            checkpoint_location="/Volumes/main/raw/_checkpoints/orders"
+        )['job_definition']
+    
+    def test_create_then_skip(self):
+        """Testa que reexecutar o deploy não cria outro job nem lista o workspace"""
+        first = self.manager.deploy_workflow(self._job_definition(self.manager))
+        self.assertTrue(first['success'])
+        self.assertEqual(first['action'], 'created')
+        created_settings = self.server.jobs[first['job_id']]
+        self.assertEqual(created_settings['tags']['dino_settings_hash'], first['settings_hash'])
+        
+        list_calls = self.server.count('GET', "/api/2.1/jobs/list")
+        second = self._create_manager().deploy_workflow(self._job_definition(self.manager))
+        
+        self.assertEqual(second['action'], 'skipped')
+        self.assertEqual(second['job_id'], first['job_id'])
+        self.assertEqual(self.server.count('POST', "/api/2.1/jobs/create"), 1)
+        self.assertEqual(self.server.count('GET', "/api/2.1/jobs/list"), list_calls)
+    
+    def test_reset_when_settings_change(self):
+        """Testa o reset do job existente quando o hash das configurações muda"""
+        first = self.manager.deploy_workflow(self._job_definition(self.manager))
+        
+        changed = self._create_manager(notification_emails=["dados@empresa.com"])
+        second = changed.deploy_workflow(self._job_definition(changed))
+        
+        self.assertEqual(second['action'], 'updated')
+        self.assertEqual(second['job_id'], first['job_id'])
+        self.assertEqual(self.server.count('POST', "/api/2.1/jobs/reset"), 1)
+        self.assertEqual(
+            self.server.jobs[first['job_id']]['email_notifications']['on_failure'],
+            ["dados@empresa.com"]
+        )
+    
+    def test_existing_job_found_by_name(self):
+        """Testa que um job criado fora deste índice é encontrado pelo nome"""
+        job_definition = self._job_definition(self.manager)
+        settings = dict(job_definition)
+        settings['tags'] = dict(job_definition['tags'], dino_settings_hash=WorkflowManager.settings_hash(job_definition))
+        job_id = self.server.add_job(settings)
+        
+        result = self.manager.deploy_workflow(job_definition)
+        
+        self.assertEqual(result['action'], 'skipped')
+        self.assertEqual(result['job_id'], job_id)
+        list_requests = [request for request in self.server.requests if request[1] == "/api/2.1/jobs/list"]
+        self.assertEqual(list_requests[0][2]['name'], job_definition['name'])
+    
+    def test_recreate_deleted_job(self):
+        """Testa a recriação de um job removido do workspace"""
+        first = self.manager.deploy_workflow(self._job_definition(self.manager))
+        del self.server.jobs[first['job_id']]
+        
+        changed = self._create_manager(notification_emails=["dados@empresa.com"])
+        second = changed.deploy_workflow(self._job_definition(changed))
+        
+        self.assertEqual(second['action'], 'created')
+        self.assertNotEqual(second['job_id'], first['job_id'])
+    
+    def test_recreate_deleted_job_with_same_settings(self):
+        """Testa que um job removido é recriado mesmo com o hash igual no índice"""
+        first = self.manager.deploy_workflow(self._job_definition(self.manager))
+        del self.server.jobs[first['job_id']]
+        
+        second = self._create_manager().deploy_workflow(self._job_definition(self.manager))
+        
+        self.assertEqual(second['action'], 'created')
+        self.assertNotEqual(second['job_id'], first['job_id'])
+        self.assertIn(second['job_id'], self.server.jobs)
+        self.assertEqual(self.server.count('GET', "/api/2.1/jobs/get"), 1)
+    
+    def test_workflow_metrics_from_runs(self):
+        """Testa as métricas do job publicado a partir das execuções"""
+        deployed = self.manager.deploy_workflow(self._job_definition(self.manager))
+        for run_id, result_state in enumerate(["SUCCESS", "SUCCESS", "FAILED"], start=1):
+            self.server.runs.append({
+                'job_id': deployed['job_id'],
+                'run_id': run_id,
+                'start_time': 1704067200000 + run_id * 60000,
+                'state': {'life_cycle_state': 'TERMINATED', 'result_state': result_state},
+                'run_duration': 120000,
+                'queue_duration': 0,
+                'setup_duration': 30000
+            })
+        
+        metrics = self.manager.get_workflow_metrics()
+        
+        self.assertEqual(metrics['status'], 'deployed')
+        self.assertEqual(metrics['total_runs'], 3)
+        self.assertEqual(metrics['successful_runs'], 2)
+        self.assertEqual(metrics['failed_runs'], 1)
+        self.assertEqual(metrics['run_duration_seconds']['p95'], 120.0)
+        
+        # Sem sincronizar, a resposta vem apenas do cache
+        calls = self.server.count('GET', "/api/2.1/jobs/runs/list")
+        self.assertEqual(self.manager.get_workflow_metrics(sync=False)['total_runs'], 3)
+        self.assertEqual(self.server.count('GET', "/api/2.1/jobs/runs/list"), calls)
+    
+    def test_refresh_job_index(self):
+        """Testa a sincronização paginada apenas dos jobs gerenciados"""
+        for table in ["a", "b", "c"]:
+            self.server.add_job({'name': f"dino_auto_ingestion_bronze_{table}",
+                                 'tags': {'dino_sdk_managed': 'true'}})
+        
+        indexed = self.manager.refresh_job_index()
+        
+        self.assertEqual(indexed, 3)
+        self.assertGreater(self.server.count('GET', "/api/2.1/jobs/list"), 1)
+        self.assertIsNotNone(self.manager._get_job_index().get("dino_auto_ingestion_bronze_b"))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,120 @@
+"""
+Testes para o módulo WorkflowMetricsStore do Dino SDK
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from databricks_client import DatabricksClient
+from workflow_metrics import WorkflowMetricsStore
+from databricks_stub import FakeDatabricksServer
+
+
+def make_run(run_id, result_state="SUCCESS", life_cycle_state="TERMINATED", duration_seconds=100,
+             queue_seconds=5, setup_seconds=60, day=1):
+    """Cria uma execução no formato de jobs/runs/list"""
+    start_time = 1704067200000 + (day - 1) * 86400000 + run_id * 1000
+    state = {'life_cycle_state': life_cycle_state}
+    if result_state:
+        state['result_state'] = result_state
+    return {
+        'job_id': 42,
+        'run_id': run_id,
+        'start_time': start_time,
+        'end_time': start_time + duration_seconds * 1000,
+        'state': state,
+        'run_duration': duration_seconds * 1000,
+        'queue_duration': queue_seconds * 1000,
+        'setup_duration': setup_seconds * 1000
+    }
+
+
+class TestWorkflowMetricsStore(unittest.TestCase):
+    """Testes para a classe WorkflowMetricsStore"""
+    
+    def setUp(self):
+        """Sobe o stand-in local e cria o cache temporário"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.server = FakeDatabricksServer()
+        self.client = DatabricksClient(host=self.server.start())
+        self.store = WorkflowMetricsStore(os.path.join(self.temp_dir, "metrics.sqlite"), workspace=self.client.host)
+    
+    def tearDown(self):
+        """Encerra o servidor e remove os arquivos temporários"""
+        self.store.close()
+        self.client.close()
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+    
+    def _runs_list_calls(self):
+        return self.server.count('GET', "/api/2.1/jobs/runs/list")
+    
+    def test_incremental_sync(self):
+        """Testa que a segunda sincronização busca só as execuções novas"""
+        self.server.runs = [make_run(run_id) for run_id in range(1, 101)]
+        
+        self.assertEqual(self.store.sync(self.client, 42), 100)
+        self.assertEqual(self._runs_list_calls(), 4)
+        
+        self.server.runs += [make_run(run_id) for run_id in range(101, 104)]
+        fetched = self.store.sync(self.client, 42)
+        
+        # Apenas a primeira página é lida; a última execução conhecida é relida
+        self.assertEqual(fetched, 4)
+        self.assertEqual(self._runs_list_calls(), 5)
+        self.assertEqual(self.store.compute_stats(42)['total_runs'], 103)
+    
+    def test_running_run_is_refreshed(self):
+        """Testa que uma execução em andamento é atualizada ao terminar"""
+        self.server.runs = [make_run(run_id) for run_id in range(1, 51)]
+        self.server.runs[9] = make_run(10, result_state=None, life_cycle_state="RUNNING")
+        self.store.sync(self.client, 42)
+        self.assertEqual(self.store.compute_stats(42)['running_runs'], 1)
+        
+        self.server.runs[9] = make_run(10, result_state="FAILED")
+        self.store.sync(self.client, 42)
+        stats = self.store.compute_stats(42)
+        
+        self.assertEqual(stats['running_runs'], 0)
+        self.assertEqual(stats['failed_runs'], 1)
+        
+        # Com tudo consolidado, a próxima leitura volta a ser de uma página
+        calls = self._runs_list_calls()
+        self.store.sync(self.client, 42)
+        self.assertEqual(self._runs_list_calls(), calls + 1)
+    
+    def test_percentiles_and_failure_trend(self):
+        """Testa percentis de duração e a tendência diária de falhas"""
+        self.server.runs = [make_run(run_id, duration_seconds=run_id * 10) for run_id in range(1, 101)]
+        self.server.runs += [make_run(101, result_state="FAILED", day=2), make_run(102, day=2)]
+        self.store.sync(self.client, 42)
+        
+        stats = self.store.compute_stats(42)
+        
+        self.assertEqual(stats['total_runs'], 102)
+        self.assertEqual(stats['successful_runs'], 101)
+        self.assertEqual(stats['failed_runs'], 1)
+        self.assertAlmostEqual(stats['run_duration_seconds']['p50'], 495.0, delta=10)
+        self.assertGreater(stats['run_duration_seconds']['p99'], stats['run_duration_seconds']['p95'])
+        self.assertEqual(stats['setup_duration_seconds']['p50'], 60.0)
+        self.assertEqual(stats['queue_duration_seconds']['p95'], 5.0)
+        self.assertEqual([day['date'] for day in stats['failure_rate_trend']], ["2024-01-01", "2024-01-02"])
+        self.assertEqual(stats['failure_rate_trend'][1]['failure_rate'], 0.5)
+    
+    def test_empty_cache(self):
+        """Testa as métricas de um job sem execuções"""
+        stats = self.store.compute_stats(99)
+        
+        self.assertEqual(stats['total_runs'], 0)
+        self.assertIsNone(stats['run_duration_seconds']['p50'])
+
+
+if __name__ == '__main__':
+    unittest.main()